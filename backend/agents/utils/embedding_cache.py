@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Embedding 向量缓存
+按 (模型, 文本内容哈希) 缓存向量，内存中按 LRU 保留，落盘为 NumPy 数组分段文件：
+每次刷盘只写入新增向量的一个分段（keys + float32 vectors），分段过多时合并为一个。
+多个进程可共用同一缓存目录：分段文件名带写入进程的 PID，合并时先读入其他进程新写的分段，
+只删除本进程已读入或写入的分段。
+同一股票/市场情境的记忆查询在缓存命中后不再调用远程 embedding 接口。
+
+另提供本地确定性 embedding（字符二元组/单词的特征哈希），用于离线运行。
+"""
+import atexit
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.logging_config import get_logger
+logger = get_logger("agents.utils.embedding_cache")
+
+LOCAL_EMBEDDING_MODEL = "local-hash-1024"
+LOCAL_EMBEDDING_DIM = 1024
+
+_CJK_RUN = re.compile(r'[一-鿿]+')
+_WORD = re.compile(r'[a-z0-9]+(?:\.[0-9]+)?')
+_MODEL_DIR_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def content_key(model: str, text: str) -> str:
+    """缓存键：模型名 + 文本内容的哈希"""
+    return hashlib.blake2b(f"{model}\x00{text}".encode('utf-8'), digest_size=16).hexdigest()
+
+
+def local_embedding(text: str, dim: int = LOCAL_EMBEDDING_DIM) -> np.ndarray:
+    """
+    本地确定性 embedding：中文取字符二元组、英文/数字取单词，做带符号的特征哈希后 L2 归一化
+
+    不依赖网络和模型文件，相同文本总是得到相同向量；词面重合度高的情境余弦相似度也高
+    """
+    lowered = (text or "").lower()
+    tokens = _WORD.findall(lowered)
+    for run in _CJK_RUN.findall(lowered):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+
+    vector = np.zeros(dim, dtype=np.float32)
+    if not tokens:
+        return vector
+    hashes = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in tokens), dtype=np.uint64, count=len(tokens))
+    signs = np.where((hashes >> np.uint64(31)) & np.uint64(1), -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, (hashes % np.uint64(dim)).astype(np.intp), signs)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+class EmbeddingCache:
+    """
+    Embedding 缓存（单例）
+
+    目录结构：<cache_dir>/<模型名>/seg_<序号>_<PID>.npz，每个分段包含 keys（内容哈希）和 vectors（float32）
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    FLUSH_EVERY = 32          # 累计多少条新向量刷一次盘
+    FLUSH_INTERVAL = 60       # 或距上次刷盘超过多少秒
+    MAX_SEGMENTS = 8          # 分段数超过该值时合并
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self._cache_dir = Path(os.getenv("EMBEDDING_CACHE_DIR", "data/embedding_cache"))
+        self._max_entries = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+        self._enabled = os.getenv("ENABLE_EMBEDDING_CACHE", "true").lower() == "true"
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._dirty: Dict[str, Dict[str, np.ndarray]] = {}
+        self._loaded_models = set()
+        self._known_segments: Dict[str, set] = {}   # 各模型已读入内存或由本进程写入的分段文件名
+        self._cache_lock = threading.RLock()
+        self._last_flush = time.time()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "flushes": 0, "compactions": 0}
+        atexit.register(self.flush)
+
+    # ==================== 查询/写入 ====================
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        return self.get_many(model, [text])[0]
+
+    def get_many(self, model: str, texts: Iterable[str]) -> List[Optional[np.ndarray]]:
+        """批量查询，未命中的位置为 None"""
+        texts = list(texts)
+        if not self._enabled:
+            return [None] * len(texts)
+        with self._cache_lock:
+            self._ensure_loaded(model)
+            result = []
+            for text in texts:
+                entry_key = (model, content_key(model, text))
+                vector = self._entries.get(entry_key)
+                if vector is not None:
+                    self._entries.move_to_end(entry_key)
+                    self._stats["hits"] += 1
+                else:
+                    self._stats["misses"] += 1
+                result.append(vector)
+            return result
+
+    def put(self, model: str, text: str, vector) -> None:
+        self.put_many(model, [(text, vector)])
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, object]]) -> None:
+        """写入向量（文本, 向量）；达到刷盘条件时把新增向量写成一个分段"""
+        if not self._enabled:
+            return
+        with self._cache_lock:
+            self._ensure_loaded(model)
+            dirty = self._dirty.setdefault(model, {})
+            for text, vector in items:
+                key = content_key(model, text)
+                array = np.asarray(vector, dtype=np.float32)
+                self._entries[(model, key)] = array
+                self._entries.move_to_end((model, key))
+                dirty[key] = array
+                self._stats["stored"] += 1
+            self._trim()
+            pending = sum(len(d) for d in self._dirty.values())
+            if pending >= self.FLUSH_EVERY or (pending and time.time() - self._last_flush > self.FLUSH_INTERVAL):
+                self.flush()
+
+    def _trim(self):
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    # ==================== 持久化 ====================
+
+    def _model_dir(self, model: str) -> Path:
+        return self._cache_dir / _MODEL_DIR_RE.sub('_', model)
+
+    @staticmethod
+    def _segment_seq(segment: Path) -> int:
+        return int(segment.stem.split("_")[1])
+
+    def _segments(self, model: str) -> List[Path]:
+        """按序号排列的分段（同序号的按文件名）"""
+        model_dir = self._model_dir(model)
+        if not model_dir.exists():
+            return []
+        return sorted(model_dir.glob("seg_*.npz"), key=lambda p: (self._segment_seq(p), p.name))
+
+    def _ensure_loaded(self, model: str):
+        """首次访问某个模型时加载其全部分段（后写入的分段覆盖先写入的）"""
+        if model in self._loaded_models:
+            return
+        self._loaded_models.add(model)
+        loaded = self._load_segments(model, self._segments(model))
+        if loaded:
+            logger.info(f"📦 [Embedding缓存] 加载 {model}: {loaded} 条向量")
+
+    def _load_segments(self, model: str, segments: List[Path], override: bool = True) -> int:
+        """
+        读入分段并记为已知（读取失败的分段也记为已知，合并时一并清理）
+
+        override=False 时不覆盖内存中已有的向量（合并时读入其他进程的分段）
+        """
+        known = self._known_segments.setdefault(model, set())
+        loaded = 0
+        for segment in segments:
+            known.add(segment.name)
+            try:
+                with np.load(segment, allow_pickle=False) as data:
+                    keys, vectors = data["keys"], data["vectors"]
+                for key, vector in zip(keys.tolist(), vectors):
+                    if override:
+                        self._entries[(model, key)] = vector
+                    else:
+                        self._entries.setdefault((model, key), vector)
+                loaded += len(keys)
+            except FileNotFoundError:
+                pass  # 已被其他进程合并删除
+            except Exception as e:
+                logger.warning(f"⚠️ [Embedding缓存] 分段加载失败，已忽略: {segment.name}: {e}")
+        self._trim()
+        return loaded
+
+    def _write_segment(self, model: str, items: Dict[str, np.ndarray], name: str) -> Path:
+        model_dir = self._model_dir(model)
+        model_dir.mkdir(parents=True, exist_ok=True)
+        path = model_dir / name
+        tmp_path = model_dir / f".{name}.{os.getpid()}.tmp.npz"
+        keys = np.array(list(items.keys()), dtype="<U32")
+        vectors = np.stack(list(items.values())).astype(np.float32, copy=False)
+        np.savez(tmp_path, keys=keys, vectors=vectors)
+        os.replace(tmp_path, path)
+        self._known_segments.setdefault(model, set()).add(name)
+        return path
+
+    def flush(self) -> None:
+        """把新增向量写成新的分段，分段过多时合并"""
+        with self._cache_lock:
+            self._last_flush = time.time()
+            for model, items in list(self._dirty.items()):
+                if not items:
+                    continue
+                try:
+                    segments = self._segments(model)
+                    seq = self._segment_seq(segments[-1]) + 1 if segments else 1
+                    # 文件名带 PID，多个进程取到同一序号时也不会互相覆盖
+                    self._write_segment(model, items, f"seg_{seq:06d}_{os.getpid()}.npz")
+                    self._dirty[model] = {}
+                    self._stats["flushes"] += 1
+                    if len(segments) + 1 > self.MAX_SEGMENTS:
+                        self._compact(model)
+                except Exception as e:
+                    logger.warning(f"⚠️ [Embedding缓存] 写入失败: {e}")
+
+    def _compact(self, model: str):
+        """
+        把内存中该模型的全部向量写成一个分段并删除旧分段（超出容量被淘汰的向量随之丢弃）
+
+        先读入其他进程写入、本进程尚未读入的分段；只删除已读入内存或由本进程写入的分段，
+        合并期间其他进程新写的分段保留到下次合并
+        """
+        known = self._known_segments.setdefault(model, set())
+        self._load_segments(model, [s for s in self._segments(model) if s.name not in known], override=False)
+        segments = self._segments(model)
+        old_segments = [s for s in segments if s.name in known]
+        items = {key: vector for (m, key), vector in self._entries.items() if m == model}
+        seq = self._segment_seq(segments[-1]) + 1 if segments else 1
+        name = f"seg_{seq:06d}_{os.getpid()}.npz"
+        if items:
+            self._write_segment(model, items, name)
+        for segment in old_segments:
+            if segment.name != name:
+                segment.unlink(missing_ok=True)
+                known.discard(segment.name)
+        self._stats["compactions"] += 1
+        logger.info(f"🗜️ [Embedding缓存] 合并 {model}: {len(old_segments)} 个分段 -> 1 个 ({len(items)} 条)")
+
+    def get_stats(self) -> Dict:
+        with self._cache_lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "enabled": self._enabled,
+                "entries": len(self._entries),
+                "pending": sum(len(d) for d in self._dirty.values()),
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "cache_dir": str(self._cache_dir)
+            }
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """获取 Embedding 缓存单例"""
+    return EmbeddingCache()
@@ -1,12 +1,15 @@
-import chromadb
-from chromadb.config import Settings
 from openai import OpenAI
-import dashscope
-from dashscope import TextEmbedding
 import os
 import threading
 import hashlib
-from typing import Dict, Optional
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .embedding_cache import LOCAL_EMBEDDING_MODEL, get_embedding_cache, local_embedding
+from .vector_store import get_vector_store
 
 # 导入统一日志系统
 from backend.utils.logging_config import get_logger
@@ -31,6 +34,9 @@ class ChromaDBManager:
 
     def __init__(self):
         if not self._initialized:
+            # chromadb 只在使用 Chroma 后端时导入
+            import chromadb
+            from chromadb.config import Settings
             try:
                 # 自动检测操作系统版本并使用最优配置
                 import platform
@@ -108,6 +114,9 @@ class ChromaDBManager:
 
 
 class FinancialSituationMemory:
+    # 最近一次逐条请求实际使用的模型（DashScope 长文本降级到 OpenAI 时为降级模型），按线程记录
+    _embedding_source = threading.local()
+
     def __init__(self, name, config):
         self.config = config
         self.llm_provider = config.get("llm_provider", "openai").lower()
@@ -317,9 +326,26 @@ class FinancialSituationMemory:
                 self.client = "DISABLED"
                 logger.warning(f"⚠️ 未找到OPENAI_API_KEY，记忆功能已禁用")
 
-        # 使用单例ChromaDB管理器
-        self.chroma_manager = ChromaDBManager()
-        self.situation_collection = self.chroma_manager.get_or_create_collection(name)
+        # 离线运行：使用本地确定性embedding，不调用远程接口
+        if os.getenv('USE_LOCAL_EMBEDDING', 'false').lower() == 'true':
+            self.embedding = LOCAL_EMBEDDING_MODEL
+            self.client = "LOCAL"
+            logger.info(f"💡 使用本地确定性embedding（离线模式）")
+
+        # 向量缓存（按模型+内容哈希）与批量请求大小（阿里百炼 text-embedding-v3 单次最多10条）
+        self.embedding_cache = get_embedding_cache()
+        self.embedding_batch_size = int(os.getenv('EMBEDDING_BATCH_SIZE', '10'))
+
+        # 记忆向量库：默认使用本地持久化向量库（按嵌入模型分集合，重启后保留）；
+        # AGENT_MEMORY_BACKEND=chroma 时使用单例ChromaDB管理器
+        self.memory_backend = os.getenv('AGENT_MEMORY_BACKEND', 'local').lower()
+        if self.memory_backend == 'chroma':
+            self.chroma_manager = ChromaDBManager()
+            self.situation_collection = self.chroma_manager.get_or_create_collection(name)
+        else:
+            self.situation_collection = get_vector_store().get_or_create_collection(
+                f"{name}-{getattr(self, 'embedding', 'disabled')}"
+            )
 
     def _smart_text_truncation(self, text, max_length=8192):
         """智能文本截断，保持语义完整性和缓存兼容性"""
@@ -360,23 +386,163 @@ class FinancialSituationMemory:
         return truncated, True
 
     def get_embedding(self, text):
-        """Get embedding for a text using the configured provider"""
+        """Get embedding for a text using the configured provider (cached); returns a 1024-dim zero vector when unavailable"""
+        embedding = self._embed(text)
+        return embedding.tolist() if embedding is not None else [0.0] * 1024
+
+    def _uses_dashscope(self):
+        """是否使用阿里百炼的嵌入模型"""
+        return (self.llm_provider in ("dashscope", "alibaba", "qianfan") or
+                (self.llm_provider in ("google", "deepseek", "openrouter") and self.client is None))
+
+    def _embed(self, text) -> Optional[np.ndarray]:
+        """获取单条文本的向量（float32），不可用时返回 None"""
+        return self._embed_many([text])[0]
+
+    def _embed_many(self, texts) -> List[Optional[np.ndarray]]:
+        """
+        批量获取向量：先按内容哈希查缓存，未命中的文本去重后按批调用 embedding 接口并写回缓存
+
+        Returns:
+            与 texts 一一对应的向量列表，记忆功能禁用、文本无效或调用失败的位置为 None
+        """
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        if self.client == "DISABLED":
+            logger.debug(f"⚠️ 记忆功能已禁用，跳过向量化")
+            return results
+
+        valid = [i for i, text in enumerate(texts) if text and isinstance(text, str)]
+        if len(valid) < len(texts):
+            logger.warning(f"⚠️ {len(texts) - len(valid)}条输入文本为空或无效，跳过向量化")
+
+        if self.client == "LOCAL":
+            for i in valid:
+                results[i] = local_embedding(texts[i])
+            return results
+
+        cached = self.embedding_cache.get_many(self.embedding, [texts[i] for i in valid])
+        missing: Dict[str, List[int]] = {}
+        for i, vector in zip(valid, cached):
+            if vector is not None:
+                results[i] = vector
+            else:
+                missing.setdefault(texts[i], []).append(i)
+
+        if missing and self._uses_dashscope() and self.fallback_available:
+            # 降级模型生成的向量按降级模型缓存，未命中主模型时再查一次
+            for text, vector in zip(list(missing), self.embedding_cache.get_many(self.fallback_embedding, list(missing))):
+                if vector is not None:
+                    for i in missing.pop(text):
+                        results[i] = vector
+
+        if missing:
+            unique_texts = list(missing)
+            new_items: Dict[str, list] = {}
+            for text, (vector, model) in zip(unique_texts, self._request_embeddings(unique_texts)):
+                if vector is None:
+                    continue
+                array = np.asarray(vector, dtype=np.float32)
+                new_items.setdefault(model, []).append((text, array))
+                for i in missing[text]:
+                    results[i] = array
+            for model, items in new_items.items():
+                self.embedding_cache.put_many(model, items)
+        return results
+
+    def _request_embeddings(self, texts):
+        """
+        按批调用 embedding 接口；长文本、超长跳过以及批量调用失败的文本逐条调用（沿用单条的降级逻辑）
+
+        Returns:
+            与 texts 一一对应的 (向量, 实际生成该向量的模型) 列表，失败的位置向量为 None
+        """
+        results = [(None, self.embedding)] * len(texts)
+        single = [i for i, text in enumerate(texts)
+                  if len(text) > 8192 or (self.enable_embedding_length_check and len(text) > self.max_embedding_length)]
+        single_set = set(single)
+        batchable = [i for i in range(len(texts)) if i not in single_set]
+        batch_size = max(1, self.embedding_batch_size)
+
+        for start in range(0, len(batchable), batch_size):
+            chunk = batchable[start:start + batch_size]
+            vectors = self._request_embedding_batch([texts[i] for i in chunk]) if len(chunk) > 1 else None
+            if vectors is None:
+                single.extend(chunk)
+                continue
+            for i, vector in zip(chunk, vectors):
+                results[i] = (vector, self.embedding)
+
+        for i in single:
+            self._embedding_source.model = None
+            vector = self._request_embedding(texts[i])
+            results[i] = (vector, self._embedding_source.model or self.embedding)
+        return results
+
+    def _request_embedding_batch(self, texts):
+        """一次请求获取多条文本的向量，失败时返回 None"""
+        try:
+            if self._uses_dashscope():
+                import dashscope
+                from dashscope import TextEmbedding
+
+                if not hasattr(dashscope, 'api_key') or not dashscope.api_key:
+                    return None
+                response = TextEmbedding.call(model=self.embedding, input=texts)
+                if response.status_code != 200:
+                    logger.warning(f"⚠️ DashScope批量embedding失败，改为逐条调用: {response.code} - {response.message}")
+                    return None
+                items = sorted(response.output['embeddings'], key=lambda item: item['text_index'])
+                vectors = [item['embedding'] for item in items]
+            else:
+                if self.client is None:
+                    return None
+                response = self.client.embeddings.create(model=self.embedding, input=texts)
+                vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+            if len(vectors) != len(texts):
+                logger.warning(f"⚠️ 批量embedding返回数量不符({len(vectors)}/{len(texts)})，改为逐条调用")
+                return None
+            logger.debug(f"✅ {self.llm_provider} 批量embedding成功: {len(texts)}条")
+            return vectors
+        except Exception as e:
+            logger.warning(f"⚠️ {self.llm_provider} 批量embedding异常，改为逐条调用: {str(e)}")
+            return None
+
+    def _request_fallback_embedding(self, text):
+        """DashScope 长度受限时改用 OpenAI 降级模型，并记录实际使用的模型"""
+        logger.info(f"💡 尝试使用OpenAI降级处理长文本")
+        try:
+            response = self.fallback_client.embeddings.create(
+                model=self.fallback_embedding,
+                input=text
+            )
+            embedding = response.data[0].embedding
+            logger.info(f"✅ OpenAI降级成功，维度: {len(embedding)}")
+            self._embedding_source.model = self.fallback_embedding
+            return embedding
+        except Exception as fallback_error:
+            logger.error(f"❌ OpenAI降级失败: {str(fallback_error)}")
+            logger.info(f"💡 所有降级选项失败，记忆功能降级")
+            return None
+
+    def _request_embedding(self, text):
+        """调用配置的 embedding 接口获取单条文本的向量；记忆功能禁用或调用失败时返回 None"""
 
         # 检查记忆功能是否被禁用
         if self.client == "DISABLED":
             # 内存功能已禁用，返回空向量
             logger.debug(f"⚠️ 记忆功能已禁用，返回空向量")
-            return [0.0] * 1024  # 返回1024维的零向量
+            return None
 
         # 验证输入文本
         if not text or not isinstance(text, str):
             logger.warning(f"⚠️ 输入文本为空或无效，返回空向量")
-            return [0.0] * 1024
+            return None
 
         text_length = len(text)
         if text_length == 0:
             logger.warning(f"⚠️ 输入文本长度为0，返回空向量")
-            return [0.0] * 1024
+            return None
         
         # 检查是否启用长度限制
         if self.enable_embedding_length_check and text_length > self.max_embedding_length:
@@ -391,7 +557,7 @@ class FinancialSituationMemory:
                 'strategy': 'length_limit_skip',
                 'max_length': self.max_embedding_length
             }
-            return [0.0] * 1024
+            return None
         
         # 记录文本信息（不进行任何截断）
         if text_length > 8192:
@@ -407,12 +573,7 @@ class FinancialSituationMemory:
             'strategy': 'no_truncation_with_fallback'  # 标记策略
         }
 
-        if (self.llm_provider == "dashscope" or
-            self.llm_provider == "alibaba" or
-            self.llm_provider == "qianfan" or
-            (self.llm_provider == "google" and self.client is None) or
-            (self.llm_provider == "deepseek" and self.client is None) or
-            (self.llm_provider == "openrouter" and self.client is None)):
+        if self._uses_dashscope():
             # 使用阿里百炼的嵌入模型
             try:
                 # 导入DashScope模块
@@ -422,7 +583,7 @@ class FinancialSituationMemory:
                 # 检查DashScope API密钥是否可用
                 if not hasattr(dashscope, 'api_key') or not dashscope.api_key:
                     logger.warning(f"⚠️ DashScope API密钥未设置，记忆功能降级")
-                    return [0.0] * 1024  # 返回空向量
+                    return None
 
                 # 尝试调用DashScope API
                 response = TextEmbedding.call(
@@ -446,25 +607,13 @@ class FinancialSituationMemory:
                         
                         # 检查是否有降级选项
                         if hasattr(self, 'fallback_available') and self.fallback_available:
-                            logger.info(f"💡 尝试使用OpenAI降级处理长文本")
-                            try:
-                                response = self.fallback_client.embeddings.create(
-                                    model=self.fallback_embedding,
-                                    input=text
-                                )
-                                embedding = response.data[0].embedding
-                                logger.info(f"✅ OpenAI降级成功，维度: {len(embedding)}")
-                                return embedding
-                            except Exception as fallback_error:
-                                logger.error(f"❌ OpenAI降级失败: {str(fallback_error)}")
-                                logger.info(f"💡 所有降级选项失败，记忆功能降级")
-                                return [0.0] * 1024
+                            return self._request_fallback_embedding(text)
                         else:
                             logger.info(f"💡 无可用降级选项，记忆功能降级")
-                            return [0.0] * 1024
+                            return None
                     else:
                         logger.error(f"❌ DashScope API错误: {error_msg}")
-                        return [0.0] * 1024  # 返回空向量而不是抛出异常
+                        return None
 
             except Exception as e:
                 error_str = str(e).lower()
@@ -475,22 +624,10 @@ class FinancialSituationMemory:
                     
                     # 检查是否有降级选项
                     if hasattr(self, 'fallback_available') and self.fallback_available:
-                        logger.info(f"💡 尝试使用OpenAI降级处理长文本")
-                        try:
-                            response = self.fallback_client.embeddings.create(
-                                model=self.fallback_embedding,
-                                input=text
-                            )
-                            embedding = response.data[0].embedding
-                            logger.info(f"✅ OpenAI降级成功，维度: {len(embedding)}")
-                            return embedding
-                        except Exception as fallback_error:
-                            logger.error(f"❌ OpenAI降级失败: {str(fallback_error)}")
-                            logger.info(f"💡 所有降级选项失败，记忆功能降级")
-                            return [0.0] * 1024
+                        return self._request_fallback_embedding(text)
                     else:
                         logger.info(f"💡 无可用降级选项，记忆功能降级")
-                        return [0.0] * 1024
+                        return None
                 elif 'import' in error_str:
                     logger.error(f"❌ DashScope包未安装: {str(e)}")
                 elif 'connection' in error_str:
@@ -501,16 +638,16 @@ class FinancialSituationMemory:
                     logger.error(f"❌ DashScope embedding异常: {str(e)}")
                 
                 logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
+                return None
         else:
             # 使用OpenAI兼容的嵌入模型
             if self.client is None:
                 logger.warning(f"⚠️ 嵌入客户端未初始化，返回空向量")
-                return [0.0] * 1024  # 返回空向量
+                return None
             elif self.client == "DISABLED":
                 # 内存功能已禁用，返回空向量
                 logger.debug(f"⚠️ 内存功能已禁用，返回空向量")
-                return [0.0] * 1024  # 返回1024维的零向量
+                return None
 
             # 尝试调用OpenAI兼容的embedding API
             try:
@@ -551,7 +688,7 @@ class FinancialSituationMemory:
                         logger.error(f"❌ {self.llm_provider} embedding异常: {str(e)}")
                 
                 logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
+                return None
 
     def get_embedding_config_status(self):
         """获取向量缓存配置状态"""
@@ -568,37 +705,59 @@ class FinancialSituationMemory:
         return getattr(self, '_last_text_info', None)
 
     def add_situations(self, situations_and_advice):
-        """Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)"""
+        """
+        Add financial situations and their corresponding advice.
+        Parameter is a list of tuples (situation, rec) or (situation, rec, metadata),
+        metadata may carry stock_code/date for filtered recall (date defaults to today)
+        """
 
         situations = []
-        advice = []
+        metadatas = []
         ids = []
         embeddings = []
 
-        offset = self.situation_collection.count()
+        # 一次性批量向量化（缓存命中的不再请求接口）
+        vectors = self._embed_many([item[0] for item in situations_and_advice])
+        today = datetime.now().strftime('%Y-%m-%d')
 
-        for i, (situation, recommendation) in enumerate(situations_and_advice):
+        for item, vector in zip(situations_and_advice, vectors):
+            if vector is None:
+                continue
+            situation, recommendation = item[0], item[1]
+            extra = item[2] if len(item) > 2 and item[2] else {}
             situations.append(situation)
-            advice.append(recommendation)
-            ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
+            metadatas.append({"recommendation": recommendation, "date": today, **extra})
+            # count() 只统计未删除的记录，删除后再用它做序号会与已有 ID 冲突并覆盖旧记忆
+            ids.append(uuid.uuid4().hex)
+            embeddings.append(vector.tolist())
+
+        if len(ids) < len(situations_and_advice):
+            logger.warning(f"⚠️ {len(situations_and_advice) - len(ids)}条情境向量化失败，未写入记忆库")
+        if not ids:
+            return
 
         self.situation_collection.add(
             documents=situations,
-            metadatas=[{"recommendation": rec} for rec in advice],
+            metadatas=metadatas,
             embeddings=embeddings,
             ids=ids,
         )
 
-    def get_memories(self, current_situation, n_matches=1):
-        """Find matching recommendations using embeddings with smart truncation handling"""
+    def get_memories(self, current_situation, n_matches=1, stock_code=None, since=None):
+        """
+        Find matching recommendations using embeddings with smart truncation handling
+
+        Args:
+            stock_code: 只召回该股票的记忆
+            since: 只召回该日期（YYYY-MM-DD）之后的记忆
+        """
         
-        # 获取当前情况的embedding
-        query_embedding = self.get_embedding(current_situation)
+        # 获取当前情况的embedding（相同情境命中缓存，不调用接口）
+        query_embedding = self._embed(current_situation)
         
-        # 检查是否为空向量（记忆功能被禁用或出错）
-        if all(x == 0.0 for x in query_embedding):
-            logger.debug(f"⚠️ 查询embedding为空向量，返回空结果")
+        # 记忆功能被禁用或出错
+        if query_embedding is None:
+            logger.debug(f"⚠️ 查询embedding不可用，返回空结果")
             return []
         
         # 检查是否有足够的数据进行查询
@@ -612,9 +771,19 @@ class FinancialSituationMemory:
         
         try:
             # 执行相似度查询
+            conditions = []
+            if stock_code:
+                conditions.append({"stock_code": stock_code})
+            if since:
+                conditions.append({"date": {"$gte": since}})
+            query_kwargs = {}
+            if conditions:
+                query_kwargs["where"] = conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
             results = self.situation_collection.query(
-                query_embeddings=[query_embedding],
-                n_results=actual_n_matches
+                query_embeddings=[query_embedding.tolist()],
+                n_results=actual_n_matches,
+                **query_kwargs
             )
             
             # 处理查询结果
@@ -656,8 +825,12 @@ class FinancialSituationMemory:
             'collection_count': self.situation_collection.count(),
             'client_status': 'enabled' if self.client != "DISABLED" else 'disabled',
             'embedding_model': self.embedding,
-            'provider': self.llm_provider
+            'provider': self.llm_provider,
+            'memory_backend': self.memory_backend,
+            'embedding_cache': self.embedding_cache.get_stats()
         }
+        if hasattr(self.situation_collection, 'get_stats'):
+            info['vector_store'] = self.situation_collection.get_stats()
         
         # 添加最后一次文本处理信息
         if hasattr(self, '_last_text_info'):
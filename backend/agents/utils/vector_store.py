@@ -0,0 +1,558 @@
+# -*- coding: utf-8 -*-
+"""
+本地持久化向量库（智能体记忆）
+每个集合一个目录，向量以 float32 原始数组落盘并通过内存映射读取，
+在其上建立 IVF 倒排索引（球面 k-means 聚类中心 + 按簇连续存放的向量）做 top-k 余弦检索。
+
+- 增量写入：新向量追加到文件末尾，并按最近的聚类中心挂到对应倒排表的溢出列表上
+- 检索：只计算最接近查询的 nprobe 个簇；按股票代码过滤时直接在该股票的向量上精确计算
+- 定期整理：溢出向量或删除标记累积到一定比例时重新聚类，并按簇顺序重写为新一代文件
+- 提供与 Chroma 集合相同的 add/query/count 接口，FinancialSituationMemory 无需区分后端
+
+目录结构：
+    manifest.json            当前代数、维度
+    vectors.<代>.f32         向量（n × dim float32，已归一化）
+    items.<代>.jsonl         每行一条记录（id/document/metadata）或删除标记
+    index.<代>.npz           聚类中心与各簇在向量文件中的起止行
+"""
+import json
+import math
+import os
+import re
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.logging_config import get_logger
+logger = get_logger("agents.utils.vector_store")
+
+BRUTE_FORCE_LIMIT = 4096        # 向量数不超过该值时直接精确检索，不建索引
+MIN_LIST_SIZE = 64              # 平均每个簇的最少向量数
+MAX_LISTS = 1024
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE_PER_LIST = 32     # 训练聚类中心时每个簇的采样数
+COMPACT_OVERFLOW_RATIO = 0.3    # 溢出向量超过已索引向量的该比例时整理
+COMPACT_DELETED_RATIO = 0.2     # 删除标记超过该比例时整理
+ASSIGN_CHUNK = 8192
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def _date_key(value: Any) -> int:
+    """元数据中的日期转为 YYYYMMDD 整数（无日期为 0）"""
+    if not value:
+        return 0
+    if isinstance(value, (datetime, date)):
+        return value.year * 10000 + value.month * 100 + value.day
+    digits = "".join(ch for ch in str(value)[:10] if ch.isdigit())
+    return int(digits) if len(digits) == 8 else 0
+
+
+def _spherical_kmeans(vectors: np.ndarray, n_lists: int, seed: int = 0) -> np.ndarray:
+    """球面 k-means（余弦相似度），返回归一化的聚类中心"""
+    rng = np.random.RandomState(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = np.bincount(assign, minlength=n_lists) == 0
+        # 空簇重新随机选点
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids.astype(np.float32)
+
+
+class LocalVectorCollection:
+    """单个向量集合（兼容 Chroma 集合的 add/query/count 接口）"""
+
+    def __init__(self, name: str, directory: Path, nprobe: int = 8):
+        self.name = name
+        self.directory = directory
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+
+        self.dim: Optional[int] = None
+        self._generation = 0
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._row_of: Dict[str, int] = {}
+        self._stock_rows: Dict[str, List[int]] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._dates = np.zeros(0, dtype=np.int32)
+        self._deleted = 0
+
+        # 向量：已整理部分内存映射，之后追加的部分在内存缓冲区
+        self._base: Optional[np.ndarray] = None
+        self._base_view: Optional[np.ndarray] = None
+        self._base_rows = 0
+        self._tail = np.zeros((0, 0), dtype=np.float32)
+        self._tail_rows = 0
+
+        # IVF 索引
+        self._centroids: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._overflow: List[List[int]] = []
+        self._overflow_rows = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    # ==================== 文件 ====================
+
+    def _path(self, kind: str, generation: Optional[int] = None) -> Path:
+        generation = self._generation if generation is None else generation
+        suffix = {"vectors": "f32", "items": "jsonl", "index": "npz"}[kind]
+        return self.directory / f"{kind}.{generation}.{suffix}"
+
+    def _load(self):
+        manifest_path = self.directory / "manifest.json"
+        if not manifest_path.exists():
+            return
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            self._generation = manifest["generation"]
+            self.dim = manifest.get("dim")
+        except Exception as e:
+            logger.error(f"❌ [向量库] 读取清单失败 {self.name}: {e}")
+            return
+
+        vectors_path = self._path("vectors")
+        vector_rows = 0
+        if self.dim and vectors_path.exists():
+            vector_rows = vectors_path.stat().st_size // (4 * self.dim)
+
+        # 按写入顺序回放：记录行号与向量行一一对应，删除标记作用于此前写入的同 id 记录。
+        # 遇到写入中断的半行或没有对应向量的记录即停止，之后的内容丢弃
+        records, alive, latest = [], [], {}
+        items_path = self._path("items")
+        items_end = 0
+        if items_path.exists():
+            with open(items_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record.get("op") == "delete":
+                        index = latest.pop(record["id"], None)
+                        if index is not None:
+                            alive[index] = False
+                    else:
+                        if len(records) >= vector_rows:
+                            break
+                        latest[record["id"]] = len(records)
+                        records.append(record)
+                        alive.append(True)
+                    items_end += len(line)
+        rows = len(records)
+
+        # 追加时先写向量再写记录，两者之间崩溃会留下没有记录的向量（或记录文件的半行）；
+        # 截掉这些残留，否则之后追加的记录与向量行号错位
+        if items_path.exists() and items_path.stat().st_size > items_end:
+            logger.warning(f"⚠️ [向量库] {self.name} 记录文件末尾有未完成的写入，已截断")
+            os.truncate(items_path, items_end)
+        if vector_rows > rows:
+            logger.warning(f"⚠️ [向量库] {self.name} 有 {vector_rows - rows} 个向量没有对应记录，已截断")
+            os.truncate(vectors_path, rows * 4 * self.dim)
+        self._base = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim)) if rows else None
+        self._base_view = np.asarray(self._base) if rows else None
+        self._base_rows = rows
+        self._tail = np.zeros((0, self.dim or 0), dtype=np.float32)
+
+        self._alive = np.array(alive[:rows], dtype=bool)
+        self._dates = np.zeros(rows, dtype=np.int32)
+        for row, record in enumerate(records):
+            self._register(row, record["id"], record.get("document", ""), record.get("metadata") or {})
+            if not self._alive[row]:
+                self._row_of.pop(record["id"], None)
+                self._deleted += 1
+
+        index_path = self._path("index")
+        if index_path.exists():
+            with np.load(index_path, allow_pickle=False) as data:
+                indexed_rows = int(data["indexed_rows"])
+                if indexed_rows <= rows:
+                    self._centroids = data["centroids"]
+                    self._offsets = data["offsets"]
+                    # 上次整理之后追加的向量重新挂到溢出列表
+                    self._overflow = [[] for _ in range(len(self._centroids))]
+                    for start in range(indexed_rows, rows, ASSIGN_CHUNK):
+                        stop = min(start + ASSIGN_CHUNK, rows)
+                        for row, lst in zip(range(start, stop), self._assign(np.asarray(self._base[start:stop]))):
+                            self._overflow[lst].append(row)
+                    self._overflow_rows = rows - indexed_rows
+        logger.info(f"📚 [向量库] 加载集合 {self.name}: {self.count()} 条记忆")
+
+    def _write_manifest(self):
+        manifest_path = self.directory / "manifest.json"
+        tmp_path = self.directory / "manifest.json.tmp"
+        tmp_path.write_text(json.dumps({"generation": self._generation, "dim": self.dim}), encoding="utf-8")
+        os.replace(tmp_path, manifest_path)
+
+    # ==================== 写入 ====================
+
+    def _register(self, row: int, item_id: str, document: str, metadata: Dict[str, Any]):
+        self._ids.append(item_id)
+        self._documents.append(document)
+        self._metadatas.append(metadata)
+        self._row_of[item_id] = row
+        self._dates[row] = _date_key(metadata.get("date"))
+        stock_code = metadata.get("stock_code")
+        if stock_code:
+            self._stock_rows.setdefault(str(stock_code), []).append(row)
+
+    def _grow(self, extra: int):
+        """扩容内存中的行级数组（容量翻倍，摊销 O(1)）"""
+        total = len(self._ids) + extra
+        if total > len(self._alive):
+            capacity = max(total, 2 * len(self._alive), 64)
+            self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+            self._dates = np.concatenate([self._dates, np.zeros(capacity - len(self._dates), dtype=np.int32)])
+        if self._tail_rows + extra > len(self._tail):
+            capacity = max(self._tail_rows + extra, 2 * len(self._tail), 64)
+            tail = np.zeros((capacity, self.dim), dtype=np.float32)
+            tail[:self._tail_rows] = self._tail[:self._tail_rows]
+            self._tail = tail
+
+    def add(self, documents: List[str], metadatas: Optional[List[Dict]] = None,
+            embeddings: Optional[List] = None, ids: Optional[List[str]] = None):
+        """追加记录（已存在的 id 先删除再写入）"""
+        if embeddings is None or len(embeddings) == 0:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        metadatas = metadatas or [{} for _ in documents]
+        ids = ids or [f"{self.name}-{len(self._ids) + i}" for i in range(len(documents))]
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._tail = np.zeros((0, self.dim), dtype=np.float32)
+                self._write_manifest()
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"向量维度不一致: {vectors.shape[1]} != {self.dim}")
+
+            replaced = [item_id for item_id in ids if item_id in self._row_of]
+            if replaced:
+                self.delete(replaced)
+
+            vectors = _normalize(vectors).astype(np.float32)
+            first_row = len(self._ids)
+            self._grow(len(ids))
+            self._tail[self._tail_rows:self._tail_rows + len(ids)] = vectors
+            self._tail_rows += len(ids)
+            for i, (item_id, document, metadata) in enumerate(zip(ids, documents, metadatas)):
+                self._alive[first_row + i] = True
+                self._register(first_row + i, item_id, document, metadata or {})
+
+            with open(self._path("vectors"), "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._path("items"), "a", encoding="utf-8") as f:
+                for item_id, document, metadata in zip(ids, documents, metadatas):
+                    f.write(json.dumps({"id": item_id, "document": document, "metadata": metadata or {}},
+                                       ensure_ascii=False) + "\n")
+
+            if self._centroids is not None:
+                for row, lst in zip(range(first_row, first_row + len(ids)), self._assign(vectors)):
+                    self._overflow[lst].append(row)
+                self._overflow_rows += len(ids)
+            self._maybe_compact()
+
+    def delete(self, ids: List[str]):
+        """删除记录（写删除标记，整理时真正移除）"""
+        with self._lock:
+            removed = []
+            for item_id in ids:
+                row = self._row_of.pop(item_id, None)
+                if row is not None and self._alive[row]:
+                    self._alive[row] = False
+                    self._deleted += 1
+                    removed.append(item_id)
+            if removed:
+                with open(self._path("items"), "a", encoding="utf-8") as f:
+                    for item_id in removed:
+                        f.write(json.dumps({"op": "delete", "id": item_id}) + "\n")
+                self._maybe_compact()
+
+    def count(self) -> int:
+        return len(self._ids) - self._deleted
+
+    # ==================== 索引 ====================
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1)
+
+    def _vectors(self, rows: np.ndarray) -> np.ndarray:
+        """按行号取向量（行号有序时分别从映射文件和内存缓冲区取）"""
+        split = np.searchsorted(rows, self._base_rows)
+        parts = []
+        if split:
+            parts.append(self._base_view[rows[:split]])
+        if split < len(rows):
+            parts.append(self._tail[rows[split:] - self._base_rows])
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def _maybe_compact(self):
+        total = len(self._ids)
+        if self._deleted > COMPACT_DELETED_RATIO * total:
+            self.compact()
+        elif self._centroids is None:
+            if self.count() > BRUTE_FORCE_LIMIT:
+                self.compact()
+        elif self._overflow_rows > COMPACT_OVERFLOW_RATIO * max(total - self._overflow_rows, 1):
+            self.compact()
+
+    def compact(self):
+        """
+        整理：移除已删除记录，重新训练聚类中心，并把向量按簇连续写入新一代文件
+
+        向量数不超过 BRUTE_FORCE_LIMIT 时不建索引，只做清理
+        """
+        with self._lock:
+            if self.dim is None:
+                return
+            alive_rows = np.flatnonzero(self._alive[:len(self._ids)])
+            n = len(alive_rows)
+            centroids, order, offsets = None, alive_rows, None
+            if n > BRUTE_FORCE_LIMIT:
+                n_lists = int(min(MAX_LISTS, 2 * math.sqrt(n), n // MIN_LIST_SIZE))
+                rng = np.random.RandomState(len(self._ids))
+                sample_rows = np.sort(rng.choice(alive_rows, min(n, n_lists * KMEANS_SAMPLE_PER_LIST), replace=False))
+                centroids = _spherical_kmeans(self._vectors(sample_rows), n_lists)
+                self._centroids = centroids
+                assign = np.concatenate([
+                    self._assign(self._vectors(alive_rows[i:i + ASSIGN_CHUNK]))
+                    for i in range(0, n, ASSIGN_CHUNK)
+                ])
+                sort = np.argsort(assign, kind="stable")
+                order = alive_rows[sort]
+                offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))]).astype(np.int64)
+
+            generation = self._generation + 1
+            with open(self._path("vectors", generation), "wb") as f:
+                for i in range(0, n, ASSIGN_CHUNK):
+                    f.write(self._vectors(np.sort(order[i:i + ASSIGN_CHUNK]))[
+                        np.argsort(np.argsort(order[i:i + ASSIGN_CHUNK]))].tobytes())
+            with open(self._path("items", generation), "w", encoding="utf-8") as f:
+                for row in order:
+                    f.write(json.dumps({"id": self._ids[row], "document": self._documents[row],
+                                        "metadata": self._metadatas[row]}, ensure_ascii=False) + "\n")
+            if centroids is not None:
+                np.savez(self._path("index", generation), centroids=centroids, offsets=offsets,
+                         indexed_rows=np.int64(n))
+
+            old_generation = self._generation
+            self._generation = generation
+            self._write_manifest()
+            for kind in ("vectors", "items", "index"):
+                self._path(kind, old_generation).unlink(missing_ok=True)
+
+            # 重新加载新一代文件
+            self._reset()
+            self._load()
+            logger.info(f"🗜️ [向量库] 整理集合 {self.name}: {n} 条记忆，"
+                        f"{len(centroids) if centroids is not None else 0} 个簇")
+
+    def _reset(self):
+        self._ids, self._documents, self._metadatas = [], [], []
+        self._row_of, self._stock_rows = {}, {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._dates = np.zeros(0, dtype=np.int32)
+        self._deleted = 0
+        self._base, self._base_view, self._base_rows = None, None, 0
+        self._tail_rows = 0
+        self._centroids, self._offsets = None, None
+        self._overflow, self._overflow_rows = [], 0
+
+    # ==================== 检索 ====================
+
+    def _filter_rows(self, where: Optional[Dict[str, Any]]) -> Tuple[Optional[np.ndarray], Optional[Tuple[int, int]]]:
+        """
+        解析过滤条件：stock_code 精确匹配，date 支持 $gte/$gt/$lte/$lt/$eq，可用 $and 组合
+
+        Returns:
+            (候选行号或 None 表示不限, 日期区间或 None)
+        """
+        if not where:
+            return None, None
+        clauses = where.get("$and", [where]) if "$and" in where else [{k: v} for k, v in where.items()]
+        rows, low, high = None, None, None
+        for clause in clauses:
+            for key, condition in clause.items():
+                if key == "stock_code":
+                    value = condition.get("$eq") if isinstance(condition, dict) else condition
+                    rows = np.asarray(self._stock_rows.get(str(value), []), dtype=np.int64)
+                elif key == "date":
+                    ops = condition if isinstance(condition, dict) else {"$eq": condition}
+                    for op, value in ops.items():
+                        key_value = _date_key(value)
+                        if op in ("$gte", "$eq"):
+                            low = max(low or 0, key_value)
+                        if op == "$gt":
+                            low = max(low or 0, key_value + 1)
+                        if op in ("$lte", "$eq"):
+                            high = min(high or 99999999, key_value)
+                        if op == "$lt":
+                            high = min(high or 99999999, key_value - 1)
+                else:
+                    raise ValueError(f"不支持的过滤字段: {key}")
+        date_range = (low or 0, high or 99999999) if (low or high) else None
+        return rows, date_range
+
+    def _score_all(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """精确计算全部向量的相似度（映射文件和内存缓冲区各一次矩阵向量乘）"""
+        parts = []
+        if self._base_rows:
+            parts.append(self._base_view @ query)
+        if self._tail_rows:
+            parts.append(self._tail[:self._tail_rows] @ query)
+        scores = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        return np.arange(len(scores)), scores
+
+    def _score_probes(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """IVF 检索：只计算最接近查询的 nprobe 个簇（簇内向量连续存放，直接按切片计算，不做行拷贝）"""
+        nprobe = min(self.nprobe, len(self._centroids))
+        probes = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        row_parts, score_parts = [], []
+        for c in probes:
+            start, stop = int(self._offsets[c]), int(self._offsets[c + 1])
+            if stop > start:
+                row_parts.append(np.arange(start, stop))
+                score_parts.append(self._base_view[start:stop] @ query)
+            if self._overflow[c]:
+                rows = np.asarray(self._overflow[c], dtype=np.int64)
+                row_parts.append(rows)
+                score_parts.append(self._vectors(rows) @ query)
+        if not row_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return np.concatenate(row_parts), np.concatenate(score_parts)
+
+    def search(self, query, k: int = 1, where: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """
+        top-k 余弦检索
+
+        Returns:
+            [(行号, 余弦相似度)]，按相似度降序
+        """
+        with self._lock:
+            if self.dim is None or self.count() == 0:
+                return []
+            query = np.asarray(query, dtype=np.float32).reshape(-1)
+            if query.shape[0] != self.dim:
+                logger.warning(f"⚠️ [向量库] 查询向量维度不一致: {query.shape[0]} != {self.dim}")
+                return []
+            norm = float(np.linalg.norm(query))
+            if norm == 0:
+                return []
+            query = query / norm
+
+            filter_rows, date_range = self._filter_rows(where)
+            if filter_rows is not None:
+                # 按股票过滤：候选集很小，直接精确计算
+                rows = np.sort(filter_rows)
+                rows = rows[self._alive[rows]]
+                scores = self._vectors(rows) @ query if len(rows) else np.zeros(0, dtype=np.float32)
+            elif self._centroids is not None:
+                rows, scores = self._score_probes(query)
+            else:
+                rows, scores = self._score_all(query)
+
+            for attempt in range(2):
+                mask = self._alive[rows]
+                if date_range is not None:
+                    dates = self._dates[rows]
+                    mask &= (dates >= date_range[0]) & (dates <= date_range[1])
+                selected, selected_scores = rows[mask], scores[mask]
+                if len(selected) >= k or filter_rows is not None or self._centroids is None or attempt:
+                    break
+                # 过滤后探测簇内结果不足 k 条时退回全量精确检索
+                rows, scores = self._score_all(query)
+
+            if not len(selected):
+                return []
+            k = min(k, len(selected))
+            top = np.argpartition(-selected_scores, k - 1)[:k]
+            top = top[np.argsort(-selected_scores[top])]
+            return [(int(selected[i]), float(selected_scores[i])) for i in top]
+
+    def query(self, query_embeddings: List, n_results: int = 1, where: Optional[Dict[str, Any]] = None,
+              **kwargs) -> Dict[str, List]:
+        """Chroma 风格查询，distances 为余弦距离（1 - 余弦相似度）"""
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for query in query_embeddings:
+            hits = self.search(query, n_results, where)
+            result["ids"].append([self._ids[row] for row, _ in hits])
+            result["documents"].append([self._documents[row] for row, _ in hits])
+            result["metadatas"].append([self._metadatas[row] for row, _ in hits])
+            result["distances"].append([1.0 - score for _, score in hits])
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "count": self.count(),
+                "dim": self.dim,
+                "generation": self._generation,
+                "lists": len(self._centroids) if self._centroids is not None else 0,
+                "overflow_rows": self._overflow_rows,
+                "deleted": self._deleted,
+                "nprobe": self.nprobe
+            }
+
+
+class LocalVectorStore:
+    """本地向量库管理器（单例），每个集合一个子目录"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self._root = Path(os.getenv("AGENT_MEMORY_DIR", "data/agent_memory"))
+        self._nprobe = int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+        self._collections: Dict[str, LocalVectorCollection] = {}
+
+    def get_or_create_collection(self, name: str) -> LocalVectorCollection:
+        """线程安全地获取或创建集合（与 ChromaDBManager 同名接口）"""
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                directory = self._root / re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+                collection = LocalVectorCollection(name, directory, nprobe=self._nprobe)
+                self._collections[name] = collection
+            return collection
+
+    def compact_all(self):
+        """整理全部已打开的集合"""
+        with self._lock:
+            collections = list(self._collections.values())
+        for collection in collections:
+            collection.compact()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: c.get_stats() for name, c in self._collections.items()}
+
+
+def get_vector_store() -> LocalVectorStore:
+    """获取本地向量库单例"""
+    return LocalVectorStore()
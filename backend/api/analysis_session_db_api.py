@@ -16,6 +16,7 @@ from backend.database.services import (
     StockHistoryService,
     StatisticsService
 )
+from backend.database.stats_rollup import StatsRollupService
 from backend.database.models import AnalysisSession, AgentResult
 
 router = APIRouter(prefix="/api/analysis/db", tags=["Analysis Session DB"])
@@ -355,8 +356,48 @@ async def get_agent_stats(
     }
 
 
+@router.get("/stats/stocks")
+async def get_stock_stats(
+    days: int = Query(7, ge=1, le=365),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """获取按股票的分析统计"""
+    stats = StatisticsService.get_stock_stats(db, days, limit)
+
+    return {
+        "period_days": days,
+        "stocks": stats
+    }
+
+
 # ==================== 维护 ====================
 
+@router.get("/stats/rollups/check")
+async def check_stats_rollups(
+    start_date: Optional[str] = Query(None, description="起始日期 YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
+    db: Session = Depends(get_db)
+):
+    """校验统计汇总表与源数据是否一致（返回不一致的桶）"""
+    return StatsRollupService.check(db, start_date, end_date)
+
+
+@router.post("/stats/rollups/rebuild")
+async def rebuild_stats_rollups(
+    start_date: Optional[str] = Query(None, description="起始日期 YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
+    db: Session = Depends(get_db)
+):
+    """从源数据重建统计汇总表（不传日期时全部重建）"""
+    rows = StatsRollupService.rebuild(db, start_date, end_date)
+
+    return {
+        "message": f"已重建 {rows} 行统计汇总",
+        "rows": rows
+    }
+
+
 @router.delete("/session/{session_id}")
 async def delete_session(session_id: str, db: Session = Depends(get_db)):
     """删除会话"""
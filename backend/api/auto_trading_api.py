@@ -7,10 +7,10 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel, Field
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-import json
 from pathlib import Path
 
 from backend.utils.logging_config import get_logger
+from backend.utils.json_journal import JsonJournal
 from backend.api.trading_llm_config_api import get_trading_llm_config
 
 logger = get_logger("api.auto_trading")
@@ -79,51 +79,65 @@ class DecisionRecord(BaseModel):
 TASKS_FILE = Path("backend/data/auto_trading_tasks.json")
 DECISIONS_FILE = Path("backend/data/trading_decisions.json")
 
-# 内存存储（实际应该用数据库）
+# 内存存储（进程内唯一数据源，变更追加写日志）
 active_tasks: Dict[str, Dict] = {}
 decision_records: List[Dict] = []
 
+tasks_journal = JsonJournal(TASKS_FILE, lambda: active_tasks)
+decisions_journal = JsonJournal(DECISIONS_FILE, lambda: decision_records)
+_loaded = {"tasks": False, "decisions": False}
 
-def load_tasks():
-    """加载任务"""
+
+def load_tasks(force: bool = False):
+    """加载任务（已加载时直接使用内存数据）"""
     global active_tasks
-    if TASKS_FILE.exists():
-        try:
-            with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-                active_tasks = json.load(f)
-        except Exception as e:
-            logger.error(f"加载任务失败: {e}")
-            active_tasks = {}
+    if _loaded["tasks"] and not force:
+        return
+    try:
+        active_tasks = tasks_journal.load(dict)
+    except Exception as e:
+        logger.error(f"加载任务失败: {e}")
+        active_tasks = {}
+    _loaded["tasks"] = True
 
 
-def save_tasks():
-    """保存任务"""
+def save_tasks(task_id: Optional[str] = None):
+    """保存任务：指定 task_id 时只追加该任务的变更，否则写完整快照"""
     try:
-        TASKS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(TASKS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(active_tasks, f, ensure_ascii=False, indent=2)
+        if task_id is None:
+            tasks_journal.compact(active_tasks)
+        else:
+            tasks_journal.set(task_id, active_tasks[task_id])
     except Exception as e:
         logger.error(f"保存任务失败: {e}")
 
 
-def load_decisions():
-    """加载决策记录"""
+def load_decisions(force: bool = False):
+    """加载决策记录（已加载时直接使用内存数据）"""
     global decision_records
-    if DECISIONS_FILE.exists():
-        try:
-            with open(DECISIONS_FILE, 'r', encoding='utf-8') as f:
-                decision_records = json.load(f)
-        except Exception as e:
-            logger.error(f"加载决策记录失败: {e}")
-            decision_records = []
+    if _loaded["decisions"] and not force:
+        return
+    try:
+        decision_records = decisions_journal.load(list)
+    except Exception as e:
+        logger.error(f"加载决策记录失败: {e}")
+        decision_records = []
+    _loaded["decisions"] = True
 
 
 def save_decisions():
-    """保存决策记录"""
+    """保存决策记录完整快照"""
+    try:
+        decisions_journal.compact(decision_records)
+    except Exception as e:
+        logger.error(f"保存决策记录失败: {e}")
+
+
+def append_decision(record: Dict):
+    """追加一条决策记录"""
+    decision_records.append(record)
     try:
-        DECISIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(DECISIONS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(decision_records, f, ensure_ascii=False, indent=2)
+        decisions_journal.push([], record)
     except Exception as e:
         logger.error(f"保存决策记录失败: {e}")
 
@@ -283,7 +297,7 @@ async def start_auto_trading(request: StartTaskRequest, background_tasks: Backgr
         }
 
         active_tasks[task_id] = task
-        save_tasks()
+        save_tasks(task_id)
 
         logger.info(f"自动交易任务已启动: {task_id}")
 
@@ -334,7 +348,7 @@ async def stop_auto_trading(task_id: str):
         task["status"] = "stopped"
         task["stopped_at"] = datetime.now().isoformat()
         
-        save_tasks()
+        save_tasks(task_id)
         
         logger.info(f"自动交易任务已停止: {task_id}")
         
@@ -502,13 +516,12 @@ async def make_decision(task_id: str):
             "execution_result": execution_result
         }
         
-        decision_records.append(record)
-        save_decisions()
+        append_decision(record)
         
         # 更新任务
         task["last_decision_at"] = datetime.now().isoformat()
         task["total_trades"] += 1 if decision.action != "hold" else 0
-        save_tasks()
+        save_tasks(task_id)
         
         logger.info(f"决策完成: {task_id} - {decision.action}")
         
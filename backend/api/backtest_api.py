@@ -2,36 +2,20 @@
 回测系统 API 路由
 """
 
-from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 import pandas as pd
 import json
 import logging
-import uuid
-
-from ..backtest.engine import BacktestEngine, BacktestConfig, BacktestResult
-from ..backtest.data_loader import DataLoader, DataSource, load_stock_data
-from ..strategies.base import StrategyConfig, get_strategy_registry
-# 导入策略模块以触发策略注册
-from ..strategies import (
-    VegasADXStrategy,
-    EMABreakoutStrategy,
-    BuffettValueStrategy,
-    GrahamMarginStrategy,
-    LynchGrowthStrategy,
-    MACDCrossoverStrategy,
-    BollingerBreakoutStrategy,
-    TurtleTradingStrategy,
-    DragonLeaderStrategy,
-    MartingaleRefinedStrategy,
-    ScalpingBladeStrategy,
-    TridentStrategy,
-    SentimentResonanceStrategy,
-    DebateWeightedStrategy,
-    LimitUpTradingStrategy,
-    VolumePriceSurgeStrategy
+
+from ..backtest.data_loader import DataLoader, DataSource
+from ..backtest.job_runner import (
+    BacktestCancelled,
+    BacktestDataNotFound,
+    StrategyNotFound,
+    get_backtest_job_runner
 )
 
 logger = logging.getLogger(__name__)
@@ -65,7 +49,11 @@ class BacktestResponse(BaseModel):
 class BacktestStatusResponse(BaseModel):
     """回测状态响应"""
     task_id: str
-    status: str  # pending, running, completed, failed
+    status: str  # pending, running, completed, failed, cancelled
+    progress: float = 0.0
+    message: Optional[str] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
 
 
 class StrategyInfo(BaseModel):
@@ -86,38 +74,15 @@ class StrategiesResponse(BaseModel):
     total: int
 
 
-# 存储回测任务状态（实际应用中应使用 Redis 或数据库）
-backtest_tasks: Dict[str, BacktestStatusResponse] = {}
-
-
 @router.post("/run", response_model=BacktestResponse)
-async def run_backtest(
-    request: BacktestRequest,
-    background_tasks: BackgroundTasks
-):
+async def run_backtest(request: BacktestRequest):
     """
     运行回测
     
-    异步执行回测任务，返回任务ID供查询状态
+    回测任务在独立进程池中执行，返回任务ID供查询状态，进度通过 SSE 日志流推送
     """
     try:
-        # 生成任务ID
-        task_id = str(uuid.uuid4())
-        
-        # 初始化任务状态
-        backtest_tasks[task_id] = BacktestStatusResponse(
-            task_id=task_id,
-            status="pending",
-            progress=0.0,
-            message="回测任务已创建，等待执行..."
-        )
-        
-        # 添加到后台任务
-        background_tasks.add_task(
-            execute_backtest,
-            task_id,
-            request
-        )
+        task_id = await get_backtest_job_runner().submit("single", request.dict())
         
         return BacktestResponse(
             task_id=task_id,
@@ -133,10 +98,65 @@ async def run_backtest(
 @router.get("/status/{task_id}", response_model=BacktestStatusResponse)
 async def get_backtest_status(task_id: str):
     """获取回测任务状态"""
-    if task_id not in backtest_tasks:
+    job = get_backtest_job_runner().get_job(task_id)
+    if not job:
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    return backtest_tasks[task_id]
+    return BacktestStatusResponse(
+        task_id=task_id,
+        status=job["status"],
+        progress=(job["progress"] or 0) / 100,
+        message=job["message"],
+        result=job["result"],
+        error=job["error"]
+    )
+
+
+@router.get("/jobs", response_model=Dict)
+async def list_backtest_jobs(
+    limit: int = Query(50, description="返回数量限制"),
+    status: Optional[str] = Query(None, description="任务状态筛选")
+):
+    """最近的回测任务列表"""
+    runner = get_backtest_job_runner()
+    return {
+        "success": True,
+        "jobs": runner.list_jobs(limit, status),
+        "stats": runner.get_stats()
+    }
+
+
+@router.get("/jobs/{job_id}", response_model=Dict)
+async def get_backtest_job(job_id: str):
+    """按ID获取回测任务及结果"""
+    job = get_backtest_job_runner().get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return {"success": True, "job": job}
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=Dict)
+async def cancel_backtest_job(job_id: str):
+    """取消回测任务"""
+    runner = get_backtest_job_runner()
+    if not await runner.cancel(job_id):
+        job = runner.get_job(job_id, include_result=False)
+        if not job:
+            raise HTTPException(status_code=404, detail="任务不存在")
+        return {"success": False, "message": f"任务已结束: {job['status']}"}
+    return {"success": True, "message": "已请求取消回测任务"}
+
+
+async def _run_backtest_job(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """在进程池中执行回测并等待结果，异常转换为 HTTP 错误"""
+    try:
+        return await get_backtest_job_runner().run(kind, params)
+    except BacktestDataNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except StrategyNotFound as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except BacktestCancelled:
+        raise HTTPException(status_code=409, detail="回测已取消")
 
 
 @router.post("/quick", response_model=Dict)
@@ -146,82 +166,17 @@ async def quick_backtest(request: BacktestRequest):
     
     适用于小数据量的快速回测，直接返回结果
     """
-    try:
-        # 兼容处理：优先使用strategy_id，其次使用strategy_name
-        strategy_name = request.strategy_id or request.strategy_name
-        if not strategy_name:
-            raise HTTPException(status_code=400, detail="必须提供 strategy_id 或 strategy_name")
-        
-        # 加载数据
-        logger.info(f"加载数据: {request.stock_code}, 日期范围: {request.start_date} - {request.end_date}")
-        loader = DataLoader(DataSource.AKSHARE)
-        try:
-            data = loader.load_stock_data(
-                request.stock_code,
-                request.start_date,
-                request.end_date
-            )
-            logger.info(f"数据加载结果: data is None={data is None}, empty={data.empty if data is not None else 'N/A'}")
-        except Exception as load_error:
-            logger.error(f"数据加载异常: {load_error}", exc_info=True)
-            raise HTTPException(status_code=500, detail=f"数据加载失败: {str(load_error)}")
+    # 兼容处理：优先使用strategy_id，其次使用strategy_name
+    if not (request.strategy_id or request.strategy_name):
+        raise HTTPException(status_code=400, detail="必须提供 strategy_id 或 strategy_name")
 
-        if data is None or data.empty:
-            logger.warning(f"无法获取股票数据: {request.stock_code}")
-            raise HTTPException(status_code=404, detail=f"无法获取股票数据: {request.stock_code}")
-        
-        # 添加技术指标
-        data = loader.add_technical_indicators(data)
-        
-        # 创建策略
-        strategy_config = StrategyConfig(
-            name=strategy_name,
-            parameters=request.strategy_params or {},
-            risk_params=request.risk_params or {}
-        )
-        
-        strategy = create_strategy(strategy_name, strategy_config)
-        if not strategy:
-            raise HTTPException(status_code=400, detail=f"未找到策略: {strategy_name}")
-        
-        # 创建回测引擎
-        backtest_config = BacktestConfig(
-            initial_capital=request.initial_capital,
-            start_date=request.start_date,
-            end_date=request.end_date,
-            use_ai_agents=request.use_ai_agents,
-            ai_agent_names=request.ai_agent_names or []
-        )
-        
-        engine = BacktestEngine(backtest_config)
-        
-        # 运行回测
-        result = engine.run(strategy, data, request.stock_code)
+    try:
+        logger.info(f"快速回测: {request.stock_code}, 日期范围: {request.start_date} - {request.end_date}")
+        result = await _run_backtest_job("single", request.dict())
         
-        # 返回结果
         return {
             "success": True,
-            "summary": {
-                "stock_code": request.stock_code,
-                "strategy": strategy_name,
-                "start_date": request.start_date,
-                "end_date": request.end_date,
-                "initial_capital": request.initial_capital,
-                "final_capital": result.final_capital,
-                "total_return": f"{((result.final_capital / request.initial_capital) - 1) * 100:.2f}%"
-            },
-            "metrics": result.metrics.to_dict(),
-            "equity_curve": result.equity_curve.reset_index().to_dict(orient="records")[-100:],  # 最近100个数据点
-            "trades": [
-                {
-                    "timestamp": t.timestamp.isoformat(),
-                    "side": t.side,
-                    "price": t.price,
-                    "quantity": t.quantity,
-                    "commission": t.commission
-                }
-                for t in result.trades[-20:]  # 最近20笔交易
-            ]
+            **result
         }
         
     except HTTPException:
@@ -336,59 +291,17 @@ async def compare_strategies(
     比较多个策略的回测结果
     """
     try:
-        # 加载数据
-        loader = DataLoader(DataSource.AKSHARE)
-        data = loader.load_stock_data(stock_code, start_date, end_date)
-        
-        if data is None or data.empty:
-            raise HTTPException(status_code=404, detail="无法获取股票数据")
-        
-        # 添加技术指标
-        data = loader.add_technical_indicators(data)
-        
-        results = {}
-        
-        for strategy_name in strategy_names:
-            try:
-                # 创建策略
-                strategy_config = StrategyConfig(name=strategy_name)
-                strategy = create_strategy(strategy_name, strategy_config)
-                
-                if not strategy:
-                    logger.warning(f"策略不存在: {strategy_name}")
-                    continue
-                
-                # 创建回测引擎
-                backtest_config = BacktestConfig(
-                    initial_capital=initial_capital,
-                    start_date=start_date,
-                    end_date=end_date
-                )
-                
-                engine = BacktestEngine(backtest_config)
-                
-                # 运行回测
-                result = engine.run(strategy, data.copy(), stock_code)
-                
-                # 保存结果
-                results[strategy_name] = {
-                    "metrics": result.metrics.to_dict(),
-                    "final_capital": result.final_capital,
-                    "total_return": ((result.final_capital / initial_capital) - 1),
-                    "trade_count": len(result.trades)
-                }
-                
-            except Exception as e:
-                logger.error(f"策略 {strategy_name} 回测失败: {e}")
-                results[strategy_name] = {
-                    "error": str(e)
-                }
+        result = await _run_backtest_job("compare", {
+            "stock_code": stock_code,
+            "strategy_names": strategy_names,
+            "start_date": start_date,
+            "end_date": end_date,
+            "initial_capital": initial_capital
+        })
         
         return {
             "success": True,
-            "stock_code": stock_code,
-            "period": f"{start_date} to {end_date}",
-            "comparison": results
+            **result
         }
         
     except HTTPException:
@@ -398,82 +311,6 @@ async def compare_strategies(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def execute_backtest(task_id: str, request: BacktestRequest):
-    """后台执行回测任务"""
-    try:
-        # 兼容处理
-        strategy_name = request.strategy_id or request.strategy_name
-        if not strategy_name:
-            raise ValueError("必须提供 strategy_id 或 strategy_name")
-        
-        # 更新状态
-        backtest_tasks[task_id].status = "running"
-        backtest_tasks[task_id].progress = 0.1
-        backtest_tasks[task_id].message = "正在加载数据..."
-        
-        # 加载数据
-        loader = DataLoader(DataSource.AKSHARE)
-        data = loader.load_stock_data(
-            request.stock_code,
-            request.start_date,
-            request.end_date
-        )
-        
-        if data is None or data.empty:
-            raise ValueError("无法获取股票数据")
-        
-        # 更新进度
-        backtest_tasks[task_id].progress = 0.3
-        backtest_tasks[task_id].message = "正在计算技术指标..."
-        
-        # 添加技术指标
-        data = loader.add_technical_indicators(data)
-        
-        # 创建策略
-        backtest_tasks[task_id].progress = 0.4
-        backtest_tasks[task_id].message = "正在初始化策略..."
-        
-        strategy_config = StrategyConfig(
-            name=strategy_name,
-            parameters=request.strategy_params or {},
-            risk_params=request.risk_params or {}
-        )
-        
-        strategy = create_strategy(strategy_name, strategy_config)
-        if not strategy:
-            raise ValueError(f"未找到策略: {strategy_name}")
-        
-        # 创建回测引擎
-        backtest_tasks[task_id].progress = 0.5
-        backtest_tasks[task_id].message = "正在运行回测..."
-        
-        backtest_config = BacktestConfig(
-            initial_capital=request.initial_capital,
-            start_date=request.start_date,
-            end_date=request.end_date,
-            use_ai_agents=request.use_ai_agents,
-            ai_agent_names=request.ai_agent_names or []
-        )
-        
-        engine = BacktestEngine(backtest_config)
-        
-        # 运行回测
-        result = engine.run(strategy, data, request.stock_code)
-        
-        # 更新结果
-        backtest_tasks[task_id].status = "completed"
-        backtest_tasks[task_id].progress = 1.0
-        backtest_tasks[task_id].message = "回测完成"
-        backtest_tasks[task_id].result = result.to_dict()
-        
-    except Exception as e:
-        logger.error(f"回测任务 {task_id} 失败: {e}", exc_info=True)
-        backtest_tasks[task_id].status = "failed"
-        backtest_tasks[task_id].progress = 0.0
-        backtest_tasks[task_id].message = "回测失败"
-        backtest_tasks[task_id].error = str(e)
-
-
 @router.get("/strategies", response_model=StrategiesResponse)
 async def get_strategies():
     """
@@ -528,41 +365,3 @@ async def get_strategies():
     except Exception as e:
         logger.error(f"获取策略列表失败: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"获取策略列表失败: {str(e)}")
-
-
-def create_strategy(name: str, config: StrategyConfig):
-    """创建策略实例"""
-    # 策略映射表 - 直接映射策略ID到策略类
-    strategy_map = {
-        "vegas_adx": VegasADXStrategy,
-        "ema_breakout": EMABreakoutStrategy,
-        "buffett_value": BuffettValueStrategy,
-        "graham_margin": GrahamMarginStrategy,
-        "lynch_growth": LynchGrowthStrategy,
-        "macd_crossover": MACDCrossoverStrategy,
-        "bollinger_breakout": BollingerBreakoutStrategy,
-        "turtle_trading": TurtleTradingStrategy,
-        "dragon_leader": DragonLeaderStrategy,
-        "martingale_refined": MartingaleRefinedStrategy,
-        "scalping_blade": ScalpingBladeStrategy,
-        "trident": TridentStrategy,
-        "sentiment_resonance": SentimentResonanceStrategy,
-        "debate_weighted": DebateWeightedStrategy,
-        "limit_up_trading": LimitUpTradingStrategy,
-        "volume_price_surge": VolumePriceSurgeStrategy,
-    }
-
-    # 先从映射表查找
-    if name in strategy_map:
-        logger.info(f"从映射表创建策略: {name}")
-        return strategy_map[name](config)
-
-    # 再从注册表获取
-    registry = get_strategy_registry()
-    strategy = registry.create_strategy(name, config)
-    if strategy:
-        logger.info(f"从注册表创建策略: {name}")
-        return strategy
-
-    logger.warning(f"未找到策略: {name}")
-    return None
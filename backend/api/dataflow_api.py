@@ -44,7 +44,8 @@ from backend.dataflows.risk import (
     check_suspend_status,
     is_st_stock,
     get_stock_realtime_quote,
-    analyze_stock_risk
+    analyze_stock_risk,
+    analyze_portfolio_risk
 )
 
 # 导入新闻和情绪分析模块
@@ -85,6 +86,13 @@ class UpdateMonitorRequest(BaseModel):
     code: str = Field(..., description="股票代码")
 
 
+class PortfolioRiskRequest(BaseModel):
+    """组合风险分析请求"""
+    codes: List[str] = Field(..., description="股票代码列表，如['600519.SH', '000001.SZ']")
+    weights: Optional[Dict[str, float]] = Field(None, description="持仓权重，默认等权")
+    lookback_days: int = Field(252, ge=20, le=1000, description="回看交易日数")
+
+
 # ==================== 全局状态 ====================
 
 # 导入数据库服务
@@ -721,6 +729,8 @@ async def get_news(source: Optional[str] = None, limit: int = 50):
         # 优先使用统一新闻监控中心
         try:
             from backend.services.news_center import get_news_monitor_center
+            from backend.services.background_worker import sync_shared_news_cache
+            await sync_shared_news_cache()
             monitor = get_news_monitor_center()
 
             # 从监控中心获取新闻
@@ -897,6 +907,8 @@ async def get_stock_news(ts_code: str, limit: int = 20):
         # 优先使用统一新闻监控中心
         try:
             from backend.services.news_center import get_news_monitor_center
+            from backend.services.background_worker import sync_shared_news_cache
+            await sync_shared_news_cache()
             monitor = get_news_monitor_center()
 
             # 从监控中心获取该股票相关新闻
@@ -1030,6 +1042,28 @@ async def get_stock_risk(ts_code: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/risk/portfolio")
+@log_api_call("组合风险分析")
+async def get_portfolio_risk(request: PortfolioRiskRequest):
+    """
+    批量/组合行情风险分析：各股票波动率、VaR、CVaR、最大回撤，
+    组合协方差、成分 VaR 与相关性聚类（收益矩阵装配和计算在线程中执行）
+    """
+    if not request.codes:
+        raise HTTPException(status_code=400, detail="股票代码列表不能为空")
+    try:
+        result = await asyncio.to_thread(
+            analyze_portfolio_risk, request.codes, request.weights, request.lookback_days
+        )
+        return {
+            "success": True,
+            **sanitize_for_json(result)
+        }
+    except Exception as e:
+        logger.error(f"组合风险分析失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/stock/comprehensive/{ts_code}")
 @log_api_call("获取股票综合数据")
 async def get_stock_comprehensive(ts_code: str, force_update: bool = False):
@@ -4,6 +4,8 @@ from typing import Optional, List, Dict
 from pydantic import BaseModel
 import logging
 
+from backend.services.background_worker import ServiceNotOwned, call_background_service
+
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/news-center", tags=["news-center"])
 
@@ -34,6 +36,16 @@ def get_monitor():
     from backend.services.news_center import get_news_monitor_center
     return get_news_monitor_center()
 
+async def get_synced_monitor():
+    """获取新闻监控中心；本进程没有运行监控（PROCESS_ROLE=api）时先同步后台进程发布的新闻快照"""
+    from backend.services.background_worker import sync_shared_news_cache
+    await sync_shared_news_cache()
+    return get_monitor()
+
+async def call_monitor(name: str, **kwargs):
+    """在运行后台服务的进程中调用新闻监控中心（本进程不是后台主进程时经 Redis 转发）"""
+    return await call_background_service("news_monitor_center", name, **kwargs)
+
 def get_storage():
     """获取新闻存储服务"""
     from backend.services.news_center.news_storage import get_news_storage
@@ -49,7 +61,7 @@ async def get_latest_news(
     stock_code: Optional[str] = Query(None)
 ):
     try:
-        monitor = get_monitor()
+        monitor = await get_synced_monitor()
         news = monitor.get_latest_news(
             limit=limit,
             urgency=urgency,
@@ -64,7 +76,7 @@ async def get_latest_news(
 @router.get("/urgent")
 async def get_urgent_news(limit: int = Query(500, ge=1, le=5000, description="返回数量限制")):
     try:
-        monitor = get_monitor()
+        monitor = await get_synced_monitor()
         news = monitor.get_urgent_news(limit=limit)
         return {"success": True, "data": news, "count": len(news)}
     except Exception as e:
@@ -74,7 +86,7 @@ async def get_urgent_news(limit: int = Query(500, ge=1, le=5000, description="
 @router.get("/stock/{stock_code}")
 async def get_news_for_stock(stock_code: str, limit: int = Query(500, ge=1, le=5000, description="返回数量限制")):
     try:
-        monitor = get_monitor()
+        monitor = await get_synced_monitor()
         news = monitor.get_news_for_stock(stock_code, limit=limit)
         return {"success": True, "data": news, "count": len(news), "stock_code": stock_code}
     except Exception as e:
@@ -240,8 +252,14 @@ async def fetch_hot_stocks_news():
 @router.get("/stats")
 async def get_stats():
     try:
-        monitor = get_monitor()
-        stats = monitor.get_stats()
+        from backend.services.background_worker import get_worker_state
+        try:
+            stats = await call_monitor("get_stats")
+        except ServiceNotOwned:
+            stats = get_monitor().get_stats()
+        if not get_monitor().is_running:
+            # 新闻监控运行在后台进程中，附上其心跳与服务状态
+            stats["worker"] = await get_worker_state()
         return {"success": True, "data": stats}
     except Exception as e:
         logger.error(f"Get stats failed: {e}")
@@ -250,9 +268,10 @@ async def get_stats():
 @router.post("/fetch")
 async def fetch_now(source_id: Optional[str] = None):
     try:
-        monitor = get_monitor()
-        await monitor.fetch_now(source_id)
+        await call_monitor("fetch_now", source_id=source_id)
         return {"success": True, "message": f"Fetch triggered for {source_id or 'all sources'}"}
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Fetch failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -260,9 +279,10 @@ async def fetch_now(source_id: Optional[str] = None):
 @router.post("/config/interval")
 async def set_interval(source_id: str, interval: int = Query(ge=10, le=3600)):
     try:
-        monitor = get_monitor()
-        monitor.set_source_interval(source_id, interval)
+        await call_monitor("set_source_interval", source_id=source_id, interval=interval)
         return {"success": True, "message": f"Set {source_id} interval to {interval}s"}
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Set interval failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -270,9 +290,10 @@ async def set_interval(source_id: str, interval: int = Query(ge=10, le=3600)):
 @router.post("/config/enable")
 async def enable_source(source_id: str, enabled: bool = True):
     try:
-        monitor = get_monitor()
-        monitor.enable_source(source_id, enabled)
+        await call_monitor("enable_source", source_id=source_id, enabled=enabled)
         return {"success": True, "message": f"Set {source_id} enabled={enabled}"}
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Enable source failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -281,9 +302,10 @@ async def enable_source(source_id: str, enabled: bool = True):
 async def cleanup():
     """清理内存缓存中的过期新闻"""
     try:
-        monitor = get_monitor()
-        count = monitor.cleanup()
+        count = await call_monitor("cleanup")
         return {"success": True, "message": f"Cleaned up {count} expired news from cache"}
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Cleanup failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -302,9 +324,10 @@ async def cleanup_database(days: int = Query(30, ge=1, le=365, description="保
 @router.post("/start")
 async def start_monitor():
     try:
-        monitor = get_monitor()
-        await monitor.start()
+        await call_monitor("start")
         return {"success": True, "message": "News monitor started"}
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Start monitor failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -312,9 +335,10 @@ async def start_monitor():
 @router.post("/stop")
 async def stop_monitor():
     try:
-        monitor = get_monitor()
-        await monitor.stop()
+        await call_monitor("stop")
         return {"success": True, "message": "News monitor stopped"}
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Stop monitor failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -325,9 +349,10 @@ async def stop_monitor():
 async def get_news_config():
     """获取新闻配置"""
     try:
-        monitor = get_monitor()
-        config = monitor.get_news_config()
+        config = await call_monitor("get_news_config")
         return {"success": True, "data": config}
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Get news config failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -336,14 +361,15 @@ async def get_news_config():
 async def update_news_config(data: Dict = Body(...)):
     """更新新闻配置"""
     try:
-        monitor = get_monitor()
-        success = monitor.update_news_config(data)
+        success = await call_monitor("update_news_config", data=data)
         if success:
             return {"success": True, "message": "Config updated"}
         else:
             raise HTTPException(status_code=400, detail="Failed to update config")
     except HTTPException:
         raise
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Update news config failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -352,15 +378,16 @@ async def update_news_config(data: Dict = Body(...)):
 async def update_source_config(source_type: str, updates: SourceConfigUpdate):
     """更新单个数据源配置"""
     try:
-        monitor = get_monitor()
         update_dict = {k: v for k, v in updates.dict().items() if v is not None}
-        success = monitor.update_source_config(source_type, update_dict)
+        success = await call_monitor("update_source_config", source_type=source_type, updates=update_dict)
         if success:
             return {"success": True, "message": f"Source {source_type} config updated"}
         else:
             raise HTTPException(status_code=400, detail=f"Source {source_type} not found or update failed")
     except HTTPException:
         raise
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Update source config failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -369,15 +396,16 @@ async def update_source_config(source_type: str, updates: SourceConfigUpdate):
 async def update_cninfo_config(updates: CninfoConfigUpdate):
     """更新巨潮配置"""
     try:
-        monitor = get_monitor()
         update_dict = {k: v for k, v in updates.dict().items() if v is not None}
-        success = monitor.update_cninfo_config(update_dict)
+        success = await call_monitor("update_cninfo_config", updates=update_dict)
         if success:
             return {"success": True, "message": "CNINFO config updated"}
         else:
             raise HTTPException(status_code=400, detail="Failed to update CNINFO config")
     except HTTPException:
         raise
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Update CNINFO config failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -386,14 +414,15 @@ async def update_cninfo_config(updates: CninfoConfigUpdate):
 async def update_hot_stocks(data: HotStocksUpdate):
     """更新热门股票列表"""
     try:
-        monitor = get_monitor()
-        success = monitor.update_hot_stocks(data.stocks)
+        success = await call_monitor("update_hot_stocks", stocks=data.stocks)
         if success:
             return {"success": True, "message": f"Hot stocks updated ({len(data.stocks)} stocks)"}
         else:
             raise HTTPException(status_code=400, detail="Failed to update hot stocks")
     except HTTPException:
         raise
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Update hot stocks failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -612,9 +641,10 @@ async def refresh_news():
     与旧API /api/unified-news/refresh 兼容
     """
     try:
-        monitor = get_monitor()
-        await monitor.fetch_now()
+        await call_monitor("fetch_now")
         return {"success": True, "message": "News refresh triggered"}
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Refresh news failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -650,15 +680,19 @@ async def health_check():
 async def search_news(
     keyword: str = Query(..., description="搜索关键词"),
     limit: int = Query(5000, ge=1, le=10000, description="返回数量限制，默认5000"),
-    hours: int = Query(72, ge=1, le=168, description="搜索最近N小时的新闻")
+    hours: int = Query(72, ge=1, le=720, description="搜索最近N小时的新闻"),
+    source: Optional[str] = Query(None, description="数据源筛选"),
+    stock_code: Optional[str] = Query(None, description="股票代码筛选")
 ):
     """
     搜索新闻（统一新闻中心使用）
-    优先从数据库搜索
+    通过本地全文索引检索数据库新闻，按相关度排序
     """
     try:
         storage = get_storage()
-        db_news = storage.search_news(keyword=keyword, limit=limit, hours=hours)
+        db_news = storage.search_news(
+            keyword=keyword, limit=limit, hours=hours, source=source, stock_code=stock_code
+        )
 
         # 格式化数据库返回的数据
         result = []
@@ -13,6 +13,7 @@ from backend.utils.tool_logging import log_api_call
 from backend.database.database import get_db
 from backend.database.services import AlertHistoryService
 from backend.services.notification_service import get_notification_service, NotificationConfig
+from backend.services.notification_dispatcher import get_notification_dispatcher
 
 logger = get_logger("api.notification")
 router = APIRouter(prefix="/api/notification", tags=["Notification"])
@@ -71,6 +72,9 @@ class SaveNotificationConfigRequest(BaseModel):
     # Bark配置
     BARK_KEY: Optional[str] = Field(None, description="Bark推送Key")
     BARK_SERVER: Optional[str] = Field(None, description="Bark服务器地址")
+    # 预警合并配置
+    NOTIFY_COALESCE_WINDOW: Optional[int] = Field(None, description="预警合并窗口（秒）")
+    NOTIFY_DIGEST_MAX_ITEMS: Optional[int] = Field(None, description="单条摘要最多包含的预警数")
 
 
 # ==================== API端点 ====================
@@ -147,6 +151,24 @@ async def get_available_channels():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/outbox/stats")
+@log_api_call("获取通知发件箱状态")
+async def get_outbox_stats():
+    """
+    获取预警通知发件箱状态
+    返回待投递/投递失败数量和合并发送统计
+    """
+    try:
+        dispatcher = get_notification_dispatcher()
+        return {
+            "success": True,
+            "stats": dispatcher.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"获取发件箱状态失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/test/email")
 @log_api_call("测试邮件通知")
 async def test_email_notification(request: TestEmailRequest):
@@ -160,7 +182,7 @@ async def test_email_notification(request: TestEmailRequest):
         service = get_notification_service()
 
         # 发送测试邮件
-        result = service.email.send(
+        result = await service.email.send_async(
             to_emails=[request.to_email],
             subject="[InvestMindPro] 测试邮件",
             content="""
@@ -9,6 +9,9 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 import uuid
 import logging
+from pathlib import Path
+
+from backend.utils.json_journal import JsonJournal
 
 logger = logging.getLogger(__name__)
 
@@ -76,7 +79,9 @@ class Order(BaseModel):
     filled_at: Optional[str]
 
 
-# ==================== 内存存储（实际应用应使用数据库） ====================
+# ==================== 存储（内存 + 追加写日志） ====================
+
+DATA_FILE = Path("backend/data/paper_trading.json")
 
 # 存储账户
 accounts: Dict[str, Dict] = {}
@@ -91,6 +96,35 @@ orders: Dict[str, List[Dict]] = {}  # account_id -> [order]
 trades: Dict[str, List[Dict]] = {}  # account_id -> [trade]
 
 
+def _snapshot() -> Dict[str, Any]:
+    """当前完整状态"""
+    return {
+        "accounts": accounts,
+        "positions": positions,
+        "orders": orders,
+        "trades": trades
+    }
+
+
+# 每笔订单只追加日志，定期压缩为快照；重启时加载快照并重放日志
+journal = JsonJournal(DATA_FILE, _snapshot)
+
+
+def load_state():
+    """从快照和日志恢复账户数据"""
+    try:
+        state = journal.load(dict)
+    except Exception as e:
+        logger.error(f"加载模拟交易数据失败: {e}")
+        return
+    for name, store in (("accounts", accounts), ("positions", positions), ("orders", orders), ("trades", trades)):
+        store.clear()
+        store.update(state.get(name, {}))
+
+
+load_state()
+
+
 # ==================== API端点 ====================
 
 @router.post("/account/create")
@@ -124,6 +158,12 @@ async def create_account(request: CreateAccountRequest):
         positions[account_id] = []
         orders[account_id] = []
         trades[account_id] = []
+
+        with journal.transaction():
+            journal.set(["accounts", account_id], account)
+            journal.set(["positions", account_id], [])
+            journal.set(["orders", account_id], [])
+            journal.set(["trades", account_id], [])
         
         logger.info(f"创建模拟账户: {account_id}")
         
@@ -347,6 +387,14 @@ async def place_order(request: PlaceOrderRequest):
         if request.account_id not in trades:
             trades[request.account_id] = []
         trades[request.account_id].append(trade)
+
+        # 追加写日志
+        account["updated_at"] = now
+        with journal.transaction():
+            journal.set(["accounts", request.account_id], account)
+            journal.set(["positions", request.account_id], positions.get(request.account_id, []))
+            journal.push(["orders", request.account_id], order)
+            journal.push(["trades", request.account_id], trade)
         
         logger.info(f"下单成功: {order_id}")
         
@@ -447,6 +495,10 @@ async def delete_account(account_id: str):
             del orders[account_id]
         if account_id in trades:
             del trades[account_id]
+
+        with journal.transaction():
+            for name in ("accounts", "positions", "orders", "trades"):
+                journal.delete([name, account_id])
         
         logger.info(f"删除模拟账户: {account_id}")
         
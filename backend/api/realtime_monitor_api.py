@@ -10,11 +10,17 @@ from datetime import datetime
 
 from backend.utils.logging_config import get_logger
 from backend.services.realtime_monitor_service import get_monitor_service, MonitorMode
+from backend.services.background_worker import ServiceNotOwned, call_background_service
 
 logger = get_logger("api.realtime_monitor")
 router = APIRouter(prefix="/api/realtime-monitor", tags=["Realtime Monitor"])
 
 
+async def call_monitor(name: str, **kwargs):
+    """在运行后台服务的进程中调用盯盘服务（本进程不是后台主进程时经 Redis 转发）"""
+    return await call_background_service("realtime_monitor", name, **kwargs)
+
+
 # ==================== 数据模型 ====================
 
 class MonitorConfigRequest(BaseModel):
@@ -57,8 +63,7 @@ async def start_monitor():
         启动结果
     """
     try:
-        service = get_monitor_service()
-        result = await service.start_monitor()
+        result = await call_monitor("start_monitor")
         
         if result.get("success"):
             logger.info("实时监控已启动")
@@ -67,6 +72,8 @@ async def start_monitor():
         
         return result
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"启动监控失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -81,14 +88,15 @@ async def stop_monitor():
         停止结果
     """
     try:
-        service = get_monitor_service()
-        result = await service.stop_monitor()
+        result = await call_monitor("stop_monitor")
         
         if result.get("success"):
             logger.info("实时监控已停止")
         
         return result
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"停止监控失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -103,14 +111,15 @@ async def get_monitor_status():
         监控状态信息
     """
     try:
-        service = get_monitor_service()
-        status = service.get_status()
+        status = await call_monitor("get_status")
         
         return {
             "success": True,
             **status
         }
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"获取状态失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -125,17 +134,17 @@ async def trigger_check():
         触发结果
     """
     try:
-        service = get_monitor_service()
-        
         # 直接执行一次检查
-        await service._execute_monitor_check()
+        await call_monitor("_execute_monitor_check")
         
         return {
             "success": True,
             "message": "已触发监控检查",
-            "stats": service.stats
+            "stats": await call_monitor("stats")
         }
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"触发检查失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -152,14 +161,15 @@ async def get_config():
         配置信息
     """
     try:
-        service = get_monitor_service()
-        config = service.get_config()
+        config = await call_monitor("get_config")
         
         return {
             "success": True,
             "config": config
         }
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"获取配置失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -177,8 +187,8 @@ async def update_config(request: MonitorConfigRequest):
         更新结果
     """
     try:
-        service = get_monitor_service()
-        result = service.update_config(
+        result = await call_monitor(
+            "update_config",
             monitor_interval=request.monitor_interval,
             enable_ai_decision=request.enable_ai_decision,
             enable_auto_trade=request.enable_auto_trade,
@@ -190,6 +200,8 @@ async def update_config(request: MonitorConfigRequest):
         
         return result
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"更新配置失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -206,8 +218,7 @@ async def list_stocks():
         股票列表
     """
     try:
-        service = get_monitor_service()
-        stocks = service.monitored_stocks
+        stocks = await call_monitor("monitored_stocks")
         
         # 获取每只股票的当前行情
         stocks_with_price = []
@@ -235,6 +246,8 @@ async def list_stocks():
             "total": len(stocks)
         }
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"获取股票列表失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -252,8 +265,8 @@ async def add_stock(request: AddStockRequest):
         添加结果
     """
     try:
-        service = get_monitor_service()
-        result = service.add_stock(
+        result = await call_monitor(
+            "add_stock",
             stock_code=request.stock_code,
             stop_loss_rate=request.stop_loss_rate,
             take_profit_rate=request.take_profit_rate,
@@ -264,6 +277,8 @@ async def add_stock(request: AddStockRequest):
         
         return result
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"添加股票失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -281,11 +296,11 @@ async def batch_add_stocks(request: BatchAddStocksRequest):
         添加结果
     """
     try:
-        service = get_monitor_service()
         results = []
         
         for stock in request.stocks:
-            result = service.add_stock(
+            result = await call_monitor(
+                "add_stock",
                 stock_code=stock.stock_code,
                 stop_loss_rate=stock.stop_loss_rate,
                 take_profit_rate=stock.take_profit_rate,
@@ -307,6 +322,8 @@ async def batch_add_stocks(request: BatchAddStocksRequest):
             "total": len(request.stocks)
         }
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"批量添加股票失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -324,14 +341,15 @@ async def remove_stock(stock_code: str):
         移除结果
     """
     try:
-        service = get_monitor_service()
-        result = service.remove_stock(stock_code)
+        result = await call_monitor("remove_stock", stock_code=stock_code)
         
         if result.get("success"):
             logger.info(f"移除监控股票: {stock_code}")
         
         return result
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"移除股票失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -350,8 +368,8 @@ async def update_stock_config(stock_code: str, request: StockConfigRequest):
         更新结果
     """
     try:
-        service = get_monitor_service()
-        result = service.update_stock_config(
+        result = await call_monitor(
+            "update_stock_config",
             stock_code=stock_code,
             stop_loss_rate=request.stop_loss_rate,
             take_profit_rate=request.take_profit_rate,
@@ -363,6 +381,8 @@ async def update_stock_config(stock_code: str, request: StockConfigRequest):
         
         return result
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"更新股票配置失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -388,12 +408,13 @@ async def sync_from_positions(
     try:
         from backend.api.trading_api import simulator
         
-        service = get_monitor_service()
+        monitored_stocks = await call_monitor("monitored_stocks")
         added = []
         
         for stock_code in simulator.positions.keys():
-            if stock_code not in service.monitored_stocks:
-                service.add_stock(
+            if stock_code not in monitored_stocks:
+                await call_monitor(
+                    "add_stock",
                     stock_code=stock_code,
                     stop_loss_rate=stop_loss_rate,
                     take_profit_rate=take_profit_rate
@@ -406,9 +427,11 @@ async def sync_from_positions(
             "success": True,
             "message": f"已同步 {len(added)} 只股票",
             "added": added,
-            "total_monitored": len(service.monitored_stocks)
+            "total_monitored": len(monitored_stocks) + len(added)
         }
         
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"同步持仓失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -442,10 +465,14 @@ async def websocket_endpoint(websocket: WebSocket):
     service.register_event_callback(event_callback)
     
     try:
-        # 发送初始状态
+        # 发送初始状态（盯盘服务不可达时附带错误信息）
+        try:
+            status = await call_monitor("get_status")
+        except ServiceNotOwned as e:
+            status = {"error": str(e)}
         await websocket.send_json({
             "type": "connected",
-            "data": service.get_status(),
+            "data": status,
             "timestamp": datetime.now().isoformat()
         })
         
@@ -467,18 +494,18 @@ async def websocket_endpoint(websocket: WebSocket):
                 elif cmd_type == "get_status":
                     await websocket.send_json({
                         "type": "status",
-                        "data": service.get_status(),
+                        "data": await call_monitor("get_status"),
                         "timestamp": datetime.now().isoformat()
                     })
                 elif cmd_type == "start":
-                    result = await service.start_monitor()
+                    result = await call_monitor("start_monitor")
                     await websocket.send_json({
                         "type": "start_result",
                         "data": result,
                         "timestamp": datetime.now().isoformat()
                     })
                 elif cmd_type == "stop":
-                    result = await service.stop_monitor()
+                    result = await call_monitor("stop_monitor")
                     await websocket.send_json({
                         "type": "stop_result",
                         "data": result,
@@ -487,6 +514,12 @@ async def websocket_endpoint(websocket: WebSocket):
                     
             except json.JSONDecodeError:
                 pass
+            except ServiceNotOwned as e:
+                await websocket.send_json({
+                    "type": "error",
+                    "data": {"success": False, "error": str(e)},
+                    "timestamp": datetime.now().isoformat()
+                })
                 
     except WebSocketDisconnect:
         logger.info("WebSocket 连接断开")
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+API 路由清单与按需加载
+所有业务路由在清单中按功能组登记（模块路径 + 路由前缀），服务启动时只登记前缀，
+第一次有请求命中某个前缀时才导入对应模块并挂载路由，akshare/tushare/chromadb 等重量级依赖随之延迟导入。
+
+配置（环境变量）：
+    LAZY_ROUTERS=false               启动时全部导入（原有行为）
+    DISABLED_FEATURE_GROUPS=news,... 不挂载这些功能组的路由（请求返回 404）
+"""
+import asyncio
+import importlib
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# 启动报告中单独标注的重量级依赖
+HEAVY_PACKAGES = ("akshare", "tushare", "chromadb", "sentence_transformers", "talib", "torch",
+                  "transformers", "pandas", "numpy", "sqlalchemy", "langchain", "openai", "dashscope")
+
+# 请求这些路径时加载全部路由，保证接口文档完整
+DOCS_PATHS = ("/docs", "/redoc", "/openapi.json")
+
+FEATURE_GROUPS = ("system", "analysis", "news", "market", "trading")
+
+
+@dataclass(frozen=True)
+class RouterSpec:
+    """路由登记项"""
+    module: str                 # 模块路径
+    prefix: str                 # 路由前缀（按前缀匹配请求）
+    group: str                  # 功能组
+    attr: str = "router"        # 模块中的路由对象名
+    eager: bool = False         # 启动时立即加载（无前缀的路由）
+
+
+ROUTER_MANIFEST: List[RouterSpec] = [
+    # 系统、配置、监控、推送
+    RouterSpec("backend.api.system_api", "/api/system", "system"),
+    RouterSpec("backend.api.llm_config_api", "/api/llm-config", "system"),
+    RouterSpec("backend.api.api_monitor_api", "/api/monitor", "system"),
+    RouterSpec("backend.api.datasource_api", "/api/datasource", "system"),
+    RouterSpec("backend.api.data_source_health_api", "/api/health", "system"),
+    RouterSpec("backend.api.dataflow_api", "/api/dataflow", "system"),
+    RouterSpec("backend.api.notification_api", "/api/notification", "system"),
+    RouterSpec("backend.api.alert_api", "/api/alerts", "system"),
+    RouterSpec("backend.api.sse_api", "/api/sse", "system"),
+    RouterSpec("backend.api.websocket_api", "", "system", eager=True),
+    # 智能体分析
+    RouterSpec("backend.api.agents_api", "/api/agents", "analysis"),
+    RouterSpec("backend.api.agent_config_api", "/api/agents/config", "analysis"),
+    RouterSpec("backend.api.agent_logs_api", "/api/agent-logs", "analysis"),
+    RouterSpec("backend.api.analysis_session_api", "/api/analysis", "analysis"),
+    RouterSpec("backend.api.analysis_session_db_api", "/api/analysis/db", "analysis"),
+    RouterSpec("backend.api.async_analysis_api", "/api/async-analysis", "analysis"),
+    RouterSpec("backend.api.debate_api", "/api/debate", "analysis"),
+    RouterSpec("backend.api.documents_api", "/api/documents", "analysis"),
+    RouterSpec("backend.api.report_api", "/api/report", "analysis"),
+    RouterSpec("backend.api.verification_api", "/api/verification", "analysis"),
+    RouterSpec("backend.api.tracking_api", "/api/tracking", "analysis"),
+    # 新闻
+    RouterSpec("backend.api.news_api", "/api/news", "news"),
+    RouterSpec("backend.api.unified_news_api_endpoint", "/api/unified-news", "news"),
+    RouterSpec("backend.api.news_center_api", "/api/news-center", "news"),
+    RouterSpec("backend.api.cninfo_api", "/api/cninfo", "news"),
+    # 行情与市场数据
+    RouterSpec("backend.api.kline_api", "/api/kline", "market"),
+    RouterSpec("backend.api.akshare_data_api", "/api/akshare", "market"),
+    RouterSpec("backend.api.market_data_api", "/api/market", "market"),
+    RouterSpec("backend.api.providers_api", "/api/providers", "market"),
+    RouterSpec("backend.api.longhubang_api", "/api/longhubang", "market"),
+    RouterSpec("backend.api.wencai_api", "/api/wencai", "market"),
+    RouterSpec("backend.api.sector_rotation_api", "/api/sector-rotation", "market"),
+    RouterSpec("backend.api.sentiment_api", "/api/sentiment", "market"),
+    RouterSpec("backend.api.realtime_monitor_api", "/api/realtime-monitor", "market"),
+    # 交易、策略、回测
+    RouterSpec("backend.api.trading_api", "/api/trading", "trading"),
+    RouterSpec("backend.api.auto_trading_api", "/api/auto-trading", "trading"),
+    RouterSpec("backend.api.trading_llm_config_api", "/api/trading-llm-config", "trading"),
+    RouterSpec("backend.api.strategy_api", "/api/strategy", "trading"),
+    RouterSpec("backend.api.strategy_selection_api", "/api/strategy-selection", "trading"),
+    RouterSpec("backend.api.backtest_api", "/api/backtest", "trading"),
+    RouterSpec("backend.api.scheduler_api", "/api/scheduler", "trading"),
+]
+
+
+def get_disabled_groups() -> List[str]:
+    """配置中禁用的功能组"""
+    value = os.getenv("DISABLED_FEATURE_GROUPS", "")
+    return [g.strip().lower() for g in value.split(",") if g.strip()]
+
+
+def is_group_enabled(group: str) -> bool:
+    """功能组是否启用（用于同时跳过该组的后台服务）"""
+    return group not in get_disabled_groups()
+
+
+def _memory_mb() -> Optional[float]:
+    """当前进程常驻内存（MB），不支持的平台返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class LazyRouterLoader:
+    """按清单挂载路由：立即加载或登记前缀待首次请求时加载"""
+
+    def __init__(self, app: FastAPI, manifest: List[RouterSpec] = ROUTER_MANIFEST):
+        self.app = app
+        self.manifest = manifest
+        self.lazy = os.getenv("LAZY_ROUTERS", "true").lower() == "true"
+        self.pending: Dict[str, RouterSpec] = {}
+        self.loaded: Dict[str, Dict[str, Any]] = {}
+        self.failed: Dict[str, str] = {}
+        self._failed_specs: Dict[str, RouterSpec] = {}
+        self.disabled: List[RouterSpec] = []
+        self._insert_at = 0
+        self._prefix_locks: Dict[str, asyncio.Lock] = {}
+
+    def mount(self):
+        """在原来注册路由的位置挂载清单中的路由"""
+        self._insert_at = len(self.app.router.routes)
+        disabled_groups = get_disabled_groups()
+        for spec in self.manifest:
+            if spec.group in disabled_groups:
+                self.disabled.append(spec)
+            elif self.lazy and not spec.eager and spec.prefix:
+                self.pending[spec.prefix] = spec
+            else:
+                self._load(spec)
+
+    def match(self, path: str) -> List[RouterSpec]:
+        """请求路径命中的待加载路由（前缀嵌套时一并加载，如 /api/agents 与 /api/agents/config）"""
+        if path in DOCS_PATHS:
+            return list(self.pending.values())
+        candidates = list(self.pending.items()) + list(self._failed_specs.items())
+        return [spec for prefix, spec in candidates if path == prefix or path.startswith(prefix + "/")]
+
+    def load(self, specs: List[RouterSpec]) -> List[str]:
+        """加载路由，返回加载失败的模块"""
+        errors = []
+        for spec in specs:
+            if self.pending.pop(spec.prefix, None) is not None:
+                self._load(spec)
+            if spec.module in self.failed:
+                errors.append(spec.module)
+        return errors
+
+    async def aload(self, specs: List[RouterSpec]) -> List[str]:
+        """
+        请求路径上的加载：模块在线程中导入，不阻塞事件循环；挂载路由仍在事件循环中进行
+
+        同一前缀同时只有一个请求在导入，其余请求等待导入完成后直接使用已挂载的路由
+        """
+        errors = []
+        for spec in specs:
+            lock = self._prefix_locks.setdefault(spec.prefix, asyncio.Lock())
+            async with lock:
+                if spec.prefix in self.pending:
+                    started = time.perf_counter()
+                    modules_before = set(sys.modules)
+                    try:
+                        router = await asyncio.to_thread(self._import, spec)
+                    except Exception as e:
+                        if self.pending.pop(spec.prefix, None) is not None:
+                            self._record_failure(spec, e)
+                    else:
+                        # 导入期间可能已被同步的 load() 挂载
+                        if self.pending.pop(spec.prefix, None) is not None:
+                            self._mount(spec, router, started, modules_before)
+            if spec.module in self.failed:
+                errors.append(spec.module)
+        return errors
+
+    def load_all(self):
+        self.load(list(self.pending.values()))
+
+    @staticmethod
+    def _import(spec: RouterSpec):
+        return getattr(importlib.import_module(spec.module), spec.attr)
+
+    def _record_failure(self, spec: RouterSpec, error: Exception):
+        self.failed[spec.module] = str(error)
+        self._failed_specs[spec.prefix] = spec
+        logger.error(f"路由模块加载失败 {spec.module}: {error}", exc_info=error)
+
+    def _load(self, spec: RouterSpec):
+        """导入模块并挂载路由"""
+        started = time.perf_counter()
+        modules_before = set(sys.modules)
+        try:
+            router = self._import(spec)
+        except Exception as e:
+            self._record_failure(spec, e)
+            return
+        self._mount(spec, router, started, modules_before)
+
+    def _mount(self, spec: RouterSpec, router, started: float, modules_before: set):
+        """挂载路由，记录导入耗时、新导入模块数和重量级依赖"""
+        # include_router 追加在末尾，移回原注册位置，保持与应用自身路由的匹配顺序
+        count = len(self.app.router.routes)
+        self.app.include_router(router)
+        new_routes = self.app.router.routes[count:]
+        del self.app.router.routes[count:]
+        self.app.router.routes[self._insert_at:self._insert_at] = new_routes
+        self._insert_at += len(new_routes)
+        self.app.openapi_schema = None
+
+        new_modules = set(sys.modules) - modules_before
+        self.loaded[spec.module] = {
+            "group": spec.group,
+            "prefix": spec.prefix,
+            "routes": len(new_routes),
+            "seconds": round(time.perf_counter() - started, 3),
+            "modules": len(new_modules),
+            "heavy": [p for p in HEAVY_PACKAGES if p in new_modules],
+            "on_demand": self.lazy and bool(spec.prefix) and not spec.eager
+        }
+
+    def get_report(self, import_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """启动/加载报告"""
+        loaded = sorted(self.loaded.items(), key=lambda item: item[1]["seconds"], reverse=True)
+        return {
+            "lazy": self.lazy,
+            "import_seconds": round(import_seconds, 3) if import_seconds is not None else None,
+            "memory_mb": _memory_mb(),
+            "loaded_heavy_packages": [p for p in HEAVY_PACKAGES if p in sys.modules],
+            "loaded": [{"module": module, **info} for module, info in loaded],
+            "pending": sorted(spec.module for spec in self.pending.values()),
+            "disabled_groups": get_disabled_groups(),
+            "disabled": sorted(spec.module for spec in self.disabled),
+            "failed": self.failed
+        }
+
+    def format_report(self, import_seconds: Optional[float] = None, top: int = 10) -> str:
+        """启动时打印的导入耗时报告"""
+        report = self.get_report(import_seconds)
+        lines = [
+            f"📦 路由加载: 已加载 {len(report['loaded'])} 个，按需加载 {len(report['pending'])} 个，"
+            f"已禁用 {len(report['disabled'])} 个{'（' + ','.join(report['disabled_groups']) + '）' if report['disabled_groups'] else ''}",
+            f"⏱️ 模块导入耗时 {report['import_seconds']}s，内存 {report['memory_mb']}MB，"
+            f"已导入重量级依赖: {', '.join(report['loaded_heavy_packages']) or '无'}"
+        ]
+        for item in report["loaded"][:top]:
+            heavy = f" [{', '.join(item['heavy'])}]" if item["heavy"] else ""
+            lines.append(f"   {item['seconds']:>6.3f}s  {item['module']}{heavy}")
+        for module, error in report["failed"].items():
+            lines.append(f"   ❌ {module}: {error}")
+        return "\n".join(lines)
+
+
+class LazyRouterMiddleware:
+    """ASGI 中间件：请求命中待加载前缀时先加载对应路由再继续处理（模块在线程中导入，不阻塞其他请求）"""
+
+    def __init__(self, app, loader: LazyRouterLoader):
+        self.app = app
+        self.loader = loader
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and (self.loader.pending or self.loader.failed):
+            specs = self.loader.match(scope["path"])
+            if specs:
+                errors = await self.loader.aload(specs)
+                if errors and scope["type"] == "http" and len(errors) == len(specs):
+                    response = JSONResponse(
+                        {"detail": f"模块加载失败: {', '.join(errors)}"},
+                        status_code=503
+                    )
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
@@ -7,7 +7,7 @@ from fastapi import APIRouter, HTTPException
 from typing import Dict, Any
 
 from backend.utils.logging_config import get_logger
-from backend.services.scheduler_service import get_scheduler
+from backend.services.background_worker import ServiceNotOwned, call_background_service
 
 logger = get_logger("api.scheduler")
 
@@ -23,11 +23,12 @@ async def get_scheduler_status():
         调度器状态信息
     """
     try:
-        scheduler = get_scheduler()
         return {
             "success": True,
-            "status": scheduler.get_status()
+            "status": await call_background_service("scheduler", "get_status")
         }
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"获取调度器状态失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -42,13 +43,14 @@ async def start_scheduler():
         启动结果
     """
     try:
-        scheduler = get_scheduler()
-        scheduler.start()
+        await call_background_service("scheduler", "start")
         return {
             "success": True,
             "message": "调度器已启动",
-            "status": scheduler.get_status()
+            "status": await call_background_service("scheduler", "get_status")
         }
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"启动调度器失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -63,13 +65,14 @@ async def stop_scheduler():
         停止结果
     """
     try:
-        scheduler = get_scheduler()
-        scheduler.stop()
+        await call_background_service("scheduler", "stop")
         return {
             "success": True,
             "message": "调度器已停止",
-            "status": scheduler.get_status()
+            "status": await call_background_service("scheduler", "get_status")
         }
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"停止调度器失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -87,12 +90,13 @@ async def trigger_task(task_type: str):
         触发结果
     """
     try:
-        scheduler = get_scheduler()
-        scheduler.trigger_task(task_type)
+        await call_background_service("scheduler", "trigger_task", task_type=task_type)
         return {
             "success": True,
             "message": f"任务 {task_type} 已触发"
         }
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -112,13 +116,14 @@ async def get_task_history(limit: int = 20):
         任务历史记录
     """
     try:
-        scheduler = get_scheduler()
-        history = scheduler.task_history[-limit:]
+        task_history = await call_background_service("scheduler", "task_history")
         return {
             "success": True,
-            "history": history,
-            "total": len(scheduler.task_history)
+            "history": task_history[-limit:],
+            "total": len(task_history)
         }
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"获取任务历史失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -136,25 +141,14 @@ async def update_config(config: Dict[str, Any]):
         更新结果
     """
     try:
-        scheduler = get_scheduler()
-
-        # 更新配置
-        for key, value in config.items():
-            if key in scheduler.config:
-                scheduler.config[key] = value
-
-        scheduler.save_config()
-
-        # 如果调度器正在运行，需要重启以应用新配置
-        if scheduler.is_running:
-            scheduler.stop()
-            scheduler.start()
-
+        # 调度器正在运行时会重启以应用新配置
         return {
             "success": True,
             "message": "配置已更新",
-            "config": scheduler.config
+            "config": await call_background_service("scheduler", "update_config", config=config)
         }
+    except ServiceNotOwned as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"更新配置失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
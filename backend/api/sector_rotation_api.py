@@ -3,6 +3,7 @@
 提供板块轮动、热度、资金流向等分析接口
 """
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
 
@@ -23,7 +24,7 @@ async def get_industry_sectors():
     返回所有行业板块的涨跌幅、换手率、领涨股等信息
     """
     try:
-        result = sector_rotation_fetcher.get_industry_sectors()
+        result = await asyncio.to_thread(sector_rotation_fetcher.get_industry_sectors)
         return result
     except Exception as e:
         logger.error(f"[行业板块] 错误: {e}")
@@ -38,7 +39,7 @@ async def get_concept_sectors():
     返回所有概念板块的涨跌幅、换手率、领涨股等信息
     """
     try:
-        result = sector_rotation_fetcher.get_concept_sectors()
+        result = await asyncio.to_thread(sector_rotation_fetcher.get_concept_sectors)
         return result
     except Exception as e:
         logger.error(f"[概念板块] 错误: {e}")
@@ -55,7 +56,7 @@ async def get_sector_fund_flow(
     返回各行业的主力资金、超大单、大单等资金流向数据
     """
     try:
-        result = sector_rotation_fetcher.get_sector_fund_flow(indicator)
+        result = await asyncio.to_thread(sector_rotation_fetcher.get_sector_fund_flow, indicator)
         return result
     except Exception as e:
         logger.error(f"[资金流向] 错误: {e}")
@@ -73,7 +74,7 @@ async def get_sector_stocks(
     返回指定板块的所有成分股及其行情数据
     """
     try:
-        result = sector_rotation_fetcher.get_sector_stocks(sector_name, sector_type)
+        result = await asyncio.to_thread(sector_rotation_fetcher.get_sector_stocks, sector_name, sector_type)
         return result
     except Exception as e:
         logger.error(f"[板块成分股] {sector_name} 错误: {e}")
@@ -93,7 +94,7 @@ async def get_sector_history(
     返回指定板块的历史K线数据
     """
     try:
-        result = sector_rotation_fetcher.get_sector_history(sector_name, sector_type, period, adjust)
+        result = await asyncio.to_thread(sector_rotation_fetcher.get_sector_history, sector_name, sector_type, period, adjust)
         return result
     except Exception as e:
         logger.error(f"[板块历史] {sector_name} 错误: {e}")
@@ -108,7 +109,7 @@ async def get_market_overview():
     返回A股市场涨跌统计、主要指数等信息
     """
     try:
-        result = sector_rotation_fetcher.get_market_overview()
+        result = await asyncio.to_thread(sector_rotation_fetcher.get_market_overview)
         return result
     except Exception as e:
         logger.error(f"[市场概况] 错误: {e}")
@@ -123,7 +124,7 @@ async def get_north_money_flow():
     返回沪股通、深股通资金流向数据
     """
     try:
-        result = sector_rotation_fetcher.get_north_money_flow()
+        result = await asyncio.to_thread(sector_rotation_fetcher.get_north_money_flow)
         return result
     except Exception as e:
         logger.error(f"[北向资金] 错误: {e}")
@@ -143,7 +144,7 @@ async def analyze_sector_ranking(
     返回涨幅榜、跌幅榜、活跃榜
     """
     try:
-        result = sector_rotation_analyzer.analyze_sector_ranking(sector_type, top_n)
+        result = await asyncio.to_thread(sector_rotation_analyzer.analyze_sector_ranking, sector_type, top_n)
         return result
     except Exception as e:
         logger.error(f"[排名分析] 错误: {e}")
@@ -160,7 +161,7 @@ async def analyze_fund_flow_ranking(
     返回主力流入榜、流出榜、超大单流入榜
     """
     try:
-        result = sector_rotation_analyzer.analyze_fund_flow_ranking(top_n)
+        result = await asyncio.to_thread(sector_rotation_analyzer.analyze_fund_flow_ranking, top_n)
         return result
     except Exception as e:
         logger.error(f"[资金流向分析] 错误: {e}")
@@ -178,7 +179,7 @@ async def analyze_sector_heat(
     返回最热板块、升温板块、降温板块
     """
     try:
-        result = sector_rotation_analyzer.analyze_sector_heat(top_n)
+        result = await asyncio.to_thread(sector_rotation_analyzer.analyze_sector_heat, top_n)
         return result
     except Exception as e:
         logger.error(f"[热度分析] 错误: {e}")
@@ -193,7 +194,7 @@ async def analyze_rotation_signal():
     识别当前强势板块、潜力板块、衰退板块
     """
     try:
-        result = sector_rotation_analyzer.analyze_rotation_signal()
+        result = await asyncio.to_thread(sector_rotation_analyzer.analyze_rotation_signal)
         return result
     except Exception as e:
         logger.error(f"[轮动分析] 错误: {e}")
@@ -211,7 +212,7 @@ async def get_sector_detail(
     返回板块基本信息、成分股、历史行情
     """
     try:
-        result = sector_rotation_analyzer.get_sector_detail(sector_name, sector_type)
+        result = await asyncio.to_thread(sector_rotation_analyzer.get_sector_detail, sector_name, sector_type)
         return result
     except Exception as e:
         logger.error(f"[板块详情] {sector_name} 错误: {e}")
@@ -226,7 +227,7 @@ async def get_comprehensive_analysis():
     返回排名、资金流向、热度、轮动信号等综合分析
     """
     try:
-        result = sector_rotation_analyzer.get_comprehensive_analysis()
+        result = await asyncio.to_thread(sector_rotation_analyzer.get_comprehensive_analysis)
         return result
     except Exception as e:
         logger.error(f"[综合分析] 错误: {e}")
@@ -243,7 +244,7 @@ async def get_comprehensive_data():
     返回行业板块、概念板块、资金流向、市场概况、北向资金等全部数据
     """
     try:
-        result = sector_rotation_fetcher.get_comprehensive_data()
+        result = await asyncio.to_thread(sector_rotation_fetcher.get_comprehensive_data)
         return result
     except Exception as e:
         logger.error(f"[综合数据] 错误: {e}")
@@ -3,6 +3,7 @@
 提供市场情绪、恐慌贪婪指数、ARBR指标等分析接口
 """
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 
 from backend.utils.logging_config import get_logger
@@ -27,7 +28,7 @@ async def get_market_sentiment():
     - 融资融券数据
     """
     try:
-        result = market_sentiment_fetcher.get_market_sentiment()
+        result = await asyncio.to_thread(market_sentiment_fetcher.get_market_sentiment)
         return result
     except Exception as e:
         logger.error(f"[市场情绪] 错误: {e}")
@@ -48,7 +49,7 @@ async def get_fear_greed_index():
     - 75-100: 极度贪婪
     """
     try:
-        result = market_sentiment_fetcher.get_market_sentiment()
+        result = await asyncio.to_thread(market_sentiment_fetcher.get_market_sentiment)
         if result.get("success"):
             return {
                 "success": True,
@@ -73,7 +74,7 @@ async def get_market_stats():
     - 市场情绪得分
     """
     try:
-        result = market_sentiment_fetcher.get_market_sentiment()
+        result = await asyncio.to_thread(market_sentiment_fetcher.get_market_sentiment)
         if result.get("success"):
             return {
                 "success": True,
@@ -97,7 +98,7 @@ async def get_limit_stats():
     - 涨跌停比例
     """
     try:
-        result = market_sentiment_fetcher.get_market_sentiment()
+        result = await asyncio.to_thread(market_sentiment_fetcher.get_market_sentiment)
         if result.get("success"):
             return {
                 "success": True,
@@ -121,7 +122,7 @@ async def get_north_flow():
     - 深股通净流入
     """
     try:
-        result = market_sentiment_fetcher.get_market_sentiment()
+        result = await asyncio.to_thread(market_sentiment_fetcher.get_market_sentiment)
         if result.get("success"):
             return {
                 "success": True,
@@ -145,7 +146,7 @@ async def get_margin_trading():
     - 融资买入额
     """
     try:
-        result = market_sentiment_fetcher.get_market_sentiment()
+        result = await asyncio.to_thread(market_sentiment_fetcher.get_market_sentiment)
         if result.get("success"):
             return {
                 "success": True,
@@ -171,7 +172,7 @@ async def get_stock_sentiment(stock_code: str):
     - 成交量分析
     """
     try:
-        result = market_sentiment_fetcher.get_stock_sentiment(stock_code)
+        result = await asyncio.to_thread(market_sentiment_fetcher.get_stock_sentiment, stock_code)
         return result
     except Exception as e:
         logger.error(f"[个股情绪] {stock_code} 错误: {e}")
@@ -194,7 +195,7 @@ async def get_stock_arbr(stock_code: str):
     - BR < 50: 超卖信号
     """
     try:
-        result = market_sentiment_fetcher.get_stock_sentiment(stock_code)
+        result = await asyncio.to_thread(market_sentiment_fetcher.get_stock_sentiment, stock_code)
         if result.get("success"):
             return {
                 "success": True,
@@ -221,7 +222,7 @@ async def get_stock_turnover(stock_code: str):
     - < 2%: 很低，交易清淡
     """
     try:
-        result = market_sentiment_fetcher.get_stock_sentiment(stock_code)
+        result = await asyncio.to_thread(market_sentiment_fetcher.get_stock_sentiment, stock_code)
         if result.get("success"):
             return {
                 "success": True,
@@ -248,7 +249,7 @@ async def get_stock_volume_analysis(stock_code: str):
     - < 0.5: 极低，成交极度萎缩
     """
     try:
-        result = market_sentiment_fetcher.get_stock_sentiment(stock_code)
+        result = await asyncio.to_thread(market_sentiment_fetcher.get_stock_sentiment, stock_code)
         if result.get("success"):
             return {
                 "success": True,
@@ -6,7 +6,7 @@ import json
 import asyncio
 import logging
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query
 from fastapi.responses import StreamingResponse
 
 from ..services.async_task.redis_client import redis_client
@@ -90,15 +90,104 @@ async def task_stream(task_id: str):
     )
 
 
+def _resume_cursor(header_value: Optional[str], query_value: Optional[str]) -> Optional[int]:
+    """解析续传位置：EventSource 自动重连时带 Last-Event-ID 头，手动重连时用 last_event_id 参数"""
+    value = header_value or query_value
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def _log_frame(entry: dict) -> str:
+    """单条日志的 SSE 帧，以日志序号作为事件 ID"""
+    return f"id: {entry.get('seq', '')}\nevent: log\ndata: {json.dumps(entry, ensure_ascii=False)}\n\n"
+
+
+async def log_event_generator(
+    session_id: str,
+    last_seq: Optional[int] = None,
+    level: Optional[str] = None,
+    logs_only: bool = False
+):
+    """
+    会话日志 SSE 生成器
+
+    先订阅频道再补发 last_seq 之后的历史日志，实时消息按序号去重，保证续传不丢不重；
+    批量消息 log_batch 拆成逐条的 log 事件推送
+
+    Args:
+        session_id: 会话ID
+        last_seq: 客户端已收到的最后一条日志序号（None 表示只推送实时日志）
+        level: 日志级别过滤（可选）
+        logs_only: 只推送日志，不推送 Agent/阶段等其他事件
+    """
+    channel = f"{log_streamer.CHANNEL_PREFIX}{session_id}"
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe(channel)
+    sent_seq = last_seq or 0
+
+    try:
+        yield f"event: connected\ndata: {json.dumps({'session_id': session_id, 'resume_from': last_seq})}\n\n"
+
+        if last_seq is not None:
+            await log_streamer.flush(session_id)
+            for entry in await log_streamer.get_logs_since(session_id, last_seq):
+                sent_seq = max(sent_seq, entry.get("seq", 0))
+                if level is None or entry.get("level") == level:
+                    yield _log_frame(entry)
+
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8")
+
+                try:
+                    parsed = json.loads(data)
+                except json.JSONDecodeError:
+                    if not logs_only:
+                        yield f"event: message\ndata: {data}\n\n"
+                    continue
+
+                event_type = parsed.get("event", "message")
+                if event_type == "log_batch":
+                    for entry in parsed.get("data", []):
+                        seq = entry.get("seq", 0)
+                        if seq <= sent_seq:
+                            continue
+                        sent_seq = seq
+                        if level is None or entry.get("level") == level:
+                            yield _log_frame(entry)
+                elif not logs_only:
+                    yield f"event: {event_type}\ndata: {data}\n\n"
+
+            elif message["type"] == "ping":
+                # 发送心跳
+                yield f"event: ping\ndata: {json.dumps({'timestamp': asyncio.get_event_loop().time()})}\n\n"
+
+    except asyncio.CancelledError:
+        logger.info(f"SSE log stream cancelled for session: {session_id}")
+    except Exception as e:
+        logger.error(f"SSE error for session {session_id}: {e}")
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    finally:
+        await pubsub.unsubscribe(channel)
+
+
 @router.get("/analysis/{session_id}")
-async def analysis_stream(session_id: str):
+async def analysis_stream(
+    session_id: str,
+    last_event_id: Optional[str] = Query(None, description="续传：已收到的最后一条日志序号"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
     """
     分析会话 SSE 流
 
     订阅指定分析会话的实时更新，包括:
     - Agent 状态变化
     - 阶段进度
-    - 实时日志
+    - 实时日志（断线重连时从 Last-Event-ID 之后续传）
 
     Args:
         session_id: 分析会话ID
@@ -106,10 +195,8 @@ async def analysis_stream(session_id: str):
     Returns:
         SSE 事件流
     """
-    channel = f"log_stream:{session_id}"
-
     return StreamingResponse(
-        event_generator(channel),
+        log_event_generator(session_id, _resume_cursor(last_event_id_header, last_event_id)),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -122,12 +209,14 @@ async def analysis_stream(session_id: str):
 @router.get("/logs/{session_id}")
 async def logs_stream(
     session_id: str,
-    level: Optional[str] = Query(None, description="过滤日志级别")
+    level: Optional[str] = Query(None, description="过滤日志级别"),
+    last_event_id: Optional[str] = Query(None, description="续传：已收到的最后一条日志序号"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
 ):
     """
     日志 SSE 流
 
-    订阅指定会话的实时日志
+    订阅指定会话的实时日志，断线重连时从 Last-Event-ID 之后续传
 
     Args:
         session_id: 会话ID
@@ -136,42 +225,13 @@ async def logs_stream(
     Returns:
         SSE 事件流
     """
-    channel = f"log_stream:{session_id}"
-
-    async def filtered_generator():
-        pubsub = redis_client.pubsub()
-        await pubsub.subscribe(channel)
-
-        try:
-            yield f"event: connected\ndata: {json.dumps({'session_id': session_id})}\n\n"
-
-            async for message in pubsub.listen():
-                if message["type"] == "message":
-                    data = message["data"]
-                    if isinstance(data, bytes):
-                        data = data.decode("utf-8")
-
-                    try:
-                        parsed = json.loads(data)
-                        # 只推送日志事件
-                        if parsed.get("event") == "log":
-                            log_data = parsed.get("data", {})
-                            # 级别过滤
-                            if level is None or log_data.get("level") == level:
-                                yield f"event: log\ndata: {json.dumps(log_data)}\n\n"
-                    except json.JSONDecodeError:
-                        pass
-
-                elif message["type"] == "ping":
-                    yield f"event: ping\ndata: {{}}\n\n"
-
-        except asyncio.CancelledError:
-            pass
-        finally:
-            await pubsub.unsubscribe(channel)
-
     return StreamingResponse(
-        filtered_generator(),
+        log_event_generator(
+            session_id,
+            _resume_cursor(last_event_id_header, last_event_id),
+            level=level,
+            logs_only=True
+        ),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -37,6 +37,14 @@ class StrategyBacktestRequest(BaseModel):
     initial_capital: float = Field(100000, description="初始资金")
 
 
+class StrategyScreenRequest(BaseModel):
+    """全市场选股请求"""
+    strategy_ids: Optional[List[str]] = Field(None, description="选股策略ID列表，默认使用所有支持向量化筛选的策略")
+    bars: int = Field(250, ge=60, le=800, description="每只股票加载的日K线数量")
+    limit: int = Field(100, ge=1, le=1000, description="返回的命中数量")
+    refresh: bool = Field(False, description="是否强制重新加载行情面板")
+
+
 class StrategyConfigRequest(BaseModel):
     """策略配置请求"""
     strategy_id: str = Field(..., description="策略ID")
@@ -189,6 +197,51 @@ async def run_strategies(request: StrategyRunRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/screen")
+@log_api_call("全市场选股")
+async def screen_market(request: StrategyScreenRequest):
+    """
+    全市场横截面选股：对全部A股最新一根K线运行策略入场条件
+    
+    Args:
+        request: 选股请求
+        
+    Returns:
+        按置信度排序的买入信号命中列表
+    """
+    try:
+        from backend.strategies.screener import get_strategy_screener
+        
+        result = await get_strategy_screener().screen(
+            strategy_ids=request.strategy_ids,
+            bars=request.bars,
+            limit=request.limit,
+            refresh=request.refresh
+        )
+        return {
+            "success": True,
+            "timestamp": datetime.now().isoformat(),
+            **result
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"全市场选股失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/screen/stats")
+@log_api_call("获取选股服务状态")
+async def get_screener_stats():
+    """获取全市场选股服务状态（行情面板缓存、进程池配置、耗时）"""
+    from backend.strategies.screener import get_strategy_screener
+    
+    return {
+        "success": True,
+        "stats": get_strategy_screener().get_stats()
+    }
+
+
 @router.post("/backtest")
 @log_api_call("回测策略")
 async def backtest_strategy(request: StrategyBacktestRequest):
@@ -88,11 +88,11 @@ async def update_settings(settings: SystemSettings):
 @router.get('/db-stats')
 async def get_db_stats():
     try:
-        from backend.database.database import engine
+        from backend.database.database import engine, read_engine
         from sqlalchemy import text
         
         stats = {}
-        with engine.connect() as conn:
+        with (read_engine or engine).connect() as conn:
             try:
                 result = conn.execute(text('SELECT COUNT(*) FROM market_news'))
                 stats['newsCount'] = result.scalar() or 0
@@ -150,6 +150,74 @@ async def get_services():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get('/cache-stats')
+async def get_cache_stats():
+    """各数据缓存的命中/未命中/合并请求统计"""
+    from backend.utils.ttl_cache import get_all_cache_stats
+    return {'success': True, 'data': get_all_cache_stats()}
+
+
+@router.get('/market-tables')
+async def get_market_tables_report():
+    """全市场数据表共享情况：各表下载次数、个股查询次数与节省的网络请求"""
+    from backend.dataflows.market_tables import get_market_tables
+    return {'success': True, 'data': get_market_tables().get_report()}
+
+
+@router.get('/rate-limiters')
+async def get_rate_limiter_stats():
+    """各数据源主机的限流统计：请求数、被限流次数、累计等待时间与并发峰值"""
+    from backend.utils.rate_limiter import get_all_limiter_stats
+    return {'success': True, 'data': get_all_limiter_stats()}
+
+
+@router.get('/db-connections')
+async def get_db_connection_stats():
+    """数据库连接统计：写连接等待、只读连接池、语句耗时、锁超时次数与 WAL 检查点"""
+    from backend.database.database import get_connection_stats
+    return {'success': True, 'data': get_connection_stats()}
+
+
+@router.get('/metrics')
+async def get_prometheus_metrics():
+    """Prometheus 文本格式的性能指标：各数据源、LLM 提供商、HTTP 接口的耗时直方图与错误计数"""
+    from fastapi.responses import PlainTextResponse
+    from backend.utils.metrics import PROMETHEUS_CONTENT_TYPE, render_prometheus
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get('/metrics/latency')
+async def get_latency_metrics(kind: Optional[str] = None):
+    """按数据源 / LLM 提供商 / 接口汇总的请求数、错误率与 P50/P95/P99 耗时（毫秒）"""
+    from backend.utils.metrics import get_latency_summary
+    return {'success': True, 'data': get_latency_summary(kind)}
+
+
+@router.get('/profile')
+async def sample_profile(seconds: float = 5, interval_ms: float = 10, include_idle: bool = False,
+                         format: str = 'json'):
+    """
+    按需采样分析：在后台线程采样指定秒数，返回火焰图数据
+
+    format=json 返回热点函数、折叠栈与火焰图嵌套树；format=folded 返回纯文本折叠栈，
+    可直接导入 speedscope / flamegraph.pl
+    """
+    import asyncio
+    from fastapi.responses import PlainTextResponse
+    from backend.utils.sampling_profiler import ProfilerBusyError, run_profile
+
+    try:
+        result = await asyncio.to_thread(run_profile, seconds, interval_ms, include_idle)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == 'folded':
+        return PlainTextResponse('\n'.join(result['folded']) + '\n')
+    return {'success': True, 'data': result}
+
+
 @router.post('/cleanup')
 async def manual_cleanup():
     try:
@@ -166,11 +234,15 @@ async def manual_cleanup():
         try:
             from backend.database.database import get_db_context
             from backend.database.models import AnalysisSession
+            from backend.database.stats_rollup import StatsRollupService
             
             with get_db_context() as db:
                 cutoff = datetime.now() - timedelta(days=settings.get('analysisRetentionDays', 90))
                 deleted = db.query(AnalysisSession).filter(AnalysisSession.created_at < cutoff).delete()
                 results['analysis'] = deleted
+                # 批量删除不触发统计汇总的增量维护，重建受影响日期
+                if deleted:
+                    StatsRollupService.rebuild(db, end_date=cutoff.strftime('%Y-%m-%d'))
         except Exception as e:
             results['analysis'] = f'Error: {e}'
         
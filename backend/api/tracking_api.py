@@ -11,6 +11,7 @@ import json
 from pathlib import Path
 
 from backend.utils.logging_config import get_logger
+from backend.utils.json_journal import JsonJournal
 from backend.api.trading_llm_config_api import get_trading_llm_config
 
 logger = get_logger("api.tracking")
@@ -69,25 +70,50 @@ TASKS_FILE = Path("backend/data/tracking_tasks.json")
 
 tracking_tasks: Dict[str, Dict] = {}
 
+# 任务变更追加写日志，定期压缩为快照
+tasks_journal = JsonJournal(TASKS_FILE, lambda: tracking_tasks)
+_tasks_loaded = False
 
-def load_tasks():
-    """加载任务"""
-    global tracking_tasks
-    if TASKS_FILE.exists():
-        try:
-            with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-                tracking_tasks = json.load(f)
-        except Exception as e:
-            logger.error(f"加载跟踪任务失败: {e}")
-            tracking_tasks = {}
+
+def load_tasks(force: bool = False):
+    """加载任务（已加载时直接使用内存数据）"""
+    global tracking_tasks, _tasks_loaded
+    if _tasks_loaded and not force:
+        return
+    try:
+        tracking_tasks = tasks_journal.load(dict)
+    except Exception as e:
+        logger.error(f"加载跟踪任务失败: {e}")
+        tracking_tasks = {}
+    _tasks_loaded = True
 
 
 def save_tasks():
-    """保存任务"""
+    """保存全部任务快照"""
+    try:
+        tasks_journal.compact(tracking_tasks)
+    except Exception as e:
+        logger.error(f"保存跟踪任务失败: {e}")
+
+
+def save_task_fields(task_id: str, *fields: str):
+    """追加记录任务的字段变更（不传字段时记录整个任务）"""
+    try:
+        task = tracking_tasks[task_id]
+        with tasks_journal.transaction():
+            if not fields:
+                tasks_journal.set(task_id, task)
+            for field in fields:
+                tasks_journal.set([task_id, field], task.get(field))
+    except Exception as e:
+        logger.error(f"保存跟踪任务失败: {e}")
+
+
+def append_task_decision(task_id: str, decision_record: Dict):
+    """追加一条任务决策记录"""
+    tracking_tasks[task_id]['decisions'].append(decision_record)
     try:
-        TASKS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(TASKS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(tracking_tasks, f, ensure_ascii=False, indent=2)
+        tasks_journal.push([task_id, 'decisions'], decision_record)
     except Exception as e:
         logger.error(f"保存跟踪任务失败: {e}")
 
@@ -266,7 +292,7 @@ async def create_tracking_task(request: CreateTaskRequest):
         }
         
         tracking_tasks[task_id] = task
-        save_tasks()
+        save_task_fields(task_id)
         
         logger.info(f"跟踪任务已创建: {task_id}")
         
@@ -422,7 +448,7 @@ async def check_task(task_id: str):
                 "action_details": llm_decision.get("action_details")
             }
             
-            task['decisions'].append(decision_record)
+            append_task_decision(task_id, decision_record)
             task['trigger_count'] += 1
             
         else:
@@ -431,7 +457,7 @@ async def check_task(task_id: str):
                 "action_details": None
             })
         
-        save_tasks()
+        save_task_fields(task_id, 'check_count', 'last_check_at', 'trigger_count')
         
         logger.info(f"任务检查完成: {task_id} - 触发: {triggered}")
         
@@ -468,7 +494,7 @@ async def pause_task(task_id: str):
         task['status'] = 'paused'
         task['paused_at'] = datetime.now().isoformat()
         
-        save_tasks()
+        save_task_fields(task_id, 'status', 'paused_at')
         
         return {
             "success": True,
@@ -503,7 +529,7 @@ async def resume_task(task_id: str):
         task['status'] = 'active'
         task['resumed_at'] = datetime.now().isoformat()
         
-        save_tasks()
+        save_task_fields(task_id, 'status', 'resumed_at')
         
         return {
             "success": True,
@@ -8,13 +8,14 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 import asyncio
-import json
 from pathlib import Path
 
 # 导入日志系统
 from backend.utils.logging_config import get_logger
 from backend.utils.tool_logging import log_api_call
+from backend.utils.json_journal import JsonJournal
 from backend.trading.market_rules import market_rule_engine, MarketType
+from backend.trading.performance_tracker import PerformanceTracker
 
 logger = get_logger("api.trading")
 
@@ -76,33 +77,44 @@ class TradingSimulator:
     
     def __init__(self):
         self.data_file = Path("backend/data/trading_simulation.json")
+        # 每笔交易追加写日志，定期压缩为快照
+        self.journal = JsonJournal(self.data_file, self._snapshot)
+        # 表现指标随交易增量更新
+        self.performance = PerformanceTracker()
         self.load_data()
         
     def load_data(self):
-        """加载交易数据"""
-        if self.data_file.exists():
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.portfolio = data.get("portfolio", self._default_portfolio())
-                self.positions = data.get("positions", {})
-                self.trade_history = data.get("trade_history", [])
-        else:
-            self.portfolio = self._default_portfolio()
-            self.positions = {}
-            self.trade_history = []
+        """加载交易数据（快照 + 日志重放）"""
+        data = self.journal.load(dict)
+        self.portfolio = data.get("portfolio", self._default_portfolio())
+        self.positions = data.get("positions", {})
+        self.trade_history = data.get("trade_history", [])
+        self.performance.invalidate()
+        if not self.data_file.exists():
             self.save_data()
-            
-    def save_data(self):
-        """保存交易数据"""
-        self.data_file.parent.mkdir(parents=True, exist_ok=True)
-        data = {
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """当前完整状态"""
+        return {
             "portfolio": self.portfolio,
             "positions": self.positions,
             "trade_history": self.trade_history,
             "last_update": datetime.now().isoformat()
         }
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            
+    def save_data(self):
+        """保存完整快照并清空日志"""
+        self.journal.compact(self._snapshot())
+
+    def _journal_trade(self, stock_code: str, trade_record: Dict[str, Any]):
+        """把一笔交易引起的变更作为一个事务追加到日志"""
+        with self.journal.transaction():
+            self.journal.set("portfolio", self.portfolio)
+            if stock_code in self.positions:
+                self.journal.set(["positions", stock_code], self.positions[stock_code])
+            else:
+                self.journal.delete(["positions", stock_code])
+            self.journal.push("trade_history", trade_record)
             
     def _default_portfolio(self):
         """默认投资组合"""
@@ -254,8 +266,8 @@ class TradingSimulator:
             # 更新组合价值
             await self._update_portfolio_value()
             
-            # 保存数据
-            self.save_data()
+            # 追加写日志
+            self._journal_trade(order.stock_code, trade_record)
             
             return {
                 "success": True,
@@ -489,13 +501,11 @@ async def get_portfolio():
                 "holding_days": holding_days
             })
 
-        # 保存更新后的数据
-        simulator.save_data()
+        # 记录更新后的组合价值
+        simulator.journal.set("portfolio", simulator.portfolio)
 
         # 计算统计指标
-        win_rate = _calculate_win_rate(simulator.trade_history)
-        max_drawdown = _calculate_max_drawdown(simulator.trade_history)
-        sharpe_ratio = _calculate_sharpe_ratio(simulator.trade_history)
+        summary = simulator.performance.get_summary(simulator.trade_history)
 
         return {
             "success": True,
@@ -503,9 +513,9 @@ async def get_portfolio():
                 **simulator.portfolio,
                 "positions": positions_list,
                 "positions_count": len(positions_list),
-                "win_rate": win_rate,
-                "max_drawdown": max_drawdown,
-                "sharpe_ratio": sharpe_ratio
+                "win_rate": summary["win_rate"],
+                "max_drawdown": summary["max_drawdown"],
+                "sharpe_ratio": summary["sharpe_ratio"]
             }
         }
 
@@ -577,6 +587,7 @@ async def reset_trading():
         simulator.portfolio = simulator._default_portfolio()
         simulator.positions = {}
         simulator.trade_history = []
+        simulator.performance.invalidate()
         simulator.save_data()
         
         logger.info("模拟交易账户已重置")
@@ -604,29 +615,8 @@ async def get_performance_metrics(days: int = 30):
         表现指标
     """
     try:
-        # 计算起始日期
-        start_date = datetime.now() - timedelta(days=days)
-        
-        # 筛选时间范围内的交易
-        recent_trades = [
-            t for t in simulator.trade_history
-            if datetime.fromisoformat(t["timestamp"]) >= start_date
-        ]
-        
-        # 计算各项指标
-        metrics = {
-            "period_days": days,
-            "total_trades": len(recent_trades),
-            "buy_trades": len([t for t in recent_trades if t["action"] == "BUY"]),
-            "sell_trades": len([t for t in recent_trades if t["action"] == "SELL"]),
-            "total_volume": sum(t["amount"] for t in recent_trades),
-            "total_commission": sum(t["commission"] for t in recent_trades),
-            "win_rate": _calculate_win_rate(recent_trades),
-            "avg_profit_per_trade": _calculate_avg_profit(recent_trades),
-            "max_drawdown": _calculate_max_drawdown(recent_trades),
-            "sharpe_ratio": _calculate_sharpe_ratio(recent_trades),
-            "daily_returns": _calculate_daily_returns(recent_trades, days)
-        }
+        # 增量累加器直接给出指标，窗口左端有交易移出时才重建
+        metrics = simulator.performance.get_metrics(simulator.trade_history, days)
         
         return {
             "success": True,
@@ -638,191 +628,6 @@ async def get_performance_metrics(days: int = 30):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# 辅助函数 - 真实计算交易统计指标
-def _calculate_win_rate(trades: List[Dict]) -> float:
-    """计算胜率 - 基于实际交易记录"""
-    if not trades:
-        return 0.0
-
-    # 配对买卖交易计算盈亏
-    buy_trades = {}  # stock_code -> [buy_trades]
-    winning_trades = 0
-    total_closed_trades = 0
-
-    for trade in trades:
-        stock_code = trade.get("stock_code", "")
-        action = trade.get("action", "")
-        price = trade.get("price", 0)
-        quantity = trade.get("quantity", 0)
-
-        if action == "BUY":
-            if stock_code not in buy_trades:
-                buy_trades[stock_code] = []
-            buy_trades[stock_code].append({"price": price, "quantity": quantity})
-        elif action == "SELL" and stock_code in buy_trades and buy_trades[stock_code]:
-            # FIFO匹配
-            buy = buy_trades[stock_code][0]
-            profit = (price - buy["price"]) * min(quantity, buy["quantity"])
-            if profit > 0:
-                winning_trades += 1
-            total_closed_trades += 1
-            # 更新买入记录
-            if buy["quantity"] <= quantity:
-                buy_trades[stock_code].pop(0)
-            else:
-                buy["quantity"] -= quantity
-
-    if total_closed_trades == 0:
-        return 0.0
-
-    return winning_trades / total_closed_trades
-
-
-def _calculate_max_drawdown(trades: List[Dict]) -> float:
-    """计算最大回撤 - 基于交易记录构建净值曲线"""
-    if not trades:
-        return 0.0
-
-    # 构建简化的净值曲线
-    initial_capital = 1000000
-    capital = initial_capital
-    peak = initial_capital
-    max_drawdown = 0
-
-    for trade in sorted(trades, key=lambda x: x.get("timestamp", "")):
-        action = trade.get("action", "")
-        amount = trade.get("amount", 0)
-        commission = trade.get("commission", 0)
-
-        if action == "BUY":
-            capital -= (amount + commission)
-        elif action == "SELL":
-            capital += (amount - commission)
-
-        # 更新峰值和回撤
-        if capital > peak:
-            peak = capital
-        drawdown = (peak - capital) / peak if peak > 0 else 0
-        max_drawdown = max(max_drawdown, drawdown)
-
-    return max_drawdown
-
-
-def _calculate_sharpe_ratio(trades: List[Dict]) -> float:
-    """计算夏普比率 - 基于交易收益率"""
-    if len(trades) < 2:
-        return 0.0
-
-    import numpy as np
-
-    # 计算每笔交易的收益率
-    returns = []
-    for trade in trades:
-        if trade.get("action") == "SELL":
-            amount = trade.get("amount", 0)
-            commission = trade.get("commission", 0)
-            # 简化：假设每笔交易投入10万
-            investment = 100000
-            ret = (amount - commission - investment) / investment
-            returns.append(ret)
-
-    if not returns:
-        return 0.0
-
-    returns = np.array(returns)
-    mean_return = np.mean(returns)
-    std_return = np.std(returns)
-
-    if std_return == 0:
-        return 0.0
-
-    # 年化夏普比率（假设每年50笔交易）
-    risk_free_rate = 0.03 / 50  # 年化3%无风险利率
-    sharpe = (mean_return - risk_free_rate) / std_return * np.sqrt(50)
-
-    return round(sharpe, 2)
-
-
-def _calculate_avg_profit(trades: List[Dict]) -> float:
-    """计算平均收益 - 基于实际交易"""
-    if not trades:
-        return 0.0
-
-    total_profit = 0
-    sell_count = 0
-
-    buy_prices = {}  # stock_code -> avg_buy_price
-
-    for trade in trades:
-        stock_code = trade.get("stock_code", "")
-        action = trade.get("action", "")
-        price = trade.get("price", 0)
-        quantity = trade.get("quantity", 0)
-        commission = trade.get("commission", 0)
-
-        if action == "BUY":
-            if stock_code not in buy_prices:
-                buy_prices[stock_code] = price
-            else:
-                # 简化：取平均
-                buy_prices[stock_code] = (buy_prices[stock_code] + price) / 2
-        elif action == "SELL" and stock_code in buy_prices:
-            profit = (price - buy_prices[stock_code]) * quantity - commission
-            total_profit += profit
-            sell_count += 1
-
-    if sell_count == 0:
-        return 0.0
-
-    return round(total_profit / sell_count, 2)
-
-
-def _calculate_daily_returns(trades: List[Dict], days: int) -> List[Dict]:
-    """计算日收益率 - 基于实际交易记录"""
-    if not trades:
-        return []
-
-    # 按日期分组交易
-    from collections import defaultdict
-    daily_pnl = defaultdict(float)
-
-    for trade in trades:
-        timestamp = trade.get("timestamp", "")
-        if timestamp:
-            try:
-                date = datetime.fromisoformat(timestamp).strftime("%Y-%m-%d")
-                action = trade.get("action", "")
-                amount = trade.get("amount", 0)
-                commission = trade.get("commission", 0)
-
-                if action == "SELL":
-                    # 简化：卖出金额减去假设的买入成本
-                    daily_pnl[date] += amount - commission - 100000
-                elif action == "BUY":
-                    daily_pnl[date] -= commission
-            except:
-                pass
-
-    # 构建日收益率列表
-    returns = []
-    initial_capital = 1000000
-    cumulative_value = initial_capital
-
-    for i in range(days):
-        date = (datetime.now() - timedelta(days=days - 1 - i)).strftime("%Y-%m-%d")
-        pnl = daily_pnl.get(date, 0)
-        cumulative_value += pnl
-        daily_return = pnl / initial_capital if initial_capital > 0 else 0
-
-        returns.append({
-            "date": date,
-            "return": round(daily_return, 4),
-            "value": round(cumulative_value, 2)
-        })
-
-    return returns
-
-
 # 测试端点
 @router.get("/test")
 async def test_trading_api():
@@ -8,13 +8,12 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 import asyncio
-import json
 from pathlib import Path
-import numpy as np
 
 # 导入日志系统
 from backend.utils.logging_config import get_logger
 from backend.utils.tool_logging import log_api_call
+from backend.utils.json_journal import JsonJournal
 
 logger = get_logger("api.verification")
 
@@ -71,36 +70,60 @@ class VerificationEngine:
     
     def __init__(self):
         self.data_file = Path("backend/data/verification_data.json")
+        # 决策和验证记录追加写日志，定期压缩为快照
+        self.journal = JsonJournal(self.data_file, self._snapshot)
         self.load_data()
         
     def load_data(self):
-        """加载验证数据"""
-        if self.data_file.exists():
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.decisions = data.get("decisions", [])
-                self.verifications = data.get("verifications", [])
-                self.strategies = data.get("strategies", [])
-                self.performance_history = data.get("performance_history", [])
-        else:
-            self.decisions = []
-            self.verifications = []
-            self.strategies = self._default_strategies()
-            self.performance_history = []
+        """加载验证数据（快照 + 日志重放）"""
+        exists = self.data_file.exists()
+        data = self.journal.load(dict)
+        self.decisions = data.get("decisions", [])
+        self.verifications = data.get("verifications", [])
+        self.strategies = data.get("strategies", []) if exists else self._default_strategies()
+        self.performance_history = data.get("performance_history", [])
+        self._rebuild_verification_stats()
+        if not exists:
             self.save_data()
-            
-    def save_data(self):
-        """保存验证数据"""
-        self.data_file.parent.mkdir(parents=True, exist_ok=True)
-        data = {
+
+    def _rebuild_verification_stats(self):
+        """从全部验证记录重新汇总（加载时），之后每条新验证增量累加"""
+        self.verification_stats = {"total": 0, "success": 0, "accuracy_sum": 0.0, "profit_loss_sum": 0.0}
+        for verification in self.verifications:
+            self._accumulate_verification(verification)
+
+    def _accumulate_verification(self, verification: Dict[str, Any]):
+        stats = self.verification_stats
+        stats["total"] += 1
+        stats["success"] += 1 if verification.get("is_success") else 0
+        stats["accuracy_sum"] += verification.get("accuracy_rate", 0)
+        stats["profit_loss_sum"] += verification.get("profit_loss", 0)
+
+    def get_verification_stats(self) -> Dict[str, Any]:
+        """验证统计（增量维护，不扫描验证记录）"""
+        stats = self.verification_stats
+        total = stats["total"]
+        return {
+            "total_verifications": total,
+            "success_count": stats["success"],
+            "success_rate": stats["success"] / total if total > 0 else 0,
+            "avg_accuracy": stats["accuracy_sum"] / total if total > 0 else 0,
+            "avg_profit_loss": stats["profit_loss_sum"] / total if total > 0 else 0
+        }
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """当前完整状态"""
+        return {
             "decisions": self.decisions,
             "verifications": self.verifications,
             "strategies": self.strategies,
             "performance_history": self.performance_history,
             "last_update": datetime.now().isoformat()
         }
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            
+    def save_data(self):
+        """保存完整快照并清空日志"""
+        self.journal.compact(self._snapshot())
             
     def _default_strategies(self):
         """默认策略配置"""
@@ -160,7 +183,7 @@ class VerificationEngine:
         }
         
         self.decisions.append(decision_record)
-        self.save_data()
+        self.journal.push("decisions", decision_record)
         
         # 启动后台验证任务
         asyncio.create_task(self._schedule_verification(decision_id))
@@ -213,11 +236,14 @@ class VerificationEngine:
         }
         
         self.verifications.append(verification)
+        self._accumulate_verification(verification)
         
         # 更新策略表现
         await self._update_strategy_performance(decision, verification)
         
-        self.save_data()
+        with self.journal.transaction():
+            self.journal.push("verifications", verification)
+            self.journal.set("strategies", self.strategies)
         
         return verification
         
@@ -482,17 +508,7 @@ async def get_verifications(limit: int = 50):
             reverse=True
         )[:limit]
         
-        # 计算统计
-        total = len(engine.verifications)
-        success_count = len([v for v in engine.verifications if v.get("is_success")])
-        
-        stats = {
-            "total_verifications": total,
-            "success_count": success_count,
-            "success_rate": success_count / total if total > 0 else 0,
-            "avg_accuracy": np.mean([v.get("accuracy_rate", 0) for v in engine.verifications]) if engine.verifications else 0,
-            "avg_profit_loss": np.mean([v.get("profit_loss", 0) for v in engine.verifications]) if engine.verifications else 0
-        }
+        stats = engine.get_verification_stats()
         
         return {
             "success": True,
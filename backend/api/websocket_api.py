@@ -1,10 +1,15 @@
 """
 WebSocket API - 数据流实时通知
 用于向前端推送数据更新通知
+
+新闻、紧急新闻和股票预警由后台服务产生，而后台服务可能运行在 worker 进程或另一个
+uvicorn worker 中。Redis 可用时这些事件发布到 WS_EVENTS_CHANNEL，每个 API 进程的
+中继任务订阅该频道并推送给本进程的 WebSocket 连接；Redis 不可用时只推送给本进程的连接。
 """
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Set, List
+from typing import Dict, Set, List, Optional
+import os
 import json
 import asyncio
 from datetime import datetime
@@ -14,26 +19,73 @@ from backend.utils.logging_config import get_logger
 logger = get_logger("api.websocket")
 router = APIRouter(tags=["WebSocket"])
 
+# 跨进程推送事件频道
+WS_EVENTS_CHANNEL = "investmind:ws:events"
+
 
 class ConnectionManager:
-    """WebSocket连接管理器"""
+    """
+    WebSocket连接管理器
+
+    消息只序列化一次，放入每个客户端的有界发送队列，由各连接独立的写任务发送，
+    慢客户端不会阻塞其他客户端；队列满时按策略丢弃消息或断开该客户端
+    """
+
+    # 订阅主题
+    TOPIC_NEWS = "news"
+    TOPIC_ALERTS = "alerts"
 
-    def __init__(self):
+    def __init__(self, queue_size: int = None, slow_client_policy: str = None):
         # 活跃连接: {client_id: WebSocket}
         self.active_connections: Dict[str, WebSocket] = {}
-        # 订阅关系: {ts_code: Set[client_id]}
-        self.subscriptions: Dict[str, Set[str]] = {}
-        # 新闻订阅: Set[client_id] - 订阅新闻推送的客户端
-        self.news_subscribers: Set[str] = set()
+        # 主题订阅: {topic: Set[client_id]}，股票主题为 "stock:<ts_code>"
+        self.topics: Dict[str, Set[str]] = {}
+        # 每个客户端的发送队列和写任务
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._writers: Dict[str, asyncio.Task] = {}
+        # 每个客户端因积压被丢弃的消息数
+        self._dropped: Dict[str, int] = {}
         # 连接计数器
         self._connection_counter = 0
 
+        # 发送队列长度（允许积压的消息数）和慢客户端策略 (drop/disconnect)
+        self.queue_size = queue_size or int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+        self.slow_client_policy = slow_client_policy or os.getenv("WS_SLOW_CLIENT_POLICY", "drop")
+
+    @staticmethod
+    def stock_topic(ts_code: str) -> str:
+        """股票主题名"""
+        return f"stock:{ts_code}"
+
+    @staticmethod
+    def serialize(message: dict) -> str:
+        """序列化消息（与 send_json 的格式一致）"""
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    @property
+    def subscriptions(self) -> Dict[str, Set[str]]:
+        """股票订阅关系: {ts_code: Set[client_id]}"""
+        prefix = self.stock_topic("")
+        return {
+            topic[len(prefix):]: clients
+            for topic, clients in self.topics.items()
+            if topic.startswith(prefix)
+        }
+
+    @property
+    def news_subscribers(self) -> Set[str]:
+        """订阅新闻推送的客户端"""
+        return self.topics.get(self.TOPIC_NEWS, set())
+
     async def connect(self, websocket: WebSocket) -> str:
         """接受新连接，返回client_id"""
         await websocket.accept()
         self._connection_counter += 1
         client_id = f"client_{self._connection_counter}_{datetime.now().strftime('%H%M%S')}"
         self.active_connections[client_id] = websocket
+        self._queues[client_id] = asyncio.Queue(maxsize=self.queue_size)
+        self._dropped[client_id] = 0
+        self._writers[client_id] = asyncio.create_task(self._writer(client_id, websocket))
         logger.info(f"[WebSocket] 新连接: {client_id}, 当前连接数: {len(self.active_connections)}")
         return client_id
 
@@ -41,69 +93,126 @@ class ConnectionManager:
         """断开连接"""
         if client_id in self.active_connections:
             del self.active_connections[client_id]
+            self._queues.pop(client_id, None)
+            self._dropped.pop(client_id, None)
+            writer = self._writers.pop(client_id, None)
+            if writer is not None and writer is not asyncio.current_task():
+                writer.cancel()
             # 清理订阅
-            for ts_code in list(self.subscriptions.keys()):
-                self.subscriptions[ts_code].discard(client_id)
-                if not self.subscriptions[ts_code]:
-                    del self.subscriptions[ts_code]
-            # 清理新闻订阅
-            self.news_subscribers.discard(client_id)
+            for topic in list(self.topics.keys()):
+                self.topics[topic].discard(client_id)
+                if not self.topics[topic]:
+                    del self.topics[topic]
             logger.info(f"[WebSocket] 断开连接: {client_id}, 剩余连接数: {len(self.active_connections)}")
 
+    async def _writer(self, client_id: str, websocket: WebSocket):
+        """连接的写任务：按顺序发送队列中的消息"""
+        queue = self._queues[client_id]
+        try:
+            while True:
+                text = await queue.get()
+                if websocket.client_state.name != "CONNECTED":
+                    break
+                await websocket.send_text(text)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            # 只记录非正常关闭的错误
+            error_msg = str(e)
+            if "close frame" not in error_msg.lower() and "disconnect" not in error_msg.lower():
+                logger.warning(f"[WebSocket] 发送消息失败: {client_id}, {error_msg[:50]}")
+        self.disconnect(client_id)
+
+    def _enqueue(self, client_id: str, text: str):
+        """将已序列化的消息放入客户端发送队列，队列满时按慢客户端策略处理"""
+        queue = self._queues.get(client_id)
+        if queue is None:
+            return
+        try:
+            queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self._dropped[client_id] += 1
+            if self.slow_client_policy == "disconnect":
+                logger.warning(f"[WebSocket] 客户端积压超过{self.queue_size}条，断开: {client_id}")
+                websocket = self.active_connections.get(client_id)
+                self.disconnect(client_id)
+                if websocket is not None:
+                    asyncio.create_task(self._close(websocket))
+            elif self._dropped[client_id] % self.queue_size == 1:
+                logger.warning(f"[WebSocket] 客户端积压，丢弃消息: {client_id}, 已丢弃{self._dropped[client_id]}条")
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        """关闭被断开的慢客户端"""
+        try:
+            await websocket.close(code=1008)
+        except Exception:
+            pass
+
+    def publish(self, client_ids, message: dict) -> int:
+        """
+        推送消息给一组客户端（只序列化一次，不等待发送完成）
+
+        Returns:
+            投递的客户端数
+        """
+        targets = [cid for cid in client_ids if cid in self._queues]
+        if not targets:
+            return 0
+        text = self.serialize(message)
+        for client_id in targets:
+            self._enqueue(client_id, text)
+        return len(targets)
+
+    def publish_topic(self, topic: str, message: dict) -> int:
+        """推送消息给订阅了某主题的客户端"""
+        return self.publish(list(self.topics.get(topic, ())), message)
+
+    def subscribe_topic(self, client_id: str, topic: str):
+        """订阅主题"""
+        if topic not in self.topics:
+            self.topics[topic] = set()
+        self.topics[topic].add(client_id)
+        logger.debug(f"[WebSocket] {client_id} 订阅 {topic}")
+
+    def unsubscribe_topic(self, client_id: str, topic: str):
+        """取消订阅主题"""
+        if topic in self.topics:
+            self.topics[topic].discard(client_id)
+            if not self.topics[topic]:
+                del self.topics[topic]
+
     def subscribe(self, client_id: str, ts_code: str):
         """订阅股票更新"""
-        if ts_code not in self.subscriptions:
-            self.subscriptions[ts_code] = set()
-        self.subscriptions[ts_code].add(client_id)
-        logger.debug(f"[WebSocket] {client_id} 订阅 {ts_code}")
+        self.subscribe_topic(client_id, self.stock_topic(ts_code))
 
     def unsubscribe(self, client_id: str, ts_code: str):
         """取消订阅"""
-        if ts_code in self.subscriptions:
-            self.subscriptions[ts_code].discard(client_id)
-            if not self.subscriptions[ts_code]:
-                del self.subscriptions[ts_code]
+        self.unsubscribe_topic(client_id, self.stock_topic(ts_code))
 
     def subscribe_news(self, client_id: str):
         """订阅新闻推送"""
-        self.news_subscribers.add(client_id)
-        logger.debug(f"[WebSocket] {client_id} 订阅新闻推送")
+        self.subscribe_topic(client_id, self.TOPIC_NEWS)
 
     def unsubscribe_news(self, client_id: str):
         """取消新闻订阅"""
-        self.news_subscribers.discard(client_id)
+        self.unsubscribe_topic(client_id, self.TOPIC_NEWS)
+
+    def subscribe_alerts(self, client_id: str):
+        """订阅全部预警推送"""
+        self.subscribe_topic(client_id, self.TOPIC_ALERTS)
+
+    def unsubscribe_alerts(self, client_id: str):
+        """取消预警订阅"""
+        self.unsubscribe_topic(client_id, self.TOPIC_ALERTS)
 
     async def send_personal_message(self, message: dict, client_id: str):
         """发送消息给特定客户端"""
-        if client_id in self.active_connections:
-            try:
-                websocket = self.active_connections[client_id]
-                # 检查连接状态
-                if websocket.client_state.name == "CONNECTED":
-                    await websocket.send_json(message)
-            except Exception as e:
-                # 只记录非正常关闭的错误
-                error_msg = str(e)
-                if "close frame" not in error_msg.lower() and "disconnect" not in error_msg.lower():
-                    logger.warning(f"[WebSocket] 发送消息失败: {client_id}, {error_msg[:50]}")
-                self.disconnect(client_id)
+        self.publish([client_id], message)
 
     async def broadcast(self, message: dict):
         """广播消息给所有连接"""
-        disconnected = []
-        for client_id, connection in self.active_connections.items():
-            try:
-                if connection.client_state.name == "CONNECTED":
-                    await connection.send_json(message)
-            except Exception as e:
-                error_msg = str(e)
-                if "close frame" not in error_msg.lower() and "disconnect" not in error_msg.lower():
-                    logger.warning(f"[WebSocket] 广播失败: {client_id}, {error_msg[:50]}")
-                disconnected.append(client_id)
-
-        # 清理断开的连接
-        for client_id in disconnected:
-            self.disconnect(client_id)
+        self.publish(list(self.active_connections.keys()), message)
 
     async def notify_stock_update(self, ts_code: str, event: str, data: dict = None):
         """
@@ -114,7 +223,8 @@ class ConnectionManager:
             event: 事件类型 (update_complete, update_progress, update_error)
             data: 附加数据
         """
-        if ts_code not in self.subscriptions:
+        topic = self.stock_topic(ts_code)
+        if topic not in self.topics:
             return
 
         message = {
@@ -124,33 +234,22 @@ class ConnectionManager:
             "timestamp": datetime.now().isoformat(),
             "data": data or {}
         }
-
-        disconnected = []
-        for client_id in self.subscriptions[ts_code]:
-            if client_id in self.active_connections:
-                try:
-                    websocket = self.active_connections[client_id]
-                    if websocket.client_state.name == "CONNECTED":
-                        await websocket.send_json(message)
-                except Exception as e:
-                    error_msg = str(e)
-                    if "close frame" not in error_msg.lower() and "disconnect" not in error_msg.lower():
-                        logger.warning(f"[WebSocket] 通知失败: {client_id}, {error_msg[:50]}")
-                    disconnected.append(client_id)
-
-        # 清理断开的连接
-        for client_id in disconnected:
-            self.disconnect(client_id)
+        self.publish_topic(topic, message)
 
     def get_status(self) -> dict:
         """获取连接状态"""
         return {
             "active_connections": len(self.active_connections),
             "news_subscribers": len(self.news_subscribers),
+            "alert_subscribers": len(self.topics.get(self.TOPIC_ALERTS, ())),
             "subscriptions": {
                 ts_code: len(clients)
                 for ts_code, clients in self.subscriptions.items()
-            }
+            },
+            "queue_size": self.queue_size,
+            "slow_client_policy": self.slow_client_policy,
+            "pending_messages": sum(q.qsize() for q in self._queues.values()),
+            "dropped_messages": sum(self._dropped.values())
         }
 
     async def notify_news(self, news_list: List[dict], urgency: str = "normal"):
@@ -171,25 +270,10 @@ class ConnectionManager:
             "count": len(news_list),
             "news": news_list[:10]  # 最多推送10条
         }
-
-        disconnected = []
-        for client_id in self.news_subscribers:
-            if client_id in self.active_connections:
-                try:
-                    websocket = self.active_connections[client_id]
-                    if websocket.client_state.name == "CONNECTED":
-                        await websocket.send_json(message)
-                except Exception as e:
-                    error_msg = str(e)
-                    if "close frame" not in error_msg.lower() and "disconnect" not in error_msg.lower():
-                        logger.warning(f"[WebSocket] 新闻推送失败: {client_id}, {error_msg[:50]}")
-                    disconnected.append(client_id)
-
-        for client_id in disconnected:
-            self.disconnect(client_id)
+        count = self.publish_topic(self.TOPIC_NEWS, message)
 
         if news_list:
-            logger.info(f"[WebSocket] 推送 {len(news_list)} 条新闻给 {len(self.news_subscribers)} 个订阅者")
+            logger.info(f"[WebSocket] 推送 {len(news_list)} 条新闻给 {count} 个订阅者")
 
 
 # 全局连接管理器
@@ -206,11 +290,14 @@ async def websocket_dataflow(websocket: WebSocket):
     - 取消订阅: {"action": "unsubscribe", "ts_code": "600519.SH"}
     - 订阅新闻: {"action": "subscribe_news"}
     - 取消新闻订阅: {"action": "unsubscribe_news"}
+    - 订阅预警: {"action": "subscribe_alerts"}
+    - 取消预警订阅: {"action": "unsubscribe_alerts"}
     - 心跳: {"action": "ping"}
 
     服务端推送:
     - 数据更新: {"type": "stock_update", "event": "update_complete", "ts_code": "...", "data": {...}}
     - 新闻更新: {"type": "news_update", "urgency": "...", "count": N, "news": [...]}
+    - 股票预警: {"type": "stock_alert", "alert_level": "...", "alert": {...}}
     - 心跳响应: {"type": "pong", "timestamp": "..."}
     """
     client_id = await manager.connect(websocket)
@@ -263,6 +350,20 @@ async def websocket_dataflow(websocket: WebSocket):
                         "message": "已取消新闻订阅"
                     }, client_id)
 
+                elif action == "subscribe_alerts":
+                    manager.subscribe_alerts(client_id)
+                    await manager.send_personal_message({
+                        "type": "subscribed_alerts",
+                        "message": "已订阅预警推送"
+                    }, client_id)
+
+                elif action == "unsubscribe_alerts":
+                    manager.unsubscribe_alerts(client_id)
+                    await manager.send_personal_message({
+                        "type": "unsubscribed_alerts",
+                        "message": "已取消预警订阅"
+                    }, client_id)
+
                 elif action == "ping":
                     await manager.send_personal_message({
                         "type": "pong",
@@ -350,7 +451,7 @@ async def notify_news_update(news_list: List[dict], urgency: str = "normal"):
         news_list: 新闻列表
         urgency: 紧急程度 (critical/high/normal)
     """
-    await manager.notify_news(news_list, urgency)
+    await _dispatch_event("news", {"news_list": news_list, "urgency": urgency})
 
 
 async def notify_urgent_news(news_list: List[dict]):
@@ -360,7 +461,7 @@ async def notify_urgent_news(news_list: List[dict]):
     Args:
         news_list: 紧急新闻列表
     """
-    await manager.notify_news(news_list, "critical")
+    await _dispatch_event("news", {"news_list": news_list, "urgency": "critical"})
 
 
 async def notify_stock_alert(alert: dict):
@@ -377,6 +478,11 @@ async def notify_stock_alert(alert: dict):
             - message: 预警详情
             - alert_time: 预警时间
     """
+    await _dispatch_event("stock_alert", {"alert": alert})
+
+
+async def _deliver_stock_alert(alert: dict):
+    """推送股票预警给本进程的客户端"""
     ts_code = alert.get('ts_code', '')
 
     # 构建推送消息
@@ -396,40 +502,99 @@ async def notify_stock_alert(alert: dict):
         }
     }
 
-    # 1. 推送给订阅了该股票的客户端
-    if ts_code and ts_code in manager.subscriptions:
-        disconnected = []
-        for client_id in manager.subscriptions[ts_code]:
-            if client_id in manager.active_connections:
-                try:
-                    websocket = manager.active_connections[client_id]
-                    if websocket.client_state.name == "CONNECTED":
-                        await websocket.send_json(message)
-                except Exception as e:
-                    error_msg = str(e)
-                    if "close frame" not in error_msg.lower() and "disconnect" not in error_msg.lower():
-                        logger.warning(f"[WebSocket] 预警推送失败: {client_id}, {error_msg[:50]}")
-                    disconnected.append(client_id)
+    # 推送给订阅了该股票和全部预警的客户端，高级别预警同时推送给新闻订阅者
+    recipients = set(manager.topics.get(manager.stock_topic(ts_code), ())) if ts_code else set()
+    recipients.update(manager.topics.get(manager.TOPIC_ALERTS, ()))
+    if alert.get('alert_level') in ['critical', 'high']:
+        recipients.update(manager.news_subscribers)
+    manager.publish(recipients, message)
 
-        for client_id in disconnected:
-            manager.disconnect(client_id)
+    logger.info(f"[WebSocket] 推送预警: [{alert.get('alert_level')}] {ts_code} - {alert.get('title', '')[:30]}")
 
-    # 2. 高级别预警广播给所有新闻订阅者
-    if alert.get('alert_level') in ['critical', 'high']:
-        disconnected = []
-        for client_id in manager.news_subscribers:
-            if client_id in manager.active_connections:
+
+# ==================== 跨进程中继 ====================
+
+_relay_task: Optional[asyncio.Task] = None
+
+
+async def _deliver_event(event: str, payload: dict):
+    """把事件推送给本进程的客户端"""
+    if event == "news":
+        await manager.notify_news(payload.get("news_list") or [], payload.get("urgency", "normal"))
+    elif event == "stock_alert":
+        await _deliver_stock_alert(payload.get("alert") or {})
+    else:
+        logger.debug(f"[WebSocket] 未知的中继事件: {event}")
+
+
+async def _dispatch_event(event: str, payload: dict):
+    """
+    推送事件：Redis 可用时发布到频道，由各 API 进程的中继任务推送给各自的连接；
+    本进程没有运行中继任务（worker 进程、Redis 不可用或发布失败）时直接推送给本进程的连接
+    """
+    published = False
+    try:
+        from backend.services.async_task.redis_client import redis_client
+        if redis_client.is_redis_available:
+            message = json.dumps({"event": event, "payload": payload}, ensure_ascii=False, default=str)
+            await redis_client.publish(WS_EVENTS_CHANNEL, message)
+            published = True
+    except Exception as e:
+        logger.warning(f"[WebSocket] 发布推送事件失败，只推送本进程连接: {e}")
+    if not published or _relay_task is None or _relay_task.done():
+        await _deliver_event(event, payload)
+
+
+async def _relay_loop():
+    """订阅推送事件频道并转发给本进程的连接，连接断开后自动重新订阅"""
+    from backend.services.async_task.redis_client import redis_client
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(WS_EVENTS_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
                 try:
-                    websocket = manager.active_connections[client_id]
-                    if websocket.client_state.name == "CONNECTED":
-                        await websocket.send_json(message)
+                    data = json.loads(message["data"])
+                    await _deliver_event(data.get("event"), data.get("payload") or {})
                 except Exception as e:
-                    error_msg = str(e)
-                    if "close frame" not in error_msg.lower() and "disconnect" not in error_msg.lower():
-                        logger.warning(f"[WebSocket] 预警广播失败: {client_id}, {error_msg[:50]}")
-                    disconnected.append(client_id)
+                    logger.warning(f"[WebSocket] 中继推送事件失败: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[WebSocket] 推送事件订阅中断，5 秒后重试: {e}")
+            await asyncio.sleep(5)
+        finally:
+            try:
+                await pubsub.unsubscribe(WS_EVENTS_CHANNEL)
+            except Exception:
+                pass
 
-        for client_id in disconnected:
-            manager.disconnect(client_id)
 
-    logger.info(f"[WebSocket] 推送预警: [{alert.get('alert_level')}] {ts_code} - {alert.get('title', '')[:30]}")
+async def start_event_relay() -> bool:
+    """
+    启动跨进程推送中继（API 进程启动时调用，需在 Redis 连接之后）
+
+    Returns:
+        是否已启动；Redis 不可用时不启动，事件只推送给产生它的进程的连接
+    """
+    global _relay_task
+    from backend.services.async_task.redis_client import redis_client
+    if not redis_client.is_redis_available:
+        return False
+    if _relay_task is None or _relay_task.done():
+        _relay_task = asyncio.create_task(_relay_loop())
+    return True
+
+
+async def stop_event_relay():
+    """停止跨进程推送中继"""
+    global _relay_task
+    if _relay_task is not None:
+        _relay_task.cancel()
+        try:
+            await _relay_task
+        except asyncio.CancelledError:
+            pass
+        _relay_task = None
@@ -5,7 +5,7 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, List, Optional, Any, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import logging
@@ -73,8 +73,8 @@ class BacktestResult:
     trades: List[Trade]
     positions: Dict[str, Position]
     
-    # 性能指标
-    metrics: PerformanceMetrics
+    # 性能指标（批量回测时可由 calculate_results_metrics 统一计算）
+    metrics: Optional[PerformanceMetrics]
     
     # 净值曲线
     equity_curve: pd.DataFrame
@@ -129,9 +129,20 @@ class BacktestEngine:
         self,
         strategy: BaseStrategy,
         data: pd.DataFrame,
-        stock_code: str
+        stock_code: str,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        compute_metrics: bool = True
     ) -> BacktestResult:
-        """运行回测"""
+        """
+        运行回测
+
+        Args:
+            strategy: 策略实例
+            data: 行情数据
+            stock_code: 股票代码
+            progress_callback: 进度回调 (已处理K线数, 总K线数)，回调抛出异常可中止回测
+            compute_metrics: 是否计算性能指标；批量回测传 False，之后用 calculate_results_metrics 一次算完
+        """
         logger.info(f"开始回测 {stock_code}，策略：{strategy.name}")
         
         # 数据预处理
@@ -145,6 +156,9 @@ class BacktestEngine:
         
         # 逐行回测
         for idx in range(30, len(data)):  # 从的30行开始，确保有足够的历史数据
+            if progress_callback and idx % 20 == 0:
+                progress_callback(idx, len(data))
+
             current_data = data.iloc[:idx+1]
             current_bar = data.iloc[idx]
                     
@@ -202,9 +216,10 @@ class BacktestEngine:
             })
         
         # 计算性能指标
-        result = self._calculate_results(data, stock_code)
+        result = self._calculate_results(data, stock_code, compute_metrics)
         
-        logger.info(f"回测完成，总收益率：{result.metrics.total_return:.2%}")
+        if result.metrics is not None:
+            logger.info(f"回测完成，总收益率：{result.metrics.total_return:.2%}")
         
         return result
     
@@ -458,7 +473,8 @@ class BacktestEngine:
     def _calculate_results(
         self,
         data: pd.DataFrame,
-        stock_code: str
+        stock_code: str,
+        compute_metrics: bool = True
     ) -> BacktestResult:
         """计算回测结果"""
         # 创建净值曲线DataFrame
@@ -469,11 +485,13 @@ class BacktestEngine:
         drawdown_df = self.metrics_calculator.calculate_drawdown(equity_df['portfolio_value'])
         
         # 计算性能指标
-        metrics = self.metrics_calculator.calculate_metrics(
-            equity_df,
-            self.trades,
-            self.config.initial_capital
-        )
+        metrics = None
+        if compute_metrics:
+            metrics = self.metrics_calculator.calculate_metrics(
+                equity_df,
+                self.trades,
+                self.config.initial_capital
+            )
         
         # 交易分析
         trade_analysis = self._analyze_trades()
@@ -525,6 +543,35 @@ class BacktestEngine:
         })
 
 
+def calculate_results_metrics(
+    results: List[BacktestResult],
+    benchmark_returns: Optional[pd.Series] = None,
+    risk_free_rate: float = 0.03
+) -> List[BacktestResult]:
+    """
+    批量计算回测结果的性能指标（参数扫描、策略对比一次调用即可）
+    
+    Args:
+        results: 以 compute_metrics=False 运行得到的回测结果
+        benchmark_returns: 基准收益率序列
+        risk_free_rate: 无风险利率（年化）
+    
+    Returns:
+        填充了 metrics 的回测结果（原地修改）
+    """
+    if not results:
+        return results
+    metrics = MetricsCalculator(risk_free_rate).calculate_metrics_batch(
+        [r.equity_curve for r in results],
+        [r.trades for r in results],
+        [r.initial_capital for r in results],
+        benchmark_returns
+    )
+    for result, result_metrics in zip(results, metrics):
+        result.metrics = result_metrics
+    return results
+
+
 def create_backtest_engine(config: Optional[BacktestConfig] = None) -> BacktestEngine:
     """创建回测引擎实例"""
     if config is None:
@@ -0,0 +1,644 @@
+"""
+回测任务执行器
+回测在独立进程池中运行，不阻塞 FastAPI 事件循环；并发数受限，支持取消，
+进度通过 LogStreamer 推送，任务和结果持久化到数据库，重启后仍可按ID查询
+
+多进程部署（API_WORKERS>1）时各进程共用任务表：每个任务记录执行进程（owner）并定期刷新心跳，
+只有执行进程已退出或心跳超时的任务才会被标记为中断；取消请求写入任务记录，由执行进程轮询处理
+"""
+
+import asyncio
+import logging
+import math
+import os
+import queue
+import socket
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from multiprocessing import Manager
+from typing import Any, Callable, Dict, List, Optional
+
+from ..database.database import engine as db_engine, get_db_context
+from ..database.models import BacktestJob
+from ..services.async_task.log_streamer import log_streamer
+# 导入策略模块以触发策略注册
+from ..strategies import (
+    VegasADXStrategy,
+    EMABreakoutStrategy,
+    BuffettValueStrategy,
+    GrahamMarginStrategy,
+    LynchGrowthStrategy,
+    MACDCrossoverStrategy,
+    BollingerBreakoutStrategy,
+    TurtleTradingStrategy,
+    DragonLeaderStrategy,
+    MartingaleRefinedStrategy,
+    ScalpingBladeStrategy,
+    TridentStrategy,
+    SentimentResonanceStrategy,
+    DebateWeightedStrategy,
+    LimitUpTradingStrategy,
+    VolumePriceSurgeStrategy
+)
+from ..strategies.base import StrategyConfig, get_strategy_registry
+from .data_loader import DataLoader, DataSource
+from .engine import BacktestEngine, BacktestConfig, calculate_results_metrics
+
+logger = logging.getLogger(__name__)
+
+# 心跳间隔（秒）；超过 BACKTEST_HEARTBEAT_STALE_FACTOR 个间隔未刷新心跳的任务视为执行进程已退出
+HEARTBEAT_INTERVAL = max(1.0, float(os.getenv("BACKTEST_HEARTBEAT_INTERVAL", "5")))
+HEARTBEAT_STALE_FACTOR = max(2, int(os.getenv("BACKTEST_HEARTBEAT_STALE_FACTOR", "6")))
+
+ProgressFn = Callable[[int, str], None]
+
+
+class BacktestDataNotFound(Exception):
+    """无法获取回测所需的行情数据"""
+
+
+class StrategyNotFound(Exception):
+    """策略不存在"""
+
+
+class BacktestCancelled(Exception):
+    """回测任务被取消"""
+
+
+def create_strategy(name: str, config: StrategyConfig):
+    """创建策略实例"""
+    # 策略映射表 - 直接映射策略ID到策略类
+    strategy_map = {
+        "vegas_adx": VegasADXStrategy,
+        "ema_breakout": EMABreakoutStrategy,
+        "buffett_value": BuffettValueStrategy,
+        "graham_margin": GrahamMarginStrategy,
+        "lynch_growth": LynchGrowthStrategy,
+        "macd_crossover": MACDCrossoverStrategy,
+        "bollinger_breakout": BollingerBreakoutStrategy,
+        "turtle_trading": TurtleTradingStrategy,
+        "dragon_leader": DragonLeaderStrategy,
+        "martingale_refined": MartingaleRefinedStrategy,
+        "scalping_blade": ScalpingBladeStrategy,
+        "trident": TridentStrategy,
+        "sentiment_resonance": SentimentResonanceStrategy,
+        "debate_weighted": DebateWeightedStrategy,
+        "limit_up_trading": LimitUpTradingStrategy,
+        "volume_price_surge": VolumePriceSurgeStrategy,
+    }
+
+    # 先从映射表查找
+    if name in strategy_map:
+        logger.info(f"从映射表创建策略: {name}")
+        return strategy_map[name](config)
+
+    # 再从注册表获取
+    registry = get_strategy_registry()
+    strategy = registry.create_strategy(name, config)
+    if strategy:
+        logger.info(f"从注册表创建策略: {name}")
+        return strategy
+
+    logger.warning(f"未找到策略: {name}")
+    return None
+
+
+def _to_jsonable(value: Any) -> Any:
+    """把回测结果转换为可 JSON 序列化的结构（时间转 ISO 字符串，NaN/inf 转 None）"""
+    if isinstance(value, dict):
+        return {str(_to_jsonable(k)): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        # numpy 标量
+        value = value.item()
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    return value
+
+
+def _load_data(stock_code: str, start_date: str, end_date: str, progress: ProgressFn):
+    """加载行情数据并计算技术指标"""
+    progress(10, "正在加载数据...")
+    loader = DataLoader(DataSource.AKSHARE)
+    data = loader.load_stock_data(stock_code, start_date, end_date)
+    if data is None or data.empty:
+        raise BacktestDataNotFound(f"无法获取股票数据: {stock_code}")
+
+    progress(30, "正在计算技术指标...")
+    return loader.add_technical_indicators(data)
+
+
+def run_single_backtest(params: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    """
+    单策略回测（在子进程中运行）
+
+    Args:
+        params: BacktestRequest 参数
+        progress: 进度回调 (百分比, 阶段说明)
+
+    Returns:
+        回测摘要、指标、最近100个净值点和最近20笔交易
+    """
+    strategy_name = params.get("strategy_id") or params.get("strategy_name")
+    if not strategy_name:
+        raise StrategyNotFound("必须提供 strategy_id 或 strategy_name")
+
+    stock_code = params["stock_code"]
+    data = _load_data(stock_code, params["start_date"], params["end_date"], progress)
+
+    progress(40, "正在初始化策略...")
+    strategy_config = StrategyConfig(
+        name=strategy_name,
+        parameters=params.get("strategy_params") or {},
+        risk_params=params.get("risk_params") or {}
+    )
+    strategy = create_strategy(strategy_name, strategy_config)
+    if not strategy:
+        raise StrategyNotFound(f"未找到策略: {strategy_name}")
+
+    progress(50, "正在运行回测...")
+    backtest_config = BacktestConfig(
+        initial_capital=params["initial_capital"],
+        start_date=params["start_date"],
+        end_date=params["end_date"],
+        use_ai_agents=params.get("use_ai_agents", False),
+        ai_agent_names=params.get("ai_agent_names") or []
+    )
+    engine = BacktestEngine(backtest_config)
+    result = engine.run(
+        strategy, data, stock_code,
+        progress_callback=lambda done, total: progress(50 + 45 * done // total, "正在运行回测...")
+    )
+
+    initial_capital = params["initial_capital"]
+    return _to_jsonable({
+        "summary": {
+            "stock_code": stock_code,
+            "strategy": strategy_name,
+            "start_date": params["start_date"],
+            "end_date": params["end_date"],
+            "initial_capital": initial_capital,
+            "final_capital": result.final_capital,
+            "total_return": f"{((result.final_capital / initial_capital) - 1) * 100:.2f}%"
+        },
+        "metrics": result.metrics.to_dict(),
+        "equity_curve": result.equity_curve.reset_index().to_dict(orient="records")[-100:],  # 最近100个数据点
+        "trades": [
+            {
+                "timestamp": t.timestamp.isoformat(),
+                "side": t.side,
+                "price": t.price,
+                "quantity": t.quantity,
+                "commission": t.commission
+            }
+            for t in result.trades[-20:]  # 最近20笔交易
+        ]
+    })
+
+
+def run_strategy_comparison(params: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    """
+    多策略对比回测（在子进程中运行），行情数据只加载一次
+
+    Args:
+        params: {stock_code, strategy_names, start_date, end_date, initial_capital}
+        progress: 进度回调 (百分比, 阶段说明)
+    """
+    stock_code = params["stock_code"]
+    start_date = params["start_date"]
+    end_date = params["end_date"]
+    initial_capital = params["initial_capital"]
+    strategy_names = params["strategy_names"]
+
+    data = _load_data(stock_code, start_date, end_date, progress)
+
+    results = {}
+    completed = {}
+    for i, strategy_name in enumerate(strategy_names):
+        percent = 40 + 55 * i // len(strategy_names)
+        message = f"正在回测策略 {strategy_name}..."
+        progress(percent, message)
+        try:
+            strategy = create_strategy(strategy_name, StrategyConfig(name=strategy_name))
+            if not strategy:
+                logger.warning(f"策略不存在: {strategy_name}")
+                continue
+
+            engine = BacktestEngine(BacktestConfig(
+                initial_capital=initial_capital,
+                start_date=start_date,
+                end_date=end_date
+            ))
+            completed[strategy_name] = engine.run(
+                strategy, data.copy(), stock_code,
+                progress_callback=lambda done, total: progress(percent, message),
+                compute_metrics=False
+            )
+            results[strategy_name] = None
+        except BacktestCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"策略 {strategy_name} 回测失败: {e}")
+            results[strategy_name] = {
+                "error": str(e)
+            }
+
+    # 所有策略的性能指标一次批量计算
+    progress(95, "正在计算性能指标...")
+    calculate_results_metrics(list(completed.values()))
+    for strategy_name, result in completed.items():
+        results[strategy_name] = {
+            "metrics": result.metrics.to_dict(),
+            "final_capital": result.final_capital,
+            "total_return": ((result.final_capital / initial_capital) - 1),
+            "trade_count": len(result.trades)
+        }
+
+    return _to_jsonable({
+        "stock_code": stock_code,
+        "period": f"{start_date} to {end_date}",
+        "comparison": results
+    })
+
+
+_JOB_FUNCTIONS = {
+    "single": run_single_backtest,
+    "compare": run_strategy_comparison,
+}
+
+
+def _pid_alive(pid: int) -> bool:
+    """本机进程是否仍存活（无法判断时按存活处理，交给心跳超时兜底）"""
+    try:
+        import psutil
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _execute_job(job_id: str, kind: str, params: Dict[str, Any], events, cancel_flags) -> Dict[str, Any]:
+    """子进程入口：执行回测，进度写入事件队列，检测到取消标记时中止"""
+    last = {"progress": -1, "message": None}
+
+    def progress(percent: int, message: str):
+        if cancel_flags.get(job_id):
+            raise BacktestCancelled(job_id)
+        if percent != last["progress"] or message != last["message"]:
+            last["progress"], last["message"] = percent, message
+            events.put((job_id, percent, message))
+
+    return _JOB_FUNCTIONS[kind](params, progress)
+
+
+class BacktestJobRunner:
+    """回测任务执行器"""
+
+    _instance = None
+
+    # 进入终态的任务状态
+    FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        # 进程池大小即最大并发回测数，超出的任务排队等待
+        self._max_workers = max(1, int(os.getenv("BACKTEST_MAX_WORKERS", "2")))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._events = None         # 子进程 -> 主进程的进度队列
+        self._cancel_flags = None   # 主进程 -> 子进程的取消标记
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pump_task: Optional[asyncio.Task] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._running_jobs: set = set()
+        self._running = False
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # 本进程标识：主机名:PID
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        BacktestJob.__table__.create(bind=db_engine, checkfirst=True)
+        self._recover_interrupted()
+        logger.info("BacktestJobRunner initialized")
+
+    def _owner_alive(self, owner: Optional[str], heartbeat_at: Optional[datetime], now: datetime) -> bool:
+        """任务的执行进程是否仍存活"""
+        if not owner or heartbeat_at is None:
+            return False
+        if owner == self._owner:
+            return True
+        if now - heartbeat_at > timedelta(seconds=HEARTBEAT_INTERVAL * HEARTBEAT_STALE_FACTOR):
+            return False
+        host, _, pid = owner.rpartition(":")
+        if host == socket.gethostname() and pid.isdigit():
+            return _pid_alive(int(pid))
+        return True
+
+    def _recover_interrupted(self):
+        """执行进程已退出（或心跳超时）的未完成任务标记为失败"""
+        now = datetime.utcnow()
+        with get_db_context() as db:
+            jobs = db.query(BacktestJob.job_id, BacktestJob.owner, BacktestJob.heartbeat_at).filter(
+                BacktestJob.status.in_(("pending", "running"))
+            ).all()
+            dead = [
+                job_id for job_id, owner, heartbeat_at in jobs
+                if not self._owner_alive(owner, heartbeat_at, now)
+            ]
+            if not dead:
+                return
+            count = db.query(BacktestJob).filter(
+                BacktestJob.job_id.in_(dead),
+                BacktestJob.status.in_(("pending", "running"))
+            ).update({
+                "status": "failed",
+                "error": "服务重启，任务中断",
+                "finished_at": now
+            }, synchronize_session=False)
+        if count:
+            logger.warning(f"{count} 个回测任务因执行进程退出而中断")
+
+    async def start(self):
+        """启动进程池和进度转发"""
+        if self._running:
+            return
+        self._running = True
+        self._manager = Manager()
+        self._events = self._manager.Queue()
+        self._cancel_flags = self._manager.dict()
+        self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        self._semaphore = asyncio.Semaphore(self._max_workers)
+        self._pump_task = asyncio.create_task(self._pump_events())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        logger.info(f"BacktestJobRunner started with {self._max_workers} workers")
+
+    async def stop(self):
+        """停止执行器：排队任务取消，运行中的任务通知子进程中止"""
+        if not self._running:
+            return
+        self._running = False
+        for job_id in list(self._running_jobs):
+            self._cancel_flags[job_id] = True
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._pump_task:
+            self._pump_task.cancel()
+            self._pump_task = None
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager:
+            self._manager.shutdown()
+            self._manager = None
+        logger.info("BacktestJobRunner stopped")
+
+    # ==================== 提交与等待 ====================
+
+    async def submit(self, kind: str, params: Dict[str, Any]) -> str:
+        """
+        提交回测任务
+
+        Args:
+            kind: single（单策略回测）/ compare（多策略对比）
+            params: 回测参数
+
+        Returns:
+            任务ID
+        """
+        if kind not in _JOB_FUNCTIONS:
+            raise ValueError(f"未知的回测任务类型: {kind}")
+        if not self._running:
+            await self.start()
+
+        job_id = str(uuid.uuid4())
+        with get_db_context() as db:
+            db.add(BacktestJob(
+                job_id=job_id,
+                kind=kind,
+                params=params,
+                status="pending",
+                progress=0,
+                message="回测任务已创建，等待执行...",
+                created_at=datetime.utcnow(),
+                owner=self._owner,
+                heartbeat_at=datetime.utcnow()
+            ))
+
+        task = asyncio.create_task(self._run_job(job_id, kind, params))
+        task.add_done_callback(lambda t, job_id=job_id: self._on_task_done(job_id, t))
+        self._tasks[job_id] = task
+        return job_id
+
+    async def run(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        提交回测任务并等待结果（等待期间不阻塞事件循环）
+
+        Returns:
+            {'job_id': 任务ID, **回测结果}
+        """
+        job_id = await self.submit(kind, params)
+        result = await asyncio.shield(self._tasks[job_id])
+        return {"job_id": job_id, **result}
+
+    def _on_task_done(self, job_id: str, task: asyncio.Task):
+        self._tasks.pop(job_id, None)
+        if not task.cancelled():
+            # 异常已写入任务记录，这里只需取出避免未处理异常告警
+            task.exception()
+
+    async def _run_job(self, job_id: str, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """排队等待执行槽位，在进程池中执行并保存结果"""
+        try:
+            async with self._semaphore:
+                self._update(job_id, status="running", started_at=datetime.utcnow(), message="正在执行回测...")
+                self._running_jobs.add(job_id)
+                await log_streamer.info(job_id, f"回测任务开始执行: {kind}", task_id=job_id)
+
+                loop = asyncio.get_running_loop()
+                try:
+                    result = await loop.run_in_executor(
+                        self._executor,
+                        _execute_job,
+                        job_id, kind, params, self._events, self._cancel_flags
+                    )
+                finally:
+                    self._running_jobs.discard(job_id)
+                    self._cancel_flags.pop(job_id, None)
+
+        except (asyncio.CancelledError, BacktestCancelled):
+            self._finish(job_id, "cancelled", message="回测已取消")
+            await log_streamer.warning(job_id, "回测任务已取消", task_id=job_id)
+            raise BacktestCancelled(job_id)
+
+        except Exception as e:
+            logger.error(f"回测任务 {job_id} 失败: {e}")
+            self._finish(job_id, "failed", message="回测失败", error=str(e))
+            await log_streamer.error(job_id, f"回测失败: {e}", task_id=job_id)
+            raise
+
+        self._finish(job_id, "completed", message="回测完成", progress=100, result=result)
+        await log_streamer.publish_event(job_id, "backtest_complete", {"job_id": job_id})
+        await log_streamer.info(job_id, "回测完成", task_id=job_id)
+        return result
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        取消回测任务：排队中的立即取消，运行中的在下一个进度检查点中止
+
+        其它进程执行的任务写入取消请求，由执行进程在下一次心跳时处理
+
+        Returns:
+            任务是否仍在执行中（已结束或不存在返回 False）
+        """
+        if self._cancel_local(job_id):
+            return True
+
+        with get_db_context() as db:
+            job = db.query(BacktestJob).filter(BacktestJob.job_id == job_id).first()
+            if job is None or job.status in self.FINISHED_STATUSES:
+                return False
+            if job.owner == self._owner or not self._owner_alive(job.owner, job.heartbeat_at, datetime.utcnow()):
+                # 本进程的任务已不在内存中，或执行进程已退出
+                return False
+            job.cancel_requested = True
+        return True
+
+    def _cancel_local(self, job_id: str) -> bool:
+        """取消本进程内的任务"""
+        task = self._tasks.get(job_id)
+        if task is None:
+            return False
+        if job_id in self._running_jobs:
+            self._cancel_flags[job_id] = True
+        else:
+            task.cancel()
+        return True
+
+    # ==================== 心跳 ====================
+
+    async def _heartbeat_loop(self):
+        """刷新本进程任务的心跳，处理其它进程写入的取消请求，并回收执行进程已退出的任务"""
+        ticks = 0
+        while self._running:
+            try:
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+                for job_id in await asyncio.to_thread(self._heartbeat):
+                    logger.info(f"收到回测任务取消请求: {job_id}")
+                    self._cancel_local(job_id)
+                ticks += 1
+                if ticks % HEARTBEAT_STALE_FACTOR == 0:
+                    await asyncio.to_thread(self._recover_interrupted)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"回测任务心跳失败: {e}")
+
+    def _heartbeat(self) -> List[str]:
+        """刷新心跳，返回被其它进程请求取消的本进程任务"""
+        job_ids = list(self._tasks)
+        if not job_ids:
+            return []
+        with get_db_context() as db:
+            db.query(BacktestJob).filter(
+                BacktestJob.job_id.in_(job_ids),
+                BacktestJob.status.notin_(self.FINISHED_STATUSES)
+            ).update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+            return [
+                job_id for (job_id,) in db.query(BacktestJob.job_id).filter(
+                    BacktestJob.job_id.in_(job_ids),
+                    BacktestJob.cancel_requested.is_(True)
+                ).all()
+            ]
+
+    # ==================== 进度 ====================
+
+    async def _pump_events(self):
+        """把子进程上报的进度写入任务记录并通过 LogStreamer 推送"""
+        events = self._events
+        while self._running:
+            try:
+                job_id, percent, message = await asyncio.to_thread(events.get, True, 0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError, BrokenPipeError):
+                break
+            except Exception as e:
+                logger.error(f"回测进度转发失败: {e}")
+                continue
+
+            self._update(job_id, progress=percent, message=message)
+            await log_streamer.publish_event(job_id, "backtest_progress", {
+                "job_id": job_id,
+                "progress": percent,
+                "message": message
+            })
+
+    # ==================== 任务记录 ====================
+
+    def _update(self, job_id: str, **values):
+        with get_db_context() as db:
+            db.query(BacktestJob).filter(
+                BacktestJob.job_id == job_id,
+                BacktestJob.status.notin_(self.FINISHED_STATUSES)
+            ).update(values, synchronize_session=False)
+
+    def _finish(self, job_id: str, status: str, **values):
+        self._update(job_id, status=status, finished_at=datetime.utcnow(), **values)
+
+    def get_job(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """按ID获取任务（含结果）"""
+        with get_db_context() as db:
+            job = db.query(BacktestJob).filter(BacktestJob.job_id == job_id).first()
+            return job.to_dict(include_result) if job else None
+
+    def list_jobs(self, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """最近的任务列表（不含结果）"""
+        with get_db_context() as db:
+            query = db.query(BacktestJob)
+            if status:
+                query = query.filter(BacktestJob.status == status)
+            jobs = query.order_by(BacktestJob.created_at.desc()).limit(limit).all()
+            return [job.to_dict(include_result=False) for job in jobs]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {
+            "running": self._running,
+            "max_workers": self._max_workers,
+            "active_jobs": len(self._running_jobs),
+            "queued_jobs": len(self._tasks) - len(self._running_jobs)
+        }
+
+
+# 单例获取函数
+_runner = None
+
+
+def get_backtest_job_runner() -> BacktestJobRunner:
+    global _runner
+    if _runner is None:
+        _runner = BacktestJobRunner()
+    return _runner
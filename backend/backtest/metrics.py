@@ -4,7 +4,8 @@
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional
+from collections import deque
+from typing import Any, List, Dict, Optional, Sequence, Union
 from dataclasses import dataclass
 
 
@@ -130,84 +131,268 @@ class MetricsCalculator:
         Returns:
             性能指标
         """
-        # 计算收益序列
-        returns = equity_curve['portfolio_value'].pct_change().dropna()
+        return self.calculate_metrics_batch(
+            [equity_curve],
+            [trades],
+            initial_capital,
+            benchmark_returns
+        )[0]
+    
+    def calculate_metrics_batch(
+        self,
+        equity_curves: Sequence[pd.DataFrame],
+        trades_list: Sequence[List],
+        initial_capital: Union[float, Sequence[float]],
+        benchmark_returns: Optional[pd.Series] = None
+    ) -> List[PerformanceMetrics]:
+        """
+        批量计算多条净值曲线的性能指标
         
-        # 计算总收益率
-        total_return = (equity_curve['portfolio_value'].iloc[-1] / initial_capital) - 1
+        日期相同的曲线（同一份行情上的参数扫描、策略对比）合并为矩阵，一次向量化计算
         
-        # 计算年化收益率
-        days = (equity_curve.index[-1] - equity_curve.index[0]).days
-        years = days / 365.25
-        annual_return = (1 + total_return) ** (1 / years) - 1 if years > 0 else 0
+        Args:
+            equity_curves: 净值曲线列表
+            trades_list: 对应的交易记录列表
+            initial_capital: 初始资金（统一值或每条曲线一个）
+            benchmark_returns: 基准收益率序列
         
-        # 计算月均收益率
-        monthly_return = returns.resample('M').apply(lambda x: (1 + x).prod() - 1).mean()
+        Returns:
+            与输入顺序一致的性能指标列表
+        """
+        n_runs = len(equity_curves)
+        capitals = np.broadcast_to(np.asarray(initial_capital, dtype=float), (n_runs,))
+        
+        # 按日期索引分组
+        groups: List[Dict[str, Any]] = []
+        for i, curve in enumerate(equity_curves):
+            for group in groups:
+                if group['index'].equals(curve.index):
+                    group['runs'].append(i)
+                    break
+            else:
+                groups.append({'index': curve.index, 'runs': [i]})
+        
+        results: List[Optional[PerformanceMetrics]] = [None] * n_runs
+        for group in groups:
+            runs = group['runs']
+            values = np.vstack([
+                equity_curves[i]['portfolio_value'].to_numpy(dtype=float) for i in runs
+            ])
+            curve_metrics = self.calculate_curve_metrics(
+                values,
+                group['index'],
+                capitals[runs],
+                benchmark_returns
+            )
+            
+            for row, i in enumerate(runs):
+                results[i] = PerformanceMetrics(
+                    # 收益指标
+                    total_return=float(curve_metrics['total_return'][row]),
+                    annual_return=float(curve_metrics['annual_return'][row]),
+                    monthly_return=float(curve_metrics['monthly_return'][row]),
+                    
+                    # 风险指标
+                    max_drawdown=float(curve_metrics['max_drawdown'][row]),
+                    max_drawdown_duration=int(curve_metrics['max_drawdown_duration'][row]),
+                    volatility=float(curve_metrics['volatility'][row]),
+                    downside_deviation=float(curve_metrics['downside_deviation'][row]),
+                    
+                    # 风险调整收益
+                    sharpe_ratio=float(curve_metrics['sharpe_ratio'][row]),
+                    sortino_ratio=float(curve_metrics['sortino_ratio'][row]),
+                    calmar_ratio=float(curve_metrics['calmar_ratio'][row]),
+                    information_ratio=float(curve_metrics['information_ratio'][row]),
+                    
+                    # 交易统计
+                    **self._calculate_trade_statistics(trades_list[i], capitals[i]),
+                    
+                    # 相对指标
+                    benchmark_return=float(curve_metrics['benchmark_return']),
+                    alpha=float(curve_metrics['alpha'][row]),
+                    beta=float(curve_metrics['beta'][row]),
+                    correlation=float(curve_metrics['correlation'][row])
+                )
+        
+        return results
+    
+    def calculate_curve_metrics(
+        self,
+        values: np.ndarray,
+        dates: pd.DatetimeIndex,
+        initial_capital: Union[float, np.ndarray],
+        benchmark_returns: Optional[pd.Series] = None
+    ) -> Dict[str, Any]:
+        """
+        净值曲线指标计算核心（向量化）
         
-        # 计算最大回撤
-        drawdown_data = self.calculate_drawdown(equity_curve['portfolio_value'])
-        max_drawdown = drawdown_data['drawdown'].min()
-        max_drawdown_duration = self._calculate_max_drawdown_duration(drawdown_data)
+        Args:
+            values: 净值矩阵 (曲线数 × 日期数)，一维数组视为单条曲线
+            dates: 日期索引
+            initial_capital: 初始资金（统一值或每条曲线一个）
+            benchmark_returns: 基准收益率序列
         
-        # 计算波动率
-        volatility = returns.std() * np.sqrt(252)  # 年化波动率
+        Returns:
+            每个指标一个长度为曲线数的数组；monthly_returns 为 (曲线数 × 月数) 矩阵，
+            months 为对应的月份
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        dates = pd.DatetimeIndex(dates)
+        n_runs, n_dates = values.shape
+        capital = np.broadcast_to(np.asarray(initial_capital, dtype=float), (n_runs,))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 收益序列
+            returns = values[:, 1:] / values[:, :-1] - 1
+            
+            # 总收益率与年化收益率
+            total_return = values[:, -1] / capital - 1
+            years = (dates[-1] - dates[0]).days / 365.25
+            if years > 0:
+                annual_return = (1 + total_return) ** (1 / years) - 1
+            else:
+                annual_return = np.zeros(n_runs)
+            
+            # 月度收益（按自然月复利，区间内无数据的月份记为0）
+            monthly_returns, months = self._monthly_returns(returns, dates[1:])
+            monthly_return = monthly_returns.mean(axis=1) if months.size else np.full(n_runs, np.nan)
+            
+            # 回撤与最长回撤持续天数
+            cummax = np.maximum.accumulate(values, axis=1)
+            drawdown = (values - cummax) / cummax
+            max_drawdown = drawdown.min(axis=1)
+            max_drawdown_duration = self._longest_run(drawdown < 0)
+            
+            # 波动率与下行标准差（年化）
+            volatility = self._masked_std(returns, np.ones_like(returns, dtype=bool)) * np.sqrt(252)
+            negative = returns < 0
+            downside_deviation = np.where(
+                negative.any(axis=1),
+                self._masked_std(returns, negative) * np.sqrt(252),
+                0.0
+            )
+            
+            # 夏普、索提诺、卡尔玛比率
+            excess_return = annual_return - self.risk_free_rate
+            sharpe_ratio = np.where(volatility > 0, excess_return / volatility, 0.0)
+            sortino_ratio = np.where(downside_deviation > 0, excess_return / downside_deviation, 0.0)
+            calmar_ratio = np.where(max_drawdown != 0, annual_return / np.abs(max_drawdown), 0.0)
+            
+            relative_metrics = self._relative_metrics(returns, dates[1:], benchmark_returns)
         
-        # 计算下行标准差
-        downside_returns = returns[returns < 0]
-        downside_deviation = downside_returns.std() * np.sqrt(252) if len(downside_returns) > 0 else 0
+        return {
+            'total_return': total_return,
+            'annual_return': annual_return,
+            'monthly_return': monthly_return,
+            'monthly_returns': monthly_returns,
+            'months': months,
+            'max_drawdown': max_drawdown,
+            'max_drawdown_duration': max_drawdown_duration,
+            'volatility': volatility,
+            'downside_deviation': downside_deviation,
+            'sharpe_ratio': sharpe_ratio,
+            'sortino_ratio': sortino_ratio,
+            'calmar_ratio': calmar_ratio,
+            **relative_metrics
+        }
+    
+    @staticmethod
+    def _masked_std(x: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """按行计算掩码内元素的样本标准差（ddof=1），不足2个元素时为 NaN"""
+        count = mask.sum(axis=1)
+        mean = np.where(mask, x, 0).sum(axis=1) / count
+        deviation = np.where(mask, x - mean[:, None], 0)
+        return np.sqrt((deviation ** 2).sum(axis=1) / np.where(count > 1, count - 1, np.nan))
+    
+    @staticmethod
+    def _longest_run(flags: np.ndarray) -> np.ndarray:
+        """按行计算连续 True 的最大长度"""
+        if flags.shape[1] == 0:
+            return np.zeros(flags.shape[0], dtype=int)
+        idx = np.arange(flags.shape[1])
+        last_reset = np.maximum.accumulate(np.where(flags, -1, idx), axis=1)
+        return np.where(flags, idx - last_reset, 0).max(axis=1)
+    
+    @staticmethod
+    def _monthly_returns(returns: np.ndarray, dates: pd.DatetimeIndex):
+        """按自然月复利汇总收益，返回 (曲线数 × 月数) 矩阵和月份"""
+        if len(dates) == 0:
+            return np.zeros((returns.shape[0], 0)), pd.PeriodIndex([], freq='M')
+        month_ids = (dates.year * 12 + dates.month - 1).to_numpy()
+        first = month_ids.min()
+        n_months = month_ids.max() - first + 1
+        starts = np.flatnonzero(np.r_[True, month_ids[1:] != month_ids[:-1]])
+        growth = np.ones((returns.shape[0], n_months))
+        np.multiply.at(
+            growth,
+            (slice(None), month_ids[starts] - first),
+            np.multiply.reduceat(1 + returns, starts, axis=1)
+        )
+        months = pd.period_range(start=dates.min(), periods=n_months, freq='M')
+        return growth - 1, months
+    
+    def _relative_metrics(
+        self,
+        returns: np.ndarray,
+        dates: pd.DatetimeIndex,
+        benchmark_returns: Optional[pd.Series]
+    ) -> Dict[str, Any]:
+        """计算相对基准的指标（alpha/beta/相关系数/信息比率）"""
+        n_runs = returns.shape[0]
+        zeros = {
+            'benchmark_return': 0.0,
+            'alpha': np.zeros(n_runs),
+            'beta': np.zeros(n_runs),
+            'correlation': np.zeros(n_runs),
+            'information_ratio': np.zeros(n_runs)
+        }
+        if benchmark_returns is None:
+            return zeros
         
-        # 计算夏普比率
-        excess_return = annual_return - self.risk_free_rate
-        sharpe_ratio = excess_return / volatility if volatility > 0 else 0
+        # 对齐数据
+        common = dates.intersection(benchmark_returns.index)
+        if len(common) == 0:
+            return zeros
+        strategy_returns = returns[:, dates.get_indexer(common)]
+        bench_returns = benchmark_returns.reindex(common).to_numpy(dtype=float)
+        ddof = len(common) - 1
         
-        # 计算索提诺比率
-        sortino_ratio = excess_return / downside_deviation if downside_deviation > 0 else 0
+        # 基准总收益
+        benchmark_return = np.prod(1 + bench_returns) - 1
         
-        # 计算卡尔玛比率
-        calmar_ratio = annual_return / abs(max_drawdown) if max_drawdown != 0 else 0
+        # 计算beta和alpha
+        strategy_mean = strategy_returns.mean(axis=1)
+        bench_mean = bench_returns.mean()
+        strategy_dev = strategy_returns - strategy_mean[:, None]
+        bench_dev = bench_returns - bench_mean
+        covariance = (strategy_dev * bench_dev).sum(axis=1) / ddof
+        benchmark_variance = (bench_dev ** 2).sum() / ddof
         
-        # 计算交易统计
-        trade_stats = self._calculate_trade_statistics(trades, initial_capital)
+        beta = covariance / benchmark_variance if benchmark_variance > 0 else np.zeros(n_runs)
         
-        # 计算相对指标
-        relative_metrics = self._calculate_relative_metrics(
-            returns,
-            benchmark_returns
-        ) if benchmark_returns is not None else {
-            'benchmark_return': 0,
-            'alpha': 0,
-            'beta': 0,
-            'correlation': 0,
-            'information_ratio': 0
-        }
+        # 年化收益率
+        strategy_annual = strategy_mean * 252
+        benchmark_annual = bench_mean * 252
         
-        return PerformanceMetrics(
-            # 收益指标
-            total_return=total_return,
-            annual_return=annual_return,
-            monthly_return=monthly_return,
-            
-            # 风险指标
-            max_drawdown=max_drawdown,
-            max_drawdown_duration=max_drawdown_duration,
-            volatility=volatility,
-            downside_deviation=downside_deviation,
-            
-            # 风险调整收益
-            sharpe_ratio=sharpe_ratio,
-            sortino_ratio=sortino_ratio,
-            calmar_ratio=calmar_ratio,
-            information_ratio=relative_metrics.get('information_ratio', 0),
-            
-            # 交易统计
-            **trade_stats,
-            
-            # 相对指标
-            benchmark_return=relative_metrics.get('benchmark_return', 0),
-            alpha=relative_metrics.get('alpha', 0),
-            beta=relative_metrics.get('beta', 0),
-            correlation=relative_metrics.get('correlation', 0)
-        )
+        # Alpha
+        alpha = strategy_annual - (self.risk_free_rate + beta * (benchmark_annual - self.risk_free_rate))
+        
+        # 相关系数
+        strategy_std = np.sqrt((strategy_dev ** 2).sum(axis=1) / ddof)
+        correlation = covariance / (strategy_std * np.sqrt(benchmark_variance))
+        
+        # 信息比率
+        active_returns = strategy_returns - bench_returns
+        tracking_error = self._masked_std(active_returns, np.ones_like(active_returns, dtype=bool)) * np.sqrt(252)
+        information_ratio = np.where(tracking_error > 0, (strategy_annual - benchmark_annual) / tracking_error, 0.0)
+        
+        return {
+            'benchmark_return': benchmark_return,
+            'alpha': alpha,
+            'beta': beta,
+            'correlation': correlation,
+            'information_ratio': information_ratio
+        }
     
     def calculate_drawdown(self, equity_series: pd.Series) -> pd.DataFrame:
         """计算回撤序列"""
@@ -225,21 +410,8 @@ class MetricsCalculator:
     
     def _calculate_max_drawdown_duration(self, drawdown_data: pd.DataFrame) -> int:
         """计算最大回撤持续时间"""
-        # 找出所有回撤期
-        in_drawdown = drawdown_data['drawdown'] < 0
-        
-        # 计算连续回撤天数
-        max_duration = 0
-        current_duration = 0
-        
-        for is_dd in in_drawdown:
-            if is_dd:
-                current_duration += 1
-                max_duration = max(max_duration, current_duration)
-            else:
-                current_duration = 0
-        
-        return max_duration
+        in_drawdown = drawdown_data['drawdown'].to_numpy() < 0
+        return int(self._longest_run(in_drawdown[None, :])[0])
     
     def _calculate_trade_statistics(
         self,
@@ -334,75 +506,23 @@ class MetricsCalculator:
     def _pair_trades(self, trades: List) -> List[Dict]:
         """配对买入和卖出交易"""
         paired = []
-        buy_trades = {}
+        buy_trades: Dict[str, deque] = {}
         
         for trade in trades:
             if trade.side == 'buy':
                 if trade.stock_code not in buy_trades:
-                    buy_trades[trade.stock_code] = []
+                    buy_trades[trade.stock_code] = deque()
                 buy_trades[trade.stock_code].append(trade)
             
             elif trade.side == 'sell':
                 if trade.stock_code in buy_trades and buy_trades[trade.stock_code]:
-                    buy_trade = buy_trades[trade.stock_code].pop(0)
+                    buy_trade = buy_trades[trade.stock_code].popleft()
                     paired.append({
                         'buy': buy_trade,
                         'sell': trade
                     })
         
         return paired
-    
-    def _calculate_relative_metrics(
-        self,
-        returns: pd.Series,
-        benchmark_returns: pd.Series
-    ) -> Dict:
-        """计算相对指标"""
-        # 对齐数据
-        aligned_returns = returns.align(benchmark_returns, join='inner')
-        strategy_returns = aligned_returns[0]
-        bench_returns = aligned_returns[1]
-        
-        if len(strategy_returns) == 0:
-            return {
-                'benchmark_return': 0,
-                'alpha': 0,
-                'beta': 0,
-                'correlation': 0,
-                'information_ratio': 0
-            }
-        
-        # 基准总收益
-        benchmark_return = (1 + bench_returns).prod() - 1
-        
-        # 计算beta和alpha
-        covariance = strategy_returns.cov(bench_returns)
-        benchmark_variance = bench_returns.var()
-        
-        beta = covariance / benchmark_variance if benchmark_variance > 0 else 0
-        
-        # 年化收益率
-        strategy_annual = strategy_returns.mean() * 252
-        benchmark_annual = bench_returns.mean() * 252
-        
-        # Alpha
-        alpha = strategy_annual - (self.risk_free_rate + beta * (benchmark_annual - self.risk_free_rate))
-        
-        # 相关系数
-        correlation = strategy_returns.corr(bench_returns)
-        
-        # 信息比率
-        active_returns = strategy_returns - bench_returns
-        tracking_error = active_returns.std() * np.sqrt(252)
-        information_ratio = (strategy_annual - benchmark_annual) / tracking_error if tracking_error > 0 else 0
-        
-        return {
-            'benchmark_return': benchmark_return,
-            'alpha': alpha,
-            'beta': beta,
-            'correlation': correlation,
-            'information_ratio': information_ratio
-        }
 
 
 def create_metrics_calculator(risk_free_rate: float = 0.03) -> MetricsCalculator:
@@ -16,7 +16,7 @@ from itertools import product
 import logging
 from datetime import datetime
 
-from .engine import BacktestEngine, BacktestConfig
+from .engine import BacktestEngine, BacktestConfig, calculate_results_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -77,9 +77,6 @@ class ParameterOptimizer:
         
         logger.info(f"总共测试 {len(combinations)} 个参数组合")
         
-        best_score = -np.inf
-        best_params = None
-        best_result = None
         results = []
         
         for i, combination in enumerate(combinations):
@@ -94,29 +91,22 @@ class ParameterOptimizer:
                     data
                 )
                 
-                # 获取评估指标
-                score = self._get_metric_value(result, metric)
-                
                 # 记录结果
                 results.append({
                     "params": params,
-                    "score": score,
                     "result": result
                 })
                 
-                # 更新最佳结果
-                if score > best_score:
-                    best_score = score
-                    best_params = params
-                    best_result = result
-                
                 if (i + 1) % 10 == 0:
-                    logger.info(f"已测试 {i+1}/{len(combinations)} 个组合，当前最佳{metric}: {best_score:.4f}")
+                    logger.info(f"已测试 {i+1}/{len(combinations)} 个组合")
                     
             except Exception as e:
                 logger.error(f"参数组合 {params} 测试失败: {e}")
                 continue
         
+        # 所有组合的性能指标一次批量计算
+        best_score, best_params, best_result = self._score_results(results, metric)
+        
         # 保存优化历史
         self.optimization_history.append({
             "method": "grid_search",
@@ -158,9 +148,6 @@ class ParameterOptimizer:
         """
         logger.info(f"开始随机搜索优化，迭代次数: {n_iterations}")
         
-        best_score = -np.inf
-        best_params = None
-        best_result = None
         results = []
         
         for i in range(n_iterations):
@@ -180,29 +167,22 @@ class ParameterOptimizer:
                     data
                 )
                 
-                # 获取评估指标
-                score = self._get_metric_value(result, metric)
-                
                 # 记录结果
                 results.append({
                     "params": params,
-                    "score": score,
                     "result": result
                 })
                 
-                # 更新最佳结果
-                if score > best_score:
-                    best_score = score
-                    best_params = params
-                    best_result = result
-                
                 if (i + 1) % 10 == 0:
-                    logger.info(f"已测试 {i+1}/{n_iterations} 次，当前最佳{metric}: {best_score:.4f}")
+                    logger.info(f"已测试 {i+1}/{n_iterations} 次")
                     
             except Exception as e:
                 logger.error(f"参数 {params} 测试失败: {e}")
                 continue
         
+        # 所有参数的性能指标一次批量计算
+        best_score, best_params, best_result = self._score_results(results, metric)
+        
         return {
             "best_params": best_params,
             "best_score": best_score,
@@ -249,11 +229,42 @@ class ParameterOptimizer:
         )
         engine = BacktestEngine(backtest_config)
         
-        # 运行回测
-        result = engine.run(strategy, data, "OPTIMIZE")
+        # 运行回测（性能指标由 _score_results 批量计算）
+        result = engine.run(strategy, data, "OPTIMIZE", compute_metrics=False)
         
         return result
     
+    def _score_results(
+        self,
+        results: List[Dict[str, Any]],
+        metric: str
+    ) -> Tuple[float, Optional[Dict[str, Any]], Any]:
+        """
+        批量计算所有回测结果的性能指标并评分
+        
+        Args:
+            results: [{"params": ..., "result": ...}]，原地写入 score
+            metric: 优化指标
+            
+        Returns:
+            (最佳得分, 最佳参数, 最佳回测结果)
+        """
+        calculate_results_metrics([r["result"] for r in results])
+        
+        best_score = -np.inf
+        best_params = None
+        best_result = None
+        for item in results:
+            item["score"] = self._get_metric_value(item["result"], metric)
+            if item["score"] > best_score:
+                best_score = item["score"]
+                best_params = item["params"]
+                best_result = item["result"]
+        
+        if results:
+            logger.info(f"已完成 {len(results)} 组回测评估，最佳{metric}: {best_score:.4f}")
+        return best_score, best_params, best_result
+    
     def _get_metric_value(self, result, metric: str) -> float:
         """
         从回测结果中获取指标值
@@ -406,9 +417,12 @@ class PortfolioOptimizer:
                 slippage_rate=0.0001
             )
             engine = BacktestEngine(backtest_config)
-            result = engine.run(strategy, data, name)
+            result = engine.run(strategy, data, name, compute_metrics=False)
             strategy_results[name] = result
         
+        # 性能指标一次批量计算
+        calculate_results_metrics(list(strategy_results.values()))
+        
         # 简化版：等权重配置
         n_strategies = len(strategies)
         equal_weights = {name: 1.0 / n_strategies for name, _ in strategies}
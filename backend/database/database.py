@@ -4,12 +4,15 @@
 
 import os
 import threading
-from sqlalchemy import create_engine, text, event
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.pool import StaticPool
 from contextlib import contextmanager
 
 from backend.database.models import Base
+from backend.database.stats_rollup import StatsRollupService  # 同时注册统计汇总表的增量维护事件
+from backend.database.sqlite_pool import (
+    CheckpointScheduler, RoutingSession, create_sqlite_engines, get_engine_stats
+)
 
 # 数据库配置
 # 优先使用环境变量，否则使用 /app/data 目录（Docker）或当前目录（本地开发）
@@ -26,26 +29,11 @@ DATABASE_URL = os.getenv("DATABASE_URL", get_default_db_path())
 _sqlite_write_lock = threading.Lock()
 
 # 创建引擎
-# SQLite 需要特殊配置以支持多线程
+# SQLite：engine 为唯一的写连接（写事务串行），read_engine 为只读连接池（WAL 下与写并发）
+# 详见 sqlite_pool.py；DB_READER_POOL_SIZE=0 时不拆分，沿用单连接
+read_engine = None
 if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={
-            "check_same_thread": False,
-            "timeout": 30  # 增加超时时间
-        },
-        poolclass=StaticPool,
-        echo=False  # 设置为 True 可以看到 SQL 语句
-    )
-
-    # 启用 WAL 模式以提高并发性能
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA synchronous=NORMAL")
-        cursor.execute("PRAGMA busy_timeout=30000")  # 30秒超时
-        cursor.close()
+    engine, read_engine = create_sqlite_engines(DATABASE_URL)
 else:
     # PostgreSQL/MySQL 配置
     engine = create_engine(
@@ -57,13 +45,37 @@ else:
     )
     _sqlite_write_lock = None  # 非 SQLite 不需要锁
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 创建会话工厂（读语句自动走只读连接池，写语句走写连接）
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, read_bind=read_engine
+)
 
 # 线程安全的会话
 ScopedSession = scoped_session(SessionLocal)
 
 
+_checkpoint_scheduler = None
+
+
+def get_checkpoint_scheduler():
+    """WAL 检查点调度器（仅 SQLite）"""
+    global _checkpoint_scheduler
+    if _checkpoint_scheduler is None and DATABASE_URL.startswith("sqlite"):
+        _checkpoint_scheduler = CheckpointScheduler(engine)
+    return _checkpoint_scheduler
+
+
+def get_connection_stats():
+    """数据库连接统计：写连接/只读连接池的等待时间、语句耗时、锁超时次数与检查点状态"""
+    scheduler = get_checkpoint_scheduler()
+    return {
+        "database": engine.url.render_as_string(hide_password=True),
+        "writer": get_engine_stats(engine),
+        "reader": get_engine_stats(read_engine),
+        "checkpoint": scheduler.get_status() if scheduler else None
+    }
+
+
 def init_database():
     """初始化数据库，创建所有表"""
     print("[数据库] 初始化数据库...")
@@ -72,6 +84,13 @@ def init_database():
     # 自动迁移：添加新列（如果不存在）
     migrate_database()
 
+    # 统计汇总表首次创建时从已有数据回填
+    try:
+        with get_db_context() as db:
+            StatsRollupService.ensure_initialized(db)
+    except Exception as e:
+        print(f"[数据库] 统计汇总初始化失败: {e}")
+
     print("[数据库] 数据库初始化完成")
 
 
@@ -98,6 +117,25 @@ def migrate_database():
                 conn.execute(text("ALTER TABLE analysis_sessions ADD COLUMN last_activity_time DATETIME"))
                 conn.commit()
 
+            # 检查并添加回测任务的执行进程、心跳与取消请求列
+            try:
+                conn.execute(text("SELECT owner FROM backtest_jobs LIMIT 1"))
+            except Exception:
+                print("[数据库迁移] 添加 backtest_jobs.owner / heartbeat_at / cancel_requested 列...")
+                conn.execute(text("ALTER TABLE backtest_jobs ADD COLUMN owner VARCHAR(100)"))
+                conn.execute(text("ALTER TABLE backtest_jobs ADD COLUMN heartbeat_at DATETIME"))
+                conn.execute(text("ALTER TABLE backtest_jobs ADD COLUMN cancel_requested BOOLEAN DEFAULT 0"))
+                conn.commit()
+
+            # 检查并添加通知发件箱的认领列
+            try:
+                conn.execute(text("SELECT owner FROM notification_outbox LIMIT 1"))
+            except Exception:
+                print("[数据库迁移] 添加 notification_outbox.owner / lease_until 列...")
+                conn.execute(text("ALTER TABLE notification_outbox ADD COLUMN owner VARCHAR(100)"))
+                conn.execute(text("ALTER TABLE notification_outbox ADD COLUMN lease_until DATETIME"))
+                conn.commit()
+
             print("[数据库迁移] 迁移检查完成")
     except Exception as e:
         print(f"[数据库迁移] 迁移失败: {e}")
@@ -114,6 +152,10 @@ def get_db():
     """
     获取数据库会话（依赖注入）
     用于 FastAPI 的 Depends
+
+    会话在响应发出后才关闭。写库之后应立即 commit 再 await 其它操作：
+    写连接只有 1 个，未提交的会话会让其它会话的写入排队等待；
+    同理不要在持有未提交写入的会话时再打开另一个会话写库（会等待自己）
     """
     db = SessionLocal()
     try:
@@ -131,6 +173,9 @@ def get_db_context():
     使用示例：
     with get_db_context() as db:
         session = db.query(AnalysisSession).first()
+
+    退出时才提交。写连接只有 1 个：with 块内写过之后不要 await 或嵌套打开
+    另一个 get_db_context() 写库，否则后者会一直等待前者提交
     """
     db = SessionLocal()
     try:
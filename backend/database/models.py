@@ -4,7 +4,7 @@
 支持 SQLite（开发）和 PostgreSQL（生产）
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -137,6 +137,62 @@ class StockHistory(Base):
         }
 
 
+class AnalysisStatsRollup(Base):
+    """分析统计汇总表 - 按日/股票/智能体预聚合，随会话和智能体结果写入增量维护"""
+    __tablename__ = 'analysis_stats_rollups'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scope = Column(String(10), nullable=False)  # daily（全部会话）/stock（按股票）/agent（按智能体）
+    stat_date = Column(String(10), nullable=False)  # YYYY-MM-DD（记录创建日期，UTC）
+    bucket_key = Column(String(50), nullable=False, default='')  # daily 为空，stock 为股票代码，agent 为智能体ID
+    label = Column(String(100))  # 股票名称/智能体名称
+
+    # 按当前状态计数（状态变化时从旧状态移到新状态）
+    total_count = Column(Integer, default=0)
+    pending_count = Column(Integer, default=0)
+    created_count = Column(Integer, default=0)
+    running_count = Column(Integer, default=0)
+    completed_count = Column(Integer, default=0)
+    error_count = Column(Integer, default=0)
+    interrupted_count = Column(Integer, default=0)
+
+    # 已完成记录的耗时（秒）与 Token
+    duration_sum = Column(Float, default=0)
+    duration_count = Column(Integer, default=0)
+    duration_max = Column(Float, default=0)
+    tokens_sum = Column(Integer, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 索引
+    __table_args__ = (
+        Index('uq_rollup_bucket', 'scope', 'stat_date', 'bucket_key', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<AnalysisStatsRollup(scope='{self.scope}', date='{self.stat_date}', key='{self.bucket_key}')>"
+
+    def to_dict(self):
+        return {
+            'scope': self.scope,
+            'stat_date': self.stat_date,
+            'bucket_key': self.bucket_key,
+            'label': self.label,
+            'total_count': self.total_count,
+            'pending_count': self.pending_count,
+            'created_count': self.created_count,
+            'running_count': self.running_count,
+            'completed_count': self.completed_count,
+            'error_count': self.error_count,
+            'interrupted_count': self.interrupted_count,
+            'duration_sum': self.duration_sum,
+            'duration_count': self.duration_count,
+            'duration_max': self.duration_max,
+            'tokens_sum': self.tokens_sum,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
 # ==================== 数据流监控相关表 ====================
 
 class MonitoredStock(Base):
@@ -500,3 +556,97 @@ class AlertRule(Base):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+
+class NotificationOutbox(Base):
+    """通知发件箱表 - 待投递的预警通知，按渠道合并发送并失败重试"""
+    __tablename__ = 'notification_outbox'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    channel = Column(String(20), nullable=False)  # email/wechat/dingtalk/serverchan/bark
+    payload = Column(JSON, nullable=False)  # 预警内容 {title, message, level, stock_code, suggestion}
+    recipients = Column(JSON)  # 邮件收件人列表（仅 email 渠道）
+
+    # 投递状态
+    status = Column(String(20), default='pending', nullable=False)  # pending/sending/failed
+    attempts = Column(Integer, default=0)  # 已尝试次数
+    last_error = Column(Text)  # 最近一次失败原因
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)  # 下次投递时间
+
+    # 投递认领：发送前先把记录标记为 sending 并写入认领者，租约过期（认领进程崩溃）后可被重新认领
+    owner = Column(String(100))
+    lease_until = Column(DateTime)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # 索引
+    __table_args__ = (
+        Index('idx_outbox_status_next', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f"<NotificationOutbox(channel='{self.channel}', status='{self.status}', attempts={self.attempts})>"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'channel': self.channel,
+            'payload': self.payload,
+            'recipients': self.recipients,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class BacktestJob(Base):
+    """回测任务表 - 在独立进程中执行的回测任务及其结果，重启后可按ID查询"""
+    __tablename__ = 'backtest_jobs'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(64), unique=True, nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # single/compare
+    params = Column(JSON, nullable=False)  # 回测参数
+
+    # 执行状态
+    status = Column(String(20), default='pending', nullable=False)  # pending/running/completed/failed/cancelled
+    progress = Column(Integer, default=0)  # 进度百分比
+    message = Column(String(200))  # 当前阶段说明
+    result = Column(JSON)  # 回测结果
+    error = Column(Text)  # 失败原因
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    # 执行进程（主机名:PID）及其心跳；多个 API 进程共用一张表，心跳过期的任务才视为中断
+    owner = Column(String(100))
+    heartbeat_at = Column(DateTime)
+    cancel_requested = Column(Boolean, default=False)  # 由其它进程发起的取消，执行进程轮询处理
+
+    # 索引
+    __table_args__ = (
+        Index('idx_backtest_job_status', 'status', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<BacktestJob(job_id='{self.job_id}', kind='{self.kind}', status='{self.status}')>"
+
+    def to_dict(self, include_result: bool = True):
+        data = {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
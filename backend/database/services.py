@@ -12,7 +12,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from sqlalchemy.exc import OperationalError
 
-from backend.database.models import AnalysisSession, AgentResult, StockHistory, MonitoredStock, StockDataRecord, StockNewsRecord, DataFlowDailyStats, AlertHistory, AlertRule
+from backend.database.models import AnalysisSession, AgentResult, StockHistory, MonitoredStock, StockDataRecord, StockNewsRecord, DataFlowDailyStats, AlertHistory, AlertRule, AnalysisStatsRollup
+from backend.database.stats_rollup import STATUS_COLUMNS, StatsRollupService
 
 
 def json_serializable(obj):
@@ -201,6 +202,10 @@ class SessionService:
             AnalysisSession.status.in_(['completed', 'error'])
         ).delete()
         db.commit()
+
+        # 批量删除不触发汇总表增量维护，重建受影响日期
+        if count:
+            StatsRollupService.rebuild(db, end_date=cutoff_date.strftime('%Y-%m-%d'))
         
         print(f"[数据库] 清理旧会话: {count} 条")
         return count
@@ -347,81 +352,97 @@ class StockHistoryService:
 
 
 class StatisticsService:
-    """统计服务"""
-    
+    """统计服务（读取按日预聚合的汇总表，见 stats_rollup.py）"""
+
+    @staticmethod
+    def _since(days: int) -> str:
+        """统计起始日期（按天分桶，包含起始日全天）"""
+        return (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d')
+
     @staticmethod
     def get_analysis_stats(db: Session, days: int = 7) -> Dict[str, Any]:
         """获取分析统计"""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        # 总分析次数
-        total_count = db.query(func.count(AnalysisSession.id)).filter(
-            AnalysisSession.created_at >= cutoff_date
-        ).scalar()
-        
-        # 成功/失败统计
-        status_stats = db.query(
-            AnalysisSession.status,
-            func.count(AnalysisSession.id)
+        R = AnalysisStatsRollup
+        status_columns = [func.sum(getattr(R, column)) for column in STATUS_COLUMNS.values()]
+        row = db.query(
+            func.sum(R.total_count),
+            func.sum(R.duration_sum),
+            func.sum(R.duration_count),
+            *status_columns
         ).filter(
-            AnalysisSession.created_at >= cutoff_date
-        ).group_by(AnalysisSession.status).all()
-        
-        # 平均分析时长 - 使用Python计算而不SQL（SQLite不支持extract）
-        completed_sessions = db.query(AnalysisSession).filter(
-            AnalysisSession.created_at >= cutoff_date,
-            AnalysisSession.status == 'completed',
-            AnalysisSession.end_time.isnot(None),
-            AnalysisSession.start_time.isnot(None)
-        ).all()
-        
-        if completed_sessions:
-            durations = []
-            for session in completed_sessions:
-                duration = (session.end_time - session.start_time).total_seconds()
-                # 过滤异常值
-                if 0 <= duration <= 86400:  # 0到1天
-                    durations.append(duration)
-            
-            avg_duration = int(sum(durations) / len(durations)) if durations else 0
-        else:
-            avg_duration = 0
-        
+            R.scope == 'daily',
+            R.stat_date >= StatisticsService._since(days)
+        ).one()
+
+        total_count, duration_sum, duration_count = row[0], row[1], row[2]
+        status_distribution = {
+            status: int(count) for status, count in zip(STATUS_COLUMNS, row[3:]) if count
+        }
+
         return {
-            'total_count': total_count or 0,
-            'status_distribution': {status: count for status, count in status_stats},
-            'avg_duration_seconds': avg_duration,
+            'total_count': int(total_count or 0),
+            'status_distribution': status_distribution,
+            'avg_duration_seconds': int(duration_sum / duration_count) if duration_count else 0,
             'period_days': days
         }
     
     @staticmethod
     def get_agent_stats(db: Session, days: int = 7) -> List[Dict[str, Any]]:
-        """获取智能体统计"""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
+        """获取智能体统计（已完成的运行）"""
+        R = AnalysisStatsRollup
         stats = db.query(
-            AgentResult.agent_id,
-            AgentResult.agent_name,
-            func.count(AgentResult.id).label('total_runs'),
-            func.avg(AgentResult.duration_seconds).label('avg_duration'),
-            func.max(AgentResult.duration_seconds).label('max_duration'),
-            func.sum(AgentResult.tokens).label('total_tokens')
+            R.bucket_key,
+            func.max(R.label).label('agent_name'),
+            func.sum(R.completed_count).label('total_runs'),
+            func.sum(R.duration_sum).label('duration_sum'),
+            func.sum(R.duration_count).label('duration_count'),
+            func.max(R.duration_max).label('max_duration'),
+            func.sum(R.tokens_sum).label('total_tokens')
         ).filter(
-            AgentResult.created_at >= cutoff_date,
-            AgentResult.status == 'completed'
-        ).group_by(
-            AgentResult.agent_id,
-            AgentResult.agent_name
-        ).all()
-        
+            R.scope == 'agent',
+            R.stat_date >= StatisticsService._since(days),
+            R.completed_count > 0
+        ).group_by(R.bucket_key).all()
+
         return [
             {
-                'agent_id': s.agent_id,
+                'agent_id': s.bucket_key,
                 'agent_name': s.agent_name,
-                'total_runs': s.total_runs,
-                'avg_duration': int(s.avg_duration) if s.avg_duration else 0,
-                'max_duration': s.max_duration or 0,
-                'total_tokens': s.total_tokens or 0
+                'total_runs': int(s.total_runs),
+                'avg_duration': int(s.duration_sum / s.duration_count) if s.duration_count else 0,
+                'max_duration': int(s.max_duration or 0),
+                'total_tokens': int(s.total_tokens or 0)
+            }
+            for s in stats
+        ]
+
+    @staticmethod
+    def get_stock_stats(db: Session, days: int = 7, limit: int = 20) -> List[Dict[str, Any]]:
+        """获取按股票的分析统计（按分析次数降序）"""
+        R = AnalysisStatsRollup
+        total = func.sum(R.total_count).label('total_count')
+        stats = db.query(
+            R.bucket_key,
+            func.max(R.label).label('stock_name'),
+            total,
+            func.sum(R.completed_count).label('completed_count'),
+            func.sum(R.error_count).label('error_count'),
+            func.sum(R.duration_sum).label('duration_sum'),
+            func.sum(R.duration_count).label('duration_count')
+        ).filter(
+            R.scope == 'stock',
+            R.stat_date >= StatisticsService._since(days)
+        ).group_by(R.bucket_key).having(total > 0).order_by(desc(total)).limit(limit).all()
+
+        return [
+            {
+                'stock_code': s.bucket_key,
+                'stock_name': s.stock_name,
+                'total_count': int(s.total_count),
+                'completed_count': int(s.completed_count or 0),
+                'error_count': int(s.error_count or 0),
+                'success_rate': round(s.completed_count / s.total_count, 4) if s.total_count else 0,
+                'avg_duration_seconds': int(s.duration_sum / s.duration_count) if s.duration_count else 0
             }
             for s in stats
         ]
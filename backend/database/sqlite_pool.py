@@ -0,0 +1,351 @@
+"""
+SQLite 连接架构：只读连接池 + 单写连接
+
+WAL 模式下多个读连接可以与写连接并发执行，但只有各自独立的连接才能享受到这一点：
+
+- 写引擎：只有 1 个连接（QueuePool pool_size=1），所有写事务在此排队串行执行
+- 读引擎：只读连接池（PRAGMA query_only），慢报表查询不再阻塞行情写入；
+  常驻 DB_READER_POOL_SIZE 个连接，不够时临时新建（归还即关闭），取连接永不等待
+- RoutingSession：读语句走读连接池；flush、INSERT/UPDATE/DELETE 以及同一事务中
+  写过之后的所有语句走写连接（保证读到本事务自己的写入）
+
+每个连接设置 mmap_size / cache_size / synchronous=NORMAL 等 PRAGMA，
+并统计各引擎的连接等待时间、语句耗时与 "database is locked" 次数；
+CheckpointScheduler 定时执行 WAL 检查点，WAL 文件过大时截断。
+
+环境变量：
+    DB_READER_POOL_SIZE      常驻只读连接数（默认 8，0 表示不拆分读写，沿用单连接）
+    DB_BUSY_TIMEOUT_MS       SQLite busy_timeout（默认 30000）
+    DB_MMAP_SIZE_MB          每个连接的内存映射大小（默认 256）
+    DB_CACHE_SIZE_MB         每个连接的页缓存大小（默认 16）
+    DB_SLOW_STATEMENT_MS     慢语句阈值（默认 200）
+    DB_CHECKPOINT_INTERVAL   WAL 检查点间隔秒数（默认 300）
+    DB_WAL_TRUNCATE_MB       WAL 文件超过该大小时截断（默认 64）
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+READER_POOL_SIZE = int(os.getenv("DB_READER_POOL_SIZE", "8"))
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "30000"))
+MMAP_SIZE_MB = int(os.getenv("DB_MMAP_SIZE_MB", "256"))
+CACHE_SIZE_MB = int(os.getenv("DB_CACHE_SIZE_MB", "16"))
+SLOW_STATEMENT_MS = int(os.getenv("DB_SLOW_STATEMENT_MS", "200"))
+CHECKPOINT_INTERVAL = int(os.getenv("DB_CHECKPOINT_INTERVAL", "300"))
+WAL_TRUNCATE_MB = int(os.getenv("DB_WAL_TRUNCATE_MB", "64"))
+
+_WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+
+# ==================== 统计 ====================
+
+class EngineStats:
+    """单个引擎的连接等待与语句耗时统计（线程安全）"""
+
+    def __init__(self, role: str, window: int = 2048):
+        self.role = role
+        self._lock = threading.Lock()
+        self._waits: deque = deque(maxlen=window)
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._statements = 0
+        self._statement_total = 0.0
+        self._statement_max = 0.0
+        self._slow_statements = 0
+        self._busy_errors = 0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self._checkouts += 1
+            self._wait_total += seconds
+            self._wait_max = max(self._wait_max, seconds)
+            self._waits.append(seconds)
+
+    def record_statement(self, seconds: float):
+        with self._lock:
+            self._statements += 1
+            self._statement_total += seconds
+            self._statement_max = max(self._statement_max, seconds)
+            if seconds * 1000 >= SLOW_STATEMENT_MS:
+                self._slow_statements += 1
+
+    def record_busy(self):
+        with self._lock:
+            self._busy_errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            p99 = waits[min(len(waits) - 1, int(len(waits) * 0.99))] if waits else 0.0
+            return {
+                "role": self.role,
+                "checkouts": self._checkouts,
+                "wait_total_seconds": round(self._wait_total, 3),
+                "wait_max_ms": round(self._wait_max * 1000, 2),
+                "wait_p99_ms": round(p99 * 1000, 2),
+                "statements": self._statements,
+                "statement_avg_ms": round(self._statement_total / self._statements * 1000, 2)
+                if self._statements else 0.0,
+                "statement_max_ms": round(self._statement_max * 1000, 2),
+                "slow_statements": self._slow_statements,
+                "busy_errors": self._busy_errors
+            }
+
+
+class _TimedQueuePool(QueuePool):
+    """记录取连接等待时间的连接池（写引擎上即为等待写锁的时间）"""
+
+    stats: Optional[EngineStats] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+# ==================== 引擎 ====================
+
+def _install_pragmas(engine: Engine, read_only: bool):
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={MMAP_SIZE_MB * 1024 * 1024}")
+        cursor.execute(f"PRAGMA cache_size=-{CACHE_SIZE_MB * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        # 日志模式要在 query_only 之前设置（只读连接也可能是第一个打开数据库的连接）
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def _install_stats(engine: Engine, stats: EngineStats):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_start", None)
+        if started is not None:
+            stats.record_statement(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None:
+            context.connection.info.pop("query_start", None)
+        message = str(context.original_exception).lower()
+        if "database is locked" in message or "database is busy" in message:
+            stats.record_busy()
+
+    engine.pool.stats = stats
+
+
+def is_memory_database(url: str) -> bool:
+    return url.rstrip("/") in ("sqlite:", "sqlite:/") or ":memory:" in url or "mode=memory" in url
+
+
+def create_sqlite_engines(url: str, reader_pool_size: int = READER_POOL_SIZE,
+                          writer_timeout: float = BUSY_TIMEOUT_MS / 1000,
+                          echo: bool = False) -> Tuple[Engine, Optional[Engine]]:
+    """
+    创建写引擎和只读引擎
+
+    Args:
+        url: SQLite 数据库 URL
+        reader_pool_size: 常驻只读连接数；<= 0 或内存数据库时不拆分，返回单连接引擎
+        writer_timeout: 等待写连接的最长秒数
+
+    Returns:
+        (写引擎, 只读引擎)；不拆分时只读引擎为 None
+    """
+    connect_args = {"check_same_thread": False, "timeout": BUSY_TIMEOUT_MS / 1000}
+
+    if reader_pool_size <= 0 or is_memory_database(url):
+        # 单连接（所有线程共享），内存数据库只能如此
+        engine = create_engine(url, connect_args=connect_args, poolclass=StaticPool, echo=echo)
+        _install_pragmas(engine, read_only=False)
+        _install_stats(engine, EngineStats("shared"))
+        return engine, None
+
+    writer = create_engine(
+        url, connect_args=connect_args, poolclass=_TimedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=writer_timeout, echo=echo
+    )
+    _install_pragmas(writer, read_only=False)
+    _install_stats(writer, EngineStats("writer"))
+
+    # 会话第一次读取时取出的读连接要到 commit/close 才归还，而 FastAPI 的 Depends(get_db)
+    # 会话在响应发出后才关闭；async 接口在事件循环上同步查库，若读连接池有上限，
+    # 第 N+1 个请求取连接时会阻塞事件循环，持有连接的 N 个请求也就永远无法关闭会话。
+    # 因此读连接池不设上限（SQLite 新建连接很便宜），超出常驻数的连接归还时直接关闭
+    reader = create_engine(
+        url, connect_args=connect_args, poolclass=_TimedQueuePool,
+        pool_size=reader_pool_size, max_overflow=-1, echo=echo
+    )
+    _install_pragmas(reader, read_only=True)
+    _install_stats(reader, EngineStats("reader"))
+    return writer, reader
+
+
+def get_engine_stats(engine: Optional[Engine]) -> Optional[Dict[str, Any]]:
+    """引擎的统计与连接池状态"""
+    if engine is None:
+        return None
+    stats = getattr(engine.pool, "stats", None)
+    data = stats.snapshot() if stats is not None else {}
+    data["pool"] = engine.pool.status()
+    return data
+
+
+# ==================== 读写路由会话 ====================
+
+def _is_read_only(clause) -> bool:
+    """语句是否只读；无法判断时按写处理"""
+    if clause is None or isinstance(clause, UpdateBase):
+        return False
+    if isinstance(clause, TextClause):
+        sql = clause.text.lstrip()
+        keyword = sql.split(None, 1)[0].upper() if sql else ""
+        if keyword == "SELECT":
+            return True
+        return keyword == "WITH" and not _WRITE_KEYWORDS.search(sql)
+    return bool(getattr(clause, "is_select", False))
+
+
+class RoutingSession(Session):
+    """
+    读写分离会话
+
+    只读语句走只读连接池；flush、写语句以及无法判断的操作（如 session.connection()）
+    走写连接，之后直到本事务结束的所有语句都留在写连接上。
+    写连接只有 1 个，写过之后要尽快 commit，不要在提交前 await 或打开另一个会话写库
+    """
+
+    def __init__(self, *args, read_bind: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_bind = read_bind
+        self._use_writer = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        writer = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self.read_bind is None or self._use_writer:
+            return writer
+        if self._flushing or not _is_read_only(clause):
+            self._use_writer = True
+            return writer
+        return self.read_bind
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session, transaction):
+    if transaction.parent is None:
+        session._use_writer = False
+
+
+# ==================== WAL 检查点 ====================
+
+class CheckpointScheduler:
+    """
+    定时执行 WAL 检查点
+
+    默认 PASSIVE（不等待读连接，不阻塞读写）；WAL 文件超过阈值时执行 TRUNCATE 把文件截回 0。
+    检查点通过写引擎执行，与其它写事务串行
+    """
+
+    def __init__(self, engine: Engine, interval: int = CHECKPOINT_INTERVAL,
+                 truncate_bytes: int = WAL_TRUNCATE_MB * 1024 * 1024):
+        self.engine = engine
+        self.interval = interval
+        self.truncate_bytes = truncate_bytes
+        database = engine.url.database or ""
+        self.wal_path = f"{database}-wal" if database and not is_memory_database(str(engine.url)) else None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.truncates = 0
+        self.last_run: Optional[float] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def wal_size(self) -> int:
+        try:
+            return os.path.getsize(self.wal_path) if self.wal_path else 0
+        except OSError:
+            return 0
+
+    def checkpoint(self, mode: Optional[str] = None) -> Dict[str, Any]:
+        """执行一次检查点，返回 busy / WAL 页数 / 已回写页数"""
+        wal_before = self.wal_size()
+        if mode is None:
+            mode = "TRUNCATE" if wal_before >= self.truncate_bytes else "PASSIVE"
+        started = time.perf_counter()
+        with self.engine.connect() as conn:
+            busy, log_pages, checkpointed = conn.execute(text(f"PRAGMA wal_checkpoint({mode})")).fetchone()
+        self.runs += 1
+        if mode == "TRUNCATE":
+            self.truncates += 1
+        self.last_run = time.time()
+        self.last_result = {
+            "mode": mode,
+            "busy": bool(busy),
+            "log_pages": log_pages,
+            "checkpointed_pages": checkpointed,
+            "wal_bytes_before": wal_before,
+            "wal_bytes_after": self.wal_size(),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+        return self.last_result
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except Exception as e:
+                print(f"[数据库] WAL 检查点失败: {e}")
+
+    def start(self):
+        if self.wal_path is None or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sqlite-checkpoint", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "interval": self.interval,
+            "truncate_threshold_mb": round(self.truncate_bytes / 1024 / 1024, 1),
+            "wal_bytes": self.wal_size(),
+            "runs": self.runs,
+            "truncates": self.truncates,
+            "last_run": self.last_run,
+            "last_result": self.last_result
+        }
@@ -0,0 +1,386 @@
+"""
+分析统计汇总（物化汇总表）
+
+AnalysisSession / AgentResult 每次 flush 时，根据新增、状态变化和删除的记录计算增量，
+在同一事务中累加到 analysis_stats_rollups（按创建日期分桶）：
+
+- daily：每天全部会话
+- stock：每天每只股票的会话
+- agent：每天每个智能体的结果
+
+统计接口直接读取预聚合行，不再扫描会话和智能体结果全表。
+批量 query.delete() 不触发 ORM 事件，之后需对相应日期调用 rebuild()。
+
+- StatsRollupService.rebuild(): 从源表重新计算（全部或指定日期范围），用于初始化与修复
+- StatsRollupService.check(): 重新计算并与汇总表逐桶比对，返回不一致的桶（漂移检测）
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, insert, select, update
+from sqlalchemy.orm import Session
+
+from backend.database.models import AnalysisSession, AgentResult, AnalysisStatsRollup
+from backend.utils.logging_config import get_logger
+
+logger = get_logger("database.stats_rollup")
+
+STATUS_COLUMNS = {
+    status: f"{status}_count"
+    for status in ('pending', 'created', 'running', 'completed', 'error', 'interrupted')
+}
+SUM_COLUMNS = ['total_count', *STATUS_COLUMNS.values(), 'duration_sum', 'duration_count', 'tokens_sum']
+
+# 会话耗时超过一天视为异常值，不计入平均时长
+MAX_SESSION_DURATION = 86400
+
+SESSION_FIELDS = ('created_at', 'stock_code', 'stock_name', 'status', 'start_time', 'end_time')
+AGENT_FIELDS = ('created_at', 'agent_id', 'agent_name', 'status', 'duration_seconds', 'tokens')
+
+BucketKey = Tuple[str, str, str]
+
+
+# ==================== 单条记录的贡献 ====================
+
+def _stat_date(created_at: Optional[datetime]) -> str:
+    return (created_at or datetime.utcnow()).strftime('%Y-%m-%d')
+
+
+def _session_contribution(values: Dict[str, Any]) -> List[Tuple[BucketKey, Optional[str], Dict[str, float]]]:
+    """一个会话对汇总表的贡献：daily 与 stock 两个桶"""
+    delta: Dict[str, float] = {'total_count': 1}
+    status = values['status']
+    if status in STATUS_COLUMNS:
+        delta[STATUS_COLUMNS[status]] = 1
+    if status == 'completed' and values['start_time'] and values['end_time']:
+        duration = (values['end_time'] - values['start_time']).total_seconds()
+        if 0 <= duration <= MAX_SESSION_DURATION:
+            delta['duration_sum'] = duration
+            delta['duration_count'] = 1
+            delta['duration_max'] = duration
+
+    stat_date = _stat_date(values['created_at'])
+    return [
+        (('daily', stat_date, ''), None, delta),
+        (('stock', stat_date, values['stock_code'] or ''), values['stock_name'], delta)
+    ]
+
+
+def _agent_contribution(values: Dict[str, Any]) -> List[Tuple[BucketKey, Optional[str], Dict[str, float]]]:
+    """一个智能体结果对汇总表的贡献：agent 桶"""
+    delta: Dict[str, float] = {'total_count': 1}
+    status = values['status']
+    if status in STATUS_COLUMNS:
+        delta[STATUS_COLUMNS[status]] = 1
+    if status == 'completed':
+        if values['duration_seconds'] is not None:
+            delta['duration_sum'] = values['duration_seconds']
+            delta['duration_count'] = 1
+            delta['duration_max'] = values['duration_seconds']
+        delta['tokens_sum'] = values['tokens'] or 0
+
+    stat_date = _stat_date(values['created_at'])
+    return [(('agent', stat_date, values['agent_id'] or ''), values['agent_name'], delta)]
+
+
+class _BucketAccumulator:
+    """按桶累加增量"""
+
+    def __init__(self):
+        self.sums: Dict[BucketKey, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.maxes: Dict[BucketKey, float] = {}
+        self.labels: Dict[BucketKey, str] = {}
+        # 扣除过耗时的桶（最大值可能变小，需从源表重算）
+        self.shrunk = set()
+
+    def add(self, contribution, sign: int = 1):
+        for key, label, delta in contribution:
+            bucket = self.sums[key]
+            for column, value in delta.items():
+                if column == 'duration_max':
+                    if sign > 0:
+                        self.maxes[key] = max(self.maxes.get(key, 0), value)
+                    else:
+                        self.shrunk.add(key)
+                else:
+                    bucket[column] += sign * value
+            if label:
+                self.labels[key] = label
+
+    def rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for key in set(self.sums) | set(self.maxes):
+            scope, stat_date, bucket_key = key
+            row = {'scope': scope, 'stat_date': stat_date, 'bucket_key': bucket_key,
+                   'label': self.labels.get(key), 'duration_max': self.maxes.get(key, 0),
+                   'updated_at': datetime.utcnow()}
+            sums = self.sums.get(key, {})
+            for column in SUM_COLUMNS:
+                value = sums.get(column, 0)
+                row[column] = value if column == 'duration_sum' else int(round(value))
+            rows.append(row)
+        return rows
+
+
+# ==================== 增量维护（flush 事件） ====================
+
+def _previous_values(obj, fields: Iterable[str]) -> Dict[str, Any]:
+    """记录在本次 flush 前（数据库中）的字段值"""
+    state = inspect(obj)
+    values = {}
+    for field in fields:
+        history = state.attrs[field].history
+        if history.deleted:
+            values[field] = history.deleted[0]
+        elif history.added:
+            values[field] = None
+        else:
+            values[field] = getattr(obj, field)
+    return values
+
+
+def _current_values(obj, fields: Iterable[str]) -> Dict[str, Any]:
+    return {field: getattr(obj, field) for field in fields}
+
+
+def _has_changes(obj, fields: Iterable[str]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _tracked(obj):
+    if isinstance(obj, AnalysisSession):
+        return SESSION_FIELDS, _session_contribution
+    if isinstance(obj, AgentResult):
+        return AGENT_FIELDS, _agent_contribution
+    return None, None
+
+
+# 各方言的 upsert 语句（构造表达式树开销较大，每个方言只构造一次）
+_upsert_statements: Dict[str, Any] = {}
+
+
+def _upsert_statement(dialect: str):
+    stmt = _upsert_statements.get(dialect)
+    if stmt is None:
+        table = AnalysisStatsRollup.__table__
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            greatest = func.max
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            greatest = func.greatest
+        stmt = dialect_insert(table)
+        set_ = {column: table.c[column] + stmt.excluded[column] for column in SUM_COLUMNS}
+        set_['duration_max'] = greatest(table.c.duration_max, stmt.excluded.duration_max)
+        set_['label'] = func.coalesce(stmt.excluded.label, table.c.label)
+        set_['updated_at'] = stmt.excluded.updated_at
+        stmt = stmt.on_conflict_do_update(index_elements=['scope', 'stat_date', 'bucket_key'], set_=set_)
+        _upsert_statements[dialect] = stmt
+    return stmt
+
+
+def _upsert(connection, rows: List[Dict[str, Any]]):
+    """按桶累加（SQLite/PostgreSQL 用 ON CONFLICT，其它数据库先 UPDATE 再 INSERT）"""
+    table = AnalysisStatsRollup.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        connection.execute(_upsert_statement(dialect), rows)
+        return
+
+    for row in rows:
+        values = {column: table.c[column] + row[column] for column in SUM_COLUMNS}
+        values['updated_at'] = row['updated_at']
+        result = connection.execute(
+            update(table).where(
+                table.c.scope == row['scope'],
+                table.c.stat_date == row['stat_date'],
+                table.c.bucket_key == row['bucket_key']
+            ).values(**values)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table), [row])
+
+
+def _bucket_max(connection, key: BucketKey) -> float:
+    """从源表重算单个桶（一天）的最大耗时"""
+    scope, stat_date, bucket_key = key
+    start = datetime.strptime(stat_date, '%Y-%m-%d')
+    end = start + timedelta(days=1)
+
+    if scope == 'agent':
+        t = AgentResult.__table__
+        value = connection.execute(select(func.max(t.c.duration_seconds)).where(
+            t.c.agent_id == bucket_key, t.c.status == 'completed',
+            t.c.created_at >= start, t.c.created_at < end
+        )).scalar()
+        return value or 0
+
+    t = AnalysisSession.__table__
+    query = select(t.c.start_time, t.c.end_time).where(
+        t.c.status == 'completed', t.c.start_time.isnot(None), t.c.end_time.isnot(None),
+        t.c.created_at >= start, t.c.created_at < end
+    )
+    if scope == 'stock':
+        query = query.where(t.c.stock_code == bucket_key)
+    durations = ((end_time - start_time).total_seconds() for start_time, end_time in connection.execute(query))
+    return max((d for d in durations if 0 <= d <= MAX_SESSION_DURATION), default=0)
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_rollups(session: Session, flush_context):
+    """把本次 flush 中会话/智能体结果的变化累加到汇总表（与源数据同一事务）"""
+    accumulator = _BucketAccumulator()
+    changed = False
+
+    for obj in session.new:
+        fields, contribution = _tracked(obj)
+        if fields:
+            accumulator.add(contribution(_current_values(obj, fields)))
+            changed = True
+
+    for obj in session.dirty:
+        fields, contribution = _tracked(obj)
+        if fields and _has_changes(obj, fields):
+            accumulator.add(contribution(_previous_values(obj, fields)), sign=-1)
+            accumulator.add(contribution(_current_values(obj, fields)))
+            changed = True
+
+    for obj in session.deleted:
+        fields, contribution = _tracked(obj)
+        if fields:
+            accumulator.add(contribution(_previous_values(obj, fields)), sign=-1)
+            changed = True
+
+    if not changed:
+        return
+    # 汇总语句放在 SAVEPOINT 中：失败时只回滚汇总部分，源数据照常提交
+    # （PostgreSQL 中失败的语句会使整个事务中止），汇总表可之后调用 rebuild 修复
+    connection = session.connection()
+    try:
+        with connection.begin_nested():
+            _upsert(connection, accumulator.rows())
+            table = AnalysisStatsRollup.__table__
+            for key in accumulator.shrunk:
+                connection.execute(update(table).where(
+                    table.c.scope == key[0], table.c.stat_date == key[1], table.c.bucket_key == key[2]
+                ).values(duration_max=_bucket_max(connection, key)))
+    except Exception as e:
+        logger.error(f"更新统计汇总失败（汇总表已与源表不一致，可调用 rebuild 修复）: {e}")
+
+
+def _load_previous_on_set(target, value, oldvalue, initiator):
+    """
+    空监听器：本身不做任何事，注册它只是为了带上 active_history=True，
+    让修改已过期（如 commit 后）的字段时先从数据库加载旧值，_previous_values 才能从旧状态的桶中扣除
+    """
+
+
+for _attribute in (AnalysisSession.status, AnalysisSession.start_time, AnalysisSession.end_time,
+                   AgentResult.status, AgentResult.duration_seconds, AgentResult.tokens):
+    event.listen(_attribute, "set", _load_previous_on_set, active_history=True)
+
+
+# ==================== 重建与校验 ====================
+
+def _date_filter(query, column, start_date: Optional[str], end_date: Optional[str]):
+    if start_date:
+        query = query.filter(column >= datetime.strptime(start_date, '%Y-%m-%d'))
+    if end_date:
+        query = query.filter(column < datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1))
+    return query
+
+
+class StatsRollupService:
+    """统计汇总表服务"""
+
+    @staticmethod
+    def compute(db: Session, start_date: Optional[str] = None,
+                end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """从源表计算汇总行（日期为 YYYY-MM-DD，含两端）"""
+        accumulator = _BucketAccumulator()
+
+        sessions = db.query(*[getattr(AnalysisSession, f) for f in SESSION_FIELDS])
+        for row in _date_filter(sessions, AnalysisSession.created_at, start_date, end_date).yield_per(5000):
+            accumulator.add(_session_contribution(dict(zip(SESSION_FIELDS, row))))
+
+        agents = db.query(*[getattr(AgentResult, f) for f in AGENT_FIELDS])
+        for row in _date_filter(agents, AgentResult.created_at, start_date, end_date).yield_per(5000):
+            accumulator.add(_agent_contribution(dict(zip(AGENT_FIELDS, row))))
+
+        return accumulator.rows()
+
+    @staticmethod
+    def rebuild(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        """
+        重建汇总表（不传日期时全部重建）
+
+        Returns:
+            写入的汇总行数
+        """
+        # 先删除再计算：删除语句使本事务持有写连接，重算期间的并发增量不会插入进来
+        query = db.query(AnalysisStatsRollup)
+        if start_date:
+            query = query.filter(AnalysisStatsRollup.stat_date >= start_date)
+        if end_date:
+            query = query.filter(AnalysisStatsRollup.stat_date <= end_date)
+        query.delete(synchronize_session=False)
+
+        rows = StatsRollupService.compute(db, start_date, end_date)
+        if rows:
+            db.execute(insert(AnalysisStatsRollup.__table__), rows)
+        db.commit()
+
+        print(f"[数据库] 重建统计汇总: {len(rows)} 行（{start_date or '最早'} ~ {end_date or '最新'}）")
+        return len(rows)
+
+    @staticmethod
+    def check(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None,
+              max_drift: int = 100) -> Dict[str, Any]:
+        """
+        一致性校验：从源表重新计算，与汇总表逐桶逐列比对
+
+        Returns:
+            {consistent, checked_buckets, drift_count, drift: [{scope, stat_date, bucket_key, column, expected, actual}]}
+        """
+        expected = {(r['scope'], r['stat_date'], r['bucket_key']): r
+                    for r in StatsRollupService.compute(db, start_date, end_date)}
+
+        query = db.query(AnalysisStatsRollup)
+        if start_date:
+            query = query.filter(AnalysisStatsRollup.stat_date >= start_date)
+        if end_date:
+            query = query.filter(AnalysisStatsRollup.stat_date <= end_date)
+        actual = {(r.scope, r.stat_date, r.bucket_key): r for r in query.all()}
+
+        drift = []
+        for key in set(expected) | set(actual):
+            exp, act = expected.get(key), actual.get(key)
+            for column in [*SUM_COLUMNS, 'duration_max']:
+                exp_value = exp[column] if exp else 0
+                act_value = (getattr(act, column) or 0) if act is not None else 0
+                if abs(exp_value - act_value) > 1e-6:
+                    drift.append({
+                        'scope': key[0], 'stat_date': key[1], 'bucket_key': key[2],
+                        'column': column, 'expected': exp_value, 'actual': act_value
+                    })
+
+        return {
+            'consistent': not drift,
+            'checked_buckets': len(set(expected) | set(actual)),
+            'drift_count': len(drift),
+            'drift': drift[:max_drift]
+        }
+
+    @staticmethod
+    def ensure_initialized(db: Session) -> bool:
+        """汇总表为空而源表已有数据时（首次升级）做一次全量重建"""
+        if db.query(AnalysisStatsRollup.id).first() is not None:
+            return False
+        if db.query(AnalysisSession.id).first() is None and db.query(AgentResult.id).first() is None:
+            return False
+        StatsRollupService.rebuild(db)
+        return True
@@ -4,10 +4,12 @@
 """
 
 import sqlite3
+import threading
 import akshare as ak
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from backend.dataflows.akshare.stock_search_index import StockSearchIndex
 from backend.utils.logging_config import get_logger
 
 logger = get_logger("StockListCache")
@@ -31,6 +33,9 @@ class StockListCache:
 
         self.db_path = db_path
         self.logger = logger
+        # 常驻内存的搜索索引，首次搜索时从数据库加载，更新列表后整体替换
+        self._index: Optional[StockSearchIndex] = None
+        self._index_lock = threading.Lock()
         self._init_database()
     
     def _init_database(self):
@@ -158,7 +163,10 @@ class StockListCache:
             
             conn.commit()
             conn.close()
-            
+
+            # 重建搜索索引后原子替换引用，正在进行的搜索继续使用旧索引
+            self._index = StockSearchIndex(stock_list)
+
             self.logger.info(f"✅ 股票列表更新完成: {len(stock_list)}只")
             return True
             
@@ -180,49 +188,40 @@ class StockListCache:
             
             return False
     
-    def search(self, keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """搜索股票"""
-        if not keyword:
-            return []
-        
-        keyword = keyword.strip().upper()
-        
+    def _load_index(self) -> StockSearchIndex:
+        """从数据库构建搜索索引"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        
-        # 先精确匹配代码
-        cursor.execute("""
-            SELECT code, name, market FROM stock_list
-            WHERE code LIKE ?
-            LIMIT ?
-        """, (f'%{keyword}%', limit))
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'code': row[0],
-                'name': row[1],
-                'market': row[2]
-            })
-        
-        # 如果结果不够，模糊匹配名称
-        if len(results) < limit:
-            cursor.execute("""
-                SELECT code, name, market FROM stock_list
-                WHERE name LIKE ? AND code NOT IN ({})
-                LIMIT ?
-            """.format(','.join('?' * len(results))), 
-            (f'%{keyword}%', *[r['code'] for r in results], limit - len(results)))
-            
-            for row in cursor.fetchall():
-                results.append({
-                    'code': row[0],
-                    'name': row[1],
-                    'market': row[2]
-                })
-        
+        cursor.execute("SELECT code, name, market FROM stock_list")
+        rows = cursor.fetchall()
         conn.close()
-        return results
+
+        index = StockSearchIndex(
+            {'code': row[0], 'name': row[1], 'market': row[2]} for row in rows
+        )
+        self.logger.info(f"✅ 股票搜索索引已加载: {len(index)}只")
+        return index
+
+    def get_index(self) -> StockSearchIndex:
+        """获取搜索索引（懒加载）"""
+        index = self._index
+        if index is None:
+            with self._index_lock:
+                index = self._index
+                if index is None:
+                    index = self._load_index()
+                    self._index = index
+        return index
+
+    def search(self, keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        搜索股票（内存索引）
+
+        支持代码、名称、拼音首字母，排序为精确 > 前缀 > 子串
+        """
+        if not keyword:
+            return []
+        return self.get_index().search(keyword, limit)
     
     def get_stock_count(self) -> int:
         """获取股票总数"""
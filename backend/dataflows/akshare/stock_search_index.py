@@ -0,0 +1,198 @@
+"""
+股票搜索内存索引
+常驻内存的只读索引，支持代码、名称、拼音首字母（如 gzmt → 贵州茅台）检索，
+排序规则：精确匹配 > 前缀匹配 > 子串匹配
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+try:
+    from pypinyin import Style, lazy_pinyin
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+
+
+# GB2312 一级汉字按拼音排序，可据编码区间推出首字母（pypinyin 不可用时的降级方案）
+_GB2312_INITIAL_BOUNDS = [
+    (0xB0A1, 'A'), (0xB0C5, 'B'), (0xB2C1, 'C'), (0xB4EE, 'D'),
+    (0xB6EA, 'E'), (0xB7A2, 'F'), (0xB8C1, 'G'), (0xB9FE, 'H'),
+    (0xBBF7, 'J'), (0xBFA6, 'K'), (0xC0AC, 'L'), (0xC2E8, 'M'),
+    (0xC4C3, 'N'), (0xC5B6, 'O'), (0xC5BE, 'P'), (0xC6DA, 'Q'),
+    (0xC8BB, 'R'), (0xC8F6, 'S'), (0xCBFA, 'T'), (0xCDDA, 'W'),
+    (0xCEF4, 'X'), (0xD1B9, 'Y'), (0xD4D1, 'Z'),
+]
+_GB2312_LEVEL1_END = 0xD7F9
+_GB2312_BOUND_CODES = [code for code, _ in _GB2312_INITIAL_BOUNDS]
+
+
+def _char_initial(ch: str) -> str:
+    """单个汉字的拼音首字母（GB2312 区间法），无法识别时返回空串"""
+    try:
+        raw = ch.encode('gb2312')
+    except UnicodeEncodeError:
+        return ''
+    if len(raw) != 2:
+        return ''
+    code = (raw[0] << 8) | raw[1]
+    if code < _GB2312_BOUND_CODES[0] or code > _GB2312_LEVEL1_END:
+        return ''
+    pos = bisect_left(_GB2312_BOUND_CODES, code + 1) - 1
+    return _GB2312_INITIAL_BOUNDS[pos][1]
+
+
+def pinyin_initials(name: str) -> str:
+    """
+    获取名称的拼音首字母（大写）
+
+    Args:
+        name: 股票名称，如 "贵州茅台"、"*ST康美"
+
+    Returns:
+        首字母串，如 "GZMT"、"STKM"
+    """
+    if not name:
+        return ''
+    if PYPINYIN_AVAILABLE:
+        parts = lazy_pinyin(name, style=Style.FIRST_LETTER, errors='ignore')
+        text = ''.join(parts)
+    else:
+        text = ''.join(ch if ch.isascii() else _char_initial(ch) for ch in name)
+    return ''.join(ch for ch in text.upper() if ch.isalnum())
+
+
+def normalize_keyword(keyword: str) -> str:
+    """规范化搜索关键词"""
+    return (keyword or '').strip().upper()
+
+
+class StockSearchIndex:
+    """
+    股票搜索索引（构建后只读，可在多线程间共享）
+
+    - 精确匹配：key -> 记录下标的字典
+    - 前缀匹配：全部 key 排序后二分查找
+    - 子串匹配：单字/双字 n-gram 倒排表求交集后校验
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        """
+        Args:
+            records: 股票记录，需包含 code/name/market 字段
+        """
+        self._records: List[Dict[str, Any]] = sorted(
+            ({'code': r['code'], 'name': r['name'], 'market': r['market']} for r in records),
+            key=lambda r: r['code']
+        )
+
+        self._keys: List[Tuple[str, ...]] = []
+        self._exact: Dict[str, List[int]] = {}
+        sorted_keys: List[Tuple[str, int]] = []
+        grams: Dict[str, Set[int]] = {}
+
+        for idx, record in enumerate(self._records):
+            keys = self._record_keys(record)
+            self._keys.append(keys)
+            for key in keys:
+                self._exact.setdefault(key, []).append(idx)
+                sorted_keys.append((key, idx))
+                for gram in self._grams(key):
+                    grams.setdefault(gram, set()).add(idx)
+
+        sorted_keys.sort()
+        self._sorted_keys = sorted_keys
+        self._grams_index: Dict[str, List[int]] = {g: sorted(s) for g, s in grams.items()}
+
+    @staticmethod
+    def _record_keys(record: Dict[str, Any]) -> Tuple[str, ...]:
+        """一条记录的全部可检索 key：完整代码、纯数字代码、名称、拼音首字母"""
+        code = normalize_keyword(record['code'])
+        symbol = code.split('.')[0]
+        name = normalize_keyword(record['name'])
+        initials = pinyin_initials(record['name'])
+        keys = []
+        for key in (code, symbol, name, initials):
+            if key and key not in keys:
+                keys.append(key)
+        return tuple(keys)
+
+    @staticmethod
+    def _grams(text: str) -> Set[str]:
+        """单字和双字 n-gram"""
+        result = set(text)
+        result.update(text[i:i + 2] for i in range(len(text) - 1))
+        return result
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def search(self, keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        搜索股票
+
+        Args:
+            keyword: 代码、名称或拼音首字母
+            limit: 返回数量限制
+
+        Returns:
+            匹配的股票列表（精确 > 前缀 > 子串）
+        """
+        kw = normalize_keyword(keyword)
+        if not kw or limit <= 0:
+            return []
+
+        picked: List[int] = []
+        seen: Set[int] = set()
+
+        def take(idx: int) -> bool:
+            if idx not in seen:
+                seen.add(idx)
+                picked.append(idx)
+            return len(picked) >= limit
+
+        # 1. 精确匹配
+        for idx in self._exact.get(kw, ()):
+            if take(idx):
+                return self._materialize(picked)
+
+        # 2. 前缀匹配（按 key 字典序）
+        pos = bisect_left(self._sorted_keys, (kw, -1))
+        while pos < len(self._sorted_keys):
+            key, idx = self._sorted_keys[pos]
+            if not key.startswith(kw):
+                break
+            if take(idx):
+                return self._materialize(picked)
+            pos += 1
+
+        # 3. 子串匹配
+        for idx in self._substring_candidates(kw):
+            if idx in seen:
+                continue
+            if any(kw in key for key in self._keys[idx]) and take(idx):
+                break
+
+        return self._materialize(picked)
+
+    def _substring_candidates(self, kw: str) -> Sequence[int]:
+        """用 n-gram 倒排表缩小子串匹配的候选集"""
+        if len(kw) == 1:
+            return self._grams_index.get(kw, [])
+        postings = []
+        for i in range(len(kw) - 1):
+            plist = self._grams_index.get(kw[i:i + 2])
+            if not plist:
+                return []
+            postings.append(plist)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for plist in postings[1:]:
+            candidates.intersection_update(plist)
+            if not candidates:
+                return []
+        return sorted(candidates)
+
+    def _materialize(self, picked: List[int]) -> List[Dict[str, Any]]:
+        """返回记录副本，避免调用方修改索引内部数据"""
+        return [dict(self._records[idx]) for idx in picked]
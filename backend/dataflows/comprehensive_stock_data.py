@@ -10,6 +10,7 @@ import pandas as pd
 
 from backend.utils.logging_config import get_logger
 from backend.dataflows.comprehensive_stock_data_additions import generate_interface_status
+from backend.dataflows.market_tables import get_market_tables
 
 logger = get_logger("dataflows.comprehensive")
 
@@ -34,6 +35,8 @@ class ComprehensiveStockDataService:
     def __init__(self):
         self.tushare_token = os.getenv('TUSHARE_TOKEN', '')
         self.tushare_api = None
+        # 全市场数据表（龙虎榜、融资融券、涨跌停池等）按交易时段共享，逐股查询只做索引查找
+        self.market_tables = get_market_tables()
         
         # 初始化Tushare
         if self.tushare_token:
@@ -221,6 +224,9 @@ class ComprehensiveStockDataService:
 
         total_time = time.time() - start_time
         logger.info(f"📊 数据获取完成: {completed_count}/{len(tasks)} 个接口，耗时 {total_time:.2f} 秒")
+        tables_report = self.market_tables.get_report()
+        logger.info(f"📦 全市场数据表: 累计查询 {tables_report['total_lookups']} 次，"
+                    f"实际下载 {tables_report['total_fetches']} 次，节省 {tables_report['network_calls_avoided']} 次网络请求")
 
         # 获取新闻数据（单独处理，避免阻塞）
         try:
@@ -506,17 +512,17 @@ class ComprehensiveStockDataService:
             import akshare as ak
 
             # 使用AKShare的ST风险警示板接口
-            df = ak.stock_zh_a_st_em()
+            table = self.market_tables.table('stock_zh_a_st_em', ak.stock_zh_a_st_em, key_column='代码')
 
-            if df is None or df.empty:
+            if table.empty:
                 return {'status': 'normal', 'is_st': False, 'message': '非ST股票'}
 
             # 检查是否在ST列表中
             stock_code = extract_pure_symbol(ts_code)
-            is_st = stock_code in df['代码'].values
+            st_rows = table.rows(stock_code)
             
-            if is_st:
-                st_info = df[df['代码'] == stock_code].iloc[0]
+            if not st_rows.empty:
+                st_info = st_rows.iloc[0]
                 return {
                     'status': 'st_stock',
                     'is_st': True,
@@ -814,26 +820,24 @@ class ComprehensiveStockDataService:
             
             # 最多查询30个交易日，或者找到10条记录
             while current_date >= start_date and len(all_records) < 10 and days_checked < 45:
-                # 跳过周末
-                if current_date.weekday() < 5:  # 0-4为周一到周五
+                # 跳过非交易日
+                if self.market_tables.calendar.is_trading_day(current_date.date()):
                     try:
                         trade_date_str = current_date.strftime('%Y%m%d')
-                        df = self.tushare_api.top_list(
-                            trade_date=trade_date_str
+                        # 每个交易日的全市场龙虎榜只下载一次，筛出当前股票的记录
+                        stock_df = self.market_tables.rows(
+                            'tushare_top_list', ts_code,
+                            lambda: self.tushare_api.top_list(trade_date=trade_date_str),
+                            'ts_code', trade_date=trade_date_str
                         )
-                        
-                        if df is not None and not df.empty:
-                            # 筛选出当前股票的记录
-                            stock_df = df[df['ts_code'] == ts_code]
-                            if not stock_df.empty:
-                                for _, row in stock_df.iterrows():
-                                    all_records.append({
-                                        'date': row.get('trade_date', ''),
-                                        'reason': row.get('reason', ''),
-                                        'buy': float(row.get('buy', 0) or 0),
-                                        'sell': float(row.get('sell', 0) or 0),
-                                        'net': float(row.get('net', 0) or 0)
-                                    })
+                        for _, row in stock_df.iterrows():
+                            all_records.append({
+                                'date': row.get('trade_date', ''),
+                                'reason': row.get('reason', ''),
+                                'buy': float(row.get('buy', 0) or 0),
+                                'sell': float(row.get('sell', 0) or 0),
+                                'net': float(row.get('net', 0) or 0)
+                            })
                     except Exception as day_error:
                         # 单日查询失败，继续下一天
                         pass
@@ -869,27 +873,25 @@ class ComprehensiveStockDataService:
                 days_checked = 0
 
                 while current_date >= start_date and len(all_records) < 10 and days_checked < 45:
-                    if current_date.weekday() < 5:
+                    if self.market_tables.calendar.is_trading_day(current_date.date()):
                         try:
                             trade_date_str = current_date.strftime('%Y%m%d')
-                            df = self.tushare_api.top_inst(
-                                trade_date=trade_date_str
+                            stock_df = self.market_tables.rows(
+                                'tushare_top_inst', ts_code,
+                                lambda: self.tushare_api.top_inst(trade_date=trade_date_str),
+                                'ts_code', trade_date=trade_date_str
                             )
-
-                            if df is not None and not df.empty:
-                                stock_df = df[df['ts_code'] == ts_code]
-                                if not stock_df.empty:
-                                    for _, row in stock_df.iterrows():
-                                        all_records.append({
-                                            'trade_date': row.get('trade_date', ''),
-                                            'exalter': row.get('exalter', ''),
-                                            'buy': float(row.get('buy', 0) or 0),
-                                            'buy_rate': float(row.get('buy_rate', 0) or 0),
-                                            'sell': float(row.get('sell', 0) or 0),
-                                            'sell_rate': float(row.get('sell_rate', 0) or 0),
-                                            'net_buy': float(row.get('net_buy', 0) or 0),
-                                            'source': 'tushare'
-                                        })
+                            for _, row in stock_df.iterrows():
+                                all_records.append({
+                                    'trade_date': row.get('trade_date', ''),
+                                    'exalter': row.get('exalter', ''),
+                                    'buy': float(row.get('buy', 0) or 0),
+                                    'buy_rate': float(row.get('buy_rate', 0) or 0),
+                                    'sell': float(row.get('sell', 0) or 0),
+                                    'sell_rate': float(row.get('sell_rate', 0) or 0),
+                                    'net_buy': float(row.get('net_buy', 0) or 0),
+                                    'source': 'tushare'
+                                })
                         except:
                             pass
 
@@ -914,23 +916,25 @@ class ComprehensiveStockDataService:
 
             # 获取机构龙虎榜统计
             try:
-                df = ak.stock_lhb_jgstatistic_em(symbol="近一月")
-                if df is not None and not df.empty:
-                    # 筛选当前股票
-                    stock_df = df[df['代码'].astype(str) == symbol]
-                    if not stock_df.empty:
-                        for _, row in stock_df.iterrows():
-                            records.append({
-                                'trade_date': '',
-                                'exalter': '机构专用',
-                                'buy': float(row.get('买入额', 0) or 0),
-                                'buy_rate': 0,
-                                'sell': float(row.get('卖出额', 0) or 0),
-                                'sell_rate': 0,
-                                'net_buy': float(row.get('净买入额', 0) or 0),
-                                'times': int(row.get('上榜次数', 0) or 0),
-                                'source': 'akshare_jgstatistic'
-                            })
+                # 筛选当前股票
+                stock_df = self.market_tables.rows(
+                    'stock_lhb_jgstatistic_em', symbol,
+                    lambda: ak.stock_lhb_jgstatistic_em(symbol="近一月"),
+                    '代码', params="近一月"
+                )
+                if not stock_df.empty:
+                    for _, row in stock_df.iterrows():
+                        records.append({
+                            'trade_date': '',
+                            'exalter': '机构专用',
+                            'buy': float(row.get('买入额', 0) or 0),
+                            'buy_rate': 0,
+                            'sell': float(row.get('卖出额', 0) or 0),
+                            'sell_rate': 0,
+                            'net_buy': float(row.get('净买入额', 0) or 0),
+                            'times': int(row.get('上榜次数', 0) or 0),
+                            'source': 'akshare_jgstatistic'
+                        })
             except Exception as e1:
                 logger.debug(f"AKShare机构龙虎榜统计获取失败: {e1}")
 
@@ -981,49 +985,34 @@ class ComprehensiveStockDataService:
                 end_date = datetime.now().strftime('%Y%m%d')
                 start_date = (datetime.now() - timedelta(days=90)).strftime('%Y%m%d')
 
-                df = ak.stock_dzjy_mrmx(symbol='A股', start_date=start_date, end_date=end_date)
-                if df is not None and not df.empty:
-                    # 找到证券代码列
-                    code_col = None
-                    for col in df.columns:
-                        if '证券代码' in str(col) or '代码' in str(col):
-                            code_col = col
-                            break
-
-                    if code_col:
-                        stock_data = df[df[code_col].astype(str) == symbol]
-                        if not stock_data.empty:
-                            records = stock_data.head(20).to_dict('records')
-                            return {
-                                'status': 'success',
-                                'count': len(records),
-                                'data': records,
-                                'description': '大宗交易明细'
-                            }
+                # 按证券代码列建立索引
+                stock_data = self.market_tables.rows(
+                    'stock_dzjy_mrmx', symbol,
+                    lambda: ak.stock_dzjy_mrmx(symbol='A股', start_date=start_date, end_date=end_date),
+                    ['证券代码', '代码'], trade_date=end_date
+                )
+                if not stock_data.empty:
+                    records = stock_data.head(20).to_dict('records')
+                    return {
+                        'status': 'success',
+                        'count': len(records),
+                        'data': records,
+                        'description': '大宗交易明细'
+                    }
             except Exception as e1:
                 logger.debug(f"stock_dzjy_mrmx失败: {e1}")
 
             # 备选：获取每日统计
             try:
-                df = ak.stock_dzjy_mrtj()
-                if df is not None and not df.empty:
-                    # 找到证券代码列
-                    code_col = None
-                    for col in df.columns:
-                        if '证券代码' in str(col) or '代码' in str(col):
-                            code_col = col
-                            break
-
-                    if code_col:
-                        stock_data = df[df[code_col].astype(str) == symbol]
-                        if not stock_data.empty:
-                            records = stock_data.head(20).to_dict('records')
-                            return {
-                                'status': 'success',
-                                'count': len(records),
-                                'data': records,
-                                'description': '大宗交易每日统计'
-                            }
+                stock_data = self.market_tables.rows('stock_dzjy_mrtj', symbol, ak.stock_dzjy_mrtj, ['证券代码', '代码'])
+                if not stock_data.empty:
+                    records = stock_data.head(20).to_dict('records')
+                    return {
+                        'status': 'success',
+                        'count': len(records),
+                        'data': records,
+                        'description': '大宗交易每日统计'
+                    }
             except Exception as e2:
                 logger.debug(f"stock_dzjy_mrtj失败: {e2}")
 
@@ -1126,7 +1115,7 @@ class ComprehensiveStockDataService:
 
             # 方法2: 使用财联社电报 (stock_telegraph_cls已改名为stock_info_global_cls)
             try:
-                df = ak.stock_info_global_cls()
+                df = self.market_tables.table('stock_info_global_cls', ak.stock_info_global_cls, max_age=120).data
                 if df is not None and not df.empty:
                     records = []
                     for _, row in df.head(20).iterrows():
@@ -1157,7 +1146,7 @@ class ComprehensiveStockDataService:
             import akshare as ak
             
             # 百度财经新闻
-            df = ak.news_economic_baidu()
+            df = self.market_tables.table('news_economic_baidu', ak.news_economic_baidu, max_age=300).data
             
             if df is not None and not df.empty:
                 records = []
@@ -1188,7 +1177,7 @@ class ComprehensiveStockDataService:
 
             # 方法1: 使用东方财富公告
             try:
-                df = ak.stock_gsgg_em()
+                df = self.market_tables.table('stock_gsgg_em', ak.stock_gsgg_em, max_age=300).data
                 if df is not None and not df.empty:
                     records = []
                     for _, row in df.head(50).iterrows():
@@ -1210,7 +1199,7 @@ class ComprehensiveStockDataService:
 
             # 方法2: 使用财联社电报作为替代 (stock_telegraph_cls已改名为stock_info_global_cls)
             try:
-                df = ak.stock_info_global_cls()
+                df = self.market_tables.table('stock_info_global_cls', ak.stock_info_global_cls, max_age=120).data
                 if df is not None and not df.empty:
                     records = []
                     for _, row in df.head(50).iterrows():
@@ -1245,7 +1234,7 @@ class ComprehensiveStockDataService:
 
             # 1. 尝试获取财联社电报（实时财经新闻，包含政策信息）(stock_telegraph_cls已改名为stock_info_global_cls)
             try:
-                df_cls = ak.stock_info_global_cls()
+                df_cls = self.market_tables.table('stock_info_global_cls', ak.stock_info_global_cls, max_age=120).data
                 if df_cls is not None and not df_cls.empty:
                     for _, row in df_cls.head(30).iterrows():
                         title = str(row.get('标题', ''))
@@ -1266,7 +1255,7 @@ class ComprehensiveStockDataService:
 
             # 2. 尝试获取东方财富全球资讯（不使用个股新闻API，避免混淆）
             try:
-                df_em = ak.stock_info_global_em()
+                df_em = self.market_tables.table('stock_info_global_em', ak.stock_info_global_em, max_age=120).data
                 if df_em is not None and not df_em.empty:
                     for _, row in df_em.head(20).iterrows():
                         title = str(row.get('标题', row.get('title', '')))
@@ -1307,14 +1296,12 @@ class ComprehensiveStockDataService:
             symbol = extract_pure_symbol(ts_code)
             
             # ST股票统计
-            df = ak.stock_zh_a_st_em()
-            if df is not None and not df.empty:
-                stock_data = df[df['代码'] == symbol]
-                if not stock_data.empty:
-                    return {
-                        'status': 'success',
-                        'data': stock_data.iloc[0].to_dict()
-                    }
+            stock_data = self.market_tables.rows('stock_zh_a_st_em', symbol, ak.stock_zh_a_st_em, '代码')
+            if not stock_data.empty:
+                return {
+                    'status': 'success',
+                    'data': stock_data.iloc[0].to_dict()
+                }
             return {'status': 'no_data', 'message': '非ST股票'}
         except Exception as e:
             logger.warning(f"⚠️ ST信息获取失败: {e}")
@@ -1327,15 +1314,13 @@ class ComprehensiveStockDataService:
             symbol = extract_pure_symbol(ts_code)
             
             # 停复牌信息
-            df = ak.stock_zh_a_stop_em()
-            if df is not None and not df.empty:
-                stock_data = df[df['代码'] == symbol]
-                if not stock_data.empty:
-                    return {
-                        'status': 'success',
-                        'count': len(stock_data),
-                        'data': stock_data.to_dict('records')
-                    }
+            stock_data = self.market_tables.rows('stock_zh_a_stop_em', symbol, ak.stock_zh_a_stop_em, '代码')
+            if not stock_data.empty:
+                return {
+                    'status': 'success',
+                    'count': len(stock_data),
+                    'data': stock_data.to_dict('records')
+                }
             return {'status': 'no_data', 'message': '无停复牌记录'}
         except Exception as e:
             logger.warning(f"⚠️ 停复牌信息获取失败: {e}")
@@ -1349,29 +1334,33 @@ class ComprehensiveStockDataService:
 
             # 方法1: 使用股权质押市场概况
             try:
-                df = ak.stock_gpzy_pledge_ratio_em()
-                if df is not None and not df.empty:
-                    stock_data = df[df['股票代码'].astype(str) == symbol]
-                    if not stock_data.empty:
-                        return {
-                            'status': 'success',
-                            'count': len(stock_data),
-                            'data': stock_data.to_dict('records')
-                        }
+                stock_data = self.market_tables.rows(
+                    'stock_gpzy_pledge_ratio_em', symbol,
+                    ak.stock_gpzy_pledge_ratio_em,
+                    '股票代码'
+                )
+                if not stock_data.empty:
+                    return {
+                        'status': 'success',
+                        'count': len(stock_data),
+                        'data': stock_data.to_dict('records')
+                    }
             except Exception as e1:
                 logger.debug(f"stock_gpzy_pledge_ratio_em失败: {e1}")
 
             # 方法2: 使用质押统计
             try:
-                df = ak.stock_gpzy_profile_em()
-                if df is not None and not df.empty:
-                    stock_data = df[df['股票代码'].astype(str) == symbol]
-                    if not stock_data.empty:
-                        return {
-                            'status': 'success',
-                            'count': len(stock_data),
-                            'data': stock_data.to_dict('records')
-                        }
+                stock_data = self.market_tables.rows(
+                    'stock_gpzy_profile_em', symbol,
+                    ak.stock_gpzy_profile_em,
+                    '股票代码'
+                )
+                if not stock_data.empty:
+                    return {
+                        'status': 'success',
+                        'count': len(stock_data),
+                        'data': stock_data.to_dict('records')
+                    }
             except Exception as e2:
                 logger.debug(f"stock_gpzy_profile_em失败: {e2}")
 
@@ -1403,17 +1392,19 @@ class ComprehensiveStockDataService:
 
             # 方法2: 尝试东财限售解禁接口
             try:
-                df = ak.stock_restricted_release_summary_em()
-                if df is not None and not df.empty:
-                    # 筛选当前股票
-                    stock_data = df[df['代码'].astype(str) == symbol]
-                    if not stock_data.empty:
-                        return {
-                            'status': 'success',
-                            'count': len(stock_data),
-                            'data': stock_data.to_dict('records'),
-                            'source': 'eastmoney'
-                        }
+                # 筛选当前股票
+                stock_data = self.market_tables.rows(
+                    'stock_restricted_release_summary_em', symbol,
+                    ak.stock_restricted_release_summary_em,
+                    '代码'
+                )
+                if not stock_data.empty:
+                    return {
+                        'status': 'success',
+                        'count': len(stock_data),
+                        'data': stock_data.to_dict('records'),
+                        'source': 'eastmoney'
+                    }
             except Exception as e2:
                 logger.debug(f"东财限售解禁接口失败: {e2}")
 
@@ -1465,30 +1456,34 @@ class ComprehensiveStockDataService:
                 end_date = datetime.now().strftime('%Y%m%d')
                 start_date = (datetime.now() - timedelta(days=30)).strftime('%Y%m%d')
 
-                df = ak.stock_lhb_detail_em(start_date=start_date, end_date=end_date)
-                if df is not None and not df.empty:
-                    # 筛选当前股票
-                    stock_data = df[df['代码'].astype(str) == symbol]
-                    if not stock_data.empty:
-                        return {
-                            'status': 'success',
-                            'count': len(stock_data),
-                            'data': stock_data.head(10).to_dict('records')
-                        }
+                # 筛选当前股票
+                stock_data = self.market_tables.rows(
+                    'stock_lhb_detail_em', symbol,
+                    lambda: ak.stock_lhb_detail_em(start_date=start_date, end_date=end_date),
+                    '代码', trade_date=end_date
+                )
+                if not stock_data.empty:
+                    return {
+                        'status': 'success',
+                        'count': len(stock_data),
+                        'data': stock_data.head(10).to_dict('records')
+                    }
             except Exception as e1:
                 logger.debug(f"stock_lhb_detail_em失败: {e1}")
 
             # 方法2: 使用龙虎榜营业部统计
             try:
-                df = ak.stock_lhb_stock_statistic_em(symbol="近一月")
-                if df is not None and not df.empty:
-                    stock_data = df[df['代码'].astype(str) == symbol]
-                    if not stock_data.empty:
-                        return {
-                            'status': 'success',
-                            'count': len(stock_data),
-                            'data': stock_data.to_dict('records')
-                        }
+                stock_data = self.market_tables.rows(
+                    'stock_lhb_stock_statistic_em', symbol,
+                    lambda: ak.stock_lhb_stock_statistic_em(symbol="近一月"),
+                    '代码', params="近一月"
+                )
+                if not stock_data.empty:
+                    return {
+                        'status': 'success',
+                        'count': len(stock_data),
+                        'data': stock_data.to_dict('records')
+                    }
             except Exception as e2:
                 logger.debug(f"stock_lhb_stock_statistic_em失败: {e2}")
 
@@ -1506,30 +1501,34 @@ class ComprehensiveStockDataService:
             # 方法1: 获取业绩预告汇总
             try:
                 # 获取最新一期业绩预告
-                df = ak.stock_yjyg_em(date="")  # 空字符串获取最新
-                if df is not None and not df.empty:
-                    stock_data = df[df['股票代码'].astype(str) == symbol]
-                    if not stock_data.empty:
-                        return {
-                            'status': 'success',
-                            'count': len(stock_data),
-                            'data': stock_data.to_dict('records')
-                        }
+                stock_data = self.market_tables.rows(
+                    'stock_yjyg_em', symbol,
+                    lambda: ak.stock_yjyg_em(date=""),
+                    '股票代码'
+                )
+                if not stock_data.empty:
+                    return {
+                        'status': 'success',
+                        'count': len(stock_data),
+                        'data': stock_data.to_dict('records')
+                    }
             except Exception as e1:
                 logger.debug(f"stock_yjyg_em失败: {e1}")
 
             # 方法2: 使用业绩快报
             try:
-                df = ak.stock_yjkb_em(date="")
-                if df is not None and not df.empty:
-                    stock_data = df[df['股票代码'].astype(str) == symbol]
-                    if not stock_data.empty:
-                        return {
-                            'status': 'success',
-                            'count': len(stock_data),
-                            'data': stock_data.to_dict('records'),
-                            'description': '业绩快报'
-                        }
+                stock_data = self.market_tables.rows(
+                    'stock_yjkb_em', symbol,
+                    lambda: ak.stock_yjkb_em(date=""),
+                    '股票代码'
+                )
+                if not stock_data.empty:
+                    return {
+                        'status': 'success',
+                        'count': len(stock_data),
+                        'data': stock_data.to_dict('records'),
+                        'description': '业绩快报'
+                    }
             except Exception as e2:
                 logger.debug(f"stock_yjkb_em失败: {e2}")
 
@@ -1546,15 +1545,17 @@ class ComprehensiveStockDataService:
 
             # 方法1: 使用财务审计意见汇总
             try:
-                df = ak.stock_fhps_detail_em()
-                if df is not None and not df.empty:
-                    stock_data = df[df['代码'].astype(str) == symbol]
-                    if not stock_data.empty:
-                        return {
-                            'status': 'success',
-                            'count': len(stock_data),
-                            'data': stock_data.to_dict('records')
-                        }
+                stock_data = self.market_tables.rows(
+                    'stock_fhps_detail_em', symbol,
+                    ak.stock_fhps_detail_em,
+                    '代码'
+                )
+                if not stock_data.empty:
+                    return {
+                        'status': 'success',
+                        'count': len(stock_data),
+                        'data': stock_data.to_dict('records')
+                    }
             except Exception as e1:
                 logger.debug(f"stock_fhps_detail_em失败: {e1}")
 
@@ -1585,29 +1586,33 @@ class ComprehensiveStockDataService:
 
             # 方法1: 使用融资融券明细
             try:
-                df = ak.stock_margin_detail_szse(date="")  # 最新日期
-                if df is not None and not df.empty:
-                    stock_data = df[df['证券代码'].astype(str) == symbol]
-                    if not stock_data.empty:
-                        return {
-                            'status': 'success',
-                            'count': len(stock_data),
-                            'data': stock_data.head(20).to_dict('records')
-                        }
+                stock_data = self.market_tables.rows(
+                    'stock_margin_detail_szse', symbol,
+                    lambda: ak.stock_margin_detail_szse(date=""),
+                    '证券代码'
+                )
+                if not stock_data.empty:
+                    return {
+                        'status': 'success',
+                        'count': len(stock_data),
+                        'data': stock_data.head(20).to_dict('records')
+                    }
             except Exception as e1:
                 logger.debug(f"stock_margin_detail_szse失败: {e1}")
 
             # 方法2: 使用上交所融资融券
             try:
-                df = ak.stock_margin_detail_sse(date="")
-                if df is not None and not df.empty:
-                    stock_data = df[df['标的证券代码'].astype(str) == symbol]
-                    if not stock_data.empty:
-                        return {
-                            'status': 'success',
-                            'count': len(stock_data),
-                            'data': stock_data.head(20).to_dict('records')
-                        }
+                stock_data = self.market_tables.rows(
+                    'stock_margin_detail_sse', symbol,
+                    lambda: ak.stock_margin_detail_sse(date=""),
+                    '标的证券代码'
+                )
+                if not stock_data.empty:
+                    return {
+                        'status': 'success',
+                        'count': len(stock_data),
+                        'data': stock_data.head(20).to_dict('records')
+                    }
             except Exception as e2:
                 logger.debug(f"stock_margin_detail_sse失败: {e2}")
 
@@ -1736,38 +1741,42 @@ class ComprehensiveStockDataService:
 
             # 尝试获取涨停池
             try:
-                zt_df = ak.stock_zt_pool_em(date=today)
-                if zt_df is not None and not zt_df.empty:
-                    # 筛选当前股票
-                    stock_zt = zt_df[zt_df['代码'].astype(str) == symbol]
-                    if not stock_zt.empty:
-                        for _, row in stock_zt.iterrows():
-                            records.append({
-                                'trade_date': today,
-                                'limit': 'U',  # 涨停
-                                'name': row.get('名称', ''),
-                                'close': row.get('最新价', 0),
-                                'pct_chg': row.get('涨跌幅', 0),
-                                'source': 'akshare_zt_pool'
-                            })
+                # 筛选当前股票
+                stock_zt = self.market_tables.rows(
+                    'stock_zt_pool_em', symbol,
+                    lambda: ak.stock_zt_pool_em(date=today),
+                    '代码', trade_date=today, max_age=300
+                )
+                if not stock_zt.empty:
+                    for _, row in stock_zt.iterrows():
+                        records.append({
+                            'trade_date': today,
+                            'limit': 'U',  # 涨停
+                            'name': row.get('名称', ''),
+                            'close': row.get('最新价', 0),
+                            'pct_chg': row.get('涨跌幅', 0),
+                            'source': 'akshare_zt_pool'
+                        })
             except Exception as e1:
                 logger.debug(f"AKShare涨停池获取失败: {e1}")
 
             # 尝试获取跌停池
             try:
-                dt_df = ak.stock_dt_pool_em(date=today)
-                if dt_df is not None and not dt_df.empty:
-                    stock_dt = dt_df[dt_df['代码'].astype(str) == symbol]
-                    if not stock_dt.empty:
-                        for _, row in stock_dt.iterrows():
-                            records.append({
-                                'trade_date': today,
-                                'limit': 'D',  # 跌停
-                                'name': row.get('名称', ''),
-                                'close': row.get('最新价', 0),
-                                'pct_chg': row.get('涨跌幅', 0),
-                                'source': 'akshare_dt_pool'
-                            })
+                stock_dt = self.market_tables.rows(
+                    'stock_dt_pool_em', symbol,
+                    lambda: ak.stock_dt_pool_em(date=today),
+                    '代码', trade_date=today, max_age=300
+                )
+                if not stock_dt.empty:
+                    for _, row in stock_dt.iterrows():
+                        records.append({
+                            'trade_date': today,
+                            'limit': 'D',  # 跌停
+                            'name': row.get('名称', ''),
+                            'close': row.get('最新价', 0),
+                            'pct_chg': row.get('涨跌幅', 0),
+                            'source': 'akshare_dt_pool'
+                        })
             except Exception as e2:
                 logger.debug(f"AKShare跌停池获取失败: {e2}")
 
@@ -1825,42 +1834,46 @@ class ComprehensiveStockDataService:
             if exchange == 'SH':
                 # 上交所融资融券
                 try:
-                    df = ak.stock_margin_detail_sse(date="")
-                    if df is not None and not df.empty:
-                        # 筛选当前股票
-                        stock_df = df[df['标的证券代码'].astype(str) == symbol]
-                        if not stock_df.empty:
-                            for _, row in stock_df.head(10).iterrows():
-                                records.append({
-                                    'trade_date': row.get('信用交易日期', ''),
-                                    'rzye': row.get('融资余额', 0),
-                                    'rzmre': row.get('融资买入额', 0),
-                                    'rzche': row.get('融资偿还额', 0),
-                                    'rqye': row.get('融券余量', 0),
-                                    'rqmcl': row.get('融券卖出量', 0),
-                                    'rqchl': row.get('融券偿还量', 0),
-                                    'source': 'akshare_sse'
-                                })
+                    # 筛选当前股票
+                    stock_df = self.market_tables.rows(
+                        'stock_margin_detail_sse', symbol,
+                        lambda: ak.stock_margin_detail_sse(date=""),
+                        '标的证券代码'
+                    )
+                    if not stock_df.empty:
+                        for _, row in stock_df.head(10).iterrows():
+                            records.append({
+                                'trade_date': row.get('信用交易日期', ''),
+                                'rzye': row.get('融资余额', 0),
+                                'rzmre': row.get('融资买入额', 0),
+                                'rzche': row.get('融资偿还额', 0),
+                                'rqye': row.get('融券余量', 0),
+                                'rqmcl': row.get('融券卖出量', 0),
+                                'rqchl': row.get('融券偿还量', 0),
+                                'source': 'akshare_sse'
+                            })
                 except Exception as e1:
                     logger.debug(f"AKShare上交所融资融券获取失败: {e1}")
             else:
                 # 深交所融资融券
                 try:
-                    df = ak.stock_margin_detail_szse(date="")
-                    if df is not None and not df.empty:
-                        stock_df = df[df['证券代码'].astype(str) == symbol]
-                        if not stock_df.empty:
-                            for _, row in stock_df.head(10).iterrows():
-                                records.append({
-                                    'trade_date': row.get('交易日期', ''),
-                                    'rzye': row.get('融资余额', 0),
-                                    'rzmre': row.get('融资买入额', 0),
-                                    'rzche': row.get('融资偿还额', 0),
-                                    'rqye': row.get('融券余量', 0),
-                                    'rqmcl': row.get('融券卖出量', 0),
-                                    'rqchl': row.get('融券偿还量', 0),
-                                    'source': 'akshare_szse'
-                                })
+                    stock_df = self.market_tables.rows(
+                        'stock_margin_detail_szse', symbol,
+                        lambda: ak.stock_margin_detail_szse(date=""),
+                        '证券代码'
+                    )
+                    if not stock_df.empty:
+                        for _, row in stock_df.head(10).iterrows():
+                            records.append({
+                                'trade_date': row.get('交易日期', ''),
+                                'rzye': row.get('融资余额', 0),
+                                'rzmre': row.get('融资买入额', 0),
+                                'rzche': row.get('融资偿还额', 0),
+                                'rqye': row.get('融券余量', 0),
+                                'rqmcl': row.get('融券卖出量', 0),
+                                'rqchl': row.get('融券偿还量', 0),
+                                'source': 'akshare_szse'
+                            })
                 except Exception as e2:
                     logger.debug(f"AKShare深交所融资融券获取失败: {e2}")
 
@@ -2093,27 +2106,21 @@ class ComprehensiveStockDataService:
 
             # 判断市场
             market = '沪股通' if symbol.startswith('6') else '深股通'
-            df = ak.stock_hsgt_hold_stock_em(market=market)
+            stock_data = self.market_tables.rows(
+                'stock_hsgt_hold_stock_em', symbol,
+                lambda: ak.stock_hsgt_hold_stock_em(market=market),
+                ['代码'], params=market
+            )
 
-            if df is not None and not df.empty:
-                # 找到代码列
-                code_col = None
-                for col in df.columns:
-                    if '代码' in str(col):
-                        code_col = col
-                        break
-
-                if code_col:
-                    stock_data = df[df[code_col].astype(str) == symbol]
-                    if not stock_data.empty:
-                        records = stock_data.to_dict('records')
-                        return {
-                            'status': 'success',
-                            'count': len(records),
-                            'data': records,
-                            'latest': records[0] if records else None,
-                            'source': 'akshare'
-                        }
+            if not stock_data.empty:
+                records = stock_data.to_dict('records')
+                return {
+                    'status': 'success',
+                    'count': len(records),
+                    'data': records,
+                    'latest': records[0] if records else None,
+                    'source': 'akshare'
+                }
         except Exception as e:
             logger.debug(f"AKShare港股通持股获取失败: {e}")
 
@@ -2243,7 +2250,9 @@ class ComprehensiveStockDataService:
         try:
             import tushare as ts
             # 使用爬虫接口获取全市场实时行情
-            df = ts.realtime_list(src='dc')  # dc=东财
+            df = self.market_tables.table(
+                'tushare_realtime_list', lambda: ts.realtime_list(src='dc'), max_age=60  # dc=东财
+            ).data
 
             if df is not None and not df.empty:
                 records = df.head(100).to_dict('records')
@@ -2319,10 +2328,12 @@ class ComprehensiveStockDataService:
             for i in range(5):
                 try:
                     check_date = (datetime.now() - timedelta(days=i)).strftime('%Y%m%d')
-                    df = self.tushare_api.ggt_top10(trade_date=check_date)
-                    if df is not None and not df.empty:
-                        if ts_code:
-                            df = df[df['ts_code'] == ts_code]
+                    table = self.market_tables.table(
+                        'tushare_ggt_top10', lambda: self.tushare_api.ggt_top10(trade_date=check_date),
+                        key_column='ts_code', trade_date=check_date
+                    )
+                    if not table.empty:
+                        df = table.rows(ts_code) if ts_code else table.data
                         if not df.empty:
                             records = df.to_dict('records')
                             return {
@@ -2377,10 +2388,11 @@ class ComprehensiveStockDataService:
             end_date = datetime.now().strftime('%Y%m%d')
             start_date = (datetime.now() - timedelta(days=30)).strftime('%Y%m%d')
 
-            df = self.tushare_api.moneyflow_hsgt(
-                start_date=start_date,
-                end_date=end_date
-            )
+            df = self.market_tables.table(
+                'tushare_moneyflow_hsgt',
+                lambda: self.tushare_api.moneyflow_hsgt(start_date=start_date, end_date=end_date),
+                trade_date=end_date
+            ).data
 
             if df is not None and not df.empty:
                 records = df.to_dict('records')
@@ -2407,10 +2419,12 @@ class ComprehensiveStockDataService:
             for i in range(5):
                 try:
                     check_date = (datetime.now() - timedelta(days=i)).strftime('%Y%m%d')
-                    df = self.tushare_api.limit_list_d(trade_date=check_date)
-                    if df is not None and not df.empty:
-                        if ts_code:
-                            df = df[df['ts_code'] == ts_code]
+                    table = self.market_tables.table(
+                        'tushare_limit_list_d', lambda: self.tushare_api.limit_list_d(trade_date=check_date),
+                        key_column='ts_code', trade_date=check_date
+                    )
+                    if not table.empty:
+                        df = table.rows(ts_code) if ts_code else table.data
                         if not df.empty:
                             records = df.to_dict('records')
                             return {
@@ -107,8 +107,8 @@ def get_int(*keys, default: int = 0) -> int:
     """
     # 如果最后一个参数是数字，则作为默认值
     if keys and isinstance(keys[-1], (int, float)):
+        default = int(keys[-1])
         keys = keys[:-1]
-        default = int(keys[-1]) if keys else default
     
     # 按优先级尝试每个键
     for key in keys:
@@ -29,10 +29,16 @@ except ImportError:
 
 # 导入统一日志系统
 from backend.utils.logging_config import get_logger
+from backend.utils.metrics import timed
 logger = get_logger("dataflow")
 warnings.filterwarnings('ignore')
 
 
+def _is_error_result(result: str) -> bool:
+    """各数据源以返回错误文本表示失败，与 get_stock_data 的成功判断保持一致"""
+    return not result or "❌" in result or "错误" in result
+
+
 class ChinaDataSource(Enum):
     """中国股票数据源枚举"""
     TDX = "tdx"           # 通达信 - 最高优先级
@@ -504,6 +510,7 @@ class DataSourceManager:
                         }, exc_info=True)
             return self._try_fallback_sources(symbol, start_date, end_date)
 
+    @timed("datasource", source="tdx", operation="stock_data", failed=_is_error_result)
     def _get_tdx_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用TDX(通达信)获取数据 - 最高优先级数据源，优先使用Native Provider"""
         logger.debug(f"📊 [TDX] 调用参数: symbol={symbol}, start_date={start_date}, end_date={end_date}")
@@ -622,6 +629,7 @@ class DataSourceManager:
             logger.error(f"❌ [TDX] 调用失败: {e}, 耗时={duration:.2f}s", exc_info=True)
             return f"❌ TDX获取{symbol}数据失败: {e}"
 
+    @timed("datasource", source="tushare", operation="stock_data", failed=_is_error_result)
     def _get_tushare_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用Tushare获取数据 - 直接调用适配器，避免循环调用"""
         logger.debug(f"📊 [Tushare] 调用参数: symbol={symbol}, start_date={start_date}, end_date={end_date}")
@@ -694,6 +702,7 @@ class DataSourceManager:
             logger.error(f"❌ [DataSourceManager详细日志] 异常堆栈: {traceback.format_exc()}")
             raise
     
+    @timed("datasource", source="akshare", operation="stock_data", failed=_is_error_result)
     def _get_akshare_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用AKShare获取数据"""
         logger.debug(f"📊 [AKShare] 调用参数: symbol={symbol}, start_date={start_date}, end_date={end_date}")
@@ -750,6 +759,7 @@ class DataSourceManager:
             logger.error(f"❌ [AKShare] 调用失败: {e}, 耗时={duration:.2f}s", exc_info=True)
             return f"❌ AKShare获取{symbol}数据失败: {e}"
     
+    @timed("datasource", source="juhe", operation="stock_data", failed=_is_error_result)
     def _get_juhe_data(self, symbol: str, start_date: str = None, end_date: str = None) -> str:
         """使用聚合数据获取股票实时行情（免费版每天50次）"""
         logger.debug(f"📊 [聚合数据] 调用参数: symbol={symbol}")
@@ -867,6 +877,7 @@ class DataSourceManager:
             logger.error(f"❌ [聚合数据] 调用失败: {e}, 耗时={duration:.2f}s", exc_info=True)
             return f"❌ 聚合数据获取{symbol}数据失败: {e}"
     
+    @timed("datasource", source="sina", operation="stock_data", failed=_is_error_result)
     def _get_sina_data(self, symbol: str, start_date: str = None, end_date: str = None) -> str:
         """使用新浪财经获取股票实时行情（免费、无限制）"""
         logger.debug(f"📊 [新浪财经] 调用参数: symbol={symbol}")
@@ -959,6 +970,7 @@ class DataSourceManager:
             logger.error(f"❌ [新浪财经] 调用失败: {e}, 耗时={duration:.2f}s", exc_info=True)
             return f"❌ 新浪财经获取{symbol}数据失败: {e}"
     
+    @timed("datasource", source="baostock", operation="stock_data", failed=_is_error_result)
     def _get_baostock_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用BaoStock获取数据"""
         # 这里需要实现BaoStock的统一接口
@@ -0,0 +1,252 @@
+"""
+全市场数据表共享层
+龙虎榜、大宗交易、融资融券、涨跌停池、ST 列表、沪深港通持股等接口返回的是全市场数据，
+逐股获取时每只股票都会重新下载一遍再筛出一行。这里按交易时段缓存整张表（同一时段只下载一次，
+并发请求合并），并按代码列建立索引，个股查询变为字典查找。
+
+缓存有效期按交易日历计算：
+- 当日数据在下一个时段边界（集合竞价、午间休市、收盘、盘后数据发布）失效
+- 历史交易日的数据不再变化，长期缓存
+- 盘中变化较快的表（涨跌停池、快讯等）可用 max_age 限制最长缓存时间
+
+用法：
+    tables = get_market_tables()
+    rows = tables.rows("st_board", "600519", ak.stock_zh_a_st_em, key_column="代码")
+    if not rows.empty: ...
+"""
+
+import threading
+import time
+from datetime import datetime, date, timedelta
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Union
+
+import pandas as pd
+
+from backend.utils.logging_config import get_logger
+from backend.utils.ttl_cache import get_ttl_cache
+
+logger = get_logger("dataflows.market_tables")
+
+# 交易时段边界：集合竞价开始、午间休市、午后开盘、收盘、盘后数据（龙虎榜、大宗交易等）发布
+SESSION_BOUNDARIES = [(9, 15), (11, 30), (13, 0), (15, 0), (18, 0)]
+
+# 历史交易日数据的缓存时长（秒）
+HISTORY_TTL = 3 * 24 * 3600
+
+# 交易日历加载失败后的重试间隔（秒）
+CALENDAR_RETRY_INTERVAL = 3600
+
+
+class TradingCalendar:
+    """A股交易日历（AKShare 新浪交易日历，不可用时按工作日判断）"""
+
+    def __init__(self):
+        self._trade_dates: Set[date] = set()
+        self._last_date: Optional[date] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._trade_dates or time.time() - self._loaded_at < CALENDAR_RETRY_INTERVAL:
+            return
+        with self._lock:
+            if self._trade_dates or time.time() - self._loaded_at < CALENDAR_RETRY_INTERVAL:
+                return
+            self._loaded_at = time.time()
+            try:
+                import akshare as ak
+                df = ak.tool_trade_date_hist_sina()
+                if df is not None and not df.empty:
+                    dates = set(pd.to_datetime(df['trade_date'].astype(str)).dt.date)
+                    self._trade_dates = dates
+                    self._last_date = max(dates)
+                    logger.info(f"[市场数据表] 交易日历加载完成，共 {len(dates)} 个交易日")
+            except Exception as e:
+                logger.warning(f"[市场数据表] 交易日历加载失败，按工作日判断: {e}")
+
+    def is_trading_day(self, day: date) -> bool:
+        self._ensure_loaded()
+        if self._trade_dates and day <= self._last_date:
+            return day in self._trade_dates
+        return day.weekday() < 5
+
+    def previous_trading_days(self, count: int, end: Optional[date] = None) -> List[date]:
+        """从 end（含，默认今天）往前的 count 个交易日，按日期倒序"""
+        day = end or date.today()
+        days = []
+        for _ in range(count * 3 + 15):
+            if len(days) >= count:
+                break
+            if self.is_trading_day(day):
+                days.append(day)
+            day -= timedelta(days=1)
+        return days
+
+    def next_session_boundary(self, now: Optional[datetime] = None) -> datetime:
+        """下一个交易时段边界（当日数据在此时刻后需要重新获取）"""
+        now = now or datetime.now()
+        if self.is_trading_day(now.date()):
+            for hour, minute in SESSION_BOUNDARIES:
+                boundary = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                if now < boundary:
+                    return boundary
+        day = now.date() + timedelta(days=1)
+        for _ in range(30):
+            if self.is_trading_day(day):
+                break
+            day += timedelta(days=1)
+        hour, minute = SESSION_BOUNDARIES[0]
+        return datetime(day.year, day.month, day.day, hour, minute)
+
+    def session_ttl(self, trade_date: Optional[Union[str, date]] = None, max_age: Optional[float] = None) -> float:
+        """
+        计算数据表的缓存时长（秒）
+
+        Args:
+            trade_date: 数据所属交易日（YYYYMMDD 或 date），早于今天的视为不再变化
+            max_age: 最长缓存时间（秒），用于盘中变化较快的表
+        """
+        if trade_date is not None:
+            if isinstance(trade_date, str):
+                trade_date = datetime.strptime(trade_date.replace('-', ''), '%Y%m%d').date()
+            if trade_date < date.today():
+                return HISTORY_TTL
+        ttl = max((self.next_session_boundary() - datetime.now()).total_seconds(), 1.0)
+        return min(ttl, max_age) if max_age else ttl
+
+
+class MarketTable:
+    """一张全市场数据表及其代码索引"""
+
+    __slots__ = ("data", "key_column", "index", "fetched_at")
+
+    def __init__(self, data: pd.DataFrame, key_column: Optional[str]):
+        self.data = data
+        self.key_column = key_column
+        self.fetched_at = time.time()
+        if key_column and key_column in data.columns:
+            self.index = data.groupby(data[key_column].astype(str).str.strip(), sort=False).indices
+        else:
+            self.index = {}
+
+    @property
+    def empty(self) -> bool:
+        return self.data.empty
+
+    def rows(self, code: str) -> pd.DataFrame:
+        positions = self.index.get(str(code).strip())
+        if positions is None:
+            return self.data.iloc[0:0]
+        return self.data.iloc[positions]
+
+
+def _resolve_key_column(df: pd.DataFrame, key_column: Union[str, List[str], None]) -> Optional[str]:
+    """key_column 可以是列名，或按顺序匹配的候选关键字（列名包含该关键字即可）"""
+    if key_column is None or isinstance(key_column, str):
+        return key_column
+    for keyword in key_column:
+        for col in df.columns:
+            if keyword in str(col):
+                return col
+    return None
+
+
+class MarketTableStore:
+    """全市场数据表缓存（按交易时段失效，同一张表的并发请求只下载一次）"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self.calendar = TradingCalendar()
+        self._cache = get_ttl_cache("market_tables", ttl=HISTORY_TTL, negative_ttl=30, max_entries=512)
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, dataset: str, field: str, amount: float = 1):
+        with self._stats_lock:
+            stats = self._stats.setdefault(dataset, {
+                "lookups": 0, "fetches": 0, "fetch_errors": 0, "fetch_seconds": 0.0, "rows": 0, "codes": 0
+            })
+            stats[field] += amount
+
+    def table(self, dataset: str, fetch: Callable[[], pd.DataFrame],
+              key_column: Union[str, List[str], None] = None, trade_date: Optional[str] = None,
+              params: Hashable = None, max_age: Optional[float] = None) -> MarketTable:
+        """
+        获取一张全市场数据表（缓存内直接返回）
+
+        Args:
+            dataset: 数据集名称（用于统计）
+            fetch: 下载整张表的函数，返回 DataFrame
+            key_column: 索引列名，或候选关键字列表
+            trade_date: 数据所属交易日（YYYYMMDD），历史交易日长期缓存
+            params: 其他区分同一数据集不同表的参数（如市场、统计周期）
+            max_age: 最长缓存时间（秒）
+
+        Raises:
+            下载失败时抛出原异常（失败结果缓存 30 秒，期间不重复请求）
+        """
+        self._count(dataset, "lookups")
+
+        def load() -> MarketTable:
+            started = time.time()
+            try:
+                df = fetch()
+            except Exception:
+                self._count(dataset, "fetch_errors")
+                raise
+            finally:
+                self._count(dataset, "fetches")
+                self._count(dataset, "fetch_seconds", time.time() - started)
+            if df is None:
+                df = pd.DataFrame()
+            table = MarketTable(df, _resolve_key_column(df, key_column))
+            with self._stats_lock:
+                self._stats[dataset]["rows"] = len(df)
+                self._stats[dataset]["codes"] = len(table.index)
+            logger.debug(f"[市场数据表] {dataset} 已下载 {len(df)} 行")
+            return table
+
+        return self._cache.get_or_load(
+            (dataset, trade_date, params), load,
+            ttl=self.calendar.session_ttl(trade_date, max_age),
+            cache_if=lambda t: not t.empty
+        )
+
+    def rows(self, dataset: str, code: str, fetch: Callable[[], pd.DataFrame],
+             key_column: Union[str, List[str]], trade_date: Optional[str] = None,
+             params: Hashable = None, max_age: Optional[float] = None) -> pd.DataFrame:
+        """获取全市场数据表中某只股票的行（无记录时返回空 DataFrame）"""
+        return self.table(dataset, fetch, key_column, trade_date, params, max_age).rows(code)
+
+    def get_report(self) -> Dict[str, Any]:
+        """各数据表的下载次数、查询次数与节省的网络请求"""
+        with self._stats_lock:
+            datasets = {name: dict(stats) for name, stats in self._stats.items()}
+        for stats in datasets.values():
+            stats["avoided"] = stats["lookups"] - stats["fetches"]
+            stats["fetch_seconds"] = round(stats["fetch_seconds"], 2)
+        lookups = sum(s["lookups"] for s in datasets.values())
+        fetches = sum(s["fetches"] for s in datasets.values())
+        return {
+            "datasets": datasets,
+            "total_lookups": lookups,
+            "total_fetches": fetches,
+            "network_calls_avoided": lookups - fetches,
+            "next_session_boundary": self.calendar.next_session_boundary().isoformat(),
+            "cache": self._cache.get_stats()
+        }
+
+
+def get_market_tables() -> MarketTableStore:
+    """获取全市场数据表缓存单例"""
+    return MarketTableStore()
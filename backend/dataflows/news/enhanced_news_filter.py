@@ -5,7 +5,10 @@
 
 import pandas as pd
 import re
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
 import numpy as np
@@ -15,6 +18,32 @@ from .news_filter import NewsRelevanceFilter, create_news_filter, get_company_na
 
 logger = logging.getLogger(__name__)
 
+SEMANTIC_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"  # 支持中文的轻量级模型
+ENCODE_BATCH_SIZE = 64
+EMBEDDING_CACHE_SIZE = 20000
+
+# 语义模型和文本向量在过滤器实例间共享（过滤器按股票创建，模型只加载一次，相同新闻只编码一次）
+_sentence_models: Dict[str, object] = {}
+_embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_embedding_lock = threading.Lock()
+
+
+def _get_sentence_model(model_name: str):
+    """加载（并缓存）SentenceTransformer 模型"""
+    with _embedding_lock:
+        model = _sentence_models.get(model_name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+            _sentence_models[model_name] = model
+        return model
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
 class EnhancedNewsFilter(NewsRelevanceFilter):
     """增强新闻过滤器，集成本地模型和多种过滤策略"""
     
@@ -53,11 +82,9 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             
             # 尝试使用sentence-transformers
             try:
-                from sentence_transformers import SentenceTransformer
-                
                 # 使用轻量级中文模型
-                model_name = "paraphrase-multilingual-MiniLM-L12-v2"  # 支持中文的轻量级模型
-                self.sentence_model = SentenceTransformer(model_name)
+                model_name = SEMANTIC_MODEL_NAME
+                self.sentence_model = _get_sentence_model(model_name)
                 
                 # 预计算公司相关的embedding
                 company_texts = [
@@ -69,7 +96,8 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
                     f"{self.company_name}财报"
                 ]
                 
-                self.company_embedding = self.sentence_model.encode(company_texts)
+                # 预先归一化，相似度计算只需一次矩阵乘
+                self.company_embedding = _normalize_rows(self.encode_texts(company_texts))
                 logger.info(f"[增强过滤器] ✅ 语义模型加载成功: {model_name}")
                 
             except ImportError:
@@ -106,6 +134,76 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             logger.error(f"[增强过滤器] 本地分类模型初始化失败: {e}")
             self.use_local_model = False
     
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        批量编码文本（按文本哈希缓存，未命中的文本一次性批量编码）
+        
+        Args:
+            texts: 文本列表
+            
+        Returns:
+            np.ndarray: 归一化后的文本向量矩阵 (len(texts), dim)
+        """
+        keys = [hashlib.md5(f"{SEMANTIC_MODEL_NAME}\x00{text}".encode('utf-8')).hexdigest() for text in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with _embedding_lock:
+            for i, key in enumerate(keys):
+                vector = _embedding_cache.get(key)
+                if vector is not None:
+                    _embedding_cache.move_to_end(key)
+                    vectors[i] = vector
+                else:
+                    missing.setdefault(key, []).append(i)
+        
+        if missing:
+            missing_keys = list(missing)
+            encoded = _normalize_rows(self.sentence_model.encode(
+                [texts[missing[key][0]] for key in missing_keys], batch_size=ENCODE_BATCH_SIZE
+            ))
+            with _embedding_lock:
+                for key, vector in zip(missing_keys, encoded):
+                    _embedding_cache[key] = vector
+                    for i in missing[key]:
+                        vectors[i] = vector
+                while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+                    _embedding_cache.popitem(last=False)
+            logger.debug(f"[增强过滤器] 批量编码 {len(missing_keys)} 条文本，缓存命中 {len(texts) - sum(len(v) for v in missing.values())} 条")
+        
+        return np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    
+    @staticmethod
+    def _semantic_text(title, content) -> str:
+        """组合标题和内容的前200字符"""
+        title = title if isinstance(title, str) else ''
+        content = content if isinstance(content, str) else ''
+        return f"{title} {content[:200]}"
+    
+    def calculate_semantic_similarities(self, titles: List[str], contents: List[str]) -> np.ndarray:
+        """
+        批量计算语义相似度评分：一次批量编码 + 与公司向量矩阵的一次矩阵乘
+        
+        Args:
+            titles: 新闻标题列表
+            contents: 新闻内容列表
+            
+        Returns:
+            np.ndarray: 各条新闻的语义相似度评分 (0-100)
+        """
+        if not self.use_semantic or self.sentence_model is None or not titles:
+            return np.zeros(len(titles))
+        
+        try:
+            text_embeddings = self.encode_texts([self._semantic_text(t, c) for t, c in zip(titles, contents)])
+            
+            # 与公司相关文本的余弦相似度取最高值，转换为0-100评分
+            max_similarity = (text_embeddings @ self.company_embedding.T).max(axis=1)
+            return np.clip(max_similarity * 100, 0, 100).astype(float)
+            
+        except Exception as e:
+            logger.error(f"[增强过滤器] 语义相似度计算失败: {e}")
+            return np.zeros(len(titles))
+    
     def calculate_semantic_similarity(self, title: str, content: str) -> float:
         """
         计算语义相似度评分
@@ -120,33 +218,9 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         if not self.use_semantic or self.sentence_model is None:
             return 0
         
-        try:
-            # 组合标题和内容的前200字符
-            text = f"{title} {content[:200]}"
-            
-            # 计算文本embedding
-            text_embedding = self.sentence_model.encode([text])
-            
-            # 计算与公司相关文本的相似度
-            similarities = []
-            for company_emb in self.company_embedding:
-                similarity = np.dot(text_embedding[0], company_emb) / (
-                    np.linalg.norm(text_embedding[0]) * np.linalg.norm(company_emb)
-                )
-                similarities.append(similarity)
-            
-            # 取最高相似度
-            max_similarity = max(similarities)
-            
-            # 转换为0-100评分
-            semantic_score = max(0, min(100, max_similarity * 100))
-            
-            logger.debug(f"[增强过滤器] 语义相似度评分: {semantic_score:.1f}")
-            return semantic_score
-            
-        except Exception as e:
-            logger.error(f"[增强过滤器] 语义相似度计算失败: {e}")
-            return 0
+        semantic_score = float(self.calculate_semantic_similarities([title], [content])[0])
+        logger.debug(f"[增强过滤器] 语义相似度评分: {semantic_score:.1f}")
+        return semantic_score
     
     def classify_news_relevance(self, title: str, content: str) -> float:
         """
@@ -202,13 +276,15 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             logger.error(f"[增强过滤器] 本地模型分类失败: {e}")
             return 0
     
-    def calculate_enhanced_relevance_score(self, title: str, content: str) -> Dict[str, float]:
+    def calculate_enhanced_relevance_score(self, title: str, content: str,
+                                           semantic_score: Optional[float] = None) -> Dict[str, float]:
         """
         计算增强相关性评分（综合多种方法）
         
         Args:
             title: 新闻标题
             content: 新闻内容
+            semantic_score: 已批量计算好的语义相似度评分（为空时单独计算）
             
         Returns:
             Dict: 包含各种评分的字典
@@ -221,7 +297,8 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         
         # 2. 语义相似度评分
         if self.use_semantic:
-            semantic_score = self.calculate_semantic_similarity(title, content)
+            if semantic_score is None:
+                semantic_score = self.calculate_semantic_similarity(title, content)
             scores['semantic_score'] = semantic_score
         else:
             scores['semantic_score'] = 0
@@ -271,16 +348,22 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         logger.info(f"[增强过滤器] 开始增强过滤，原始数量: {len(news_df)}条，最低评分阈值: {min_score}")
         
         filtered_news = []
+        records = news_df.to_dict('records')
+        titles = [row.get('新闻标题', row.get('标题', '')) for row in records]
+        contents = [row.get('新闻内容', row.get('内容', '')) for row in records]
         
-        for idx, row in news_df.iterrows():
-            title = row.get('新闻标题', row.get('标题', ''))
-            content = row.get('新闻内容', row.get('内容', ''))
-            
+        # 全部候选新闻一次批量编码、一次矩阵乘得到语义评分
+        semantic_scores = self.calculate_semantic_similarities(titles, contents) if self.use_semantic else None
+        
+        for i, (row, title, content) in enumerate(zip(records, titles, contents)):
             # 计算增强评分
-            scores = self.calculate_enhanced_relevance_score(title, content)
+            scores = self.calculate_enhanced_relevance_score(
+                title, content,
+                semantic_score=float(semantic_scores[i]) if semantic_scores is not None else None
+            )
             
             if scores['final_score'] >= min_score:
-                row_dict = row.to_dict()
+                row_dict = dict(row)
                 row_dict.update(scores)  # 添加所有评分信息
                 filtered_news.append(row_dict)
                 
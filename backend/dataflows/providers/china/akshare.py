@@ -17,6 +17,7 @@ from typing import Dict, Any, List, Optional, Union
 import pandas as pd
 
 from ..base_provider import BaseStockDataProvider
+from backend.utils.metrics import instrument
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +75,7 @@ def get_random_user_agent() -> str:
     return random.choice(USER_AGENTS)
 
 
+@instrument("datasource", source="akshare")
 class AKShareProvider(BaseStockDataProvider):
     """
     AKShare统一数据提供器
@@ -10,10 +10,12 @@ from typing import Dict, Any, List, Optional, Union
 import pandas as pd
 
 from ..base_provider import BaseStockDataProvider
+from backend.utils.metrics import instrument
 
 logger = logging.getLogger(__name__)
 
 
+@instrument("datasource", source="baostock")
 class BaoStockProvider(BaseStockDataProvider):
     """BaoStock统一数据提供器"""
     
@@ -8,6 +8,7 @@ import asyncio
 import logging
 
 from ..base_provider import BaseStockDataProvider
+from backend.utils.metrics import instrument
 from backend.dataflows.utils.providers_config import get_provider_config
 
 # 尝试导入tushare
@@ -21,6 +22,7 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+@instrument("datasource", source="tushare")
 class TushareProvider(BaseStockDataProvider):
     """
     统一的Tushare数据提供器
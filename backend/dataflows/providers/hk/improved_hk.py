@@ -2,10 +2,12 @@
 """
 改进的港股数据获取工具
 解决API速率限制和数据获取问题
+
+同步方法沿用原接口；异步端点使用 aget_* 方法，限流等待通过 await 完成，不阻塞事件循环。
+缓存采用快照 + 追加日志（JsonJournal），每次只追加变化的键。
 """
 
 import time
-import json
 import os
 import pandas as pd
 from typing import Dict, Any, Optional
@@ -16,6 +18,8 @@ from backend.dataflows.config_utils import get_int, get_float
 
 # 导入统一日志系统
 from backend.utils.logging_config import get_logger
+from backend.utils.json_journal import JsonJournal
+from backend.utils.rate_limiter import get_host_limiter
 logger = get_logger("default")
 
 # 新增：使用统一的数据目录配置
@@ -45,7 +49,14 @@ class ImprovedHKStockProvider:
 
         self.cache_ttl = get_int("TA_HK_CACHE_TTL_SECONDS", "ta_hk_cache_ttl_seconds", 3600 * 24)
         self.rate_limit_wait = get_int("TA_HK_RATE_LIMIT_WAIT_SECONDS", "ta_hk_rate_limit_wait_seconds", 5)
-        self.last_request_time = 0
+        self.max_concurrency = get_int("TA_HK_MAX_CONCURRENCY", "ta_hk_max_concurrency", 2)
+
+        # 港股接口的同步/异步调用共用一个令牌桶：平均每 rate_limit_wait 秒一次请求
+        self._limiter = get_host_limiter(
+            "akshare_hk",
+            rate=1.0 / self.rate_limit_wait if self.rate_limit_wait > 0 else None,
+            max_concurrency=self.max_concurrency
+        )
 
         # 内置港股名称映射（避免API调用）
         self.hk_stock_names = {
@@ -109,24 +120,19 @@ class ImprovedHKStockProvider:
         self._load_cache()
     
     def _load_cache(self):
-        """加载缓存"""
+        """加载缓存（快照文件沿用 hk_stock_cache.json，再重放追加日志）"""
+        self._journal = JsonJournal(self.cache_file, lambda: self.cache)
         try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
-            else:
-                self.cache = {}
+            self.cache = self._journal.load(dict)
         except Exception as e:
             logger.debug(f"📊 [港股缓存] 加载缓存失败: {e}")
             self.cache = {}
     
-    def _save_cache(self):
-        """保存缓存"""
+    def _set_cache(self, key: str, entry: Dict[str, Any]):
+        """写入一条缓存（只追加该键，不重写整个缓存文件）"""
+        self.cache[key] = entry
         try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
+            self._journal.set(key, entry)
         except Exception as e:
             logger.debug(f"📊 [港股缓存] 保存缓存失败: {e}")
     
@@ -138,18 +144,6 @@ class ImprovedHKStockProvider:
         cache_time = self.cache[key].get('timestamp', 0)
         return (time.time() - cache_time) < self.cache_ttl
 
-    def _rate_limit(self):
-        """速率限制：确保两次请求之间有足够的间隔"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-
-        if time_since_last_request < self.rate_limit_wait:
-            wait_time = self.rate_limit_wait - time_since_last_request
-            logger.debug(f"⏱️ [速率限制] 等待 {wait_time:.2f} 秒")
-            time.sleep(wait_time)
-
-        self.last_request_time = time.time()
-
     def _normalize_hk_symbol(self, symbol: str) -> str:
         """标准化港股代码"""
         # 移除.HK后缀
@@ -178,119 +172,149 @@ class ImprovedHKStockProvider:
             str: 公司名称
         """
         try:
-            # 检查缓存
-            cache_key = f"name_{symbol}"
-            if self._is_cache_valid(cache_key):
-                cached_name = self.cache[cache_key]['data']
-                logger.debug(f"📊 [港股缓存] 从缓存获取公司名称: {symbol} -> {cached_name}")
-                return cached_name
-            
-            # 方案1：使用内置映射
-            normalized_symbol = self._normalize_hk_symbol(symbol)
-            
-            # 尝试多种格式匹配
-            for format_symbol in [symbol, normalized_symbol, f"{normalized_symbol}.HK"]:
-                if format_symbol in self.hk_stock_names:
-                    company_name = self.hk_stock_names[format_symbol]
-                    
-                    # 缓存结果
-                    self.cache[cache_key] = {
-                        'data': company_name,
-                        'timestamp': time.time(),
-                        'source': 'builtin_mapping'
-                    }
-                    self._save_cache()
-                    
-                    logger.debug(f"📊 [港股映射] 获取公司名称: {symbol} -> {company_name}")
-                    return company_name
-            
-            # 方案2：优先尝试AKShare API获取（有速率限制保护）
-            try:
-                # 速率限制保护
-                current_time = time.time()
-                if current_time - self.last_request_time < self.rate_limit_wait:
-                    wait_time = self.rate_limit_wait - (current_time - self.last_request_time)
-                    logger.debug(f"📊 [港股API] 速率限制保护，等待 {wait_time:.1f} 秒")
-                    time.sleep(wait_time)
+            # 方案1：缓存或内置映射
+            company_name = self._get_local_company_name(symbol)
+            if company_name:
+                return company_name
 
-                self.last_request_time = time.time()
+            # 方案2：AKShare / 统一接口（有速率限制保护）
+            try:
+                with self._limiter.throttle():
+                    company_name = self._fetch_company_name(symbol)
+                if company_name:
+                    return company_name
+            except Exception as e:
+                logger.debug(f"📊 [港股API] API获取失败: {e}")
 
-                # 优先尝试AKShare获取
-                try:
-                    # 直接使用 akshare 库获取，避免循环调用
-                    logger.debug(f"📊 [港股API] 优先使用AKShare获取: {symbol}")
+            # 方案3：生成友好的默认名称
+            return self._default_company_name(symbol)
 
-                    import akshare as ak
-                    # 标准化代码格式（akshare 需要 5 位数字格式）
-                    normalized_symbol = self._normalize_hk_symbol(symbol)
+        except Exception as e:
+            logger.error(f"❌ [港股] 获取公司名称失败: {e}")
+            clean_symbol = self._normalize_hk_symbol(symbol)
+            return f"港股{clean_symbol}"
 
-                    # 尝试获取港股实时行情（包含名称）
-                    try:
-                        # 使用新浪财经接口（更稳定）
-                        df = ak.stock_hk_spot()
-                        if df is not None and not df.empty:
-                            # 查找匹配的股票
-                            matched = df[df['代码'] == normalized_symbol]
-                            if not matched.empty:
-                                # 新浪接口返回的列名是 '中文名称'
-                                akshare_name = matched.iloc[0]['中文名称']
-                                if akshare_name and not str(akshare_name).startswith('港股'):
-                                    # 缓存AKShare结果
-                                    self.cache[cache_key] = {
-                                        'data': akshare_name,
-                                        'timestamp': time.time(),
-                                        'source': 'akshare_sina'
-                                    }
-                                    self._save_cache()
-
-                                    logger.debug(f"📊 [港股AKShare-新浪] 获取公司名称: {symbol} -> {akshare_name}")
-                                    return akshare_name
-                    except Exception as e:
-                        logger.debug(f"📊 [港股AKShare-新浪] 获取实时行情失败: {e}")
-
-                except Exception as e:
-                    logger.debug(f"📊 [港股AKShare] AKShare获取失败: {e}")
-
-                # 备用：尝试从统一接口获取（包含Yahoo Finance）
-                from backend.dataflows.interface import get_hk_stock_info_unified
-                hk_info = get_hk_stock_info_unified(symbol)
-
-                if hk_info and isinstance(hk_info, dict) and 'name' in hk_info:
-                    api_name = hk_info['name']
-                    if not api_name.startswith('港股'):
-                        # 缓存API结果
-                        self.cache[cache_key] = {
-                            'data': api_name,
-                            'timestamp': time.time(),
-                            'source': 'unified_api'
-                        }
-                        self._save_cache()
-
-                        logger.debug(f"📊 [港股统一API] 获取公司名称: {symbol} -> {api_name}")
-                        return api_name
+    async def aget_company_name(self, symbol: str) -> str:
+        """获取港股公司名称（异步版本，限流等待不阻塞事件循环）"""
+        try:
+            company_name = self._get_local_company_name(symbol)
+            if company_name:
+                return company_name
 
+            try:
+                company_name = await self._limiter.run(self._fetch_company_name, symbol)
+                if company_name:
+                    return company_name
             except Exception as e:
                 logger.debug(f"📊 [港股API] API获取失败: {e}")
-            
-            # 方案3：生成友好的默认名称
-            clean_symbol = self._normalize_hk_symbol(symbol)
-            default_name = f"港股{clean_symbol}"
-            
-            # 缓存默认结果（较短的TTL）
-            self.cache[cache_key] = {
-                'data': default_name,
-                'timestamp': time.time() - self.cache_ttl + 3600,  # 1小时后过期
-                'source': 'default'
-            }
-            self._save_cache()
-            
-            logger.debug(f"📊 [港股默认] 使用默认名称: {symbol} -> {default_name}")
-            return default_name
-            
+
+            return self._default_company_name(symbol)
+
         except Exception as e:
             logger.error(f"❌ [港股] 获取公司名称失败: {e}")
             clean_symbol = self._normalize_hk_symbol(symbol)
             return f"港股{clean_symbol}"
+
+    def _get_local_company_name(self, symbol: str) -> Optional[str]:
+        """从缓存或内置映射获取公司名称（不访问网络）"""
+        # 检查缓存
+        cache_key = f"name_{symbol}"
+        if self._is_cache_valid(cache_key):
+            cached_name = self.cache[cache_key]['data']
+            logger.debug(f"📊 [港股缓存] 从缓存获取公司名称: {symbol} -> {cached_name}")
+            return cached_name
+
+        normalized_symbol = self._normalize_hk_symbol(symbol)
+
+        # 尝试多种格式匹配
+        for format_symbol in [symbol, normalized_symbol, f"{normalized_symbol}.HK"]:
+            if format_symbol in self.hk_stock_names:
+                company_name = self.hk_stock_names[format_symbol]
+
+                # 缓存结果
+                self._set_cache(cache_key, {
+                    'data': company_name,
+                    'timestamp': time.time(),
+                    'source': 'builtin_mapping'
+                })
+
+                logger.debug(f"📊 [港股映射] 获取公司名称: {symbol} -> {company_name}")
+                return company_name
+
+        return None
+
+    def _fetch_company_name(self, symbol: str) -> Optional[str]:
+        """从 AKShare / 统一接口获取公司名称（不含限流，调用方负责）"""
+        cache_key = f"name_{symbol}"
+
+        # 优先尝试AKShare获取
+        try:
+            # 直接使用 akshare 库获取，避免循环调用
+            logger.debug(f"📊 [港股API] 优先使用AKShare获取: {symbol}")
+
+            import akshare as ak
+            # 标准化代码格式（akshare 需要 5 位数字格式）
+            normalized_symbol = self._normalize_hk_symbol(symbol)
+
+            # 尝试获取港股实时行情（包含名称）
+            try:
+                # 使用新浪财经接口（更稳定）
+                df = ak.stock_hk_spot()
+                if df is not None and not df.empty:
+                    # 查找匹配的股票
+                    matched = df[df['代码'] == normalized_symbol]
+                    if not matched.empty:
+                        # 新浪接口返回的列名是 '中文名称'
+                        akshare_name = matched.iloc[0]['中文名称']
+                        if akshare_name and not str(akshare_name).startswith('港股'):
+                            # 缓存AKShare结果
+                            self._set_cache(cache_key, {
+                                'data': akshare_name,
+                                'timestamp': time.time(),
+                                'source': 'akshare_sina'
+                            })
+
+                            logger.debug(f"📊 [港股AKShare-新浪] 获取公司名称: {symbol} -> {akshare_name}")
+                            return akshare_name
+            except Exception as e:
+                logger.debug(f"📊 [港股AKShare-新浪] 获取实时行情失败: {e}")
+
+        except Exception as e:
+            logger.debug(f"📊 [港股AKShare] AKShare获取失败: {e}")
+
+        # 备用：尝试从统一接口获取（包含Yahoo Finance）
+        from backend.dataflows.interface import get_hk_stock_info_unified
+        hk_info = get_hk_stock_info_unified(symbol)
+
+        if hk_info and isinstance(hk_info, dict) and 'name' in hk_info:
+            api_name = hk_info['name']
+            if not api_name.startswith('港股'):
+                # 缓存API结果
+                self._set_cache(cache_key, {
+                    'data': api_name,
+                    'timestamp': time.time(),
+                    'source': 'unified_api'
+                })
+
+                logger.debug(f"📊 [港股统一API] 获取公司名称: {symbol} -> {api_name}")
+                return api_name
+
+        return None
+
+    def _default_company_name(self, symbol: str) -> str:
+        """生成默认名称（较短的缓存时间）"""
+        clean_symbol = self._normalize_hk_symbol(symbol)
+        default_name = f"港股{clean_symbol}"
+
+        # 缓存默认结果（较短的TTL）
+        self._set_cache(f"name_{symbol}", {
+            'data': default_name,
+            'timestamp': time.time() - self.cache_ttl + 3600,  # 1小时后过期
+            'source': 'default'
+        })
+
+        logger.debug(f"📊 [港股默认] 使用默认名称: {symbol} -> {default_name}")
+        return default_name
     
     def get_financial_indicators(self, symbol: str) -> Dict[str, Any]:
         """
@@ -306,8 +330,6 @@ class ImprovedHKStockProvider:
             Dict: 财务指标数据
         """
         try:
-            import akshare as ak
-
             # 标准化代码
             normalized_symbol = self._normalize_hk_symbol(symbol)
 
@@ -317,77 +339,101 @@ class ImprovedHKStockProvider:
                 logger.debug(f"📊 [港股财务指标] 使用缓存: {normalized_symbol}")
                 return self.cache[cache_key]['data']
 
+            logger.info(f"📊 [港股财务指标] 获取财务指标: {normalized_symbol}")
+
             # 速率限制
-            self._rate_limit()
+            with self._limiter.throttle():
+                df = self._download_financial_indicators(normalized_symbol)
 
-            logger.info(f"📊 [港股财务指标] 获取财务指标: {normalized_symbol}")
+            return self._store_financial_indicators(normalized_symbol, df)
 
-            # 调用 AKShare 接口
-            df = ak.stock_financial_hk_analysis_indicator_em(symbol=normalized_symbol)
-
-            if df is None or df.empty:
-                logger.warning(f"⚠️ [港股财务指标] 未获取到数据: {normalized_symbol}")
-                return {}
-
-            # 获取最新一期数据
-            latest = df.iloc[0]
-
-            # 提取关键指标
-            indicators = {
-                # 基本信息
-                'report_date': str(latest.get('REPORT_DATE', '')),
-                'fiscal_year': str(latest.get('FISCAL_YEAR', '')),
-
-                # 每股指标
-                'eps_basic': float(latest.get('BASIC_EPS', 0)) if pd.notna(latest.get('BASIC_EPS')) else None,
-                'eps_diluted': float(latest.get('DILUTED_EPS', 0)) if pd.notna(latest.get('DILUTED_EPS')) else None,
-                'eps_ttm': float(latest.get('EPS_TTM', 0)) if pd.notna(latest.get('EPS_TTM')) else None,
-                'bps': float(latest.get('BPS', 0)) if pd.notna(latest.get('BPS')) else None,
-                'per_netcash_operate': float(latest.get('PER_NETCASH_OPERATE', 0)) if pd.notna(latest.get('PER_NETCASH_OPERATE')) else None,
-
-                # 盈利能力指标
-                'roe_avg': float(latest.get('ROE_AVG', 0)) if pd.notna(latest.get('ROE_AVG')) else None,
-                'roe_yearly': float(latest.get('ROE_YEARLY', 0)) if pd.notna(latest.get('ROE_YEARLY')) else None,
-                'roa': float(latest.get('ROA', 0)) if pd.notna(latest.get('ROA')) else None,
-                'roic_yearly': float(latest.get('ROIC_YEARLY', 0)) if pd.notna(latest.get('ROIC_YEARLY')) else None,
-                'net_profit_ratio': float(latest.get('NET_PROFIT_RATIO', 0)) if pd.notna(latest.get('NET_PROFIT_RATIO')) else None,
-                'gross_profit_ratio': float(latest.get('GROSS_PROFIT_RATIO', 0)) if pd.notna(latest.get('GROSS_PROFIT_RATIO')) else None,
-
-                # 营收指标
-                'operate_income': float(latest.get('OPERATE_INCOME', 0)) if pd.notna(latest.get('OPERATE_INCOME')) else None,
-                'operate_income_yoy': float(latest.get('OPERATE_INCOME_YOY', 0)) if pd.notna(latest.get('OPERATE_INCOME_YOY')) else None,
-                'operate_income_qoq': float(latest.get('OPERATE_INCOME_QOQ', 0)) if pd.notna(latest.get('OPERATE_INCOME_QOQ')) else None,
-                'gross_profit': float(latest.get('GROSS_PROFIT', 0)) if pd.notna(latest.get('GROSS_PROFIT')) else None,
-                'gross_profit_yoy': float(latest.get('GROSS_PROFIT_YOY', 0)) if pd.notna(latest.get('GROSS_PROFIT_YOY')) else None,
-                'holder_profit': float(latest.get('HOLDER_PROFIT', 0)) if pd.notna(latest.get('HOLDER_PROFIT')) else None,
-                'holder_profit_yoy': float(latest.get('HOLDER_PROFIT_YOY', 0)) if pd.notna(latest.get('HOLDER_PROFIT_YOY')) else None,
-
-                # 偿债能力指标
-                'debt_asset_ratio': float(latest.get('DEBT_ASSET_RATIO', 0)) if pd.notna(latest.get('DEBT_ASSET_RATIO')) else None,
-                'current_ratio': float(latest.get('CURRENT_RATIO', 0)) if pd.notna(latest.get('CURRENT_RATIO')) else None,
-
-                # 现金流指标
-                'ocf_sales': float(latest.get('OCF_SALES', 0)) if pd.notna(latest.get('OCF_SALES')) else None,
-
-                # 数据源
-                'source': 'akshare_eastmoney',
-                'data_count': len(df)
-            }
+        except Exception as e:
+            logger.error(f"❌ [港股财务指标] 获取失败: {symbol} - {e}")
+            return {}
 
-            # 缓存数据
-            self.cache[cache_key] = {
-                'data': indicators,
-                'timestamp': time.time()
-            }
-            self._save_cache()
+    async def aget_financial_indicators(self, symbol: str) -> Dict[str, Any]:
+        """获取港股财务指标（异步版本，限流等待不阻塞事件循环）"""
+        try:
+            normalized_symbol = self._normalize_hk_symbol(symbol)
 
-            logger.info(f"✅ [港股财务指标] 成功获取: {normalized_symbol}, 报告期: {indicators['report_date']}")
-            return indicators
+            cache_key = f"financial_{normalized_symbol}"
+            if self._is_cache_valid(cache_key):
+                logger.debug(f"📊 [港股财务指标] 使用缓存: {normalized_symbol}")
+                return self.cache[cache_key]['data']
+
+            logger.info(f"📊 [港股财务指标] 获取财务指标: {normalized_symbol}")
+            df = await self._limiter.run(self._download_financial_indicators, normalized_symbol)
+            return self._store_financial_indicators(normalized_symbol, df)
 
         except Exception as e:
             logger.error(f"❌ [港股财务指标] 获取失败: {symbol} - {e}")
             return {}
 
+    def _download_financial_indicators(self, normalized_symbol: str) -> Optional[pd.DataFrame]:
+        """调用 AKShare 接口下载财务指标（不含限流）"""
+        import akshare as ak
+        return ak.stock_financial_hk_analysis_indicator_em(symbol=normalized_symbol)
+
+    def _store_financial_indicators(self, normalized_symbol: str, df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+        """解析财务指标并写入缓存"""
+        if df is None or df.empty:
+            logger.warning(f"⚠️ [港股财务指标] 未获取到数据: {normalized_symbol}")
+            return {}
+
+        # 获取最新一期数据
+        latest = df.iloc[0]
+
+        # 提取关键指标
+        indicators = {
+            # 基本信息
+            'report_date': str(latest.get('REPORT_DATE', '')),
+            'fiscal_year': str(latest.get('FISCAL_YEAR', '')),
+
+            # 每股指标
+            'eps_basic': float(latest.get('BASIC_EPS', 0)) if pd.notna(latest.get('BASIC_EPS')) else None,
+            'eps_diluted': float(latest.get('DILUTED_EPS', 0)) if pd.notna(latest.get('DILUTED_EPS')) else None,
+            'eps_ttm': float(latest.get('EPS_TTM', 0)) if pd.notna(latest.get('EPS_TTM')) else None,
+            'bps': float(latest.get('BPS', 0)) if pd.notna(latest.get('BPS')) else None,
+            'per_netcash_operate': float(latest.get('PER_NETCASH_OPERATE', 0)) if pd.notna(latest.get('PER_NETCASH_OPERATE')) else None,
+
+            # 盈利能力指标
+            'roe_avg': float(latest.get('ROE_AVG', 0)) if pd.notna(latest.get('ROE_AVG')) else None,
+            'roe_yearly': float(latest.get('ROE_YEARLY', 0)) if pd.notna(latest.get('ROE_YEARLY')) else None,
+            'roa': float(latest.get('ROA', 0)) if pd.notna(latest.get('ROA')) else None,
+            'roic_yearly': float(latest.get('ROIC_YEARLY', 0)) if pd.notna(latest.get('ROIC_YEARLY')) else None,
+            'net_profit_ratio': float(latest.get('NET_PROFIT_RATIO', 0)) if pd.notna(latest.get('NET_PROFIT_RATIO')) else None,
+            'gross_profit_ratio': float(latest.get('GROSS_PROFIT_RATIO', 0)) if pd.notna(latest.get('GROSS_PROFIT_RATIO')) else None,
+
+            # 营收指标
+            'operate_income': float(latest.get('OPERATE_INCOME', 0)) if pd.notna(latest.get('OPERATE_INCOME')) else None,
+            'operate_income_yoy': float(latest.get('OPERATE_INCOME_YOY', 0)) if pd.notna(latest.get('OPERATE_INCOME_YOY')) else None,
+            'operate_income_qoq': float(latest.get('OPERATE_INCOME_QOQ', 0)) if pd.notna(latest.get('OPERATE_INCOME_QOQ')) else None,
+            'gross_profit': float(latest.get('GROSS_PROFIT', 0)) if pd.notna(latest.get('GROSS_PROFIT')) else None,
+            'gross_profit_yoy': float(latest.get('GROSS_PROFIT_YOY', 0)) if pd.notna(latest.get('GROSS_PROFIT_YOY')) else None,
+            'holder_profit': float(latest.get('HOLDER_PROFIT', 0)) if pd.notna(latest.get('HOLDER_PROFIT')) else None,
+            'holder_profit_yoy': float(latest.get('HOLDER_PROFIT_YOY', 0)) if pd.notna(latest.get('HOLDER_PROFIT_YOY')) else None,
+
+            # 偿债能力指标
+            'debt_asset_ratio': float(latest.get('DEBT_ASSET_RATIO', 0)) if pd.notna(latest.get('DEBT_ASSET_RATIO')) else None,
+            'current_ratio': float(latest.get('CURRENT_RATIO', 0)) if pd.notna(latest.get('CURRENT_RATIO')) else None,
+
+            # 现金流指标
+            'ocf_sales': float(latest.get('OCF_SALES', 0)) if pd.notna(latest.get('OCF_SALES')) else None,
+
+            # 数据源
+            'source': 'akshare_eastmoney',
+            'data_count': len(df)
+        }
+
+        # 缓存数据
+        self._set_cache(f"financial_{normalized_symbol}", {
+            'data': indicators,
+            'timestamp': time.time()
+        })
+
+        logger.info(f"✅ [港股财务指标] 成功获取: {normalized_symbol}, 报告期: {indicators['report_date']}")
+        return indicators
+
     def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """
         获取港股基本信息
@@ -423,6 +469,18 @@ class ImprovedHKStockProvider:
                 'error': str(e)
             }
 
+    async def aget_stock_info(self, symbol: str) -> Dict[str, Any]:
+        """获取港股基本信息（异步版本）"""
+        company_name = await self.aget_company_name(symbol)
+        return {
+            'symbol': symbol,
+            'name': company_name,
+            'currency': 'HKD',
+            'exchange': 'HKG',
+            'market': '港股',
+            'source': 'improved_hk_provider'
+        }
+
 
 # 全局实例
 _improved_hk_provider = None
@@ -486,6 +544,18 @@ def get_hk_financial_indicators(symbol: str) -> Dict[str, Any]:
     return provider.get_financial_indicators(symbol)
 
 
+async def aget_hk_financial_indicators(symbol: str) -> Dict[str, Any]:
+    """获取港股财务指标（异步版本，供异步端点调用）"""
+    provider = get_improved_hk_provider()
+    return await provider.aget_financial_indicators(symbol)
+
+
+async def aget_hk_stock_info_improved(symbol: str) -> Dict[str, Any]:
+    """获取港股信息（异步版本，供异步端点调用）"""
+    provider = get_improved_hk_provider()
+    return await provider.aget_stock_info(symbol)
+
+
 # 兼容性函数：为了兼容旧的 akshare_utils 导入
 def get_hk_stock_data_akshare(symbol: str, start_date: str = None, end_date: str = None):
     """
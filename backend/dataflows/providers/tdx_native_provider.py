@@ -48,7 +48,10 @@ try:
 except ImportError:
     logger = logging.getLogger(__name__)
 
+from backend.utils.metrics import instrument
 
+
+@instrument("datasource", source="tdx")
 class TDXNativeProvider:
     """
     TDX 原生 Python Provider
@@ -44,6 +44,8 @@ try:
 except ImportError:
     logger = logging.getLogger(__name__)
 
+from backend.utils.metrics import instrument
+
 
 class KlineType(Enum):
     """K线类型枚举"""
@@ -59,6 +61,7 @@ class KlineType(Enum):
     YEAR = "year"
 
 
+@instrument("datasource", source="tdx")
 class TDXProvider:
     """
     通达信数据源Provider - 完整版
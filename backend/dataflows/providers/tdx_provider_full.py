@@ -5,8 +5,11 @@ import pandas as pd
 from typing import Dict, List, Optional, Union
 from datetime import datetime
 
+from backend.utils.metrics import instrument
+
 logger = logging.getLogger(__name__)
 
+@instrument("datasource", source="tdx")
 class TDXProviderFull:
     KLINE_TYPES = {
         '1m': 'minute1', '5m': 'minute5', '15m': 'minute15',
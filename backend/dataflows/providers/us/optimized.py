@@ -4,6 +4,7 @@
 集成缓存策略，减少API调用，提高响应速度
 """
 
+import asyncio
 import os
 import time
 import random
@@ -34,6 +35,7 @@ from backend.dataflows.config_utils import get_int, get_float
 
 # 导入日志模块
 from backend.utils.logging_config import get_logger
+from backend.utils.rate_limiter import get_host_limiter
 logger = get_logger('agents')
 
 
@@ -43,8 +45,8 @@ class OptimizedUSDataProvider:
     def __init__(self):
         self.cache = get_cache()
         self.config = get_config()
-        self.last_api_call = 0
         self.min_api_interval = get_float("TA_US_MIN_API_INTERVAL_SECONDS", "ta_us_min_api_interval_seconds", 1.0)
+        self.max_concurrency = get_int("TA_US_MAX_CONCURRENCY", "ta_us_max_concurrency", 4)
 
         # 🔥 初始化数据源管理器（从数据库读取配置）
         try:
@@ -57,17 +59,13 @@ class OptimizedUSDataProvider:
 
         logger.info(f"📊 优化美股数据提供器初始化完成")
 
-    def _wait_for_rate_limit(self):
-        """等待API限制"""
-        current_time = time.time()
-        time_since_last_call = current_time - self.last_api_call
-
-        if time_since_last_call < self.min_api_interval:
-            wait_time = self.min_api_interval - time_since_last_call
-            logger.info(f"⏳ API限制等待 {wait_time:.1f}s...")
-            time.sleep(wait_time)
-
-        self.last_api_call = time.time()
+    def _get_limiter(self, source_name: str):
+        """获取数据源的限流器（同一数据源的同步/异步调用共用令牌桶）"""
+        return get_host_limiter(
+            f"us_{source_name}",
+            rate=1.0 / self.min_api_interval if self.min_api_interval > 0 else None,
+            max_concurrency=self.max_concurrency
+        )
 
     def get_stock_data(self, symbol: str, start_date: str, end_date: str,
                       force_refresh: bool = False) -> str:
@@ -87,45 +85,121 @@ class OptimizedUSDataProvider:
 
         # 检查缓存（除非强制刷新）
         if not force_refresh:
-            # 🔥 按照数据源优先级顺序查找缓存
-            from ...data_source_manager import get_us_data_source_manager, USDataSource
-            us_manager = get_us_data_source_manager()
-
-            # 获取数据源优先级顺序
-            priority_order = us_manager._get_data_source_priority_order(symbol)
-
-            # 数据源名称映射
-            source_name_mapping = {
-                USDataSource.ALPHA_VANTAGE: "alpha_vantage",
-                USDataSource.YFINANCE: "yfinance",
-                USDataSource.FINNHUB: "finnhub",
-            }
-
-            # 按优先级顺序查找缓存
-            for source in priority_order:
-                if source == USDataSource.MONGODB:
-                    continue  # MongoDB 缓存单独处理
-
-                source_name = source_name_mapping.get(source)
-                if source_name:
-                    cache_key = self.cache.find_cached_stock_data(
-                        symbol=symbol,
-                        start_date=start_date,
-                        end_date=end_date,
-                        data_source=source_name
-                    )
-
-                    if cache_key:
-                        cached_data = self.cache.load_stock_data(cache_key)
-                        if cached_data:
-                            logger.info(f"⚡ [数据来源: 缓存-{source_name}] 从缓存加载美股数据: {symbol}")
-                            return cached_data
+            cached_data = self._load_cached_stock_data(symbol, start_date, end_date)
+            if cached_data:
+                return cached_data
 
         # 缓存未命中，从API获取 - 使用数据源管理器的优先级顺序
         formatted_data = None
         data_source = None
 
+        # 按优先级尝试各个数据源
+        for source in self._get_source_priority(symbol):
+            source_name = source.value
+            try:
+                logger.info(f"🌐 [数据来源: API调用-{source_name.upper()}] 尝试从 {source_name.upper()} 获取数据: {symbol}")
+                with self._get_limiter(source_name).throttle():
+                    formatted_data = self._fetch_from_source(source_name, symbol, start_date, end_date)
+            except Exception as e:
+                logger.error(f"❌ [数据来源: API异常-{source_name.upper()}] {source_name.upper()} API调用失败: {e}")
+                formatted_data = None
+                continue  # 尝试下一个数据源
+
+            if self._is_valid_data(source_name, formatted_data):
+                data_source = source_name
+                break  # 成功获取数据，跳出循环
+            formatted_data = None
+
+        # 如果所有配置的数据源都失败，尝试备用方案
+        if not formatted_data:
+            formatted_data, data_source = self._fetch_fallback(symbol, start_date, end_date)
+
+        return self._finish_stock_data(symbol, start_date, end_date, formatted_data, data_source)
+
+    async def aget_stock_data(self, symbol: str, start_date: str, end_date: str,
+                              force_refresh: bool = False) -> str:
+        """
+        获取美股数据（异步版本）
+
+        限流等待通过 await 完成，数据源调用在线程中执行，不阻塞事件循环；
+        同一数据源的并发请求数受限流器约束
+        """
+        logger.info(f"📈 获取美股数据: {symbol} ({start_date} 到 {end_date})")
+
+        if not force_refresh:
+            cached_data = await asyncio.to_thread(self._load_cached_stock_data, symbol, start_date, end_date)
+            if cached_data:
+                return cached_data
+
+        formatted_data = None
+        data_source = None
+
+        for source in await asyncio.to_thread(self._get_source_priority, symbol):
+            source_name = source.value
+            try:
+                logger.info(f"🌐 [数据来源: API调用-{source_name.upper()}] 尝试从 {source_name.upper()} 获取数据: {symbol}")
+                formatted_data = await self._get_limiter(source_name).run(
+                    self._fetch_from_source, source_name, symbol, start_date, end_date
+                )
+            except Exception as e:
+                logger.error(f"❌ [数据来源: API异常-{source_name.upper()}] {source_name.upper()} API调用失败: {e}")
+                formatted_data = None
+                continue
+
+            if self._is_valid_data(source_name, formatted_data):
+                data_source = source_name
+                break
+            formatted_data = None
+
+        if not formatted_data:
+            # 备用方案较少触发，整体放到线程中执行
+            formatted_data, data_source = await asyncio.to_thread(self._fetch_fallback, symbol, start_date, end_date)
+
+        return await asyncio.to_thread(
+            self._finish_stock_data, symbol, start_date, end_date, formatted_data, data_source
+        )
+
+    def _load_cached_stock_data(self, symbol: str, start_date: str, end_date: str) -> Optional[str]:
+        """按照数据源优先级顺序查找缓存"""
+        from ...data_source_manager import get_us_data_source_manager, USDataSource
+        us_manager = get_us_data_source_manager()
+
+        # 获取数据源优先级顺序
+        priority_order = us_manager._get_data_source_priority_order(symbol)
+
+        # 数据源名称映射
+        source_name_mapping = {
+            USDataSource.ALPHA_VANTAGE: "alpha_vantage",
+            USDataSource.YFINANCE: "yfinance",
+            USDataSource.FINNHUB: "finnhub",
+        }
+
+        # 按优先级顺序查找缓存
+        for source in priority_order:
+            if source == USDataSource.MONGODB:
+                continue  # MongoDB 缓存单独处理
+
+            source_name = source_name_mapping.get(source)
+            if source_name:
+                cache_key = self.cache.find_cached_stock_data(
+                    symbol=symbol,
+                    start_date=start_date,
+                    end_date=end_date,
+                    data_source=source_name
+                )
+
+                if cache_key:
+                    cached_data = self.cache.load_stock_data(cache_key)
+                    if cached_data:
+                        logger.info(f"⚡ [数据来源: 缓存-{source_name}] 从缓存加载美股数据: {symbol}")
+                        return cached_data
+
+        return None
+
+    def _get_source_priority(self, symbol: str) -> list:
+        """数据源优先级（从数据库配置读取，未配置时使用默认顺序）"""
         # 🔥 从数据源管理器获取优先级顺序
+        source_priority = None
         if self.us_manager:
             try:
                 source_priority = self.us_manager._get_data_source_priority_order(symbol)
@@ -133,8 +207,6 @@ class OptimizedUSDataProvider:
             except Exception as e:
                 logger.warning(f"⚠️ 获取数据源优先级失败: {e}，使用默认顺序")
                 source_priority = None
-        else:
-            source_priority = None
 
         # 如果没有配置优先级，使用默认顺序
         if not source_priority:
@@ -143,95 +215,93 @@ class OptimizedUSDataProvider:
             source_priority = [USDataSource.YFINANCE, USDataSource.ALPHA_VANTAGE, USDataSource.FINNHUB]
             logger.info(f"📊 [美股数据源优先级] 使用默认顺序: {[s.value for s in source_priority]}")
 
-        # 按优先级尝试各个数据源
-        for source in source_priority:
-            try:
-                source_name = source.value
-                logger.info(f"🌐 [数据来源: API调用-{source_name.upper()}] 尝试从 {source_name.upper()} 获取数据: {symbol}")
-                self._wait_for_rate_limit()
-
-                # 根据数据源类型调用不同的方法
-                if source_name == 'finnhub':
-                    formatted_data = self._get_data_from_finnhub(symbol, start_date, end_date)
-                elif source_name == 'alpha_vantage':
-                    formatted_data = self._get_data_from_alpha_vantage(symbol, start_date, end_date)
-                elif source_name == 'yfinance':
-                    formatted_data = self._get_data_from_yfinance(symbol, start_date, end_date)
-                else:
-                    logger.warning(f"⚠️ 未知的数据源类型: {source_name}")
-                    continue
+        return source_priority
+
+    def _fetch_from_source(self, source_name: str, symbol: str, start_date: str, end_date: str) -> Optional[str]:
+        """根据数据源类型调用不同的方法（不含限流）"""
+        if source_name == 'finnhub':
+            return self._get_data_from_finnhub(symbol, start_date, end_date)
+        if source_name == 'alpha_vantage':
+            return self._get_data_from_alpha_vantage(symbol, start_date, end_date)
+        if source_name == 'yfinance':
+            return self._get_data_from_yfinance(symbol, start_date, end_date)
+        logger.warning(f"⚠️ 未知的数据源类型: {source_name}")
+        return None
 
-                if formatted_data and "❌" not in formatted_data:
-                    data_source = source_name
-                    logger.info(f"✅ [数据来源: API调用成功-{source_name.upper()}] {source_name.upper()} 数据获取成功: {symbol}")
-                    break  # 成功获取数据，跳出循环
-                else:
-                    logger.warning(f"⚠️ [数据来源: API失败-{source_name.upper()}] {source_name.upper()} 数据获取失败，尝试下一个数据源")
-                    formatted_data = None
+    @staticmethod
+    def _is_valid_data(source_name: str, formatted_data: Optional[str]) -> bool:
+        if formatted_data and "❌" not in formatted_data:
+            logger.info(f"✅ [数据来源: API调用成功-{source_name.upper()}] {source_name.upper()} 数据获取成功")
+            return True
+        logger.warning(f"⚠️ [数据来源: API失败-{source_name.upper()}] {source_name.upper()} 数据获取失败，尝试下一个数据源")
+        return False
 
-            except Exception as e:
-                logger.error(f"❌ [数据来源: API异常-{source.value.upper()}] {source.value.upper()} API调用失败: {e}")
-                formatted_data = None
-                continue  # 尝试下一个数据源
+    def _fetch_fallback(self, symbol: str, start_date: str, end_date: str):
+        """所有配置的数据源都失败时的备用方案，返回 (数据, 数据源)"""
+        formatted_data = None
+        data_source = None
 
-        # 如果所有配置的数据源都失败，尝试备用方案
-        if not formatted_data:
-            try:
-                # 检测股票类型
-                from backend.utils.stock_utils import StockUtils
-                market_info = StockUtils.get_market_info(symbol)
-
-                if market_info['is_hk']:
-                    # 港股优先使用AKShare数据源
-                    logger.info(f"🇭🇰 [数据来源: API调用-AKShare] 尝试使用AKShare获取港股数据: {symbol}")
-                    try:
-                        from backend.dataflows.interface import get_hk_stock_data_unified
-                        hk_data_text = get_hk_stock_data_unified(symbol, start_date, end_date)
-
-                        if hk_data_text and "❌" not in hk_data_text:
-                            formatted_data = hk_data_text
-                            data_source = "akshare_hk"
-                            logger.info(f"✅ [数据来源: API调用成功-AKShare] AKShare港股数据获取成功: {symbol}")
-                        else:
-                            raise Exception("AKShare港股数据获取失败")
-
-                    except Exception as e:
-                        logger.error(f"⚠️ [数据来源: API失败-AKShare] AKShare港股数据获取失败: {e}")
-                        # 备用方案：Yahoo Finance
-                        logger.info(f"🔄 [数据来源: API调用-Yahoo Finance备用] 使用Yahoo Finance备用方案获取港股数据: {symbol}")
-
-                        self._wait_for_rate_limit()
+        try:
+            # 检测股票类型
+            from backend.utils.stock_utils import StockUtils
+            market_info = StockUtils.get_market_info(symbol)
+
+            if market_info['is_hk']:
+                # 港股优先使用AKShare数据源
+                logger.info(f"🇭🇰 [数据来源: API调用-AKShare] 尝试使用AKShare获取港股数据: {symbol}")
+                try:
+                    from backend.dataflows.interface import get_hk_stock_data_unified
+                    hk_data_text = get_hk_stock_data_unified(symbol, start_date, end_date)
+
+                    if hk_data_text and "❌" not in hk_data_text:
+                        formatted_data = hk_data_text
+                        data_source = "akshare_hk"
+                        logger.info(f"✅ [数据来源: API调用成功-AKShare] AKShare港股数据获取成功: {symbol}")
+                    else:
+                        raise Exception("AKShare港股数据获取失败")
+
+                except Exception as e:
+                    logger.error(f"⚠️ [数据来源: API失败-AKShare] AKShare港股数据获取失败: {e}")
+                    # 备用方案：Yahoo Finance
+                    logger.info(f"🔄 [数据来源: API调用-Yahoo Finance备用] 使用Yahoo Finance备用方案获取港股数据: {symbol}")
+
+                    with self._get_limiter("yfinance").throttle():
                         ticker = yf.Ticker(symbol)  # 港股代码保持原格式
                         data = ticker.history(start=start_date, end=end_date)
 
-                        if not data.empty:
-                            formatted_data = self._format_stock_data(symbol, data, start_date, end_date)
-                            data_source = "yfinance_hk"
-                            logger.info(f"✅ [数据来源: API调用成功-Yahoo Finance] Yahoo Finance港股数据获取成功: {symbol}")
-                        else:
-                            logger.error(f"❌ [数据来源: API失败-Yahoo Finance] Yahoo Finance港股数据为空: {symbol}")
-                else:
-                    # 美股使用Yahoo Finance
-                    logger.info(f"🇺🇸 [数据来源: API调用-Yahoo Finance] 从Yahoo Finance API获取美股数据: {symbol}")
-                    self._wait_for_rate_limit()
+                    if not data.empty:
+                        formatted_data = self._format_stock_data(symbol, data, start_date, end_date)
+                        data_source = "yfinance_hk"
+                        logger.info(f"✅ [数据来源: API调用成功-Yahoo Finance] Yahoo Finance港股数据获取成功: {symbol}")
+                    else:
+                        logger.error(f"❌ [数据来源: API失败-Yahoo Finance] Yahoo Finance港股数据为空: {symbol}")
+            else:
+                # 美股使用Yahoo Finance
+                logger.info(f"🇺🇸 [数据来源: API调用-Yahoo Finance] 从Yahoo Finance API获取美股数据: {symbol}")
 
-                    # 获取数据
+                # 获取数据
+                with self._get_limiter("yfinance").throttle():
                     ticker = yf.Ticker(symbol.upper())
                     data = ticker.history(start=start_date, end=end_date)
 
-                    if data.empty:
-                        error_msg = f"未找到股票 '{symbol}' 在 {start_date} 到 {end_date} 期间的数据"
-                        logger.error(f"❌ [数据来源: API失败-Yahoo Finance] {error_msg}")
-                    else:
-                        # 格式化数据
-                        formatted_data = self._format_stock_data(symbol, data, start_date, end_date)
-                        data_source = "yfinance"
-                        logger.info(f"✅ [数据来源: API调用成功-Yahoo Finance] Yahoo Finance美股数据获取成功: {symbol}")
+                if data.empty:
+                    error_msg = f"未找到股票 '{symbol}' 在 {start_date} 到 {end_date} 期间的数据"
+                    logger.error(f"❌ [数据来源: API失败-Yahoo Finance] {error_msg}")
+                else:
+                    # 格式化数据
+                    formatted_data = self._format_stock_data(symbol, data, start_date, end_date)
+                    data_source = "yfinance"
+                    logger.info(f"✅ [数据来源: API调用成功-Yahoo Finance] Yahoo Finance美股数据获取成功: {symbol}")
 
-            except Exception as e:
-                logger.error(f"❌ [数据来源: API异常] 数据获取失败: {e}")
-                formatted_data = None
+        except Exception as e:
+            logger.error(f"❌ [数据来源: API异常] 数据获取失败: {e}")
+            formatted_data = None
+
+        return formatted_data, data_source
 
+    def _finish_stock_data(self, symbol: str, start_date: str, end_date: str,
+                           formatted_data: Optional[str], data_source: Optional[str]) -> str:
+        """保存到缓存；所有数据源都失败时生成备用数据"""
         # 如果所有API都失败，生成备用数据
         if not formatted_data:
             error_msg = "所有美股数据源都不可用"
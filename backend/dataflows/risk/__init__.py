@@ -26,9 +26,15 @@ from .realtime_monitor import (
 from .risk_analyzer import (
     get_risk_analyzer,
     analyze_stock_risk,
+    analyze_portfolio_risk,
     get_risk_level
 )
 
+from .portfolio_risk import (
+    PortfolioRiskEngine,
+    get_portfolio_risk_engine
+)
+
 __all__ = [
     # 停复牌监控
     'get_suspend_monitor',
@@ -50,5 +56,10 @@ __all__ = [
     # 综合风险分析
     'get_risk_analyzer',
     'analyze_stock_risk',
-    'get_risk_level'
+    'analyze_portfolio_risk',
+    'get_risk_level',
+
+    # 组合风险
+    'PortfolioRiskEngine',
+    'get_portfolio_risk_engine'
 ]
@@ -0,0 +1,358 @@
+"""
+组合风险引擎
+把自选股/持仓的日收益一次性装配成对齐的收益矩阵（交易日 × 股票），
+在矩阵上按列向量化计算各股票的波动率、VaR、CVaR、最大回撤，
+并给出组合层面的协方差、成分 VaR（各股票对组合 VaR 的贡献）与相关性聚类。
+
+历史行情按交易时段缓存，多只股票并发获取；计算全部为 numpy 矩阵运算，
+500 只股票的风险计算在毫秒级完成。
+
+用法：
+    engine = get_portfolio_risk_engine()
+    report = engine.analyze(["600519.SH", "000001.SZ"], weights={"600519.SH": 0.6, "000001.SZ": 0.4})
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.logging_config import get_logger
+from backend.utils.ttl_cache import get_ttl_cache
+
+logger = get_logger("dataflows.portfolio_risk")
+
+TRADING_DAYS = 252
+# 95% 单尾正态分位数
+Z_95 = 1.6448536269514722
+
+# 股票有效收益样本少于该数量时不参与计算
+MIN_OBSERVATIONS = 20
+
+# 相关系数高于该阈值的股票归为同一聚类
+CLUSTER_THRESHOLD = 0.7
+
+HistoryLoader = Callable[[str, str, str], pd.DataFrame]
+
+
+def _default_history_loader(ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+    from backend.services.market_data_service import get_market_data_service
+    return get_market_data_service().get_historical_data(ts_code, start_date, end_date)
+
+
+def _risk_level(volatility: float, var_95: float, max_drawdown: float) -> str:
+    """按年化波动率、日 VaR 与最大回撤划分风险等级"""
+    if volatility >= 0.6 or var_95 >= 0.06 or max_drawdown >= 0.5:
+        return 'high'
+    if volatility >= 0.35 or var_95 >= 0.035 or max_drawdown >= 0.3:
+        return 'medium'
+    return 'low'
+
+
+class PortfolioRiskEngine:
+    """组合风险引擎（收益矩阵 + 向量化指标）"""
+
+    def __init__(self, history_loader: Optional[HistoryLoader] = None, max_workers: int = 16):
+        """
+        Args:
+            history_loader: 获取单只股票历史行情的函数 (ts_code, start, end) -> DataFrame（需含 close 列，日期索引）
+            max_workers: 并发获取历史行情的线程数
+        """
+        self.history_loader = history_loader or _default_history_loader
+        self.max_workers = max_workers
+        self._history_cache = get_ttl_cache("risk_history", ttl=3600, negative_ttl=60, max_entries=4096)
+
+    # ==================== 收益矩阵 ====================
+
+    def _history_ttl(self) -> float:
+        """历史收盘价在下一个交易时段边界前不变"""
+        try:
+            from backend.dataflows.market_tables import get_market_tables
+            return get_market_tables().calendar.session_ttl(max_age=3600)
+        except Exception:
+            return 3600
+
+    def _load_closes(self, ts_code: str, start_date: str, end_date: str, ttl: float) -> Optional[pd.Series]:
+        def load() -> Optional[pd.Series]:
+            df = self.history_loader(ts_code, start_date, end_date)
+            if df is None or df.empty or 'close' not in df.columns:
+                return None
+            closes = pd.to_numeric(df['close'], errors='coerce').dropna()
+            closes.index = pd.to_datetime(closes.index)
+            return closes[~closes.index.duplicated(keep='last')].sort_index()
+
+        try:
+            return self._history_cache.get_or_load(
+                (ts_code, start_date, end_date), load,
+                ttl=ttl, cache_if=lambda s: s is not None
+            )
+        except Exception as e:
+            logger.warning(f"获取{ts_code}历史行情失败: {e}")
+            return None
+
+    def load_return_matrix(self, ts_codes: List[str], lookback_days: int = TRADING_DAYS,
+                           end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        并发获取所有股票的收盘价，对齐为一个日收益矩阵
+
+        Args:
+            ts_codes: 股票代码列表
+            lookback_days: 回看交易日数
+            end_date: 截止日期 YYYYMMDD（默认今天）
+
+        Returns:
+            DataFrame: 行为交易日，列为股票代码；某股票当日无数据（停牌、未上市）为 NaN，
+            复牌首日收益相对停牌前最后收盘价计算
+        """
+        end = datetime.strptime(end_date, '%Y%m%d') if end_date else datetime.now()
+        start = end - timedelta(days=int(lookback_days * 1.5) + 10)
+        start_str, end_str = start.strftime('%Y%m%d'), end.strftime('%Y%m%d')
+
+        codes = list(dict.fromkeys(ts_codes))
+        ttl = self._history_ttl()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(codes), 1))) as pool:
+            series = list(pool.map(lambda code: self._load_closes(code, start_str, end_str, ttl), codes))
+
+        closes = {code: s for code, s in zip(codes, series) if s is not None and len(s) > 1}
+        if not closes:
+            return pd.DataFrame()
+
+        # 在所有交易日的并集上一次性填充矩阵（避免逐列索引对齐）
+        dates = np.unique(np.concatenate([s.index.values for s in closes.values()]))
+        matrix = np.full((len(dates), len(closes)), np.nan)
+        for col, s in enumerate(closes.values()):
+            values = s.to_numpy(dtype=float)
+            rows = np.searchsorted(dates, s.index.values[1:])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                matrix[rows, col] = values[1:] / values[:-1] - 1.0
+
+        returns = pd.DataFrame(matrix[1:], index=pd.DatetimeIndex(dates[1:]), columns=list(closes))
+        return returns.iloc[-lookback_days:]
+
+    # ==================== 单只股票指标 ====================
+
+    @staticmethod
+    def asset_metrics(returns: pd.DataFrame) -> pd.DataFrame:
+        """
+        按列向量化计算各股票风险指标
+
+        Returns:
+            DataFrame（索引为股票代码）：observations, volatility, annual_return, var_95, cvar_95,
+            max_drawdown, sharpe, risk_level；VaR/CVaR/回撤以正数表示损失
+        """
+        r = returns.to_numpy(dtype=float)
+        valid = ~np.isnan(r)
+        obs = valid.sum(axis=0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            daily_std = np.nanstd(r, axis=0, ddof=1)
+            daily_mean = np.nanmean(r, axis=0)
+            var_95 = -np.nanquantile(r, 0.05, axis=0)
+
+            # CVaR：不高于 5% 分位数的收益均值
+            tail = valid & (r <= -var_95)
+            cvar_95 = -np.where(tail, r, 0.0).sum(axis=0) / tail.sum(axis=0)
+
+            # 最大回撤：缺失日按不变处理
+            wealth = np.cumprod(1.0 + np.where(valid, r, 0.0), axis=0)
+            peak = np.maximum.accumulate(wealth, axis=0)
+            max_drawdown = -(wealth / peak - 1.0).min(axis=0)
+
+            volatility = daily_std * np.sqrt(TRADING_DAYS)
+            annual_return = daily_mean * TRADING_DAYS
+            sharpe = annual_return / volatility
+
+        metrics = pd.DataFrame({
+            'observations': obs,
+            'volatility': volatility,
+            'annual_return': annual_return,
+            'var_95': var_95,
+            'cvar_95': cvar_95,
+            'max_drawdown': max_drawdown,
+            'sharpe': sharpe
+        }, index=returns.columns)
+        metrics['risk_level'] = [
+            _risk_level(v, q, d) if n >= MIN_OBSERVATIONS else 'unknown'
+            for v, q, d, n in zip(volatility, var_95, max_drawdown, obs)
+        ]
+        return metrics
+
+    # ==================== 组合指标 ====================
+
+    @staticmethod
+    def _weights(codes: List[str], weights: Optional[Dict[str, float]]) -> np.ndarray:
+        if not weights:
+            return np.full(len(codes), 1.0 / len(codes))
+        w = np.array([float(weights.get(code, 0.0)) for code in codes])
+        total = w.sum()
+        return w / total if total > 0 else np.full(len(codes), 1.0 / len(codes))
+
+    @staticmethod
+    def correlation_clusters(corr: np.ndarray, codes: List[str], weights: np.ndarray,
+                             threshold: float = CLUSTER_THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        相关性聚类：相关系数 >= threshold 的股票相连，取连通分量（单链接聚类）
+
+        Returns:
+            多于一只股票的聚类，按合计权重降序
+        """
+        n = len(codes)
+        adjacency = corr >= threshold
+        np.fill_diagonal(adjacency, True)
+
+        # 标签传播求连通分量：每轮取相邻节点的最小标签，直到不再变化
+        labels = np.arange(n)
+        while True:
+            new_labels = np.where(adjacency, labels[None, :], n).min(axis=1)
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+
+        clusters = []
+        for label in np.unique(labels):
+            members = np.flatnonzero(labels == label)
+            if len(members) < 2:
+                continue
+            block = corr[np.ix_(members, members)]
+            avg_corr = (block.sum() - len(members)) / (len(members) * (len(members) - 1))
+            clusters.append({
+                'members': [codes[i] for i in members],
+                'size': len(members),
+                'avg_correlation': round(float(avg_corr), 4),
+                'weight': round(float(weights[members].sum()), 4)
+            })
+        clusters.sort(key=lambda c: c['weight'], reverse=True)
+        return clusters
+
+    def portfolio_metrics(self, returns: pd.DataFrame, weights: Optional[Dict[str, float]] = None,
+                          cluster_threshold: float = CLUSTER_THRESHOLD) -> Dict[str, Any]:
+        """
+        组合层面风险：协方差、参数法/历史法 VaR、成分 VaR 与相关性聚类
+
+        缺失收益（停牌）按 0 处理后计算协方差
+        """
+        codes = list(returns.columns)
+        r = np.nan_to_num(returns.to_numpy(dtype=float), nan=0.0)
+        w = self._weights(codes, weights)
+
+        cov = np.cov(r, rowvar=False, ddof=1).reshape(len(codes), len(codes))
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.outer(std, std)
+        corr = np.nan_to_num(corr, nan=0.0)
+
+        marginal = cov @ w
+        portfolio_var = float(w @ marginal)
+        portfolio_std = np.sqrt(max(portfolio_var, 0.0))
+
+        # 成分 VaR：w_i * (Σw)_i / σ_p * z，各成分之和等于组合 VaR
+        parametric_var = Z_95 * portfolio_std
+        if portfolio_std > 0:
+            component_var = w * marginal / portfolio_std * Z_95
+        else:
+            component_var = np.zeros(len(codes))
+
+        portfolio_returns = r @ w
+        historical_var = float(-np.quantile(portfolio_returns, 0.05)) if len(portfolio_returns) else 0.0
+        wealth = np.cumprod(1.0 + portfolio_returns)
+        max_drawdown = float(-(wealth / np.maximum.accumulate(wealth) - 1.0).min()) if len(wealth) else 0.0
+
+        # 分散化比率：加权个股波动率之和 / 组合波动率
+        diversification = float(w @ std / portfolio_std) if portfolio_std > 0 else 1.0
+
+        contributions = pd.DataFrame({
+            'weight': w,
+            'component_var': component_var,
+            'contribution_pct': component_var / parametric_var * 100 if parametric_var > 0 else 0.0
+        }, index=codes).sort_values('component_var', ascending=False)
+
+        upper = corr[np.triu_indices(len(codes), k=1)]
+        return {
+            'volatility': float(portfolio_std * np.sqrt(TRADING_DAYS)),
+            'var_95': float(parametric_var),
+            'historical_var_95': historical_var,
+            'max_drawdown': max_drawdown,
+            'diversification_ratio': diversification,
+            'avg_correlation': float(upper.mean()) if len(upper) else 0.0,
+            'component_var': contributions,
+            'clusters': self.correlation_clusters(corr, codes, w, cluster_threshold),
+            'covariance': cov,
+            'correlation': corr
+        }
+
+    # ==================== 综合报告 ====================
+
+    def analyze(self, ts_codes: List[str], weights: Optional[Dict[str, float]] = None,
+                lookback_days: int = TRADING_DAYS, end_date: Optional[str] = None,
+                top_contributors: int = 20) -> Dict[str, Any]:
+        """
+        批量风险分析（收益矩阵装配 + 个股指标 + 组合指标）
+
+        Returns:
+            {
+                'assets': {ts_code: {...}},
+                'portfolio': {...},
+                'missing': [...],        # 无历史数据或样本不足的股票
+                'timing': {...}
+            }
+        """
+        started = time.perf_counter()
+        returns = self.load_return_matrix(ts_codes, lookback_days, end_date)
+        loaded = time.perf_counter()
+
+        if returns.empty:
+            return {'assets': {}, 'portfolio': {}, 'missing': list(ts_codes),
+                    'timing': {'load_seconds': round(loaded - started, 3), 'compute_seconds': 0.0}}
+
+        metrics = self.asset_metrics(returns)
+        usable = metrics.index[metrics['observations'] >= MIN_OBSERVATIONS]
+        missing = [code for code in dict.fromkeys(ts_codes) if code not in usable]
+
+        portfolio = {}
+        if len(usable):
+            portfolio = self.portfolio_metrics(returns[usable], weights)
+            contributions = portfolio.pop('component_var')
+            portfolio.pop('covariance')
+            portfolio.pop('correlation')
+            portfolio['top_contributors'] = [
+                {'ts_code': code, **{k: round(float(v), 6) for k, v in row.items()}}
+                for code, row in contributions.head(top_contributors).iterrows()
+            ]
+            metrics.loc[usable, 'component_var'] = contributions['component_var']
+            metrics.loc[usable, 'contribution_pct'] = contributions['contribution_pct']
+            portfolio = {k: round(v, 6) if isinstance(v, float) else v for k, v in portfolio.items()}
+            portfolio['size'] = len(usable)
+        finished = time.perf_counter()
+
+        assets = metrics.replace([np.inf, -np.inf], np.nan).round(6)
+        assets = assets.astype(object).where(assets.notna(), None)
+        result = {
+            'assets': assets.to_dict(orient='index'),
+            'portfolio': portfolio,
+            'missing': missing,
+            'timing': {
+                'load_seconds': round(loaded - started, 3),
+                'compute_seconds': round(finished - loaded, 3)
+            }
+        }
+        logger.info(f"✅ 组合风险分析完成: {len(usable)}/{len(ts_codes)}只股票 "
+                    f"(装配{result['timing']['load_seconds']}s, 计算{result['timing']['compute_seconds']}s)")
+        return result
+
+
+_engine: Optional[PortfolioRiskEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_portfolio_risk_engine() -> PortfolioRiskEngine:
+    """获取组合风险引擎单例"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = PortfolioRiskEngine()
+    return _engine
@@ -3,13 +3,15 @@
 整合停复牌风险、ST风险、舆情风险等多维度风险评估
 """
 
-from typing import Dict, Optional
+import asyncio
+from typing import Dict, List, Optional
 from datetime import datetime
 
 from backend.utils.logging_config import get_logger
 from .suspend_monitor import get_suspend_monitor
 from .st_monitor import get_st_monitor
 from .realtime_monitor import get_realtime_monitor
+from .portfolio_risk import get_portfolio_risk_engine
 
 logger = get_logger("dataflows.risk_analysis")
 
@@ -285,6 +287,34 @@ class RiskAnalyzer:
         
         return results
 
+    def batch_analyze_portfolio_risk(
+        self,
+        ts_codes: List[str],
+        weights: Optional[Dict[str, float]] = None,
+        lookback_days: int = 252
+    ) -> Dict:
+        """
+        批量行情风险分析（组合风险引擎）
+
+        一次装配所有股票的收益矩阵，向量化计算波动率、VaR、CVaR、最大回撤，
+        并给出组合协方差、成分 VaR 与相关性聚类
+
+        Args:
+            ts_codes: 股票代码列表
+            weights: 持仓权重 {ts_code: weight}，默认等权
+            lookback_days: 回看交易日数
+        """
+        return get_portfolio_risk_engine().analyze(ts_codes, weights=weights, lookback_days=lookback_days)
+
+    async def abatch_analyze_portfolio_risk(
+        self,
+        ts_codes: List[str],
+        weights: Optional[Dict[str, float]] = None,
+        lookback_days: int = 252
+    ) -> Dict:
+        """批量行情风险分析（异步版本，装配与计算在线程中执行，不阻塞事件循环）"""
+        return await asyncio.to_thread(self.batch_analyze_portfolio_risk, ts_codes, weights, lookback_days)
+
 
 # 全局分析器实例
 _risk_analyzer = None
@@ -306,6 +336,13 @@ def analyze_stock_risk(ts_code: str, sentiment_score: Optional[float] = None) ->
     return analyzer.analyze_stock_risk(ts_code, sentiment_score=sentiment_score)
 
 
+def analyze_portfolio_risk(ts_codes: List[str], weights: Optional[Dict[str, float]] = None,
+                           lookback_days: int = 252) -> Dict:
+    """批量分析股票组合的行情风险"""
+    analyzer = get_risk_analyzer()
+    return analyzer.batch_analyze_portfolio_risk(ts_codes, weights=weights, lookback_days=lookback_days)
+
+
 def get_risk_level(ts_code: str) -> str:
     """获取股票风险等级"""
     analyzer = get_risk_analyzer()
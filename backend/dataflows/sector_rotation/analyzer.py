@@ -8,11 +8,18 @@ from datetime import datetime
 import json
 
 from backend.utils.logging_config import get_logger
+from backend.utils.ttl_cache import ttl_cached
 from .data_fetcher import sector_rotation_fetcher
 
 logger = get_logger("dataflows.sector_rotation.analyzer")
 
 
+def _analysis_cached(key):
+    """分析结果缓存（1分钟），多个页面同时请求时只计算一次"""
+    return ttl_cached("sector_rotation_analysis", key=key, cache_if=lambda r: r.get("success"),
+                      ttl=60, stale_ttl=60, max_entries=128)
+
+
 class SectorRotationAnalyzer:
     """板块轮动分析器"""
 
@@ -111,6 +118,7 @@ class SectorRotationAnalyzer:
             logger.error(f"[板块轮动分析] 资金流向分析失败: {e}")
             return {"success": False, "message": str(e)}
 
+    @_analysis_cached(lambda self, top_n=20: f"sector_heat_{top_n}")
     def analyze_sector_heat(self, top_n: int = 20) -> Dict[str, Any]:
         """
         分析板块热度
@@ -226,6 +234,7 @@ class SectorRotationAnalyzer:
             logger.error(f"[板块轮动分析] 热度分析失败: {e}")
             return {"success": False, "message": str(e)}
 
+    @_analysis_cached(lambda self: "rotation_signal")
     def analyze_rotation_signal(self) -> Dict[str, Any]:
         """
         分析板块轮动信号
@@ -381,6 +390,7 @@ class SectorRotationAnalyzer:
             logger.error(f"[板块轮动分析] 获取板块详情失败: {e}")
             return {"success": False, "message": str(e)}
 
+    @_analysis_cached(lambda self: "comprehensive_analysis")
     def get_comprehensive_analysis(self) -> Dict[str, Any]:
         """
         获取综合分析报告
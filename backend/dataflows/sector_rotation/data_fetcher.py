@@ -10,9 +10,23 @@ from typing import Dict, Any, List, Optional
 import time
 
 from backend.utils.logging_config import get_logger
+from backend.utils.ttl_cache import get_ttl_cache, ttl_cached
 
 logger = get_logger("dataflows.sector_rotation")
 
+# 5分钟缓存，过期后5分钟内先返回旧数据并后台刷新；失败结果只缓存15秒
+get_ttl_cache("sector_rotation", ttl=300, stale_ttl=300, negative_ttl=15, max_entries=512)
+
+
+def _cacheable(result: Dict[str, Any]) -> bool:
+    """成功且不是降级空数据（降级结果带 message）的结果才缓存"""
+    return bool(result.get("success")) and "message" not in result
+
+
+def _sector_cached(key):
+    """板块数据缓存装饰器，同一数据的并发请求只访问一次上游"""
+    return ttl_cached("sector_rotation", key=key, cache_if=_cacheable)
+
 
 class SectorRotationDataFetcher:
     """板块轮动数据获取器"""
@@ -21,9 +35,6 @@ class SectorRotationDataFetcher:
         self.max_retries = 3
         self.retry_delay = 2
         self.request_delay = 0.5
-        self._cache = {}
-        self._cache_time = {}
-        self._cache_ttl = 300  # 5分钟缓存
         self._tdx_provider = None  # 延迟初始化TDX Provider
         logger.info("[板块轮动] 数据获取器初始化完成")
 
@@ -95,19 +106,7 @@ class SectorRotationDataFetcher:
                     logger.error(f"请求失败，已达最大重试次数: {e}")
                     raise e
 
-    def _get_cached(self, key: str) -> Optional[Any]:
-        """获取缓存数据"""
-        if key in self._cache:
-            cache_time = self._cache_time.get(key, 0)
-            if time.time() - cache_time < self._cache_ttl:
-                return self._cache[key]
-        return None
-
-    def _set_cache(self, key: str, value: Any):
-        """设置缓存"""
-        self._cache[key] = value
-        self._cache_time[key] = time.time()
-
+    @_sector_cached(lambda self: "industry_sectors")
     def get_industry_sectors(self) -> Dict[str, Any]:
         """
         获取行业板块实时行情
@@ -115,11 +114,6 @@ class SectorRotationDataFetcher:
         Returns:
             包含行业板块数据的字典
         """
-        cache_key = "industry_sectors"
-        cached = self._get_cached(cache_key)
-        if cached:
-            return cached
-
         try:
             logger.info("[板块轮动] 获取行业板块行情...")
             df = self._safe_request(ak.stock_board_industry_name_em)
@@ -153,7 +147,6 @@ class SectorRotationDataFetcher:
                 "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
 
-            self._set_cache(cache_key, result)
             logger.info(f"[板块轮动] 获取到 {len(sectors)} 个行业板块")
             return result
 
@@ -161,6 +154,7 @@ class SectorRotationDataFetcher:
             logger.error(f"[板块轮动] 获取行业板块失败: {e}")
             return {"success": False, "data": [], "message": str(e)}
 
+    @_sector_cached(lambda self: "concept_sectors")
     def get_concept_sectors(self) -> Dict[str, Any]:
         """
         获取概念板块实时行情
@@ -168,11 +162,6 @@ class SectorRotationDataFetcher:
         Returns:
             包含概念板块数据的字典
         """
-        cache_key = "concept_sectors"
-        cached = self._get_cached(cache_key)
-        if cached:
-            return cached
-
         try:
             logger.info("[板块轮动] 获取概念板块行情...")
             df = self._safe_request(ak.stock_board_concept_name_em)
@@ -206,7 +195,6 @@ class SectorRotationDataFetcher:
                 "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
 
-            self._set_cache(cache_key, result)
             logger.info(f"[板块轮动] 获取到 {len(concepts)} 个概念板块")
             return result
 
@@ -214,6 +202,7 @@ class SectorRotationDataFetcher:
             logger.error(f"[板块轮动] 获取概念板块失败: {e}")
             return {"success": False, "data": [], "message": str(e)}
 
+    @_sector_cached(lambda self, indicator="今日": f"sector_fund_flow_{indicator}")
     def get_sector_fund_flow(self, indicator: str = "今日") -> Dict[str, Any]:
         """
         获取行业资金流向
@@ -224,11 +213,6 @@ class SectorRotationDataFetcher:
         Returns:
             包含资金流向数据的字典
         """
-        cache_key = f"sector_fund_flow_{indicator}"
-        cached = self._get_cached(cache_key)
-        if cached:
-            return cached
-
         try:
             logger.info(f"[板块轮动] 获取行业资金流向 ({indicator})...")
             df = self._safe_request(ak.stock_sector_fund_flow_rank, indicator=indicator)
@@ -259,7 +243,6 @@ class SectorRotationDataFetcher:
                 "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
 
-            self._set_cache(cache_key, result)
             logger.info(f"[板块轮动] 获取到 {len(fund_flow)} 条资金流向数据")
             return result
 
@@ -267,6 +250,7 @@ class SectorRotationDataFetcher:
             logger.error(f"[板块轮动] 获取资金流向失败: {e}")
             return {"success": False, "data": [], "message": str(e)}
 
+    @_sector_cached(lambda self, sector_name, sector_type="industry": f"sector_stocks_{sector_type}_{sector_name}")
     def get_sector_stocks(self, sector_name: str, sector_type: str = "industry") -> Dict[str, Any]:
         """
         获取板块成分股
@@ -325,6 +309,8 @@ class SectorRotationDataFetcher:
             logger.error(f"[板块轮动] 获取成分股失败: {e}")
             return {"success": False, "data": [], "message": str(e)}
 
+    @_sector_cached(lambda self, sector_name, sector_type="industry", period="日k", adjust="qfq":
+                    f"sector_history_{sector_type}_{sector_name}_{period}_{adjust}")
     def get_sector_history(self, sector_name: str, sector_type: str = "industry",
                           period: str = "日k", adjust: str = "qfq") -> Dict[str, Any]:
         """
@@ -391,6 +377,7 @@ class SectorRotationDataFetcher:
             logger.error(f"[板块轮动] 获取历史行情失败: {e}")
             return {"success": False, "data": [], "message": str(e)}
 
+    @_sector_cached(lambda self: "market_overview")
     def get_market_overview(self) -> Dict[str, Any]:
         """
         获取市场总体情况
@@ -398,11 +385,6 @@ class SectorRotationDataFetcher:
         Returns:
             包含市场概况的字典
         """
-        cache_key = "market_overview"
-        cached = self._get_cached(cache_key)
-        if cached:
-            return cached
-
         try:
             logger.info("[板块轮动] 获取市场概况...")
             overview = {}
@@ -612,7 +594,6 @@ class SectorRotationDataFetcher:
                 "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
 
-            self._set_cache(cache_key, result)
             logger.info(f"[板块轮动] 市场概况获取完成，获取到 {len(overview.get('indices', []))} 个指数")
             return result
 
@@ -634,6 +615,7 @@ class SectorRotationDataFetcher:
                 "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
 
+    @_sector_cached(lambda self: "north_money_flow")
     def get_north_money_flow(self) -> Dict[str, Any]:
         """
         获取北向资金流向
@@ -641,11 +623,6 @@ class SectorRotationDataFetcher:
         Returns:
             包含北向资金数据的字典
         """
-        cache_key = "north_money_flow"
-        cached = self._get_cached(cache_key)
-        if cached:
-            return cached
-
         try:
             logger.info("[板块轮动] 获取北向资金流向...")
             df = self._safe_request(ak.stock_hsgt_fund_flow_summary_em)
@@ -679,7 +656,6 @@ class SectorRotationDataFetcher:
                 "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
 
-            self._set_cache(cache_key, result)
             logger.info("[板块轮动] 北向资金数据获取完成")
             return result
 
@@ -8,9 +8,9 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
-import time
 
 from backend.utils.logging_config import get_logger
+from backend.utils.ttl_cache import ttl_cached
 
 logger = get_logger("dataflows.sentiment")
 
@@ -20,24 +20,11 @@ class MarketSentimentFetcher:
 
     def __init__(self):
         self.arbr_period = 26  # ARBR计算周期
-        self._cache = {}
-        self._cache_time = {}
-        self._cache_ttl = 300  # 5分钟缓存
         logger.info("[市场情绪] 数据获取器初始化完成")
 
-    def _get_cached(self, key: str) -> Optional[Any]:
-        """获取缓存数据"""
-        if key in self._cache:
-            cache_time = self._cache_time.get(key, 0)
-            if time.time() - cache_time < self._cache_ttl:
-                return self._cache[key]
-        return None
-
-    def _set_cache(self, key: str, value: Any):
-        """设置缓存"""
-        self._cache[key] = value
-        self._cache_time[key] = time.time()
-
+    # 5分钟缓存，过期后5分钟内先返回旧数据并后台刷新；失败结果只缓存15秒
+    @ttl_cached("market_sentiment", key=lambda self: "market_sentiment",
+                cache_if=lambda r: r.get("success"), ttl=300, stale_ttl=300)
     def get_market_sentiment(self) -> Dict[str, Any]:
         """
         获取市场整体情绪数据
@@ -45,11 +32,6 @@ class MarketSentimentFetcher:
         Returns:
             包含市场情绪各项指标的字典
         """
-        cache_key = "market_sentiment"
-        cached = self._get_cached(cache_key)
-        if cached:
-            return cached
-
         logger.info("[市场情绪] 开始获取市场情绪数据...")
 
         sentiment_data = {
@@ -94,7 +76,6 @@ class MarketSentimentFetcher:
                 sentiment_data["margin_trading"] = margin_data
 
             sentiment_data["success"] = True
-            self._set_cache(cache_key, sentiment_data)
             logger.info("[市场情绪] 数据获取完成")
 
         except Exception as e:
@@ -577,6 +558,8 @@ class MarketSentimentFetcher:
             logger.error(f"[市场情绪] 获取融资融券数据失败: {e}")
             return {}
 
+    @ttl_cached("stock_sentiment", key=lambda self, stock_code: stock_code,
+                cache_if=lambda r: r.get("success"), ttl=300, max_entries=512)
     def get_stock_sentiment(self, stock_code: str) -> Dict[str, Any]:
         """
         获取个股情绪数据
@@ -15,6 +15,10 @@ from backend.utils.logging_config import get_logger
 
 logger = get_logger("dataflow")
 
+# 港股代码（0700 / 00700 / 00700.HK）与美股代码（AAPL / BRK.B）；A股为 6 位数字
+_HK_SYMBOL = re.compile(r'^\d{4,5}(\.HK)?$', re.IGNORECASE)
+_US_SYMBOL = re.compile(r'^[A-Za-z]{1,5}(\.[A-Za-z])?$')
+
 
 class StockDataAdapter:
     """股票数据适配器 - 统一不同数据源的格式"""
@@ -48,7 +52,7 @@ class StockDataAdapter:
         优先级：TDX Native > AKShare > 新浪财经
 
         Args:
-            symbol: 股票代码（如 '000001'）
+            symbol: 股票代码（如 '000001'；港股 '00700.HK'、美股 'AAPL' 走异步港股/美股提供器）
 
         Returns:
             统一格式的数据字典
@@ -72,6 +76,12 @@ class StockDataAdapter:
 
         logger.info(f"[StockDataAdapter] 开始获取股票 {symbol} 的数据")
 
+        # 港股/美股走各自的异步提供器（限流等待与网络请求不阻塞事件循环），不再逐个尝试A股数据源
+        if _HK_SYMBOL.match(symbol):
+            return await self._get_hk_stock_data_async(symbol, result)
+        if _US_SYMBOL.match(symbol):
+            return await self._get_us_stock_data_async(symbol, result)
+
         # 最高优先级：TDX Native Provider（最快，直接获取单只股票）
         try:
             tdx = self._get_tdx_provider()
@@ -367,6 +377,49 @@ class StockDataAdapter:
         result['raw_text'] = self._format_as_text(result)
         return result
     
+    async def _get_hk_stock_data_async(self, symbol: str, result: Dict) -> Dict:
+        """港股：基本信息来自改进版港股提供器（该提供器没有实时行情，价格字段保持为 0）"""
+        try:
+            from backend.dataflows.providers.hk.improved_hk import get_improved_hk_provider
+            info = await get_improved_hk_provider().aget_stock_info(symbol)
+            result['success'] = True
+            result['name'] = info.get('name') or f'港股{symbol}'
+            result['data_source'] = info.get('source', 'improved_hk_provider')
+            result['raw_text'] = f"📊 {result['name']}({symbol}) - 港股基本信息（暂无实时行情）"
+            logger.info(f"[StockDataAdapter] ✅ 港股信息获取成功: {result['name']}")
+        except Exception as e:
+            logger.warning(f"[StockDataAdapter] 港股信息获取失败: {e}")
+            result['error'] = str(e)
+        return result
+
+    async def _get_us_stock_data_async(self, symbol: str, result: Dict) -> Dict:
+        """美股：取最近 60 天数据报告，从中提取最新价格与期间涨跌"""
+        try:
+            from backend.dataflows.providers.us.optimized import get_optimized_us_data_provider
+            end_date = datetime.now().strftime('%Y-%m-%d')
+            start_date = (datetime.now() - timedelta(days=60)).strftime('%Y-%m-%d')
+            text = await get_optimized_us_data_provider().aget_stock_data(symbol.upper(), start_date, end_date)
+            price_match = re.search(r'最新价格[：:]\s*\$?([\d.]+)', text or '')
+            if not price_match:
+                result['error'] = '美股数据源未返回价格'
+                result['raw_text'] = text or ''
+                return result
+            result['success'] = True
+            result['name'] = symbol.upper()
+            result['price'] = float(price_match.group(1))
+            change_match = re.search(r'期间涨跌[：:]\s*\$?([+-]?[\d.]+)\s*\(([+-]?[\d.]+)%\)', text)
+            if change_match:
+                result['change_amount'] = float(change_match.group(1))
+                result['change'] = float(change_match.group(2))
+            # 所有美股数据源都失败时提供器返回随机的演示数据
+            result['data_source'] = 'mock' if '模拟数据' in text else 'us_optimized'
+            result['raw_text'] = text
+            logger.info(f"[StockDataAdapter] ✅ 美股数据获取成功: {symbol}")
+        except Exception as e:
+            logger.warning(f"[StockDataAdapter] 美股数据获取失败: {e}")
+            result['error'] = str(e)
+        return result
+
     def _format_as_text(self, data: Dict) -> str:
         """将数据格式化为文本格式"""
         text = f"📊 {data['name']}({data['symbol']}) - {data['data_source'].upper()}数据\n"
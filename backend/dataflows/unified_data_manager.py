@@ -24,6 +24,8 @@ from typing import Dict, List, Optional, Any, Callable, Union
 from datetime import datetime, timedelta
 import pandas as pd
 
+from backend.utils.metrics import timed
+
 logger = logging.getLogger(__name__)
 
 
@@ -114,7 +116,10 @@ class UnifiedDataManager:
                 continue
             try:
                 logger.info(f"Trying {name} for {data_type}")
-                result = methods[name](**kwargs)
+                with timed("datasource", source=name, operation=data_type) as timer:
+                    result = methods[name](**kwargs)
+                    if result is None or (isinstance(result, pd.DataFrame) and result.empty):
+                        timer.mark_error()
                 if result is not None:
                     if isinstance(result, pd.DataFrame) and result.empty:
                         continue
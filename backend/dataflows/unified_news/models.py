@@ -84,6 +84,7 @@ class UnifiedNewsItem:
     # 关联信息
     related_stocks: List[str] = field(default_factory=list)  # 相关股票代码
     keywords: List[str] = field(default_factory=list)        # 关键词
+    sources: List[str] = field(default_factory=list)         # 转载了这条新闻的各数据源（近似去重后）
     
     # 分析信息
     sentiment_score: float = 0.0                  # 情绪分数 -1到1
@@ -123,6 +124,7 @@ class UnifiedNewsItem:
             "category": self.category,
             "related_stocks": self.related_stocks,
             "keywords": self.keywords,
+            "sources": self.sources,
             "sentiment_score": self.sentiment_score,
             "sentiment_label": self.sentiment_label,
             "urgency": self.urgency,
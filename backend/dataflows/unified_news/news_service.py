@@ -356,11 +356,40 @@ class UnifiedNewsService:
         Returns:
             统一新闻响应
         """
-        return await self.get_news_list(
-            keyword=keyword,
-            page_size=limit,
-            use_cache=use_cache
-        )
+        try:
+            cache_key = self._get_cache_key("news_search", keyword=keyword, limit=limit)
+            if use_cache:
+                cached = self._cache.get(cache_key)
+                if cached:
+                    return cached
+            
+            # 优先检索本地全文索引，本地无结果时才访问远程数据源
+            news_list = await self._provider_manager.search_news(keyword, limit)
+            news_list = self._sentiment_analyzer.analyze_batch(news_list)
+            
+            response = UnifiedNewsResponse(
+                success=True,
+                message="搜索成功",
+                total_count=len(news_list),
+                page=1,
+                page_size=limit,
+                filters={"keyword": keyword},
+                news_items=news_list,
+                statistics=NewsStatistics.from_news_list(news_list)
+            )
+            if use_cache:
+                self._cache.set(cache_key, response)
+            return response
+            
+        except Exception as e:
+            logger.error(f"搜索新闻失败: {e}")
+            return UnifiedNewsResponse(
+                success=False,
+                message=f"搜索失败: {str(e)}",
+                total_count=0,
+                page=1,
+                page_size=limit
+            )
     
     async def get_sources(self) -> List[NewsSourceInfo]:
         """
@@ -222,6 +222,9 @@ class NewsProviderManager:
                     except Exception as e:
                         logger.error(f"从{source_type}获取新闻失败: {e}")
         
+        # 抓取结果写入本地全文索引
+        self._index_news(all_news)
+        
         # 应用筛选条件
         all_news = self._apply_filters(all_news, filter_params)
         
@@ -309,17 +312,82 @@ class NewsProviderManager:
         
         return filtered
     
+    def _index_news(self, news_list: List[UnifiedNewsItem]):
+        """把抓取到的新闻增量写入本地全文索引"""
+        if not news_list:
+            return
+        try:
+            from backend.services.news_center.news_search_index import get_news_search_index
+            get_news_search_index().add_many([
+                {
+                    'origin': 'unified',
+                    'news_id': n.id,
+                    'title': n.title,
+                    'content': n.content or n.summary,
+                    'source': n.source,
+                    'url': n.original_url,
+                    'stock_codes': n.related_stocks,
+                    'sentiment': n.sentiment_label,
+                    'pub_time': n.publish_time,
+                    'sort_time': n.publish_time or n.fetch_time
+                }
+                for n in news_list
+            ])
+        except Exception as e:
+            logger.warning(f"新闻写入全文索引失败: {e}")
+    
+    def _search_local(
+        self,
+        keyword: str,
+        limit: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[UnifiedNewsItem]:
+        """在本地全文索引中检索（数据库新闻、新闻缓存和已抓取的新闻）"""
+        try:
+            from backend.services.news_center.news_search_index import get_news_search_index
+            hits = get_news_search_index().search(
+                keyword=keyword,
+                start_time=start_date,
+                end_time=end_date,
+                limit=limit
+            )
+        except Exception as e:
+            logger.warning(f"本地新闻检索失败: {e}")
+            return []
+        
+        news_list = []
+        for hit in hits:
+            publish_time = None
+            if hit['pub_time']:
+                try:
+                    publish_time = datetime.fromisoformat(hit['pub_time'])
+                except ValueError:
+                    publish_time = None
+            news_list.append(UnifiedNewsItem(
+                id=hit['news_id'],
+                title=hit['title'],
+                content=hit['content'] or "",
+                source=hit['source'] or "",
+                original_url=hit['url'] or "",
+                publish_time=publish_time,
+                related_stocks=hit['stock_codes'],
+                relevance_score=hit['score'] or 0.0
+            ))
+        return self._deduplicate(news_list)
+    
     def _deduplicate(self, news_list: List[UnifiedNewsItem]) -> List[UnifiedNewsItem]:
-        """去重"""
-        seen_titles = set()
-        unique_news = []
+        """去重：不同数据源的转载稿近似去重，合并到首条代表稿的 sources 上"""
+        from backend.services.news_center.news_deduplicator import collapse_near_duplicates
         
-        for news in news_list:
-            # 使用标题的前50个字符作为去重键
-            key = news.title[:50] if news.title else news.id
-            if key not in seen_titles:
-                seen_titles.add(key)
-                unique_news.append(news)
+        unique_news = []
+        clusters = collapse_near_duplicates(
+            news_list,
+            lambda news: (news.title or news.id, news.content, news.source)
+        )
+        for news, sources, _ in clusters:
+            news.sources = sources
+            unique_news.append(news)
         
         return unique_news
     
@@ -407,6 +475,7 @@ class NewsProviderManager:
     ) -> List[UnifiedNewsItem]:
         """
         搜索新闻
+        未指定数据源时优先检索本地全文索引，本地无结果再从远程数据源获取
         
         Args:
             keyword: 搜索关键词
@@ -416,6 +485,11 @@ class NewsProviderManager:
         Returns:
             新闻列表
         """
+        if not sources:
+            local_news = self._search_local(keyword, limit)
+            if local_news:
+                return local_news
+        
         filter_params = NewsFilter(
             keyword=keyword,
             page_size=limit
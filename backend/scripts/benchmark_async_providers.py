@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+港股/美股数据提供器异步限流性能对比
+在本地启动一个模拟数据源的 HTTP 服务（固定延迟），异步端点同时请求 100 只股票的财务指标：
+
+1. 原方式：异步端点直接调用同步方法，time.sleep 限流 + 每次保存重写整个 JSON 缓存文件，
+   请求串行执行且阻塞事件循环
+2. 异步方式：aget_financial_indicators，按主机令牌桶 await 等待 + 并发上限，
+   缓存只追加变化的键（JsonJournal）
+
+统计总耗时、单请求延迟 P50/P95、事件循环最大卡顿与缓存写入量。
+
+使用方法：
+    python backend/scripts/benchmark_async_providers.py
+"""
+
+import asyncio
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import pandas as pd
+
+# 设置 stdout 编码为 utf-8，解决 Windows 控制台编码问题
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.dataflows.providers.hk.improved_hk import ImprovedHKStockProvider
+from backend.utils.rate_limiter import HostLimiter
+
+SYMBOLS = [f"{i:05d}" for i in range(1, 101)]
+UPSTREAM_LATENCY = 0.05     # 模拟数据源单次响应 50ms
+RATE = 50                   # 数据源允许 50 次/秒
+BURST = 10
+MAX_CONCURRENCY = 8
+EXISTING_CACHE_ENTRIES = 2000
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """模拟东方财富港股财务指标接口"""
+
+    def do_GET(self):
+        time.sleep(UPSTREAM_LATENCY)
+        symbol = self.path.rsplit("/", 1)[-1]
+        body = json.dumps([{
+            "REPORT_DATE": "2025-12-31", "FISCAL_YEAR": "2025", "BASIC_EPS": 1.2, "EPS_TTM": 1.3,
+            "BPS": 10.5, "ROE_AVG": 12.3, "ROA": 5.1, "OPERATE_INCOME": 1e9, "DEBT_ASSET_RATIO": 40.2,
+            "SECUCODE": f"{symbol}.HK"
+        }]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def download(base_url: str, symbol: str) -> pd.DataFrame:
+    with urllib.request.urlopen(f"{base_url}/financial/{symbol}", timeout=10) as resp:
+        return pd.DataFrame(json.loads(resp.read()))
+
+
+def seed_cache(path: str):
+    """预置已有缓存条目（原方式每次保存都要重写这些内容）"""
+    entries = {f"name_{i:05d}": {"data": f"港股{i:05d}", "timestamp": time.time(), "source": "default"}
+               for i in range(EXISTING_CACHE_ENTRIES)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+
+
+class LegacyProvider:
+    """原实现（对照组）：time.sleep 限流，保存时重写整个 JSON 缓存"""
+
+    def __init__(self, base_url: str, cache_file: str):
+        self.base_url = base_url
+        self.cache_file = cache_file
+        self.rate_limit_wait = 1.0 / RATE
+        self.last_request_time = 0
+        with open(cache_file, "r", encoding="utf-8") as f:
+            self.cache = json.load(f)
+        self.bytes_written = 0
+
+    def _save_cache(self):
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, ensure_ascii=False, indent=2)
+        self.bytes_written += os.path.getsize(self.cache_file)
+
+    def get_financial_indicators(self, symbol: str) -> Dict:
+        elapsed = time.time() - self.last_request_time
+        if elapsed < self.rate_limit_wait:
+            time.sleep(self.rate_limit_wait - elapsed)
+        self.last_request_time = time.time()
+        df = download(self.base_url, symbol)
+        indicators = {"report_date": str(df.iloc[0]["REPORT_DATE"]), "eps_ttm": float(df.iloc[0]["EPS_TTM"])}
+        self.cache[f"financial_{symbol}"] = {"data": indicators, "timestamp": time.time()}
+        self._save_cache()
+        return indicators
+
+
+class BenchHKProvider(ImprovedHKStockProvider):
+    """异步方式：数据源下载改为请求本地模拟服务，缓存放到临时目录"""
+
+    def __init__(self, base_url: str, cache_file: str):
+        super().__init__()
+        self.base_url = base_url
+        self.cache_file = cache_file
+        self._load_cache()
+        self._limiter = HostLimiter("bench_hk", rate=RATE, burst=BURST, max_concurrency=MAX_CONCURRENCY)
+
+    def _download_financial_indicators(self, normalized_symbol: str) -> pd.DataFrame:
+        return download(self.base_url, normalized_symbol)
+
+
+async def measure(handler, symbols: List[str]):
+    """并发发起请求，同时用心跳任务测量事件循环卡顿"""
+    lags: List[float] = []
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - started - 0.01)
+
+    async def request(symbol):
+        # 从统一的提交时刻起计算（串行执行时排在后面的请求也要计入等待）
+        await handler(symbol)
+        return time.perf_counter() - started
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(request(s) for s in symbols))
+    total = time.perf_counter() - started
+    stop.set()
+    await beat
+    return total, latencies, max(lags) if lags else 0.0
+
+
+def pct(values: List[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] * 1000
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    print("=" * 76)
+    print(f"  异步限流对比（{len(SYMBOLS)} 只股票并发，上游延迟 {UPSTREAM_LATENCY * 1000:.0f}ms，"
+          f"限速 {RATE}/s 突发 {BURST}，并发上限 {MAX_CONCURRENCY}）")
+    print("=" * 76)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_file = os.path.join(tmp, "legacy_cache.json")
+        seed_cache(legacy_file)
+        legacy = LegacyProvider(base_url, legacy_file)
+
+        async def legacy_handler(symbol):
+            # 原异步端点直接调用同步方法
+            return legacy.get_financial_indicators(symbol)
+
+        total, latencies, lag = asyncio.run(measure(legacy_handler, SYMBOLS))
+        print(f"原方式:   总耗时 {total:6.2f}s  P50 {pct(latencies, 50):8.1f}ms  P95 {pct(latencies, 95):8.1f}ms  "
+              f"事件循环最大卡顿 {lag * 1000:8.1f}ms  缓存写入 {legacy.bytes_written / 1024 / 1024:6.1f}MB")
+
+        new_file = os.path.join(tmp, "hk_stock_cache.json")
+        seed_cache(new_file)
+        provider = BenchHKProvider(base_url, new_file)
+        total, latencies, lag = asyncio.run(measure(provider.aget_financial_indicators, SYMBOLS))
+        journal_bytes = os.path.getsize(provider._journal.journal_path)
+        stats = provider._limiter.get_stats()
+        print(f"异步方式: 总耗时 {total:6.2f}s  P50 {pct(latencies, 50):8.1f}ms  P95 {pct(latencies, 95):8.1f}ms  "
+              f"事件循环最大卡顿 {lag * 1000:8.1f}ms  缓存写入 {journal_bytes / 1024 / 1024:6.1f}MB")
+        print(f"    限流 {stats['throttled']}/{stats['requests']} 次  累计等待 {stats['wait_seconds']}s  "
+              f"并发峰值 {stats['max_in_flight']}")
+
+        assert all(f"financial_{s}" in provider.cache for s in SYMBOLS)
+        reloaded = BenchHKProvider(base_url, new_file)
+        assert len(reloaded.cache) == EXISTING_CACHE_ENTRIES + len(SYMBOLS)
+        provider._journal.close()
+        reloaded._journal.close()
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
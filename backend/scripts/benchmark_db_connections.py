@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 连接架构并发对比
+批量写入线程持续写入行情（每个事务 5000 行），同时报表线程反复执行全表聚合，
+多个查询线程做单只股票的点查询，对比：
+
+1. 单连接（原 StaticPool）：所有线程共用一个连接，读写互相排队
+2. 读写分离：1 个串行写连接 + 只读连接池（WAL 下读写并发）
+
+统计点查询延迟 P50/P99、写入吞吐、报表完成次数，并校验写入行数无丢失。
+
+使用方法：
+    python backend/scripts/benchmark_db_connections.py
+"""
+
+import io
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+# 设置 stdout 编码为 utf-8，解决 Windows 控制台编码问题
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from backend.database.sqlite_pool import RoutingSession, create_sqlite_engines, get_engine_stats
+
+STOCKS = 2000
+SEED_ROWS = 200_000
+BATCH_ROWS = 5000
+READERS = 6
+DURATION = 5.0
+
+INSERT_SQL = text("INSERT INTO quotes (ts_code, trade_time, close, volume) VALUES (:ts_code, :trade_time, :close, :volume)")
+POINT_SQL = text("SELECT close, volume FROM quotes WHERE ts_code = :ts_code ORDER BY id DESC LIMIT 20")
+REPORT_SQL = text("SELECT ts_code, AVG(close), SUM(volume), COUNT(*) FROM quotes GROUP BY ts_code")
+
+
+def codes() -> List[str]:
+    return [f"{600000 + i}.SH" for i in range(STOCKS)]
+
+
+def make_rows(n: int, rng: random.Random) -> List[Dict]:
+    all_codes = codes()
+    now = time.time()
+    return [{"ts_code": rng.choice(all_codes), "trade_time": now, "close": rng.uniform(5, 100),
+             "volume": rng.randint(100, 100000)} for _ in range(n)]
+
+
+def setup(url: str):
+    engine, _ = create_sqlite_engines(url)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE quotes (id INTEGER PRIMARY KEY, ts_code TEXT, trade_time REAL, "
+                          "close REAL, volume INTEGER)"))
+        conn.execute(text("CREATE INDEX idx_quotes_code ON quotes (ts_code)"))
+        conn.execute(INSERT_SQL, make_rows(SEED_ROWS, random.Random(0)))
+    engine.dispose()
+
+
+def run(url: str, reader_pool_size: int) -> Dict:
+    engine, read_engine = create_sqlite_engines(url, reader_pool_size=reader_pool_size)
+    Session = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False,
+                           bind=engine, read_bind=read_engine)
+    stop = threading.Event()
+    latencies: List[float] = []
+    lock = threading.Lock()
+    result = {"written": 0, "reports": 0, "errors": 0}
+
+    # 预先生成写入批次，避免生成数据占用 GIL 干扰延迟测量
+    rng = random.Random(1)
+    batches = [make_rows(BATCH_ROWS, rng) for _ in range(20)]
+
+    def writer():
+        for i in itertools.count():
+            if stop.is_set():
+                break
+            rows = batches[i % len(batches)]
+            session = Session()
+            try:
+                session.execute(INSERT_SQL, rows)
+                session.commit()
+                with lock:
+                    result["written"] += len(rows)
+            except Exception:
+                session.rollback()
+                with lock:
+                    result["errors"] += 1
+            finally:
+                session.close()
+
+    def reporter():
+        while not stop.is_set():
+            session = Session()
+            try:
+                session.execute(REPORT_SQL).fetchall()
+                with lock:
+                    result["reports"] += 1
+            except Exception:
+                with lock:
+                    result["errors"] += 1
+            finally:
+                session.close()
+
+    def reader(seed: int):
+        rng = random.Random(seed)
+        all_codes = codes()
+        while not stop.is_set():
+            session = Session()
+            started = time.perf_counter()
+            try:
+                session.execute(POINT_SQL, {"ts_code": rng.choice(all_codes)}).fetchall()
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+            except Exception:
+                with lock:
+                    result["errors"] += 1
+            finally:
+                session.close()
+            time.sleep(0.002)
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=reporter)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(READERS)]
+    for t in threads:
+        t.start()
+    time.sleep(DURATION)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    with engine.connect() as conn:
+        result["rows"] = conn.execute(text("SELECT COUNT(*) FROM quotes")).scalar()
+    result["latencies"] = latencies
+    result["writer_stats"] = get_engine_stats(engine)
+    engine.dispose()
+    if read_engine is not None:
+        read_engine.dispose()
+    return result
+
+
+def report(label: str, result: Dict, seed_rows: int):
+    lat = sorted(result["latencies"])
+    p50 = statistics.median(lat) * 1000 if lat else 0.0
+    p99 = lat[int(len(lat) * 0.99)] * 1000 if lat else 0.0
+    lost = seed_rows + result["written"] - result["rows"]
+    print(f"{label}  点查询 {len(lat):6d} 次  P50 {p50:7.2f}ms  P99 {p99:8.2f}ms  "
+          f"写入 {result['written'] / DURATION:8.0f} 行/s  报表 {result['reports']:3d} 次  "
+          f"错误 {result['errors']}  丢失 {lost} 行")
+
+
+def main():
+    print("=" * 100)
+    print(f"  SQLite 连接架构对比（种子 {SEED_ROWS} 行，批量写入 {BATCH_ROWS} 行/事务，"
+          f"{READERS} 个点查询线程 + 1 个报表线程，{DURATION:.0f}s）")
+    print("=" * 100)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, pool_size in (("单连接:  ", 0), ("读写分离:", READERS + 2)):
+            path = os.path.join(tmp, f"bench_{pool_size}.db")
+            url = f"sqlite:///{path}"
+            setup(url)
+            result = run(url, pool_size)
+            report(label, result, SEED_ROWS)
+            stats = result["writer_stats"]
+            print(f"          写连接等待 P99 {stats.get('wait_p99_ms', 0):.2f}ms  "
+                  f"锁超时 {stats.get('busy_errors', 0)} 次  慢语句 {stats.get('slow_statements', 0)} 条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话日志流性能对比
+对比逐条写入（LPUSH + LTRIM + EXPIRE + PUBLISH 四次往返）与当前的批量写入：
+
+1. 写入吞吐：模拟每条命令的网络往返延迟，统计每秒日志条数和每条日志的往返次数
+2. 每个 SSE 客户端的流量：实时推送的字节数，以及断线重连时全量重放与按 Last-Event-ID 续传的字节数
+
+使用方法：
+    python backend/scripts/benchmark_log_streaming.py
+"""
+
+import asyncio
+import inspect
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# 设置 stdout 编码为 utf-8，解决 Windows 控制台编码问题
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.services.async_task.redis_client import MemoryFallback, RedisClient
+from backend.services.async_task.log_streamer import LogStreamer, LogLevel
+
+
+class SimulatedNetwork:
+    """在内存存储外包一层，每次命令（或一次 pipeline）等待 rtt 秒并计数，模拟访问远程 Redis"""
+
+    def __init__(self, store: MemoryFallback, rtt: float):
+        self._store = store
+        self._rtt = rtt
+        self.round_trips = 0
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        if self._rtt:
+            await asyncio.sleep(self._rtt)
+
+    def __getattr__(self, name):
+        attr = getattr(self._store, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            await self._round_trip()
+            return await attr(*args, **kwargs)
+        return call
+
+    def pipeline(self, transaction: bool = False):
+        pipe = self._store.pipeline()
+        execute = pipe.execute
+
+        async def execute_once():
+            await self._round_trip()
+            return await execute()
+        pipe.execute = execute_once
+        return pipe
+
+
+def make_client(rtt: float):
+    network = SimulatedNetwork(MemoryFallback(), rtt)
+    client = RedisClient()
+    client._fallback = network
+    return client, network
+
+
+def make_entry(i: int) -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "level": "info",
+        "message": f"[技术分析师] 第 {i} 步：计算 MACD、RSI 与均线排列，结论偏多",
+        "agent_id": "technical_analyst",
+        "task_id": "bench"
+    }
+
+
+async def legacy_log(redis: RedisClient, session_id: str, entry: dict):
+    """原 LogStreamer.log 的写入方式"""
+    log_key = f"{LogStreamer.LOG_PREFIX}{session_id}"
+    await redis.lpush(log_key, json.dumps(entry, ensure_ascii=False))
+    await redis.ltrim(log_key, 0, LogStreamer.MAX_LOGS - 1)
+    await redis.expire(log_key, LogStreamer.LOG_EXPIRE)
+    await redis.publish(f"{LogStreamer.CHANNEL_PREFIX}{session_id}", json.dumps({
+        "event": "log",
+        "data": entry
+    }, ensure_ascii=False))
+
+
+async def bench_write(n: int, rtt: float):
+    """返回 (原实现 条/秒, 原实现 往返/条, 当前 条/秒, 当前 往返/条)"""
+    redis, network = make_client(rtt)
+    started = time.perf_counter()
+    for i in range(n):
+        await legacy_log(redis, "legacy", make_entry(i))
+    legacy_rate = n / (time.perf_counter() - started)
+    legacy_trips = network.round_trips / n
+
+    redis, network = make_client(rtt)
+    streamer = LogStreamer(redis)
+    started = time.perf_counter()
+    for i in range(n):
+        entry = make_entry(i)
+        await streamer.log("batched", LogLevel.INFO, entry["message"], agent_id=entry["agent_id"], task_id="bench")
+        if i % 20 == 0:
+            await asyncio.sleep(0)   # 模拟分析过程中穿插的其他协程
+    await streamer.flush_all()
+    batched_rate = n / (time.perf_counter() - started)
+    return legacy_rate, legacy_trips, batched_rate, network.round_trips / n
+
+
+def legacy_frame(entry: dict) -> str:
+    """原 SSE 日志帧（默认 ensure_ascii，中文转义为 \\uXXXX）"""
+    return f"event: log\ndata: {json.dumps(entry)}\n\n"
+
+
+def resumable_frame(entry: dict) -> str:
+    """当前 SSE 日志帧（带事件 ID，保留 UTF-8 原文）"""
+    return f"id: {entry.get('seq', '')}\nevent: log\ndata: {json.dumps(entry, ensure_ascii=False)}\n\n"
+
+
+async def bench_client_bytes(n: int, missed: int):
+    """返回 (原实现实时字节/条, 当前实时字节/条, 全量重放字节, 续传字节)"""
+    redis, _ = make_client(0)
+    streamer = LogStreamer(redis)
+    for i in range(n):
+        entry = make_entry(i)
+        await streamer.log("session", LogLevel.INFO, entry["message"], agent_id=entry["agent_id"], task_id="bench")
+    await streamer.flush_all()
+
+    history = list(reversed(await streamer.get_logs("session", 0, LogStreamer.MAX_LOGS)))
+    legacy_live = sum(len(legacy_frame({k: v for k, v in e.items() if k != "seq"}).encode()) for e in history)
+    current_live = sum(len(resumable_frame(e).encode()) for e in history)
+
+    # 断线期间错过最后 missed 条：全量重放整个列表 vs 从 Last-Event-ID 续传
+    last_seen = history[-missed - 1]["seq"]
+    full_replay = sum(len(legacy_frame(e).encode()) for e in history)
+    resumed = await streamer.get_logs_since("session", last_seen)
+    resume_bytes = sum(len(resumable_frame(e).encode()) for e in resumed)
+    return legacy_live / len(history), current_live / len(history), full_replay, resume_bytes, len(resumed)
+
+
+async def main():
+    print("=" * 72)
+    print("  会话日志流性能对比（逐条写入 vs 批量写入）")
+    print("=" * 72)
+
+    for rtt in (0.0, 0.0005):
+        n = 20_000 if rtt == 0 else 2_000
+        legacy_rate, legacy_trips, rate, trips = await bench_write(n, rtt)
+        print(f"写入 x{n:<6} 往返延迟 {rtt * 1000:.1f}ms: 原实现 {legacy_rate:>9,.0f} 条/s ({legacy_trips:.2f} 往返/条)  "
+              f"当前 {rate:>9,.0f} 条/s ({trips:.3f} 往返/条)  {rate / legacy_rate:.1f}x")
+
+    legacy_per_entry, per_entry, full_replay, resume_bytes, resumed = await bench_client_bytes(1000, 20)
+    print(f"每个客户端实时推送: 原实现 {legacy_per_entry:.0f} 字节/条  当前 {per_entry:.0f} 字节/条")
+    print(f"断线重连（错过 {resumed} 条）: 全量重放 {full_replay:,} 字节  续传 {resume_bytes:,} 字节")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全市场数据表共享性能对比
+模拟批量分析多只股票时的综合数据获取：龙虎榜、大宗交易、融资融券、涨跌停池、ST 列表、
+沪深港通持股等接口每次都下载全市场数据再筛出一只股票。对比：
+
+1. 原方式：每只股票各自下载整张表并按代码筛选
+2. 共享方式：MarketTableStore 每张表每个交易时段只下载一次，个股查询走代码索引
+
+上游接口用固定延迟模拟，统计网络请求次数、总耗时与单次个股查询耗时。
+
+使用方法：
+    python backend/scripts/benchmark_market_tables.py
+"""
+
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 设置 stdout 编码为 utf-8，解决 Windows 控制台编码问题
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.dataflows.market_tables import MarketTableStore
+
+UNIVERSE = [f"{i:06d}" for i in range(5000)]
+
+
+def make_table(rows: int, code_col: str, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    codes = rng.choice(UNIVERSE, size=rows)
+    return pd.DataFrame({
+        code_col: codes,
+        "名称": [f"股票{c}" for c in codes],
+        "金额": rng.random(rows) * 1e8,
+        "涨跌幅": rng.normal(0, 3, rows)
+    })
+
+
+class FakeUpstream:
+    """模拟全市场接口：固定延迟并计数"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def endpoint(self, table: pd.DataFrame) -> Callable[[], pd.DataFrame]:
+        def fetch():
+            self.calls += 1
+            time.sleep(self.latency)
+            return table.copy()
+        return fetch
+
+
+def build_datasets(upstream: FakeUpstream, trade_days: int) -> List[Tuple[str, str, Callable, str]]:
+    """(数据集, 交易日, 下载函数, 代码列)，与综合数据服务中的全市场接口对应"""
+    datasets = [
+        ("stock_zh_a_st_em", None, make_table(200, "代码", 1), "代码"),
+        ("stock_lhb_jgstatistic_em", None, make_table(600, "代码", 2), "代码"),
+        ("stock_dzjy_mrmx", None, make_table(4000, "证券代码", 3), "证券代码"),
+        ("stock_zt_pool_em", None, make_table(80, "代码", 4), "代码"),
+        ("stock_dt_pool_em", None, make_table(20, "代码", 5), "代码"),
+        ("stock_margin_detail_sse", None, make_table(1800, "标的证券代码", 6), "标的证券代码"),
+        ("stock_margin_detail_szse", None, make_table(1900, "证券代码", 7), "证券代码"),
+        ("stock_hsgt_hold_stock_em", None, make_table(2500, "代码", 8), "代码"),
+    ]
+    # Tushare 龙虎榜按交易日逐天查询
+    today = date.today()
+    for i in range(trade_days):
+        day = (today - timedelta(days=i + 1)).strftime('%Y%m%d')
+        datasets.append(("tushare_top_list", day, make_table(70, "代码", 100 + i), "代码"))
+    return [(name, day, upstream.endpoint(table), col) for name, day, table, col in datasets]
+
+
+def analyse_legacy(datasets, code: str) -> int:
+    found = 0
+    for _, _, fetch, col in datasets:
+        df = fetch()
+        if df is not None and not df.empty:
+            found += len(df[df[col].astype(str) == code])
+    return found
+
+
+def analyse_shared(store: MarketTableStore, datasets, code: str) -> int:
+    found = 0
+    for name, day, fetch, col in datasets:
+        found += len(store.rows(name, code, fetch, col, trade_date=day))
+    return found
+
+
+def run(analyse: Callable[[str], int], codes: List[str], workers: int) -> Tuple[float, int]:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        found = sum(pool.map(analyse, codes))
+    return time.perf_counter() - started, found
+
+
+def main():
+    latency = 0.02
+    stocks = 50
+    trade_days = 20
+    codes = list(np.random.default_rng(0).choice(UNIVERSE, size=stocks, replace=False))
+
+    print("=" * 72)
+    print(f"  全市场数据表共享对比（{stocks} 只股票，上游延迟 {latency * 1000:.0f}ms/次）")
+    print("=" * 72)
+
+    legacy_up = FakeUpstream(latency)
+    legacy_sets = build_datasets(legacy_up, trade_days)
+    legacy_time, legacy_found = run(lambda c: analyse_legacy(legacy_sets, c), codes, 5)
+
+    shared_up = FakeUpstream(latency)
+    shared_sets = build_datasets(shared_up, trade_days)
+    store = MarketTableStore()
+    shared_time, shared_found = run(lambda c: analyse_shared(store, shared_sets, c), codes, 5)
+
+    assert legacy_found == shared_found, (legacy_found, shared_found)
+    print(f"原方式:   网络请求 {legacy_up.calls:>5} 次  耗时 {legacy_time:7.2f}s")
+    print(f"共享方式: 网络请求 {shared_up.calls:>5} 次  耗时 {shared_time:7.2f}s  "
+          f"({legacy_time / shared_time:.1f}x，匹配记录 {shared_found} 条一致)")
+
+    report = store.get_report()
+    print(f"节省网络请求 {report['network_calls_avoided']} 次，下一次失效时间 {report['next_session_boundary']}")
+
+    # 单次个股查询：整表筛选 vs 索引查找（表已在内存中）
+    table = make_table(5000, "代码", 42)
+    store.rows("lookup_bench", codes[0], lambda: table, "代码")
+    n = 2000
+    started = time.perf_counter()
+    for code in codes * (n // stocks):
+        table[table["代码"].astype(str) == code]
+    scan_us = (time.perf_counter() - started) / n * 1e6
+    started = time.perf_counter()
+    for code in codes * (n // stocks):
+        store.rows("lookup_bench", code, lambda: table, "代码")
+    index_us = (time.perf_counter() - started) / n * 1e6
+    print(f"个股查询（5000 行表）: 整表筛选 {scan_us:8.1f}µs  索引查找 {index_us:8.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
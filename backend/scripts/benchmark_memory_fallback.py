@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis 内存降级存储性能对比
+对比当前 MemoryFallback 与原实现（list.insert(0) + sleep 轮询 + 逐个 await 回调）：
+
+1. 任务队列：LPUSH N 条后 BRPOP 取完
+2. 阻塞唤醒延迟：消费者在 BRPOP 中等待，生产者间隔写入，统计入队到出队的延迟
+3. 日志流：LPUSH + LTRIM 保留最近 1000 条 + LRANGE 取最近 100 条
+4. 发布订阅扇出：多个订阅者，发布 N 条消息并全部消费
+
+使用方法：
+    python backend/scripts/benchmark_memory_fallback.py
+"""
+
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# 设置 stdout 编码为 utf-8，解决 Windows 控制台编码问题
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.services.async_task.redis_client import MemoryFallback
+
+
+class LegacyMemoryFallback:
+    """原实现（对照组），只保留基准测试用到的操作"""
+
+    def __init__(self):
+        self._lists: Dict[str, List] = {}
+        self._pubsub_callbacks: Dict[str, List] = {}
+        self._expiry: Dict[str, datetime] = {}
+
+    async def lpush(self, key: str, *values):
+        if key not in self._lists:
+            self._lists[key] = []
+        for v in values:
+            self._lists[key].insert(0, v)
+
+    async def brpop(self, key: str, timeout: int = 0) -> Optional[tuple]:
+        if key in self._lists and self._lists[key]:
+            return (key, self._lists[key].pop())
+        if timeout > 0:
+            await asyncio.sleep(min(timeout, 1))
+        return None
+
+    async def lrange(self, key: str, start: int, end: int) -> List:
+        if key not in self._lists:
+            return []
+        return self._lists[key][start:end+1 if end >= 0 else None]
+
+    async def expire(self, key: str, seconds: int):
+        self._expiry[key] = datetime.now() + timedelta(seconds=seconds)
+
+    async def publish(self, channel: str, message: str):
+        if channel in self._pubsub_callbacks:
+            for callback in self._pubsub_callbacks[channel]:
+                await callback(message)
+
+    def pubsub(self):
+        return LegacyMemoryPubSub(self)
+
+
+class LegacyMemoryPubSub:
+    def __init__(self, fallback: LegacyMemoryFallback):
+        self._fallback = fallback
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, *channels):
+        for channel in channels:
+            self._fallback._pubsub_callbacks.setdefault(channel, []).append(self._on_message)
+
+    async def _on_message(self, message: str):
+        await self._queue.put(message)
+
+    async def get_message(self, timeout: float = 0.0):
+        return {"type": "message", "data": await asyncio.wait_for(self._queue.get(), timeout)}
+
+
+# ==================== 基准测试 ====================
+
+async def bench_queue(store, n: int) -> float:
+    """LPUSH N 条后 BRPOP 取完，返回每秒操作数"""
+    started = time.perf_counter()
+    for i in range(n):
+        await store.lpush("queue", f"task-{i}")
+    for _ in range(n):
+        await store.brpop("queue", timeout=1)
+    return 2 * n / (time.perf_counter() - started)
+
+
+async def bench_wakeup(store, n: int, gap: float) -> List[float]:
+    """消费者阻塞等待，生产者每隔 gap 秒写入一条，返回各条的入队到出队延迟（毫秒）"""
+    latencies = []
+
+    async def consumer():
+        while len(latencies) < n:
+            result = await store.brpop("wake", timeout=1)
+            if result:
+                latencies.append((time.perf_counter() - float(result[1])) * 1000)
+
+    task = asyncio.create_task(consumer())
+    for _ in range(n):
+        await asyncio.sleep(gap)
+        await store.lpush("wake", str(time.perf_counter()))
+    await task
+    return latencies
+
+
+async def bench_log_stream(store, n: int, keep: int = 1000) -> float:
+    """LPUSH + LTRIM + EXPIRE，每 10 条 LRANGE 一次，返回每秒写入条数"""
+    started = time.perf_counter()
+    for i in range(n):
+        await store.lpush("logs", f'{{"message": "log line {i}"}}')
+        if hasattr(store, "ltrim"):
+            await store.ltrim("logs", 0, keep - 1)
+        await store.expire("logs", 3600)
+        if i % 10 == 0:
+            await store.lrange("logs", 0, 99)
+    return n / (time.perf_counter() - started)
+
+
+async def bench_pubsub(store, subscribers: int, n: int) -> float:
+    """发布 N 条消息扇出到多个订阅者并全部消费，返回每秒投递条数"""
+    subs = [store.pubsub() for _ in range(subscribers)]
+    for sub in subs:
+        await sub.subscribe("events")
+
+    async def drain(sub):
+        for _ in range(n):
+            await sub.get_message(timeout=5)
+
+    started = time.perf_counter()
+    readers = [asyncio.create_task(drain(sub)) for sub in subs]
+    for i in range(n):
+        await store.publish("events", f"event-{i}")
+        if i % 100 == 0:
+            await asyncio.sleep(0)
+    await asyncio.gather(*readers)
+    return subscribers * n / (time.perf_counter() - started)
+
+
+async def main():
+    print("=" * 64)
+    print("  MemoryFallback 性能对比（原实现 vs 当前实现）")
+    print("=" * 64)
+
+    for n in (10_000, 50_000, 100_000):
+        legacy = await bench_queue(LegacyMemoryFallback(), n)
+        current = await bench_queue(MemoryFallback(max_list_length=n), n)
+        print(f"任务队列 LPUSH+BRPOP x{n:>7}: 原实现 {legacy:>12,.0f} ops/s  当前 {current:>12,.0f} ops/s  "
+              f"({current / legacy:.1f}x)")
+
+    for name, store in (("原实现", LegacyMemoryFallback()), ("当前", MemoryFallback())):
+        latencies = await bench_wakeup(store, 20, 0.05)
+        print(f"阻塞唤醒延迟 ({name}): 中位数 {statistics.median(latencies):8.2f} ms  "
+              f"最大 {max(latencies):8.2f} ms")
+
+    n = 20_000
+    legacy = await bench_log_stream(LegacyMemoryFallback(), n)
+    current = await bench_log_stream(MemoryFallback(), n)
+    print(f"日志流 x{n}: 原实现 {legacy:,.0f} 条/s（列表无上限）  当前 {current:,.0f} 条/s（保留 1000 条）")
+
+    legacy = await bench_pubsub(LegacyMemoryFallback(), 10, 10_000)
+    current = await bench_pubsub(MemoryFallback(), 10, 10_000)
+    print(f"发布订阅 10 订阅者 x10000: 原实现 {legacy:,.0f} 条/s  当前 {current:,.0f} 条/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能指标与采样分析器开销测试
+1. 单次记录开销：timed 装饰器 / 上下文管理器 / 加锁直方图（对照），单线程与多线程
+2. 业务开销：对约 1 毫秒的取数解析函数（相当于最快的一次数据源调用，
+   真实的 TDX/Tushare/AKShare 网络请求在数毫秒以上，LLM 请求在秒级）加 timed 前后的耗时对比（目标 < 1%）
+3. 接口中间件开销：最小 ASGI 应用加 MetricsMiddleware 前后的单请求耗时
+4. 分位数精度：对数正态耗时样本的直方图估算 P50/P95/P99 与精确值对比
+5. 采样分析器：100Hz 采样期间业务线程完成同样工作量的耗时变化，以及采样线程自身占用
+
+使用方法：
+    python backend/scripts/benchmark_metrics.py
+"""
+
+import asyncio
+import gc
+import io
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+# 设置 stdout 编码为 utf-8，解决 Windows 控制台编码问题
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.utils.metrics import (DEFAULT_LATENCY_BUCKETS, HistogramSeries, MetricsMiddleware,
+                                   _quantile, get_metrics_registry, timed)
+from backend.utils.sampling_profiler import run_profile
+
+CALLS = 200_000
+THREADS = 8
+
+
+class LockedHistogram:
+    """对照：一把锁保护的直方图"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.counts[bisect_left(self.bounds, value)] += 1
+            self.total += value
+
+
+def per_call_ns(fn, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def threaded_ns(fn, threads: int, calls: int) -> float:
+    """多线程同时调用，返回每次调用的平均墙钟耗时"""
+    def worker():
+        for _ in range(calls):
+            fn()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return (time.perf_counter() - started) / (threads * calls) * 1e9
+
+
+def record_overhead():
+    def noop():
+        return None
+
+    decorated = timed("datasource", source="bench", operation="noop")(noop)
+
+    def with_context():
+        with timed("datasource", source="bench", operation="ctx"):
+            pass
+
+    locked = LockedHistogram(DEFAULT_LATENCY_BUCKETS)
+    sharded = HistogramSeries(DEFAULT_LATENCY_BUCKETS)
+
+    def locked_observe():
+        locked.observe(0.0123)
+
+    def sharded_observe():
+        sharded.observe(0.0123)
+
+    base = per_call_ns(noop, CALLS)
+    decorator_ns = per_call_ns(decorated, CALLS) - base
+    print(f"空函数调用:             {base:7.0f} ns")
+    print(f"timed 装饰器:           {decorator_ns:7.0f} ns/次（扣除空函数）")
+    print(f"timed 上下文管理器:     {per_call_ns(with_context, CALLS) - base:7.0f} ns/次")
+    print(f"直方图记录（分片）:     {per_call_ns(sharded_observe, CALLS) - base:7.0f} ns/次   "
+          f"{THREADS} 线程 {threaded_ns(sharded_observe, THREADS, CALLS // THREADS):7.0f} ns/次")
+    print(f"直方图记录（加锁对照）: {per_call_ns(locked_observe, CALLS) - base:7.0f} ns/次   "
+          f"{THREADS} 线程 {threaded_ns(locked_observe, THREADS, CALLS // THREADS):7.0f} ns/次")
+    return decorator_ns
+
+
+def workload_overhead(record_ns: float):
+    """约 1 毫秒的取数解析：把一批行情文本行拆成字典"""
+    rows = [f"{600000 + i}.SH,{10 + i * 0.01:.2f},{1000 + i},{0.5 + i * 0.001:.3f}" for i in range(1000)]
+
+    def parse():
+        result = []
+        for row in rows:
+            code, price, volume, change = row.split(",")
+            result.append({"code": code, "price": float(price), "volume": int(volume), "change": float(change)})
+        return result
+
+    instrumented = timed("datasource", source="bench", operation="parse")(parse)
+    # 逐次交替调用（先后顺序也轮换）并取中位数，关闭 GC，减少机器抖动对毫秒级对比的影响
+    plain, timed_cost = [], []
+    pairs = ((parse, plain), (instrumented, timed_cost))
+    gc.disable()
+    try:
+        for i in range(4000):
+            for fn, samples in (pairs if i % 2 else pairs[::-1]):
+                started = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - started)
+    finally:
+        gc.enable()
+    base, cost = statistics.median(plain) * 1e6, statistics.median(timed_cost) * 1e6
+    print(f"取数解析函数: 原始 {base:7.1f} µs   加计时 {cost:7.1f} µs   "
+          f"实测差 {(cost - base) / base * 100:+5.2f}%（中位数，含测量噪声）   "
+          f"按单次记录开销折算 {record_ns / 1000 / base * 100:5.3f}%")
+
+
+def middleware_overhead():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    wrapped = MetricsMiddleware(app)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    async def run(target, n):
+        scope = {"type": "http", "method": "GET", "path": "/api/bench"}
+        started = time.perf_counter()
+        for _ in range(n):
+            await target(dict(scope), receive, send)
+        return (time.perf_counter() - started) / n * 1e6
+
+    n = 50_000
+    base = asyncio.run(run(app, n))
+    cost = asyncio.run(run(wrapped, n))
+    print(f"接口中间件: 每请求增加 {cost - base:5.2f} µs（FastAPI 最简接口本身约 100~300 µs）")
+
+
+def quantile_accuracy():
+    rng = random.Random(0)
+    samples = [rng.lognormvariate(-3.5, 1.0) for _ in range(100_000)]
+    series = HistogramSeries(DEFAULT_LATENCY_BUCKETS)
+    for value in samples:
+        series.observe(value)
+    counts, _, peak = series.snapshot()
+    ordered = sorted(samples)
+    parts = []
+    for q in (0.50, 0.95, 0.99):
+        exact = ordered[int(q * len(ordered)) - 1]
+        estimate = _quantile(DEFAULT_LATENCY_BUCKETS, counts, q, peak)
+        parts.append(f"P{int(q * 100)} 精确 {exact * 1000:7.2f}ms 估算 {estimate * 1000:7.2f}ms "
+                     f"({(estimate - exact) / exact * 100:+5.1f}%)")
+    print("分位数精度: " + "  ".join(parts))
+
+
+def profiler_overhead():
+    def busy(units: int):
+        for _ in range(units):
+            sum(i * i for i in range(2000))
+
+    def work_seconds(units: int) -> float:
+        """业务线程完成固定工作量的墙钟耗时"""
+        worker = threading.Thread(target=busy, args=(units,))
+        started = time.perf_counter()
+        worker.start()
+        worker.join()
+        return time.perf_counter() - started
+
+    units = 6000
+    plain, profiled = [], []
+    result = {}
+    for _ in range(5):
+        plain.append(work_seconds(units))
+        # 采样在后台线程进行，时长覆盖整段工作
+        sampler = threading.Thread(target=lambda: result.update(run_profile(plain[-1] * 2, interval_ms=10)))
+        sampler.start()
+        profiled.append(work_seconds(units))
+        sampler.join()
+    base, cost = statistics.median(plain), statistics.median(profiled)
+    print(f"采样分析器（100Hz）: 固定工作量耗时 {base:6.3f}s → {cost:6.3f}s   "
+          f"实测差 {(cost - base) / base * 100:+5.2f}%（中位数，含测量噪声）   "
+          f"采样线程持有 GIL 占比 {result['overhead_ratio'] * 100:.2f}%（业务线程变慢的上限）")
+    top = result["top_functions"][0]
+    print(f"  最热函数: {top['function']}  自身 {top['self_pct']}%")
+
+
+def main():
+    print("=" * 90)
+    print("  性能指标开销测试")
+    print("=" * 90)
+    workload_overhead(record_overhead())
+    middleware_overhead()
+    quantile_accuracy()
+    profiler_overhead()
+    get_metrics_registry().reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时行情快照性能对比
+对比两种跨进程共享全市场实时行情（约 5500 只股票）的方式：
+
+1. JSON 文件：写进程 json.dump 整张行情表，读进程每次 json.load 后查找（原 TDX 缓存服务方式）
+2. 二进制快照：写进程原地写入内存映射的结构化数组，读进程二分查找（seqlock，无锁无解析）
+
+并在多进程下持续写入的同时并发读取，校验 seqlock 不会读到写了一半的记录。
+
+使用方法：
+    python backend/scripts/benchmark_quote_snapshot.py
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 设置 stdout 编码为 utf-8，解决 Windows 控制台编码问题
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.services.quote_snapshot import QUOTE_DTYPE, QuoteSnapshotReader, QuoteSnapshotWriter
+
+STOCKS = 5500
+
+
+def make_spot_df(seed: int = 0) -> pd.DataFrame:
+    """构造与 ak.stock_zh_a_spot_em() 同列名的全市场行情表"""
+    rng = np.random.default_rng(seed)
+    codes = [f"{p}{i:04d}" for p in ("60", "00", "30") for i in range(STOCKS // 3 + 1)][:STOCKS]
+    price = rng.uniform(2, 200, STOCKS).round(2)
+    pct = rng.normal(0, 3, STOCKS).round(2)
+    return pd.DataFrame({
+        "代码": codes,
+        "名称": [f"股票{c[-4:]}" for c in codes],
+        "最新价": price,
+        "涨跌幅": pct,
+        "涨跌额": (price * pct / 100).round(2),
+        "成交量": rng.integers(1e4, 1e7, STOCKS),
+        "成交额": rng.uniform(1e6, 1e10, STOCKS),
+        "最高": price * 1.02,
+        "最低": price * 0.98,
+        "今开": price * 0.99,
+        "昨收": price * 0.995,
+        "换手率": rng.uniform(0, 20, STOCKS),
+        "市盈率-动态": rng.uniform(5, 80, STOCKS),
+        "市净率": rng.uniform(0.5, 10, STOCKS),
+        "总市值": rng.uniform(1e9, 1e12, STOCKS),
+    })
+
+
+def timed(fn, repeat: int) -> float:
+    """平均每次耗时（微秒）"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def json_write(path: Path, df: pd.DataFrame):
+    cache_data = {"data": df.to_dict("records"), "update_time": time.time(), "cache_type": "realtime_quotes"}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache_data, f, ensure_ascii=False, indent=2)
+
+
+def json_get(path: Path, code: str):
+    with open(path, "r", encoding="utf-8") as f:
+        cache_data = json.load(f)
+    for row in cache_data["data"]:
+        if row["代码"] == code:
+            return row
+    return None
+
+
+def json_get_many(path: Path, codes):
+    with open(path, "r", encoding="utf-8") as f:
+        cache_data = json.load(f)
+    wanted = set(codes)
+    return {row["代码"]: row for row in cache_data["data"] if row["代码"] in wanted}
+
+
+def torn_writer(path: str, stop, generations):
+    """持续写入：每一代所有数值字段都等于代数，读到混合值即为撕裂读"""
+    writer = QuoteSnapshotWriter(Path(path), capacity=STOCKS)
+    records = np.zeros(STOCKS, dtype=QUOTE_DTYPE)
+    records["code"] = [f"{i:06d}".encode() for i in range(STOCKS)]
+    gen = 0
+    while not stop.is_set():
+        gen += 1
+        for field in QUOTE_DTYPE.names[2:]:
+            records[field] = gen
+        writer.write(records)
+    generations.value = gen
+    writer.close()
+
+
+def torn_reader(path: str, stop, result):
+    reader = QuoteSnapshotReader(Path(path))
+    codes = [f"{i:06d}" for i in range(0, STOCKS, 97)]
+    reads = torn = 0
+    while not stop.is_set():
+        quotes = reader.get_many(codes)
+        values = {q[field] for q in quotes.values() for field in QUOTE_DTYPE.names[2:]}
+        reads += 1
+        if len(values) > 1:
+            torn += 1
+    result.put((reads, torn, reader.retries))
+
+
+def bench_torn_reads(path: Path, readers: int, duration: float):
+    QuoteSnapshotWriter(path, capacity=STOCKS).write(np.zeros(0, dtype=QUOTE_DTYPE))
+    stop = multiprocessing.Event()
+    generations = multiprocessing.Value("q", 0)
+    result = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=torn_writer, args=(str(path), stop, generations))]
+    procs += [multiprocessing.Process(target=torn_reader, args=(str(path), stop, result)) for _ in range(readers)]
+    for p in procs:
+        p.start()
+    time.sleep(duration)
+    stop.set()
+    stats = [result.get() for _ in range(readers)]
+    for p in procs:
+        p.join()
+    return generations.value, sum(s[0] for s in stats), sum(s[1] for s in stats), sum(s[2] for s in stats)
+
+
+def main():
+    df = make_spot_df()
+    codes = df["代码"].sample(50, random_state=1).tolist()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "realtime_quotes.json"
+        snap_path = Path(tmp) / "realtime_quotes.snap"
+        writer = QuoteSnapshotWriter(snap_path)
+        reader = QuoteSnapshotReader(snap_path)
+
+        print("=" * 72)
+        print(f"  实时行情共享对比（{STOCKS} 只股票）")
+        print("=" * 72)
+
+        json_write_us = timed(lambda: json_write(json_path, df), 5)
+        snap_write_us = timed(lambda: writer.write_dataframe(df), 20)
+        print(f"写入全市场:      JSON {json_write_us / 1000:9.2f}ms   快照 {snap_write_us / 1000:9.2f}ms   "
+              f"({json_write_us / snap_write_us:.0f}x)")
+        print(f"文件大小:        JSON {json_path.stat().st_size / 1024:9.0f}KB   快照 {snap_path.stat().st_size / 1024:9.0f}KB")
+
+        expected = json_get(json_path, codes[0])
+        quote = reader.get(codes[0])
+        assert abs(expected["最新价"] - quote["price"]) < 1e-9, (expected, quote)
+        assert len(reader.get_many(codes)) == len(json_get_many(json_path, codes)) == len(codes)
+
+        json_get_us = timed(lambda: json_get(json_path, codes[0]), 10)
+        snap_get_us = timed(lambda: reader.get(codes[0]), 5000)
+        print(f"单只查询:        JSON {json_get_us:9.1f}µs   快照 {snap_get_us:9.1f}µs   ({json_get_us / snap_get_us:.0f}x)")
+
+        json_many_us = timed(lambda: json_get_many(json_path, codes), 10)
+        snap_many_us = timed(lambda: reader.get_many(codes), 500)
+        print(f"批量查询 50 只:  JSON {json_many_us:9.1f}µs   快照 {snap_many_us:9.1f}µs   ({json_many_us / snap_many_us:.0f}x)")
+
+        def zero_copy_scan():
+            seq, view = reader.view()
+            up = int((view["change_pct"] > 0).sum())
+            assert reader.is_current(seq)
+            return up
+
+        scan_us = timed(zero_copy_scan, 500)
+        print(f"零拷贝全市场扫描（统计上涨家数）: {scan_us:9.1f}µs")
+        writer.close()
+
+        torn_path = Path(tmp) / "torn.snap"
+        generations, reads, torn, retries = bench_torn_reads(torn_path, readers=3, duration=2.0)
+        print(f"并发一致性（1 写 3 读，2s）: 写入 {generations} 代  读取 {reads} 次  "
+              f"重试 {retries} 次  撕裂读 {torn} 次")
+        assert torn == 0
+
+
+if __name__ == "__main__":
+    main()
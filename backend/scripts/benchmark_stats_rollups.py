@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析统计汇总表性能对比
+在临时 SQLite 数据库中构造一年的分析会话与智能体结果，对比统计接口的两种实现：
+
+1. 扫描源表（原 StatisticsService）：每次请求对会话/智能体结果全表聚合，
+   平均时长需要把已完成会话全部加载到 Python 计算
+2. 汇总表：读取按日/智能体预聚合的行
+
+并测量增量维护给单次会话写入带来的额外开销，校验两种方式结果一致、汇总表无漂移。
+
+使用方法：
+    python backend/scripts/benchmark_stats_rollups.py
+"""
+
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+# 设置 stdout 编码为 utf-8，解决 Windows 控制台编码问题
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+
+from sqlalchemy import event, func, insert
+from sqlalchemy.orm import Session
+
+from backend.database.database import SessionLocal, init_database
+from backend.database.models import AgentResult, AnalysisSession
+from backend.database.services import SessionService, StatisticsService
+from backend.database.stats_rollup import StatsRollupService, _maintain_rollups
+
+SESSIONS = 30_000
+AGENTS = ['bull', 'bear', 'risk', 'news', 'fundamental', 'technical', 'macro', 'manager']
+DAYS = 365
+
+
+def seed(db):
+    """一年的会话，每个会话 8 个智能体结果"""
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    sessions, results = [], []
+    for i in range(SESSIONS):
+        created = now - timedelta(days=rng.uniform(0, DAYS - 1))
+        status = rng.choices(['completed', 'error', 'interrupted'], [0.8, 0.15, 0.05])[0]
+        sid = f"bench-{i}"
+        sessions.append({
+            "session_id": sid, "stock_code": f"{600000 + rng.randrange(300)}", "stock_name": "基准股票",
+            "status": status, "progress": 100, "current_stage": 4, "start_time": created,
+            "end_time": created + timedelta(seconds=rng.uniform(60, 900)), "created_at": created
+        })
+        for agent in AGENTS:
+            agent_status = 'completed' if rng.random() < 0.9 else 'error'
+            results.append({
+                "session_id": sid, "agent_id": agent, "agent_name": agent.upper(), "status": agent_status,
+                "tokens": rng.randint(500, 5000), "duration_seconds": rng.randint(5, 120), "created_at": created
+            })
+    db.execute(insert(AnalysisSession.__table__), sessions)
+    db.execute(insert(AgentResult.__table__), results)
+    db.commit()
+
+
+def legacy_analysis_stats(db, days):
+    """原实现：扫描会话表，加载已完成会话计算平均时长"""
+    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    total_count = db.query(func.count(AnalysisSession.id)).filter(AnalysisSession.created_at >= cutoff_date).scalar()
+    status_stats = db.query(AnalysisSession.status, func.count(AnalysisSession.id)).filter(
+        AnalysisSession.created_at >= cutoff_date).group_by(AnalysisSession.status).all()
+    completed_sessions = db.query(AnalysisSession).filter(
+        AnalysisSession.created_at >= cutoff_date, AnalysisSession.status == 'completed',
+        AnalysisSession.end_time.isnot(None), AnalysisSession.start_time.isnot(None)).all()
+    durations = [d for d in ((s.end_time - s.start_time).total_seconds() for s in completed_sessions)
+                 if 0 <= d <= 86400]
+    return {
+        'total_count': total_count or 0,
+        'status_distribution': {status: count for status, count in status_stats},
+        'avg_duration_seconds': int(sum(durations) / len(durations)) if durations else 0,
+        'period_days': days
+    }
+
+
+def legacy_agent_stats(db, days):
+    """原实现：按智能体对结果表分组聚合"""
+    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    stats = db.query(
+        AgentResult.agent_id, AgentResult.agent_name, func.count(AgentResult.id).label('total_runs'),
+        func.avg(AgentResult.duration_seconds).label('avg_duration'),
+        func.max(AgentResult.duration_seconds).label('max_duration'),
+        func.sum(AgentResult.tokens).label('total_tokens')
+    ).filter(AgentResult.created_at >= cutoff_date, AgentResult.status == 'completed').group_by(
+        AgentResult.agent_id, AgentResult.agent_name).all()
+    return sorted([{'agent_id': s.agent_id, 'total_runs': s.total_runs, 'max_duration': s.max_duration or 0,
+                    'total_tokens': s.total_tokens or 0} for s in stats], key=lambda s: s['agent_id'])
+
+
+def timed(fn, repeat: int) -> float:
+    """平均每次耗时（毫秒）"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    with redirect_stdout(io.StringIO()):
+        init_database()
+    db = SessionLocal()
+    seed(db)
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        rows = StatsRollupService.rebuild(db)
+    rebuild_seconds = time.perf_counter() - started
+
+    print("=" * 76)
+    print(f"  统计接口对比（{SESSIONS} 个会话，{SESSIONS * len(AGENTS)} 条智能体结果，{DAYS} 天）")
+    print("=" * 76)
+    print(f"全量重建汇总表: {rebuild_seconds:6.2f}s（{rows} 行）")
+
+    for days in (7, DAYS):
+        legacy_ms = timed(lambda: legacy_analysis_stats(db, days), 3)
+        rollup_ms = timed(lambda: StatisticsService.get_analysis_stats(db, days), 50)
+        print(f"分析统计（{days:3d} 天）: 扫描 {legacy_ms:8.2f}ms   汇总表 {rollup_ms:6.2f}ms   ({legacy_ms / rollup_ms:.0f}x)")
+        legacy_ms = timed(lambda: legacy_agent_stats(db, days), 3)
+        rollup_ms = timed(lambda: StatisticsService.get_agent_stats(db, days), 50)
+        print(f"智能体统计（{days:3d} 天）: 扫描 {legacy_ms:8.2f}ms   汇总表 {rollup_ms:6.2f}ms   ({legacy_ms / rollup_ms:.0f}x)")
+
+    # 全部数据都在窗口内时两种实现结果一致
+    legacy = legacy_analysis_stats(db, DAYS + 1)
+    rollup = StatisticsService.get_analysis_stats(db, DAYS + 1)
+    assert legacy == rollup, (legacy, rollup)
+    rollup_agents = sorted(({k: s[k] for k in ('agent_id', 'total_runs', 'max_duration', 'total_tokens')}
+                            for s in StatisticsService.get_agent_stats(db, DAYS + 1)), key=lambda s: s['agent_id'])
+    assert legacy_agent_stats(db, DAYS + 1) == rollup_agents
+
+    # 写入开销：创建会话 + 两次状态更新（每次 flush 同事务累加汇总表）
+    def write_session(i):
+        sid = f"write-{i}"
+        SessionService.create_session(db, sid, "600519", "贵州茅台")
+        SessionService.update_session_status(db, sid, 'running')
+        SessionService.update_session_status(db, sid, 'completed')
+
+    with redirect_stdout(io.StringIO()):
+        write_ms = timed(lambda: write_session(time.perf_counter_ns()), 300)
+
+    check = StatsRollupService.check(db)
+    print(f"一致性校验: {'一致' if check['consistent'] else '存在漂移'}（{check['checked_buckets']} 个桶）")
+    assert check['consistent'], check['drift'][:5]
+
+    # 对照：去掉增量维护后的写入耗时（放在校验之后，这些写入不进汇总表）
+    event.remove(Session, "after_flush", _maintain_rollups)
+    with redirect_stdout(io.StringIO()):
+        base_ms = timed(lambda: write_session(time.perf_counter_ns()), 300)
+    print(f"单个会话写入（创建 + 2 次状态更新）: 无汇总 {base_ms:6.2f}ms   含汇总表维护 {write_ms:6.2f}ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
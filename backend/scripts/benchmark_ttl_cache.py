@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+统一 TTL 缓存性能对比
+模拟多个看板页面同时轮询板块/情绪接口，对比原先各模块自带的字典缓存
+（先查后取，无并发合并、失败不缓存）与 TTLCache 的上游请求次数和响应延迟：
+
+1. 冷启动并发：缓存为空时 N 个客户端同时请求
+2. 持续轮询：缓存周期性过期，统计上游请求次数与 P95 延迟（stale-while-revalidate）
+3. 上游故障：数据源持续报错时的上游请求次数（negative caching）
+4. 异步调用方：事件循环中的并发请求合并
+
+使用方法：
+    python backend/scripts/benchmark_ttl_cache.py
+"""
+
+import asyncio
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+# 设置 stdout 编码为 utf-8，解决 Windows 控制台编码问题
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.utils.ttl_cache import TTLCache
+
+# 看板每次刷新请求的数据
+DASHBOARD_KEYS = ["industry_sectors", "concept_sectors", "sector_fund_flow_今日",
+                  "market_overview", "north_money_flow", "market_sentiment"]
+
+
+class FakeUpstream:
+    """模拟 AKShare 接口：固定延迟，计数，可设置为持续失败"""
+
+    def __init__(self, latency: float, failing: bool = False):
+        self.latency = latency
+        self.failing = failing
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if self.failing:
+            return {"success": False, "data": [], "message": "upstream error"}
+        return {"success": True, "data": [key], "timestamp": time.time()}
+
+
+class LegacyDictCache:
+    """原实现（对照组）：_get_cached / _set_cache，只缓存成功结果"""
+
+    def __init__(self, ttl: float):
+        self._cache = {}
+        self._cache_time = {}
+        self._cache_ttl = ttl
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        if key in self._cache and time.time() - self._cache_time[key] < self._cache_ttl:
+            return self._cache[key]
+        result = loader()
+        if result.get("success"):
+            self._cache[key] = result
+            self._cache_time[key] = time.time()
+        return result
+
+
+def run_clients(get: Callable[[str], Any], clients: int, duration: float, interval: float) -> List[float]:
+    """clients 个线程在 duration 秒内每隔 interval 秒刷新一次看板，返回每次请求的延迟（毫秒）"""
+    latencies: List[float] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while True:
+            for key in DASHBOARD_KEYS:
+                started = time.perf_counter()
+                get(key)
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+            if time.perf_counter() >= deadline:
+                return
+            time.sleep(interval)
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for _ in range(clients):
+            pool.submit(client)
+    return latencies
+
+
+def p95(values: List[float]) -> float:
+    return statistics.quantiles(values, n=20)[-1] if len(values) > 1 else (values[0] if values else 0.0)
+
+
+def bench_cold_start(clients: int, latency: float):
+    legacy_up = FakeUpstream(latency)
+    legacy = LegacyDictCache(ttl=300)
+    run_clients(lambda k: legacy.get_or_load(k, lambda: legacy_up.fetch(k)), clients, 0, 0)
+
+    up = FakeUpstream(latency)
+    cache = TTLCache("bench_cold", ttl=300)
+    run_clients(lambda k: cache.get_or_load(k, lambda: up.fetch(k), cache_if=lambda r: r.get("success")),
+                clients, 0, 0)
+    return legacy_up.calls, up.calls
+
+
+def bench_polling(clients: int, latency: float, ttl: float, duration: float):
+    legacy_up = FakeUpstream(latency)
+    legacy = LegacyDictCache(ttl=ttl)
+    legacy_lat = run_clients(lambda k: legacy.get_or_load(k, lambda: legacy_up.fetch(k)), clients, duration, 0.05)
+
+    up = FakeUpstream(latency)
+    cache = TTLCache("bench_polling", ttl=ttl, stale_ttl=ttl)
+    lat = run_clients(lambda k: cache.get_or_load(k, lambda: up.fetch(k), cache_if=lambda r: r.get("success")),
+                      clients, duration, 0.05)
+    return legacy_up.calls, p95(legacy_lat), up.calls, p95(lat), cache.get_stats()
+
+
+def bench_failing(clients: int, latency: float, duration: float):
+    legacy_up = FakeUpstream(latency, failing=True)
+    legacy = LegacyDictCache(ttl=300)
+    run_clients(lambda k: legacy.get_or_load(k, lambda: legacy_up.fetch(k)), clients, duration, 0.05)
+
+    up = FakeUpstream(latency, failing=True)
+    cache = TTLCache("bench_failing", ttl=300, negative_ttl=1)
+    run_clients(lambda k: cache.get_or_load(k, lambda: up.fetch(k), cache_if=lambda r: r.get("success")),
+                clients, duration, 0.05)
+    return legacy_up.calls, up.calls
+
+
+async def bench_async(clients: int, latency: float):
+    """异步端点：原先直接在事件循环里同步调用（串行阻塞），现在 aget_or_load 在线程中加载并合并"""
+    legacy_up = FakeUpstream(latency)
+    legacy = LegacyDictCache(ttl=300)
+
+    async def legacy_request(key):
+        return legacy.get_or_load(key, lambda: legacy_up.fetch(key))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(legacy_request(k) for _ in range(clients) for k in DASHBOARD_KEYS))
+    legacy_elapsed = time.perf_counter() - started
+
+    up = FakeUpstream(latency)
+    cache = TTLCache("bench_async", ttl=300)
+    started = time.perf_counter()
+    await asyncio.gather(*(cache.aget_or_load(k, lambda k=k: up.fetch(k)) for _ in range(clients) for k in DASHBOARD_KEYS))
+    elapsed = time.perf_counter() - started
+    return legacy_up.calls, legacy_elapsed, up.calls, elapsed
+
+
+def main():
+    latency = 0.2
+    clients = 20
+    print("=" * 76)
+    print(f"  TTL 缓存对比（{clients} 个看板客户端，每次刷新 {len(DASHBOARD_KEYS)} 个接口，上游延迟 {latency * 1000:.0f}ms）")
+    print("=" * 76)
+
+    legacy_calls, calls = bench_cold_start(clients, latency)
+    print(f"冷启动并发:   原实现 上游请求 {legacy_calls:>4} 次   TTLCache {calls:>4} 次")
+
+    legacy_calls, legacy_p95, calls, lat_p95, stats = bench_polling(clients, latency, ttl=1.0, duration=5.0)
+    print(f"持续轮询 5s（TTL 1s）: 原实现 上游 {legacy_calls:>4} 次 P95 {legacy_p95:7.1f}ms   "
+          f"TTLCache 上游 {calls:>4} 次 P95 {lat_p95:7.1f}ms")
+    print(f"    命中 {stats['hits']}  过期命中 {stats['stale_hits']}  合并 {stats['coalesced']}  "
+          f"未命中 {stats['misses']}  后台刷新 {stats['refreshes']}  命中率 {stats['hit_rate']:.1%}")
+
+    legacy_calls, calls = bench_failing(clients, latency, duration=3.0)
+    print(f"上游故障 3s:  原实现 上游请求 {legacy_calls:>4} 次   TTLCache {calls:>4} 次（失败结果缓存 1s）")
+
+    legacy_calls, legacy_elapsed, calls, elapsed = asyncio.run(bench_async(clients, latency))
+    print(f"异步并发请求: 原实现 上游 {legacy_calls:>4} 次 耗时 {legacy_elapsed:6.2f}s（阻塞事件循环）   "
+          f"TTLCache 上游 {calls:>4} 次 耗时 {elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ IcySaint AI - Python 后端服务器
 
 import os
 import sys
+import time
+_import_started = time.perf_counter()
 # 添加项目根目录到Python路径
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
@@ -77,49 +79,9 @@ else:
     load_dotenv()  # 尝试默认加载
     print("⚠️ 使用默认环境变量加载")
 
-# 导入API路由
-from backend.api.news_api import router as news_router
-from backend.api.debate_api import router as debate_router
-from backend.api.trading_api import router as trading_router
-from backend.api.verification_api import router as verification_router
-from backend.api.agents_api import router as agents_router
-from backend.api.agent_config_api import router as agent_config_router
-from backend.api.unified_news_api_endpoint import router as unified_news_router
-from backend.api.documents_api import router as documents_router
-from backend.api.akshare_data_api import router as akshare_router
-from backend.api.agent_logs_api import router as agent_logs_router
-from backend.api.analysis_session_api import router as analysis_session_router  # 分析会话 API
-from backend.api.analysis_session_db_api import router as analysis_session_db_router  # 数据库版会话 API
-from backend.api.backtest_api import router as backtest_router  # 回测API
-from backend.api.strategy_api import router as strategy_router  # 策略API
-from backend.api.llm_config_api import router as llm_config_router  # LLM配置API（智能分析）
-from backend.api.trading_llm_config_api import router as trading_llm_config_router  # 交易LLM配置API（新功能）
-from backend.api.strategy_selection_api import router as strategy_selection_router  # 智能策略选择API
-from backend.api.auto_trading_api import router as auto_trading_router  # 自动交易API
-from backend.api.tracking_api import router as tracking_router  # 持续跟踪API
-from backend.api.verification_api import router as verification_router  # 验证报告API
-from backend.api.kline_api import router as kline_router  # K线API
-from backend.api.scheduler_api import router as scheduler_router  # 调度器API
-from backend.api.data_source_health_api import router as data_source_health_router  # 数据源健康检查API
-from backend.api.dataflow_api import router as dataflow_router  # 数据流监控API
-from backend.api.notification_api import router as notification_router  # 通知服务API
-from backend.api.sse_api import router as sse_router  # SSE实时推送API
-from backend.api.async_analysis_api import router as async_analysis_router  # 异步分析API
-from backend.api.websocket_api import router as websocket_router  # WebSocket实时通知API
-from backend.api.providers_api import router as providers_router  # 数据源Provider API (TDX/Wencai/TA-Lib)
-from backend.api.report_api import router as report_router  # PDF报告生成API
-from backend.api.longhubang_api import router as longhubang_router  # 龙虎榜分析API
-from backend.api.wencai_api import router as wencai_router  # 问财智能选股API
-from backend.api.sector_rotation_api import router as sector_rotation_router  # 板块轮动分析API
-from backend.api.sentiment_api import router as sentiment_router  # 市场情绪分析API
-from backend.api.realtime_monitor_api import router as realtime_monitor_router  # 实时盯盘监控API
-from backend.api.market_data_api import router as market_data_router  # 市场数据API（盘口、排行榜等）
-from backend.api.news_center_api import router as news_center_router  # 统一新闻监控中心API
-from backend.api.cninfo_api import router as cninfo_router  # 巨潮资讯网官方API
-from backend.api.system_api import router as system_router  # 系统设置API
-from backend.api.api_monitor_api import router as api_monitor_router  # API监控API
-from backend.api.datasource_api import router as datasource_router  # 数据源调度器API
-from backend.api.alert_api import router as alert_router  # 预警服务API
+# 导入API路由清单（路由模块在首次请求时才导入，见 backend/api/router_manifest.py）
+from backend.api.router_manifest import LazyRouterLoader, LazyRouterMiddleware
+from backend.utils.metrics import MetricsMiddleware, timed
 
 # ==================== 配置 ====================
 
@@ -222,6 +184,9 @@ async def lifespan(app: FastAPI):
     
     print("✅ HTTP连接池初始化成功")
 
+    # 启动导入耗时报告（模块导入耗时、已加载路由及其引入的重量级依赖、进程内存）
+    print(router_loader.format_report(_server_import_seconds))
+
     # 初始化 Redis 连接（用于异步任务和SSE）
     try:
         from backend.services.async_task.redis_client import redis_client
@@ -233,187 +198,84 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Redis 初始化失败: {e}，使用内存降级模式")
 
-    # 启动交易调度器（可选，根据环境变量控制）
-    import os
-    if os.getenv("ENABLE_SCHEDULER", "false").lower() == "true":
-        try:
-            from backend.services.scheduler_service import start_scheduler
-            start_scheduler()
-            print("✅ 交易调度器已启动")
-        except Exception as e:
-            print(f"⚠️ 交易调度器启动失败: {e}")
-    
-    # 启动数据清理调度器（默认启动）
-    if os.getenv("ENABLE_DATA_CLEANUP", "true").lower() == "true":
-        try:
-            from backend.dataflows.data_cleanup_scheduler import start_cleanup_scheduler
-            start_cleanup_scheduler()
-            print("✅ 数据清理调度器已启动")
-        except Exception as e:
-            print(f"⚠️ 数据清理调度器启动失败: {e}")
-
-    # 启动后台新闻服务（默认启动）
-    # 该服务使用独立进程池处理新闻请求，完全不阻塞FastAPI主事件循环
-    if os.getenv("ENABLE_BACKGROUND_NEWS", "true").lower() == "true":
-        try:
-            from backend.services.background_news_service import background_news_service
-            await background_news_service.start()
-            print("✅ 后台新闻服务已启动（独立进程池模式）")
-        except Exception as e:
-            print(f"⚠️ 后台新闻服务启动失败: {e}")
-
-    # 启动统一后台数据更新服务（默认禁用）
-    # 该服务会自动为所有监控股票调用48个接口，非常耗时
-    # 如需启用，请设置环境变量 ENABLE_DATA_UPDATE_SERVICE=true
-    if os.getenv("ENABLE_DATA_UPDATE_SERVICE", "false").lower() == "true":
-        try:
-            from backend.services.unified_data_update_service import start_background_update_service
-            start_background_update_service()
-            print("✅ 统一后台数据更新服务已启动")
-        except Exception as e:
-            print(f"⚠️ 统一后台数据更新服务启动失败: {e}")
-
-    # 启动实时盯盘监控服务（默认禁用）
-    # 该服务提供实时股票监控和AI决策功能
-    # 如需启用，请设置环境变量 ENABLE_REALTIME_MONITOR=true
-    if os.getenv("ENABLE_REALTIME_MONITOR", "false").lower() == "true":
-        try:
-            from backend.services.realtime_monitor_service import get_realtime_monitor_service
-            realtime_monitor = get_realtime_monitor_service()
-            # 尝试加载保存的配置并自动启动
-            realtime_monitor.load_config()
-            if realtime_monitor.config.get("auto_start", False):
-                realtime_monitor.start_monitoring()
-                print("✅ 实时盯盘监控服务已启动（自动启动模式）")
-            else:
-                print("✅ 实时盯盘监控服务已初始化（等待手动启动）")
-        except Exception as e:
-            print(f"⚠️ 实时盯盘监控服务启动失败: {e}")
-
-    # 启动统一新闻监控中心（默认启动）
-    # 该服务整合所有新闻数据源，提供统一缓存和实时推送
-    if os.getenv("ENABLE_NEWS_MONITOR_CENTER", "true").lower() == "true":
-        try:
-            from backend.services.news_center import get_news_monitor_center
-            news_monitor = get_news_monitor_center()
-            await news_monitor.start()
-            print("✅ 统一新闻监控中心已启动")
-        except Exception as e:
-            print(f"⚠️ 统一新闻监控中心启动失败: {e}")
-
-    # 启动TDX数据缓存服务（默认启动）
-    # 该服务在后台定时获取TDX数据，缓存到服务器端文件
-    # 所有API请求直接读取缓存，不阻塞用户请求
-    if os.getenv("ENABLE_TDX_CACHE_SERVICE", "true").lower() == "true":
+    # WebSocket 跨进程推送中继：后台服务在其他进程产生的新闻/预警经 Redis 转发给本进程的连接
+    try:
+        from backend.api.websocket_api import start_event_relay
+        if await start_event_relay():
+            print("✅ WebSocket 推送中继已启动")
+    except Exception as e:
+        print(f"⚠️ WebSocket 推送中继启动失败: {e}")
+
+    # 启动后台服务（调度器、新闻监控、盯盘、TDX缓存、预警监控、通知投递等）
+    # PROCESS_ROLE=all（默认）在本进程内运行，api 只处理请求，worker 由 worker.py 单独运行；
+    # 后台服务需先拿到本机文件锁，多个 uvicorn worker 时只有一个进程运行，其余待命
+    from backend.services.background_worker import get_background_worker, get_process_role
+    process_role = get_process_role()
+    if process_role == "all":
+        background_worker = get_background_worker()
+        await background_worker.start()
+        if background_worker.is_leader:
+            print("✅ 后台服务已在本进程启动")
+        else:
+            print("⏸️ 后台服务由其他进程运行，本进程待命")
+    else:
+        print(f"ℹ️ 进程角色: {process_role}，后台服务由 worker 进程运行")
         try:
-            from backend.services.tdx_cache_service import get_tdx_cache_service
-            tdx_cache = get_tdx_cache_service()
-            tdx_cache.start()
-            print("✅ TDX数据缓存服务已启动")
-        except Exception as e:
-            print(f"⚠️ TDX数据缓存服务启动失败: {e}")
+            from backend.services.async_task.redis_client import redis_client
+            if not redis_client.is_redis_available:
+                print("⚠️ Redis 不可用，API 进程只能读取同机 worker 进程的新闻快照，收不到新闻/预警推送，"
+                      "调度器/盯盘/新闻中心的控制接口返回 409")
+        except Exception:
+            pass
 
-    # 启动股票预警监控服务（默认启动）
-    # 包括：公告监控、行情异动检测
-    if os.getenv("ENABLE_ALERT_MONITOR", "true").lower() == "true":
-        try:
-            # 初始化预警服务
-            from backend.services.alert_service import get_alert_service
-            alert_service = get_alert_service()
-            print("✅ 预警服务已初始化")
-
-            # 启动公告监控服务
-            from backend.services.announcement_monitor_service import get_announcement_monitor_service
-            announcement_monitor = get_announcement_monitor_service()
-            await announcement_monitor.start()
-            print("✅ 公告监控服务已启动")
-
-            # 启动行情异动检测服务
-            from backend.services.price_monitor_service import get_price_monitor_service
-            price_monitor = get_price_monitor_service()
-            await price_monitor.start()
-            print("✅ 行情异动检测服务已启动")
-        except Exception as e:
-            print(f"⚠️ 预警监控服务启动失败: {e}")
+    # 初始化回测任务执行器（回测在独立进程池中运行，首次提交任务时启动进程池）
+    # 每个 API 进程各自执行自己提交的回测，无需选主：任务记录执行进程与心跳，
+    # 启动时只把执行进程已退出的未完成任务标记为中断，取消请求经数据库转给执行进程
+    try:
+        from backend.backtest.job_runner import get_backtest_job_runner
+        get_backtest_job_runner()
+        print("✅ 回测任务执行器已初始化")
+    except Exception as e:
+        print(f"⚠️ 回测任务执行器初始化失败: {e}")
 
     # yield 控制权给应用
     yield
 
-    # 停止调度器
-    try:
-        from backend.services.scheduler_service import stop_scheduler
-        stop_scheduler()
-        print("✅ 交易调度器已停止")
-    except:
-        pass
-
-    # 停止数据清理调度器
-    try:
-        from backend.dataflows.data_cleanup_scheduler import stop_cleanup_scheduler
-        stop_cleanup_scheduler()
-        print("✅ 数据清理调度器已停止")
-    except:
-        pass
-
-    # 停止后台新闻服务
-    try:
-        from backend.services.background_news_service import background_news_service
-        await background_news_service.stop()
-        print("✅ 后台新闻服务已停止")
-    except:
-        pass
-
-    # 停止统一后台数据更新服务
-    try:
-        from backend.services.unified_data_update_service import stop_background_update_service
-        stop_background_update_service()
-        print("✅ 统一后台数据更新服务已停止")
-    except:
-        pass
-
-    # 停止实时盯盘监控服务
+    # 停止后台服务（仅本进程持有后台服务时）
     try:
-        from backend.services.realtime_monitor_service import get_realtime_monitor_service
-        realtime_monitor = get_realtime_monitor_service()
-        if realtime_monitor.is_running:
-            realtime_monitor.stop_monitoring()
-            print("✅ 实时盯盘监控服务已停止")
-    except:
-        pass
+        from backend.services.background_worker import get_background_worker
+        await get_background_worker().stop()
+    except Exception as e:
+        print(f"⚠️ 后台服务停止失败: {e}")
 
-    # 停止统一新闻监控中心
+    # 停止回测任务执行器
     try:
-        from backend.services.news_center import get_news_monitor_center
-        news_monitor = get_news_monitor_center()
-        await news_monitor.stop()
-        print("✅ 统一新闻监控中心已停止")
+        from backend.backtest.job_runner import get_backtest_job_runner
+        await get_backtest_job_runner().stop()
+        print("✅ 回测任务执行器已停止")
     except:
         pass
 
-    # 停止TDX数据缓存服务
+    # 关闭全市场选股进程池
     try:
-        from backend.services.tdx_cache_service import get_tdx_cache_service
-        tdx_cache = get_tdx_cache_service()
-        tdx_cache.stop()
-        print("✅ TDX数据缓存服务已停止")
+        from backend.strategies.screener import get_strategy_screener
+        await get_strategy_screener().stop()
+        print("✅ 全市场选股服务已停止")
     except:
         pass
 
-    # 停止预警监控服务
+    # 写入缓冲中的会话日志
     try:
-        from backend.services.announcement_monitor_service import get_announcement_monitor_service
-        announcement_monitor = get_announcement_monitor_service()
-        await announcement_monitor.stop()
-        print("✅ 公告监控服务已停止")
+        from backend.services.async_task.log_streamer import log_streamer
+        await log_streamer.flush_all()
     except:
         pass
 
+    # 停止 WebSocket 推送中继
     try:
-        from backend.services.price_monitor_service import get_price_monitor_service
-        price_monitor = get_price_monitor_service()
-        await price_monitor.stop()
-        print("✅ 行情异动检测服务已停止")
-    except:
+        from backend.api.websocket_api import stop_event_relay
+        await stop_event_relay()
+    except Exception:
         pass
 
     # 关闭 Redis 连接
@@ -448,49 +310,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 注册API路由
-app.include_router(news_router)
-app.include_router(debate_router)
-app.include_router(trading_router)
-app.include_router(verification_router)
-app.include_router(agents_router)
-app.include_router(agent_config_router)  # 智能体配置API
-app.include_router(unified_news_router)  # 统一新闻API
-app.include_router(documents_router)  # 文档API
-app.include_router(akshare_router)  # AKShare数据 API
-app.include_router(agent_logs_router)  # 智能体日志流API
-app.include_router(analysis_session_router)  # 分析会话 API
-app.include_router(analysis_session_db_router)  # 数据库版会话 API
-app.include_router(backtest_router)  # 回测API
-app.include_router(strategy_router)  # 策略API
-app.include_router(llm_config_router)  # LLM配置API（智能分析）
-app.include_router(trading_llm_config_router)  # 交易LLM配置API（新功能）
-app.include_router(strategy_selection_router)  # 智能策略选择API
-app.include_router(auto_trading_router)  # 自动交易API
-app.include_router(tracking_router)  # 持续跟踪API
-app.include_router(verification_router)  # 验证报告API
-app.include_router(kline_router)  # K线API
-app.include_router(scheduler_router)  # 调度器API
-app.include_router(data_source_health_router)  # 数据源健康检查API
-app.include_router(dataflow_router)  # 数据流监控API
-app.include_router(notification_router)  # 通知服务API
-app.include_router(sse_router)  # SSE实时推送API
-app.include_router(async_analysis_router)  # 异步分析API
-app.include_router(websocket_router)  # WebSocket实时通知API
-app.include_router(providers_router)  # 数据源Provider API (TDX/Wencai/TA-Lib)
-app.include_router(report_router)  # PDF报告生成API
-app.include_router(longhubang_router)  # 龙虎榜分析API
-app.include_router(wencai_router)  # 问财智能选股API
-app.include_router(sector_rotation_router)  # 板块轮动分析API
-app.include_router(sentiment_router)  # 市场情绪分析API
-app.include_router(realtime_monitor_router)  # 实时盯盘监控API
-app.include_router(market_data_router)  # 市场数据API（盘口、排行榜等）
-app.include_router(news_center_router)  # 统一新闻监控中心API
-app.include_router(cninfo_router)  # 巨潮资讯网官方API
-app.include_router(system_router)  # 系统设置API
-app.include_router(api_monitor_router)  # API监控API
-app.include_router(datasource_router)  # 数据源调度器API
-app.include_router(alert_router)  # 预警服务API
+# 注册API路由：按清单挂载，LAZY_ROUTERS=false 时启动即全部导入，
+# DISABLED_FEATURE_GROUPS 中的功能组（system/analysis/news/market/trading）不挂载
+router_loader = LazyRouterLoader(app)
+router_loader.mount()
+app.add_middleware(LazyRouterMiddleware, loader=router_loader)
+# 最外层：接口耗时按路由模板统计（含按需加载路由的耗时）
+app.add_middleware(MetricsMiddleware)
 
 
 # ==================== 数据模型 ====================
@@ -549,7 +375,14 @@ class CalibrationRunRequest(BaseModel):
 
 # ==================== AI API 端点 ====================
 
+def _llm_failed(result: Dict[str, Any]) -> bool:
+    """代理以返回值表示失败：success=False、超时/默认降级响应、余额不足都计为失败"""
+    return bool(not result.get("success") or result.get("timeout") or result.get("quota_exceeded")
+                or result.get("fallback_level") == 99)
+
+
 @app.post("/api/ai/gemini")
+@timed("llm", provider="gemini", model=lambda request: request.model, failed=_llm_failed)
 async def gemini_api(request: GeminiRequest):
     """Google Gemini API 代理"""
     try:
@@ -596,6 +429,7 @@ async def gemini_api(request: GeminiRequest):
         return {"success": False, "error": error_msg}
 
 @app.post("/api/ai/deepseek")
+@timed("llm", provider="deepseek", model=lambda request: request.model, failed=_llm_failed)
 async def deepseek_api(request: DeepSeekRequest):
     """DeepSeek API 代理"""
     try:
@@ -671,6 +505,7 @@ async def deepseek_api(request: DeepSeekRequest):
         return {"success": False, "error": error_msg}
 
 @app.post("/api/ai/qwen")
+@timed("llm", provider="qwen", model=lambda request: request.model, failed=_llm_failed)
 async def qwen_api(request: QwenRequest):
     """通义千问 API 代理"""
     try:
@@ -737,6 +572,7 @@ async def qwen_api(request: QwenRequest):
         return {"success": False, "error": error_msg}
 
 @app.post("/api/ai/siliconflow")
+@timed("llm", provider="siliconflow", model=lambda request: request.model, failed=_llm_failed)
 async def siliconflow_api(request: SiliconFlowRequest):
     """硅基流动 API 代理"""
     # 使用全局并发控制器限制并发请求
@@ -2587,6 +2423,25 @@ async def health_check():
     """健康检查端点"""
     return {"status": "healthy"}
 
+@app.get("/api/startup/profile")
+async def startup_profile():
+    """启动与路由加载报告：模块导入耗时、已加载/待加载/已禁用路由、重量级依赖、进程内存"""
+    return router_loader.get_report(_server_import_seconds)
+
+@app.get("/api/worker/status")
+async def worker_status():
+    """后台服务进程状态：本进程角色，以及持锁后台进程发布的心跳与各服务状态"""
+    from backend.services.background_worker import get_background_worker, get_worker_state
+    local = get_background_worker()
+    return {
+        "role": local.role,
+        "pid": os.getpid(),
+        "is_leader": local.is_leader,
+        "worker": await get_worker_state()
+    }
+
+_server_import_seconds = time.perf_counter() - _import_started
+
 # ==================== 启动服务器 ====================
 
 if __name__ == "__main__":
@@ -2611,11 +2466,29 @@ if __name__ == "__main__":
     print("🎯 使用 scripts/dev.py 可一键启动前后端！")
     print("-" * 60)
     
+    # PROCESS_ROLE=worker 时只运行后台服务
+    from backend.services.background_worker import get_process_role
+    if get_process_role() == "worker":
+        from backend.worker import main as worker_main
+        worker_main()
+        sys.exit(0)
+
     # 启动服务器
-    uvicorn.run(
-        app,  # 直接使用app对象而不是字符串导入
-        host="0.0.0.0",
-        port=8000,
-        reload=False,  # 关闭自动重载以避免CORS问题
-        log_level="info"
-    )
+    # API_WORKERS>1 时以多进程运行（需以模块路径导入 app），建议配合 PROCESS_ROLE=api + 独立 worker 进程
+    api_workers = int(os.getenv("API_WORKERS", "1"))
+    if api_workers > 1:
+        uvicorn.run(
+            "backend.server:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=api_workers,
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            app,  # 直接使用app对象而不是字符串导入
+            host="0.0.0.0",
+            port=8000,
+            reload=False,  # 关闭自动重载以避免CORS问题
+            log_level="info"
+        )
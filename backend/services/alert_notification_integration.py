@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 from backend.utils.logging_config import get_logger
 from backend.database.services import AlertHistoryService, AlertRuleService
 from backend.services.notification_service import get_notification_service, NotificationConfig
+from backend.services.notification_dispatcher import get_notification_dispatcher
 
 logger = get_logger("alert_notification")
 
@@ -95,13 +96,11 @@ class AlertNotificationIntegration:
                 'message': '预警已保存，无需发送通知'
             }
 
-        # 3. 发送通知
-        notification_results = []
+        # 3. 写入发件箱（后台按渠道合并为摘要投递，失败自动重试）
+        dispatcher = get_notification_dispatcher()
+        queued_count = 0
         for item in alerts_to_notify:
             alert = item['alert']
-            channels = item['channels']
-
-            # 格式化单条预警为列表格式
             alert_list = [{
                 'title': alert.get('title', ''),
                 'message': alert.get('message', ''),
@@ -111,30 +110,23 @@ class AlertNotificationIntegration:
             }]
 
             try:
-                result = await self.notification_service.send_alert_notification(
+                if dispatcher.enqueue(
                     alerts=alert_list,
-                    channels=channels,
+                    channels=item['channels'],
                     email_recipients=email_recipients
-                )
-                notification_results.append(result)
+                ):
+                    queued_count += 1
             except Exception as e:
-                logger.error(f"❌ 发送通知失败: {e}")
-                notification_results.append({
-                    'success': False,
-                    'message': str(e)
-                })
-
-        # 4. 统计结果
-        success_count = sum(1 for r in notification_results if r.get('success'))
+                logger.error(f"❌ 预警加入发件箱失败: {e}")
 
-        logger.info(f"📤 通知发送完成: {success_count}/{len(alerts_to_notify)} 成功")
+        logger.info(f"📤 通知已加入发件箱: {queued_count}/{len(alerts_to_notify)}")
 
         return {
             'success': True,
             'saved_count': saved_count,
-            'notified_count': success_count,
+            'notified_count': queued_count,
             'total_alerts': len(alerts),
-            'message': f'保存{saved_count}条预警，发送{success_count}条通知'
+            'message': f'保存{saved_count}条预警，{queued_count}条通知已加入发件箱'
         }
 
     async def send_batch_alerts(
@@ -267,10 +267,10 @@ class AlertService:
             logger.debug(f"WebSocket push failed: {e}")
 
     async def _send_notification(self, alert: Dict):
-        """发送通知（邮件/微信等）"""
+        """发送通知（写入发件箱，按渠道合并后投递）"""
         try:
-            from backend.services.notification_service import get_notification_service
-            notification_service = get_notification_service()
+            from backend.services.notification_dispatcher import get_notification_dispatcher
+            dispatcher = get_notification_dispatcher()
 
             alerts = [{
                 'title': alert.get('title', ''),
@@ -280,11 +280,10 @@ class AlertService:
                 'suggestion': alert.get('suggestion', '')
             }]
 
-            result = await notification_service.send_alert_notification(alerts)
-            if result.get('success'):
-                logger.info(f"Alert notification sent: {alert.get('title', '')[:50]}")
+            if dispatcher.enqueue(alerts):
+                logger.info(f"Alert notification queued: {alert.get('title', '')[:50]}")
         except Exception as e:
-            logger.debug(f"Notification send failed: {e}")
+            logger.debug(f"Notification enqueue failed: {e}")
 
     def get_alerts(
         self,
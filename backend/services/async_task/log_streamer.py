@@ -1,7 +1,12 @@
 """
 实时日志流服务
 支持日志记录、存储和实时推送
+
+日志按会话缓冲，每 FLUSH_INTERVAL 秒或攒够 BATCH_SIZE 条时批量写入：
+一次 INCRBY 分配连续序号，一个 pipeline 完成 LPUSH/LTRIM/EXPIRE，并只发布一条 log_batch 消息。
+序号按会话单调递增，SSE 以序号作为事件 ID，断线重连时从 Last-Event-ID 之后续传。
 """
+import asyncio
 import json
 import logging
 from typing import Optional, List, Dict, Any
@@ -39,9 +44,18 @@ class LogStreamer:
     LOG_EXPIRE = 3600 * 24  # 24小时
     # 最大日志条数
     MAX_LOGS = 1000
+    # 日志序号键前缀
+    SEQ_PREFIX = "logs:seq:"
+    # 批量写入：间隔（秒）与条数
+    FLUSH_INTERVAL = 0.05
+    BATCH_SIZE = 50
 
     def __init__(self, redis: RedisClient = None):
         self.redis = redis or redis_client
+        self._buffers: Dict[str, List[Dict]] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        self._flush_lock = asyncio.Lock()
+        self._stats = {"entries": 0, "batches": 0}
 
     async def log(
         self,
@@ -53,7 +67,7 @@ class LogStreamer:
         extra: Dict = None
     ):
         """
-        记录并推送日志
+        记录日志（写入会话缓冲区，随批量写入推送）
 
         Args:
             session_id: 会话ID
@@ -72,28 +86,59 @@ class LogStreamer:
             **(extra or {})
         }
 
-        log_key = f"{self.LOG_PREFIX}{session_id}"
-
-        # 存储日志
-        await self.redis.lpush(log_key, json.dumps(log_entry, ensure_ascii=False))
-
-        # 限制日志数量
-        await self.redis.client.ltrim(log_key, 0, self.MAX_LOGS - 1) if hasattr(self.redis.client, 'ltrim') else None
-
-        # 设置过期时间
-        await self.redis.expire(log_key, self.LOG_EXPIRE)
-
-        # 实时推送
-        channel = f"{self.CHANNEL_PREFIX}{session_id}"
-        await self.redis.publish(channel, json.dumps({
-            "event": "log",
-            "data": log_entry
-        }, ensure_ascii=False))
+        buffer = self._buffers.setdefault(session_id, [])
+        buffer.append(log_entry)
+        if len(buffer) >= self.BATCH_SIZE:
+            await self.flush(session_id)
+        elif session_id not in self._flush_tasks:
+            self._flush_tasks[session_id] = asyncio.create_task(self._flush_later(session_id))
 
         # 同时记录到 Python logger
         log_func = getattr(logger, level.value if isinstance(level, LogLevel) else level, logger.info)
         log_func(f"[{session_id}] {message}")
 
+    async def _flush_later(self, session_id: str):
+        try:
+            await asyncio.sleep(self.FLUSH_INTERVAL)
+        finally:
+            self._flush_tasks.pop(session_id, None)
+        await self.flush(session_id)
+
+    async def flush(self, session_id: str):
+        """把会话缓冲区中的日志批量写入并推送"""
+        try:
+            # 串行化写入，保证列表顺序与序号一致
+            async with self._flush_lock:
+                entries = self._buffers.pop(session_id, None)
+                if not entries:
+                    return
+                last_seq = await self.redis.incrby(f"{self.SEQ_PREFIX}{session_id}", len(entries))
+                first_seq = last_seq - len(entries) + 1
+                for offset, entry in enumerate(entries):
+                    entry["seq"] = first_seq + offset
+
+                log_key = f"{self.LOG_PREFIX}{session_id}"
+                channel = f"{self.CHANNEL_PREFIX}{session_id}"
+                pipe = self.redis.pipeline()
+                pipe.lpush(log_key, *[json.dumps(e, ensure_ascii=False) for e in entries])
+                pipe.ltrim(log_key, 0, self.MAX_LOGS - 1)
+                pipe.expire(log_key, self.LOG_EXPIRE)
+                pipe.expire(f"{self.SEQ_PREFIX}{session_id}", self.LOG_EXPIRE)
+                pipe.publish(channel, json.dumps({
+                    "event": "log_batch",
+                    "data": entries
+                }, ensure_ascii=False))
+                await pipe.execute()
+                self._stats["entries"] += len(entries)
+                self._stats["batches"] += 1
+        except Exception as e:
+            logger.error(f"[{session_id}] 日志批量写入失败: {e}")
+
+    async def flush_all(self):
+        """写入所有会话的缓冲日志（关闭服务前调用）"""
+        for session_id in list(self._buffers):
+            await self.flush(session_id)
+
     async def debug(self, session_id: str, message: str, **kwargs):
         """记录 DEBUG 日志"""
         await self.log(session_id, LogLevel.DEBUG, message, **kwargs)
@@ -143,6 +188,39 @@ class LogStreamer:
 
         return result
 
+    async def get_logs_since(self, session_id: str, last_seq: int) -> List[Dict]:
+        """
+        获取序号大于 last_seq 的日志（按序号升序），用于 SSE 断线续传
+
+        列表按新到旧存储，从头分页读取，遇到 last_seq 即停止，不读取整个列表
+        """
+        log_key = f"{self.LOG_PREFIX}{session_id}"
+        result = []
+        start, page = 0, 100
+        while start < self.MAX_LOGS:
+            logs = await self.redis.lrange(log_key, start, start + page - 1)
+            for log_str in logs:
+                try:
+                    log_entry = json.loads(log_str)
+                except json.JSONDecodeError:
+                    continue
+                if log_entry.get("seq", 0) <= last_seq:
+                    result.reverse()
+                    return result
+                result.append(log_entry)
+            if len(logs) < page:
+                break
+            start += page
+        result.reverse()
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "buffered": sum(len(b) for b in self._buffers.values()),
+            "sessions": len(self._buffers)
+        }
+
     async def get_log_count(self, session_id: str) -> int:
         """获取日志总数"""
         log_key = f"{self.LOG_PREFIX}{session_id}"
@@ -167,6 +245,9 @@ class LogStreamer:
             event_type: 事件类型
             data: 事件数据
         """
+        # 先写入缓冲的日志，保证事件与日志的先后顺序
+        if session_id in self._buffers:
+            await self.flush(session_id)
         channel = f"{self.CHANNEL_PREFIX}{session_id}"
         await self.redis.publish(channel, json.dumps({
             "event": event_type,
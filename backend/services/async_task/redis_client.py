@@ -3,142 +3,403 @@ Redis 客户端封装
 支持连接池、自动重连、降级到内存模式
 """
 import asyncio
+import heapq
 import json
 import logging
-from typing import Optional, Any, Dict, List
-from datetime import datetime, timedelta
+import os
+import time
+from collections import deque
+from itertools import islice
+from typing import Optional, Any, Dict, List, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
 
 class MemoryFallback:
-    """内存降级存储，当 Redis 不可用时使用"""
+    """
+    内存降级存储，当 Redis 不可用时使用
+
+    - 列表基于 deque，两端进出均为 O(1)，长度超过上限时丢弃最早写入的一端（MEMORY_FALLBACK_MAX_LIST）
+    - BRPOP/BLPOP 阻塞等待由写入唤醒，不轮询；多个等待者按先来先服务
+    - 过期键在访问时检查，并由写操作顺带按过期时间堆批量清理
+    - 发布订阅为每个订阅者单独排队（扇出），慢订阅者只丢弃自己最旧的消息，不阻塞发布方
+    """
+
+    SWEEP_INTERVAL = 1.0    # 过期键批量清理的最小间隔（秒）
 
-    def __init__(self):
+    def __init__(self, max_list_length: int = None, max_pending_messages: int = None):
         self._data: Dict[str, Any] = {}
-        self._lists: Dict[str, List] = {}
-        self._pubsub_callbacks: Dict[str, List] = {}
-        self._expiry: Dict[str, datetime] = {}
+        self._lists: Dict[str, deque] = {}
+        self._subscribers: Dict[str, Set['MemoryPubSub']] = {}
+        self._waiters: Dict[str, deque] = {}
+        self._expiry: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._last_sweep = 0.0
+        self.max_list_length = max_list_length or int(os.getenv("MEMORY_FALLBACK_MAX_LIST", "10000"))
+        self.max_pending_messages = max_pending_messages or int(os.getenv("MEMORY_PUBSUB_MAX_PENDING", "1000"))
+        self._stats = {"list_dropped": 0, "messages_dropped": 0, "expired": 0}
+
+    # ==================== 过期 ====================
+
+    def _alive(self, key: str) -> bool:
+        """键存在且未过期（已过期的键顺带删除）"""
+        deadline = self._expiry.get(key)
+        if deadline is not None and time.monotonic() >= deadline:
+            self._remove(key)
+            self._stats["expired"] += 1
+            return False
+        return key in self._data or key in self._lists
+
+    def _remove(self, key: str) -> bool:
+        existed = self._data.pop(key, None) is not None
+        existed = self._lists.pop(key, None) is not None or existed
+        self._expiry.pop(key, None)
+        return existed
+
+    def _sweep(self):
+        """按过期时间堆清理已过期的键（堆中可能有已被覆盖的旧记录，以 _expiry 为准）"""
+        now = time.monotonic()
+        if now - self._last_sweep < self.SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            deadline, key = heapq.heappop(heap)
+            if self._expiry.get(key) == deadline:
+                self._remove(key)
+                self._stats["expired"] += 1
+
+    def _set_expiry(self, key: str, seconds: float):
+        deadline = time.monotonic() + seconds
+        self._expiry[key] = deadline
+        heapq.heappush(self._expiry_heap, (deadline, key))
+
+    # ==================== 字符串 / 哈希 ====================
 
     async def get(self, key: str) -> Optional[str]:
-        self._check_expiry(key)
+        if not self._alive(key):
+            return None
         return self._data.get(key)
 
     async def set(self, key: str, value: str, ex: int = None):
+        self._sweep()
+        self._lists.pop(key, None)
         self._data[key] = value
+        # 与 Redis 一致：不带 ex 的 SET 清除原有过期时间
+        self._expiry.pop(key, None)
         if ex:
-            self._expiry[key] = datetime.now() + timedelta(seconds=ex)
+            self._set_expiry(key, ex)
+        return True
+
+    async def incrby(self, key: str, amount: int = 1) -> int:
+        self._sweep()
+        value = int(self._data.get(key) or 0) if self._alive(key) else 0
+        value += amount
+        self._data[key] = str(value)
+        return value
+
+    async def incr(self, key: str) -> int:
+        return await self.incrby(key, 1)
 
     async def hset(self, key: str, mapping: dict = None, **kwargs):
-        if key not in self._data:
+        self._sweep()
+        if not self._alive(key) or not isinstance(self._data.get(key), dict):
             self._data[key] = {}
-        if mapping:
-            self._data[key].update(mapping)
-        self._data[key].update(kwargs)
+        fields = {**(mapping or {}), **kwargs}
+        added = sum(1 for f in fields if f not in self._data[key])
+        self._data[key].update(fields)
+        return added
 
     async def hget(self, key: str, field: str) -> Optional[str]:
-        if key in self._data and isinstance(self._data[key], dict):
+        if self._alive(key) and isinstance(self._data.get(key), dict):
             return self._data[key].get(field)
         return None
 
     async def hgetall(self, key: str) -> dict:
-        if key in self._data and isinstance(self._data[key], dict):
-            return self._data[key]
+        if self._alive(key) and isinstance(self._data.get(key), dict):
+            return dict(self._data[key])
         return {}
 
+    # ==================== 列表 ====================
+
+    def _list(self, key: str) -> deque:
+        if not self._alive(key) or key not in self._lists:
+            self._data.pop(key, None)
+            self._lists[key] = deque(maxlen=self.max_list_length)
+        return self._lists[key]
+
+    def _push(self, key: str, values, left: bool) -> int:
+        self._sweep()
+        items = self._list(key)
+        overflow = len(items) + len(values) - self.max_list_length
+        if overflow > 0:
+            dropped = self._stats["list_dropped"]
+            self._stats["list_dropped"] += overflow
+            if dropped == 0 or dropped // 1000 != self._stats["list_dropped"] // 1000:
+                logger.warning(f"MemoryFallback list {key} reached {self.max_list_length} items, "
+                               f"{self._stats['list_dropped']} oldest items dropped so far")
+        if left:
+            items.extendleft(values)
+        else:
+            items.extend(values)
+        for _ in values:
+            if not self._wake(key):
+                break
+        return len(items)
+
+    def _pop(self, key: str, right: bool):
+        if not self._alive(key):
+            return None
+        items = self._lists.get(key)
+        if not items:
+            return None
+        value = items.pop() if right else items.popleft()
+        if not items:
+            self._remove(key)   # 与 Redis 一致：空列表即不存在
+        return value
+
+    def _wake(self, key: str) -> bool:
+        """唤醒一个等待该列表的阻塞弹出者"""
+        waiters = self._waiters.get(key)
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                _resolve(future)
+                return True
+        return False
+
+    async def _blocking_pop(self, keys, timeout: float, right: bool) -> Optional[tuple]:
+        """BRPOP/BLPOP：按键顺序弹出第一个非空列表；都为空时等待写入唤醒，timeout=0 表示一直等待"""
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        while True:
+            for key in keys:
+                value = self._pop(key, right)
+                if value is not None:
+                    return (key, value)
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            future = loop.create_future()
+            for key in keys:
+                self._waiters.setdefault(key, deque()).append(future)
+            try:
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                for key in keys:
+                    waiters = self._waiters.get(key)
+                    if waiters is None:
+                        continue
+                    try:
+                        waiters.remove(future)
+                    except ValueError:
+                        pass
+                    if not waiters:
+                        del self._waiters[key]
+                    elif self._lists.get(key):
+                        # 本次被其他键唤醒，该键上仍有数据时交给下一个等待者
+                        self._wake(key)
+
     async def lpush(self, key: str, *values):
-        if key not in self._lists:
-            self._lists[key] = []
-        for v in values:
-            self._lists[key].insert(0, v)
+        return self._push(key, values, left=True)
 
     async def rpush(self, key: str, *values):
-        if key not in self._lists:
-            self._lists[key] = []
-        self._lists[key].extend(values)
-
-    async def brpop(self, key: str, timeout: int = 0) -> Optional[tuple]:
-        if key in self._lists and self._lists[key]:
-            return (key, self._lists[key].pop())
-        if timeout > 0:
-            await asyncio.sleep(min(timeout, 1))
-        return None
+        return self._push(key, values, left=False)
+
+    async def lpop(self, key: str) -> Optional[str]:
+        return self._pop(key, right=False)
+
+    async def rpop(self, key: str) -> Optional[str]:
+        return self._pop(key, right=True)
+
+    async def brpop(self, keys, timeout: int = 0) -> Optional[tuple]:
+        return await self._blocking_pop(keys, timeout, right=True)
+
+    async def blpop(self, keys, timeout: int = 0) -> Optional[tuple]:
+        return await self._blocking_pop(keys, timeout, right=False)
+
+    @staticmethod
+    def _range(length: int, start: int, end: int) -> Tuple[int, int]:
+        """Redis 风格的闭区间下标（支持负数）转换为 [start, stop)"""
+        if start < 0:
+            start = max(length + start, 0)
+        if end < 0:
+            end = length + end
+        return start, min(end, length - 1) + 1
 
     async def lrange(self, key: str, start: int, end: int) -> List:
-        if key not in self._lists:
+        if not self._alive(key) or key not in self._lists:
             return []
-        return self._lists[key][start:end+1 if end >= 0 else None]
+        items = self._lists[key]
+        start, stop = self._range(len(items), start, end)
+        if start >= stop:
+            return []
+        return list(islice(items, start, stop))
+
+    async def ltrim(self, key: str, start: int, end: int):
+        if not self._alive(key) or key not in self._lists:
+            return True
+        items = self._lists[key]
+        start, stop = self._range(len(items), start, end)
+        if start >= stop:
+            self._remove(key)
+            return True
+        # 两端各自弹出，保留部分不复制
+        for _ in range(len(items) - stop):
+            items.pop()
+        for _ in range(start):
+            items.popleft()
+        return True
 
     async def llen(self, key: str) -> int:
-        return len(self._lists.get(key, []))
+        if not self._alive(key):
+            return 0
+        return len(self._lists.get(key, ()))
+
+    # ==================== 通用 ====================
 
     async def delete(self, *keys):
-        for key in keys:
-            self._data.pop(key, None)
-            self._lists.pop(key, None)
-            self._expiry.pop(key, None)
+        return sum(1 for key in keys if self._remove(key))
 
     async def exists(self, key: str) -> bool:
-        self._check_expiry(key)
-        return key in self._data or key in self._lists
+        return self._alive(key)
 
     async def expire(self, key: str, seconds: int):
-        self._expiry[key] = datetime.now() + timedelta(seconds=seconds)
-
-    async def publish(self, channel: str, message: str):
-        """发布消息到频道"""
-        if channel in self._pubsub_callbacks:
-            for callback in self._pubsub_callbacks[channel]:
-                try:
-                    await callback(message)
-                except Exception as e:
-                    logger.error(f"Pubsub callback error: {e}")
+        if not self._alive(key):
+            return False
+        self._set_expiry(key, seconds)
+        return True
+
+    async def ttl(self, key: str) -> int:
+        """剩余秒数；-1 表示未设置过期，-2 表示键不存在"""
+        if not self._alive(key):
+            return -2
+        deadline = self._expiry.get(key)
+        if deadline is None:
+            return -1
+        return max(int(round(deadline - time.monotonic())), 0)
+
+    # ==================== 发布订阅 ====================
+
+    async def publish(self, channel: str, message: str) -> int:
+        """发布消息到频道，返回收到消息的订阅者数量"""
+        subscribers = self._subscribers.get(channel)
+        if not subscribers:
+            return 0
+        for subscriber in list(subscribers):
+            subscriber._deliver(channel, message)
+        return len(subscribers)
 
     def pubsub(self):
         return MemoryPubSub(self)
 
-    def _check_expiry(self, key: str):
-        if key in self._expiry and datetime.now() > self._expiry[key]:
-            self._data.pop(key, None)
-            self._lists.pop(key, None)
-            self._expiry.pop(key, None)
+    def pipeline(self, transaction: bool = False):
+        return MemoryPipeline(self)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "keys": len(self._data) + len(self._lists),
+            "lists": len(self._lists),
+            "channels": len(self._subscribers),
+            "blocked_waiters": sum(len(w) for w in self._waiters.values())
+        }
+
+
+def _resolve(future: asyncio.Future):
+    """唤醒等待者（等待者可能属于其他线程的事件循环）"""
+    loop = future.get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if loop is running:
+        future.set_result(True)
+    else:
+        loop.call_soon_threadsafe(lambda: future.done() or future.set_result(True))
+
+
+class MemoryPipeline:
+    """内存模式的 pipeline：与 redis-py 一致，命令先排队，execute() 时依次执行并返回结果列表"""
+
+    def __init__(self, fallback: MemoryFallback):
+        self._fallback = fallback
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not hasattr(self._fallback, name):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [await getattr(self._fallback, name)(*args, **kwargs) for name, args, kwargs in commands]
 
 
 class MemoryPubSub:
-    """内存模式的 PubSub 实现"""
+    """内存模式的 PubSub 实现（每个订阅者一个有界队列）"""
 
     def __init__(self, fallback: MemoryFallback):
         self._fallback = fallback
         self._channels: List[str] = []
-        self._queue: asyncio.Queue = asyncio.Queue()
+        self._queue: deque = deque()
+        self._waiter: Optional[asyncio.Future] = None
+        self.dropped = 0
 
     async def subscribe(self, *channels):
         for channel in channels:
-            self._channels.append(channel)
-            if channel not in self._fallback._pubsub_callbacks:
-                self._fallback._pubsub_callbacks[channel] = []
-            self._fallback._pubsub_callbacks[channel].append(self._on_message)
+            if channel not in self._channels:
+                self._channels.append(channel)
+            self._fallback._subscribers.setdefault(channel, set()).add(self)
 
     async def unsubscribe(self, *channels):
-        for channel in channels:
+        for channel in channels or list(self._channels):
             if channel in self._channels:
                 self._channels.remove(channel)
-            if channel in self._fallback._pubsub_callbacks:
-                try:
-                    self._fallback._pubsub_callbacks[channel].remove(self._on_message)
-                except ValueError:
-                    pass
-
-    async def _on_message(self, message: str):
-        await self._queue.put(message)
+            subscribers = self._fallback._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(self)
+                if not subscribers:
+                    del self._fallback._subscribers[channel]
+
+    async def close(self):
+        await self.unsubscribe()
+
+    def _deliver(self, channel: str, message: str):
+        if len(self._queue) >= self._fallback.max_pending_messages:
+            self._queue.popleft()
+            self.dropped += 1
+            self._fallback._stats["messages_dropped"] += 1
+        self._queue.append({"type": "message", "channel": channel, "data": message})
+        if self._waiter is not None and not self._waiter.done():
+            _resolve(self._waiter)
+
+    async def get_message(self, timeout: float = 0.0) -> Optional[dict]:
+        """取一条消息，timeout 秒内没有消息返回 None"""
+        if not self._queue and timeout:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._waiter = None
+        return self._queue.popleft() if self._queue else None
 
     async def listen(self):
         while True:
-            try:
-                message = await asyncio.wait_for(self._queue.get(), timeout=30)
-                yield {"type": "message", "data": message}
-            except asyncio.TimeoutError:
+            message = await self.get_message(timeout=30)
+            if message is None:
                 yield {"type": "ping", "data": None}
+            else:
+                yield message
 
 
 class RedisClient:
@@ -233,12 +494,25 @@ class RedisClient:
     async def rpush(self, key: str, *values):
         return await self.client.rpush(key, *values)
 
-    async def brpop(self, key: str, timeout: int = 0):
-        return await self.client.brpop(key, timeout=timeout)
+    async def lpop(self, key: str) -> Optional[str]:
+        return await self.client.lpop(key)
+
+    async def rpop(self, key: str) -> Optional[str]:
+        return await self.client.rpop(key)
+
+    async def brpop(self, keys, timeout: int = 0):
+        """keys 可以是单个键或按优先级排列的键列表"""
+        return await self.client.brpop(keys, timeout=timeout)
+
+    async def blpop(self, keys, timeout: int = 0):
+        return await self.client.blpop(keys, timeout=timeout)
 
     async def lrange(self, key: str, start: int, end: int) -> List:
         return await self.client.lrange(key, start, end)
 
+    async def ltrim(self, key: str, start: int, end: int):
+        return await self.client.ltrim(key, start, end)
+
     async def llen(self, key: str) -> int:
         return await self.client.llen(key)
 
@@ -251,6 +525,19 @@ class RedisClient:
     async def expire(self, key: str, seconds: int):
         return await self.client.expire(key, seconds)
 
+    async def ttl(self, key: str) -> int:
+        return await self.client.ttl(key)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    async def incrby(self, key: str, amount: int = 1) -> int:
+        return await self.client.incrby(key, amount)
+
+    def pipeline(self):
+        """批量命令（非事务）：命令排队，await pipe.execute() 时一次发送"""
+        return self.client.pipeline(transaction=False)
+
     async def publish(self, channel: str, message: str):
         return await self.client.publish(channel, message)
 
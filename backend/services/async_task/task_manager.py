@@ -304,17 +304,12 @@ class TaskManager:
 
         while self._running:
             try:
-                # 按优先级从队列获取任务
-                task_data = None
-                for priority in TaskPriority:
-                    queue_name = f"{self.QUEUE_PREFIX}{priority.value}"
-                    result = await self.redis.brpop(queue_name, timeout=1)
-                    if result:
-                        task_data = json.loads(result[1])
-                        break
-
-                if not task_data:
+                # 按优先级从队列获取任务（一次阻塞等待所有队列，先检查高优先级）
+                queue_names = [f"{self.QUEUE_PREFIX}{priority.value}" for priority in TaskPriority]
+                result = await self.redis.brpop(queue_names, timeout=1)
+                if not result:
                     continue
+                task_data = json.loads(result[1])
 
                 task_id = task_data["task_id"]
                 task_type = task_data["task_type"]
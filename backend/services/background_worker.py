@@ -0,0 +1,661 @@
+# -*- coding: utf-8 -*-
+"""
+后台服务进程角色与选主
+调度器、新闻监控、盯盘、TDX 缓存、预警监控等后台服务可以与 API 分开运行：
+
+    PROCESS_ROLE=all      API 进程内运行后台服务（默认，原有行为）
+    PROCESS_ROLE=api      只处理请求，不启动后台服务，从共享状态读取后台结果
+    PROCESS_ROLE=worker   只运行后台服务（python worker.py）
+
+无论哪种角色，后台服务都要先拿到本机文件锁（选主）才会启动，多个 uvicorn worker
+或多个 worker 进程同时运行时只有一个真正轮询，其余处于待命状态，持锁进程退出后自动接管。
+后台进程定时把心跳、服务状态和新闻缓存快照写入 Redis（Redis 不可用时写入本机
+WORKER_SHARED_DIR 下的快照文件，同机的其他进程从文件读取）；新闻、紧急新闻和预警的 WebSocket 推送
+经 Redis 频道中继到每个 API 进程（见 backend.api.websocket_api）。
+
+调度器、盯盘、新闻监控中心的控制接口（启停、配置、手动触发）只能由运行这些服务的持锁进程执行：
+其他进程经 call_background_service() 把命令放入 Redis 队列，由持锁进程执行并回传结果；
+Redis 不可用或没有存活的后台进程时抛出 ServiceNotOwned，接口返回 409。
+"""
+import asyncio
+import inspect
+import json
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger("background_worker")
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+PROCESS_ROLES = ("api", "worker", "all")
+
+# 共享状态键
+WORKER_STATE_KEY = "investmind:worker:state"
+NEWS_SNAPSHOT_KEY = "investmind:worker:news_snapshot"
+WORKER_COMMAND_QUEUE = "investmind:worker:commands"
+WORKER_REPLY_KEY = "investmind:worker:reply:"
+
+# Redis 不可用时共享状态的落盘目录（仅同机进程可见）
+WORKER_SHARED_DIR = Path(os.getenv("WORKER_SHARED_DIR", "data/worker"))
+
+HEARTBEAT_INTERVAL = 10          # 心跳/快照发布间隔（秒）
+NEWS_SNAPSHOT_LIMIT = 2000       # 快照中的新闻条数
+SHARED_SYNC_INTERVAL = 5         # API 进程同步快照的最小间隔（秒）
+COMMAND_TIMEOUT = int(os.getenv("WORKER_COMMAND_TIMEOUT", "30"))  # 等待后台进程执行控制命令的超时（秒）
+
+
+class ServiceNotOwned(Exception):
+    """本进程没有运行该后台服务，且无法把控制命令转发给运行它的进程"""
+
+
+def get_process_role() -> str:
+    """当前进程角色（环境变量 PROCESS_ROLE）"""
+    role = os.getenv("PROCESS_ROLE", "all").strip().lower()
+    if role not in PROCESS_ROLES:
+        logger.warning(f"⚠️ 未知的 PROCESS_ROLE={role}，按 all 运行")
+        return "all"
+    return role
+
+
+class LeaderLock:
+    """
+    本机文件锁选主
+
+    锁由操作系统在进程退出（包括崩溃）时释放，不会残留；锁文件内容仅记录持有者 PID 便于排查
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        """非阻塞加锁，成功返回 True"""
+        if self._file is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        if fcntl is not None:
+            # Windows 下锁住的字节不能再写入，只在 POSIX 下记录 PID
+            f.seek(0)
+            f.truncate()
+            f.write(str(os.getpid()))
+            f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        self._file.close()
+        self._file = None
+
+
+# ==================== 后台服务启停 ====================
+
+async def _start_scheduler():
+    from backend.services.scheduler_service import start_scheduler
+    start_scheduler()
+
+
+async def _stop_scheduler():
+    from backend.services.scheduler_service import stop_scheduler
+    stop_scheduler()
+
+
+async def _start_data_cleanup():
+    from backend.dataflows.data_cleanup_scheduler import start_cleanup_scheduler
+    start_cleanup_scheduler()
+
+
+async def _stop_data_cleanup():
+    from backend.dataflows.data_cleanup_scheduler import stop_cleanup_scheduler
+    stop_cleanup_scheduler()
+
+
+async def _start_background_news():
+    # 该服务使用独立进程池处理新闻请求
+    from backend.services.background_news_service import background_news_service
+    await background_news_service.start()
+
+
+async def _stop_background_news():
+    from backend.services.background_news_service import background_news_service
+    await background_news_service.stop()
+
+
+async def _start_data_update():
+    # 该服务会自动为所有监控股票调用48个接口，非常耗时
+    from backend.services.unified_data_update_service import start_background_update_service
+    start_background_update_service()
+
+
+async def _stop_data_update():
+    from backend.services.unified_data_update_service import stop_background_update_service
+    stop_background_update_service()
+
+
+async def _start_realtime_monitor():
+    # 服务初始化时加载保存的配置，盯盘由 /api/realtime-monitor/start 手动启动（转发到本进程执行）
+    from backend.services.realtime_monitor_service import get_monitor_service
+    get_monitor_service()
+    logger.info("实时盯盘监控服务已初始化（等待手动启动）")
+
+
+async def _stop_realtime_monitor():
+    from backend.services.realtime_monitor_service import get_monitor_service, MonitorStatus
+    realtime_monitor = get_monitor_service()
+    if realtime_monitor.status in (MonitorStatus.RUNNING, MonitorStatus.PAUSED):
+        await realtime_monitor.stop_monitor()
+
+
+async def _start_news_monitor_center():
+    from backend.services.news_center import get_news_monitor_center
+    await get_news_monitor_center().start()
+
+
+async def _stop_news_monitor_center():
+    from backend.services.news_center import get_news_monitor_center
+    await get_news_monitor_center().stop()
+
+
+async def _start_tdx_cache():
+    # 后台定时获取TDX数据并缓存到文件，API 进程直接读文件
+    from backend.services.tdx_cache_service import get_tdx_cache_service
+    get_tdx_cache_service().start()
+
+
+async def _stop_tdx_cache():
+    from backend.services.tdx_cache_service import get_tdx_cache_service
+    get_tdx_cache_service().stop()
+
+
+async def _start_alert_monitor():
+    # 预警服务、公告监控、行情异动检测
+    from backend.services.alert_service import get_alert_service
+    get_alert_service()
+    from backend.services.announcement_monitor_service import get_announcement_monitor_service
+    await get_announcement_monitor_service().start()
+    from backend.services.price_monitor_service import get_price_monitor_service
+    await get_price_monitor_service().start()
+
+
+async def _stop_alert_monitor():
+    from backend.services.announcement_monitor_service import get_announcement_monitor_service
+    await get_announcement_monitor_service().stop()
+    from backend.services.price_monitor_service import get_price_monitor_service
+    await get_price_monitor_service().stop()
+
+
+async def _start_notification_dispatcher():
+    from backend.services.notification_dispatcher import get_notification_dispatcher
+    await get_notification_dispatcher().start()
+
+
+async def _stop_notification_dispatcher():
+    from backend.services.notification_dispatcher import get_notification_dispatcher
+    await get_notification_dispatcher().stop()
+
+
+async def _start_news_index_maintenance():
+    # 后台补建数据库中尚未索引的新闻，清理过期的抓取结果
+    from backend.services.news_center.news_search_index import get_news_search_index
+    news_index = get_news_search_index()
+    if not news_index.available:
+        return
+    retention_days = int(os.getenv("NEWS_SEARCH_RETENTION_DAYS", "30"))
+    asyncio.create_task(asyncio.to_thread(news_index.maintain, retention_days))
+
+
+async def _start_db_checkpoint():
+    from backend.database.database import get_checkpoint_scheduler
+    scheduler = get_checkpoint_scheduler()
+    if scheduler:
+        scheduler.start()
+
+
+async def _stop_db_checkpoint():
+    from backend.database.database import get_checkpoint_scheduler
+    scheduler = get_checkpoint_scheduler()
+    if scheduler:
+        scheduler.stop()
+
+
+async def _noop():
+    pass
+
+
+@dataclass
+class BackgroundServiceSpec:
+    """后台服务登记项"""
+    name: str
+    label: str
+    start: Callable[[], Awaitable[None]]
+    stop: Callable[[], Awaitable[None]]
+    env_flag: Optional[str] = None   # 控制开关的环境变量，None 表示总是启动
+    default: bool = True             # 环境变量未设置时是否启动
+    group: Optional[str] = None      # 所属功能组（功能组被禁用时不启动）
+
+    def enabled(self) -> bool:
+        if self.env_flag and os.getenv(self.env_flag, str(self.default).lower()).lower() != "true":
+            return False
+        if self.group:
+            from backend.api.router_manifest import is_group_enabled
+            return is_group_enabled(self.group)
+        return True
+
+
+BACKGROUND_SERVICES: List[BackgroundServiceSpec] = [
+    BackgroundServiceSpec("scheduler", "交易调度器", _start_scheduler, _stop_scheduler,
+                          "ENABLE_SCHEDULER", False, "trading"),
+    BackgroundServiceSpec("data_cleanup", "数据清理调度器", _start_data_cleanup, _stop_data_cleanup,
+                          "ENABLE_DATA_CLEANUP", True),
+    BackgroundServiceSpec("background_news", "后台新闻服务", _start_background_news, _stop_background_news,
+                          "ENABLE_BACKGROUND_NEWS", True, "news"),
+    BackgroundServiceSpec("data_update", "统一后台数据更新服务", _start_data_update, _stop_data_update,
+                          "ENABLE_DATA_UPDATE_SERVICE", False),
+    BackgroundServiceSpec("realtime_monitor", "实时盯盘监控服务", _start_realtime_monitor, _stop_realtime_monitor,
+                          "ENABLE_REALTIME_MONITOR", False),
+    BackgroundServiceSpec("news_monitor_center", "统一新闻监控中心", _start_news_monitor_center,
+                          _stop_news_monitor_center, "ENABLE_NEWS_MONITOR_CENTER", True, "news"),
+    BackgroundServiceSpec("tdx_cache", "TDX数据缓存服务", _start_tdx_cache, _stop_tdx_cache,
+                          "ENABLE_TDX_CACHE_SERVICE", True),
+    BackgroundServiceSpec("alert_monitor", "预警监控服务（公告监控、行情异动检测）", _start_alert_monitor,
+                          _stop_alert_monitor, "ENABLE_ALERT_MONITOR", True),
+    BackgroundServiceSpec("notification_dispatcher", "预警通知投递服务", _start_notification_dispatcher,
+                          _stop_notification_dispatcher, "ENABLE_NOTIFICATION_DISPATCHER", True),
+    BackgroundServiceSpec("news_index_maintenance", "新闻全文索引维护", _start_news_index_maintenance, _noop,
+                          group="news"),
+    BackgroundServiceSpec("db_checkpoint", "SQLite WAL 检查点", _start_db_checkpoint, _stop_db_checkpoint,
+                          "ENABLE_DB_CHECKPOINT", True),
+]
+
+
+# ==================== 后台进程 ====================
+
+class BackgroundWorker:
+    """
+    后台服务运行器（单例）
+
+    start() 先尝试选主：拿到锁就启动全部后台服务，否则待命并定期重试；
+    运行期间定时发布心跳、服务状态和新闻快照
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self.role = get_process_role()
+        self._lock = LeaderLock(os.getenv("WORKER_LOCK_FILE", "data/locks/background_worker.lock"))
+        self._services: Dict[str, Dict[str, Any]] = {}
+        self._started: List[BackgroundServiceSpec] = []
+        self._loop_task: Optional[asyncio.Task] = None
+        self._command_task: Optional[asyncio.Task] = None
+        self._started_at: Optional[str] = None
+        self._leader_since: Optional[str] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock.held
+
+    async def start(self):
+        """选主并启动后台服务，随后在后台循环中发布心跳（未拿到锁时定期重试）"""
+        if self._loop_task is not None:
+            return
+        self._started_at = datetime.now().isoformat()
+        if self._lock.try_acquire():
+            await self._start_services()
+        else:
+            logger.info(f"⏸️ 后台服务由其他进程运行，当前进程 (PID {os.getpid()}) 待命")
+        self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        if self.is_leader:
+            await self._stop_services()
+            try:
+                from backend.services.async_task.redis_client import redis_client
+                if redis_client.is_redis_available:
+                    await redis_client.delete(WORKER_STATE_KEY)
+                else:
+                    _shared_file(WORKER_STATE_KEY).unlink(missing_ok=True)
+            except Exception:
+                pass
+            self._lock.release()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                if not self.is_leader and self._lock.try_acquire():
+                    logger.info(f"🔁 原后台进程已退出，当前进程 (PID {os.getpid()}) 接管后台服务")
+                    await self._start_services()
+                if self.is_leader:
+                    await self.publish_state()
+            except Exception as e:
+                logger.error(f"后台进程心跳失败: {e}")
+
+    async def _start_services(self):
+        self._leader_since = datetime.now().isoformat()
+        for spec in BACKGROUND_SERVICES:
+            if not spec.enabled():
+                self._services[spec.name] = {"label": spec.label, "status": "disabled"}
+                continue
+            started = time.perf_counter()
+            try:
+                await spec.start()
+                self._started.append(spec)
+                self._services[spec.name] = {
+                    "label": spec.label,
+                    "status": "running",
+                    "startup_seconds": round(time.perf_counter() - started, 3)
+                }
+                logger.info(f"✅ {spec.label}已启动")
+            except Exception as e:
+                self._services[spec.name] = {"label": spec.label, "status": "failed", "error": str(e)}
+                logger.warning(f"⚠️ {spec.label}启动失败: {e}")
+        from backend.services.async_task.redis_client import redis_client
+        if redis_client.is_redis_available:
+            self._command_task = asyncio.create_task(self._serve_commands())
+        await self.publish_state()
+
+    async def _stop_services(self):
+        if self._command_task is not None:
+            self._command_task.cancel()
+            try:
+                await self._command_task
+            except asyncio.CancelledError:
+                pass
+            self._command_task = None
+        while self._started:
+            spec = self._started.pop()
+            try:
+                await spec.stop()
+                self._services[spec.name]["status"] = "stopped"
+                logger.info(f"✅ {spec.label}已停止")
+            except Exception as e:
+                logger.debug(f"{spec.label}停止失败: {e}")
+
+    # ==================== 共享状态 ====================
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "host": socket.gethostname(),
+            "role": self.role,
+            "leader": self.is_leader,
+            "started_at": self._started_at,
+            "leader_since": self._leader_since if self.is_leader else None,
+            "heartbeat": datetime.now().isoformat(),
+            "services": self._services
+        }
+
+    async def publish_state(self):
+        """发布心跳、服务状态和新闻缓存快照（过期时间为三个心跳周期，持有者失联后自动消失）"""
+        state = json.dumps(self.get_state(), ensure_ascii=False)
+        news = None
+        if self._services.get("news_monitor_center", {}).get("status") == "running":
+            from backend.services.news_center import get_news_monitor_center
+            news = json.dumps(get_news_monitor_center().get_latest_news(limit=NEWS_SNAPSHOT_LIMIT), ensure_ascii=False)
+        await _publish_shared(WORKER_STATE_KEY, state)
+        if news is not None:
+            await _publish_shared(NEWS_SNAPSHOT_KEY, news)
+
+    async def _serve_commands(self):
+        """执行其他进程经 Redis 队列转发来的控制命令"""
+        from backend.services.async_task.redis_client import redis_client
+        while True:
+            try:
+                popped = await redis_client.blpop(WORKER_COMMAND_QUEUE, timeout=1)
+                if not popped:
+                    continue
+                command = json.loads(popped[1])
+                if command.get("deadline", 0) < time.time():
+                    continue  # 发起方已超时放弃
+                asyncio.create_task(self._handle_command(command))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"读取后台控制命令失败: {e}")
+                await asyncio.sleep(1)
+
+    async def _handle_command(self, command: Dict[str, Any]):
+        from backend.services.async_task.redis_client import redis_client
+        try:
+            result = await _execute_command(command["service"], command["name"], command.get("kwargs") or {})
+            reply = {"result": result}
+        except Exception as e:
+            reply = {"error": str(e), "value_error": isinstance(e, ValueError)}
+        reply_key = WORKER_REPLY_KEY + command["id"]
+        try:
+            await redis_client.rpush(reply_key, json.dumps(reply, ensure_ascii=False, default=str))
+            await redis_client.expire(reply_key, COMMAND_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"回传后台控制命令结果失败: {e}")
+
+    async def run_forever(self, stop_event: asyncio.Event):
+        """worker 角色的主循环：运行到 stop_event 被设置"""
+        await self.start()
+        try:
+            await stop_event.wait()
+        finally:
+            await self.stop()
+
+
+def get_background_worker() -> BackgroundWorker:
+    """获取后台服务运行器单例"""
+    return BackgroundWorker()
+
+
+# ==================== 共享状态读写 ====================
+
+def _shared_file(key: str) -> Path:
+    return WORKER_SHARED_DIR / f"{key.rsplit(':', 1)[-1]}.json"
+
+
+async def _publish_shared(key: str, value: str):
+    """写入共享状态（过期时间为三个心跳周期，持有者失联后自动失效）；Redis 不可用时写本机文件"""
+    from backend.services.async_task.redis_client import redis_client
+    if redis_client.is_redis_available:
+        await redis_client.set(key, value, ex=HEARTBEAT_INTERVAL * 3)
+        return
+
+    def write():
+        path = _shared_file(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(value, encoding="utf-8")
+        os.replace(tmp, path)
+
+    await asyncio.to_thread(write)
+
+
+async def _read_shared(key: str) -> Optional[str]:
+    """读取共享状态；Redis 不可用时读本机文件，超过三个心跳周期未更新视为失效"""
+    from backend.services.async_task.redis_client import redis_client
+    if redis_client.is_redis_available:
+        return await redis_client.get(key)
+
+    def read():
+        path = _shared_file(key)
+        try:
+            if time.time() - path.stat().st_mtime > HEARTBEAT_INTERVAL * 3:
+                return None
+            return path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    return await asyncio.to_thread(read)
+
+
+async def get_worker_state() -> Optional[Dict[str, Any]]:
+    """读取后台进程发布的心跳与服务状态，没有存活的后台进程时返回 None"""
+    raw = await _read_shared(WORKER_STATE_KEY)
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+_last_news_sync = 0.0
+
+
+async def sync_shared_news_cache(force: bool = False) -> bool:
+    """
+    API 进程本地没有运行新闻监控中心时，用后台进程发布的快照刷新本地新闻缓存
+
+    Returns:
+        是否使用了共享快照
+    """
+    global _last_news_sync
+    from backend.services.news_center import get_news_monitor_center
+    if get_news_monitor_center().is_running:
+        return False
+    if not force and time.time() - _last_news_sync < SHARED_SYNC_INTERVAL:
+        return True
+    _last_news_sync = time.time()
+    try:
+        raw = await _read_shared(NEWS_SNAPSHOT_KEY)
+        if not raw:
+            return False
+        from backend.services.news_center.news_cache import get_news_cache
+        get_news_cache().replace_from_snapshot(json.loads(raw))
+        return True
+    except Exception as e:
+        logger.warning(f"同步后台新闻快照失败: {e}")
+        return False
+
+
+# ==================== 控制命令转发 ====================
+
+def _get_scheduler():
+    from backend.services.scheduler_service import get_scheduler
+    return get_scheduler()
+
+
+def _get_realtime_monitor():
+    from backend.services.realtime_monitor_service import get_monitor_service
+    return get_monitor_service()
+
+
+def _get_news_monitor_center():
+    from backend.services.news_center import get_news_monitor_center
+    return get_news_monitor_center()
+
+
+# 可转发的后台服务：服务名 -> (实例获取函数, 允许调用的方法/读取的属性)
+SERVICE_COMMANDS: Dict[str, Tuple[Callable[[], Any], Tuple[str, ...]]] = {
+    "scheduler": (_get_scheduler, (
+        "get_status", "start", "stop", "trigger_task", "update_config", "task_history",
+    )),
+    "realtime_monitor": (_get_realtime_monitor, (
+        "get_status", "start_monitor", "stop_monitor", "_execute_monitor_check", "stats",
+        "get_config", "update_config", "monitored_stocks", "add_stock", "remove_stock", "update_stock_config",
+    )),
+    "news_monitor_center": (_get_news_monitor_center, (
+        "get_stats", "is_running", "start", "stop", "fetch_now", "cleanup",
+        "set_source_interval", "enable_source", "get_news_config", "update_news_config",
+        "update_source_config", "update_cninfo_config", "update_hot_stocks",
+    )),
+}
+
+
+async def _execute_command(service: str, name: str, kwargs: Dict[str, Any]) -> Any:
+    """在本进程对服务实例执行方法（或读取属性）"""
+    if service not in SERVICE_COMMANDS or name not in SERVICE_COMMANDS[service][1]:
+        raise ValueError(f"不支持的后台服务命令: {service}.{name}")
+    value = getattr(SERVICE_COMMANDS[service][0](), name)
+    if callable(value):
+        value = value(**kwargs)
+    if inspect.isawaitable(value):
+        value = await value
+    return value
+
+
+async def call_background_service(service: str, name: str, **kwargs) -> Any:
+    """
+    在运行后台服务的进程中调用服务方法（或读取属性）
+
+    本进程持有后台服务锁时直接执行；否则经 Redis 队列转发给持锁进程并等待结果，
+    结果经 JSON 传回（不可序列化的值转为字符串）。
+
+    Raises:
+        ServiceNotOwned: Redis 不可用、没有存活的后台进程或后台进程未按时响应
+        ValueError: 命令执行时抛出的 ValueError（参数错误）
+        RuntimeError: 命令执行时抛出的其他异常
+    """
+    if get_background_worker().is_leader:
+        return await _execute_command(service, name, kwargs)
+
+    from backend.services.async_task.redis_client import redis_client
+    if not redis_client.is_redis_available:
+        raise ServiceNotOwned("后台服务运行在其他进程，Redis 不可用时无法转发控制命令")
+    if await get_worker_state() is None:
+        raise ServiceNotOwned("没有存活的后台服务进程")
+
+    command_id = uuid.uuid4().hex
+    await redis_client.rpush(WORKER_COMMAND_QUEUE, json.dumps({
+        "id": command_id,
+        "service": service,
+        "name": name,
+        "kwargs": kwargs,
+        "deadline": time.time() + COMMAND_TIMEOUT
+    }, ensure_ascii=False, default=str))
+    # 后台进程失联时队列中的命令随之过期
+    await redis_client.expire(WORKER_COMMAND_QUEUE, COMMAND_TIMEOUT * 2)
+
+    popped = await redis_client.blpop(WORKER_REPLY_KEY + command_id, timeout=COMMAND_TIMEOUT)
+    if not popped:
+        raise ServiceNotOwned(f"后台服务进程 {COMMAND_TIMEOUT} 秒内未响应控制命令")
+    reply = json.loads(popped[1])
+    if "error" in reply:
+        raise (ValueError if reply.get("value_error") else RuntimeError)(reply["error"])
+    return reply.get("result")
@@ -12,6 +12,7 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 
 from backend.utils.logging_config import get_logger
+from backend.utils.metrics import timed
 
 logger = get_logger("services.llm")
 
@@ -198,8 +199,9 @@ class LLMService:
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             try:
                 logger.info(f"调用LLM: provider={provider}, model={model}")
-                response = await client.post(api_url, headers=headers, json=data)
-                response.raise_for_status()
+                async with timed("llm", provider=provider, model=model):
+                    response = await client.post(api_url, headers=headers, json=data)
+                    response.raise_for_status()
 
                 result = response.json()
                 content = result["choices"][0]["message"]["content"]
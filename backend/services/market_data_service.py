@@ -10,6 +10,9 @@ from functools import lru_cache
 import asyncio
 
 from backend.utils.logging_config import get_logger
+from backend.utils.ttl_cache import get_ttl_cache
+# 行情快照（TDX缓存服务按 REFRESH_INTERVAL 写入）超过 SNAPSHOT_MAX_AGE 秒视为过期，改为实时请求
+from backend.services.quote_snapshot import SNAPSHOT_MAX_AGE, get_snapshot_reader
 
 logger = get_logger("services.market_data")
 
@@ -18,9 +21,9 @@ class MarketDataService:
     """市场数据服务（支持TDX优先）"""
 
     def __init__(self):
-        self._cache = {}
-        self._cache_time = {}
-        self._cache_ttl = 60  # 缓存60秒
+        # 行情缓存60秒；同一股票的并发请求合并为一次上游调用，降级数据不缓存
+        self._quote_cache = get_ttl_cache("market_quotes", ttl=60, negative_ttl=10, max_entries=2048)
+        self._market_cache = get_ttl_cache("market_overview", ttl=60, stale_ttl=60, negative_ttl=10)
         self._tdx_provider = None
         self._tdx_checked = False
 
@@ -54,22 +57,35 @@ class MarketDataService:
             self._tdx_checked = True
         return self._tdx_provider
 
-    def _is_cache_valid(self, key: str) -> bool:
-        """检查缓存是否有效"""
-        if key not in self._cache_time:
-            return False
-        return (datetime.now() - self._cache_time[key]).seconds < self._cache_ttl
-
-    def _set_cache(self, key: str, value: Any):
-        """设置缓存"""
-        self._cache[key] = value
-        self._cache_time[key] = datetime.now()
-
-    def _get_cache(self, key: str) -> Optional[Any]:
-        """获取缓存"""
-        if self._is_cache_valid(key):
-            return self._cache.get(key)
-        return None
+    @staticmethod
+    def _is_live_quote(quote: Dict[str, Any]) -> bool:
+        """实时数据源返回的行情才长期缓存（历史降级/不可用结果只短时间缓存）"""
+        return bool(quote) and quote.get("source") not in ("akshare_history", "unavailable")
+
+    @staticmethod
+    def _from_snapshot(quote: Dict[str, Any]) -> Dict[str, Any]:
+        """行情快照记录转换为统一的行情格式"""
+        return {
+            "code": quote["code"],
+            "stock_code": quote["code"],
+            "stock_name": quote["name"],
+            "price": quote["price"],
+            "current_price": quote["price"],
+            "open_price": quote["open"],
+            "high_price": quote["high"],
+            "low_price": quote["low"],
+            "pre_close": quote["pre_close"],
+            "change": quote["change"],
+            "change_rate": round(quote["change_pct"], 2),
+            "volume": int(quote["volume"]),
+            "amount": quote["amount"],
+            "turnover_rate": quote["turnover_rate"],
+            "pe_ratio": quote["pe"],
+            "pb_ratio": quote["pb"],
+            "total_market_cap": quote["total_mv"],
+            "timestamp": datetime.fromtimestamp(quote["updated_at"]).isoformat(),
+            "source": "tdx_snapshot"
+        }
 
     def get_realtime_quote(self, stock_code: str) -> Dict[str, Any]:
         """
@@ -81,13 +97,23 @@ class MarketDataService:
         Returns:
             实时行情数据
         """
-        cache_key = f"quote_{stock_code}"
-        cached = self._get_cache(cache_key)
-        if cached:
-            return cached
-
         # 标准化股票代码
         code = stock_code.replace(".SH", "").replace(".SZ", "")
+        return self._quote_cache.get_or_load(
+            f"quote_{code}", lambda: self._load_realtime_quote(code), cache_if=self._is_live_quote
+        )
+
+    def _load_realtime_quote(self, code: str) -> Dict[str, Any]:
+        """依次尝试各数据源获取实时行情（不经过缓存）"""
+        stock_code = code
+
+        # 0. 行情快照（内存映射文件，无网络请求）
+        try:
+            snapshot = get_snapshot_reader().get(code, max_age=SNAPSHOT_MAX_AGE)
+            if snapshot and snapshot["price"] > 0:
+                return self._from_snapshot(snapshot)
+        except Exception as e:
+            logger.debug(f"读取行情快照失败: {e}")
 
         # 1. 优先使用TDX获取实时行情
         tdx = self._get_tdx_provider()
@@ -116,7 +142,6 @@ class MarketDataService:
                             "timestamp": datetime.now().isoformat(),
                             "source": "tdx_native"
                         }
-                        self._set_cache(cache_key, result)
                         logger.info(f"✅ TDX Native获取实时行情成功: {stock_code} @ {result['current_price']}")
                         return result
 
@@ -153,7 +178,6 @@ class MarketDataService:
                             "source": "tdx"
                         }
 
-                        self._set_cache(cache_key, result)
                         logger.info(f"✅ TDX获取实时行情成功: {stock_code} @ {result['current_price']}")
                         return result
             except Exception as e:
@@ -251,8 +275,6 @@ class MarketDataService:
                         "source": "sina"
                     }
 
-                    cache_key = f"quote_{code}"
-                    self._set_cache(cache_key, result)
                     logger.info(f"获取实时行情成功(新浪): {code} @ {result['current_price']}")
                     return result
         except Exception as e:
@@ -326,8 +348,6 @@ class MarketDataService:
                         "source": "juhe"
                     }
 
-                    cache_key = f"quote_{code}"
-                    self._set_cache(cache_key, result)
                     logger.info(f"获取实时行情成功(聚合数据): {code} @ {result['current_price']}")
                     return result
                 else:
@@ -369,8 +389,6 @@ class MarketDataService:
                     "source": "tushare"
                 }
 
-                cache_key = f"quote_{code}"
-                self._set_cache(cache_key, result)
                 logger.info(f"获取实时行情成功(Tushare): {code} @ {result['current_price']}")
                 return result
         except Exception as e:
@@ -422,8 +440,6 @@ class MarketDataService:
                         "source": "tencent"
                     }
 
-                    cache_key = f"quote_{code}"
-                    self._set_cache(cache_key, result)
                     logger.info(f"获取实时行情成功(腾讯): {code} @ {result['current_price']}")
                     return result
         except Exception as e:
@@ -485,8 +501,6 @@ class MarketDataService:
                 "source": "akshare"
             }
 
-            cache_key = f"quote_{code}"
-            self._set_cache(cache_key, result)
             logger.info(f"获取实时行情成功: {code} @ {result['current_price']}")
             return result
 
@@ -730,6 +744,12 @@ class MarketDataService:
         Returns:
             市场概览数据
         """
+        return self._market_cache.get_or_load(
+            "market_overview", self._load_market_overview, cache_if=lambda r: bool(r.get("indices"))
+        )
+
+    def _load_market_overview(self) -> Dict[str, Any]:
+        """获取市场概览（不经过缓存）"""
         # 1. 优先使用TDX获取市场概览
         tdx = self._get_tdx_provider()
         if tdx:
@@ -883,6 +903,14 @@ def get_realtime_quotes_batch(stock_codes: List[str]) -> List[Dict[str, Any]]:
     # 标准化股票代码
     codes = [code.replace(".SH", "").replace(".SZ", "") for code in stock_codes]
 
+    # 0. 行情快照全部命中时直接返回
+    try:
+        snapshots = get_snapshot_reader().get_many(codes, max_age=SNAPSHOT_MAX_AGE)
+        if len(snapshots) == len(set(codes)):
+            return [service._from_snapshot(snapshots[code]) for code in codes]
+    except Exception as e:
+        logger.debug(f"读取行情快照失败: {e}")
+
     # 1. 优先使用TDX批量获取
     tdx = service._get_tdx_provider()
     if tdx:
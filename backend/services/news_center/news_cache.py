@@ -9,6 +9,8 @@ from typing import Dict, List, Optional, Any, Set
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 
+from .news_search_index import get_news_search_index
+
 logger = logging.getLogger(__name__)
 
 class NewsUrgency(str, Enum):
@@ -36,6 +38,8 @@ class CachedNews:
     impact_score: float = 0.0
     is_pushed: bool = False
     push_time: str = ""
+    sources: List[str] = field(default_factory=list)   # 转载了这条新闻的各来源
+    duplicate_count: int = 0                           # 被合并的转载稿数量
     
     def to_dict(self):
         return asdict(self)
@@ -67,6 +71,7 @@ class NewsCache:
         self._cache_dir = Path("data/news_center_cache")
         self._cache_dir.mkdir(parents=True, exist_ok=True)
         self._stats = {"total_added": 0, "duplicates_skipped": 0, "expired_cleaned": 0}
+        self._index = get_news_search_index()
         self._load_file_cache()
     
     def generate_fingerprint(self, title, pub_time=""):
@@ -82,7 +87,17 @@ class NewsCache:
             urgency = NewsUrgency(news.urgency) if news.urgency in [e.value for e in NewsUrgency] else NewsUrgency.LOW
             self._expiry[news.news_id] = datetime.now() + timedelta(minutes=self._ttl_config.get(urgency, 30))
             self._stats["total_added"] += 1
-            return True
+        self._index.add_many([self._index_doc(news)])
+        return True
+
+    @staticmethod
+    def _index_doc(news):
+        """缓存新闻转换为全文索引文档（按抓取时间排序，与原有排序一致）"""
+        return {
+            "origin": "cache", "news_id": news.news_id, "title": news.title, "content": news.content,
+            "source": news.source, "url": news.url, "stock_codes": news.related_stocks,
+            "sentiment": news.sentiment, "pub_time": news.pub_time, "sort_time": news.fetch_time
+        }
     
     def add_news_batch(self, news_list):
         added, skipped = 0, 0
@@ -103,7 +118,9 @@ class NewsCache:
                     urgency=nd.get("urgency", "low"),
                     keywords=nd.get("keywords", []),
                     related_stocks=nd.get("related_stocks", []),
-                    impact_score=float(nd.get("impact_score", 0.0))
+                    impact_score=float(nd.get("impact_score", 0.0)),
+                    sources=list(nd.get("sources") or [s for s in [nd.get("source", "")] if s]),
+                    duplicate_count=int(nd.get("duplicate_count", 0))
                 )
                 if self.add_news(news):
                     added += 1
@@ -135,6 +152,10 @@ class NewsCache:
 
     def get_news_for_stock(self, stock_code: str, limit: int = 30):
         """获取与指定股票相关的新闻"""
+        if self._index.available:
+            hits = self._index.search(stock_code=stock_code, origin="cache", limit=limit, order_by="time")
+            with self._cache_lock:
+                return [self._cache[h["news_id"]] for h in hits if h["news_id"] in self._cache]
         with self._cache_lock:
             # 标准化股票代码（去掉后缀）
             code_base = stock_code.split('.')[0] if '.' in stock_code else stock_code
@@ -148,7 +169,36 @@ class NewsCache:
     
     def is_duplicate(self, title, pub_time=""):
         return self.generate_fingerprint(title, pub_time) in self._fingerprints
+
+    def add_source(self, news_id, source):
+        """记录一条转载稿：把来源追加到代表稿上"""
+        with self._cache_lock:
+            news = self._cache.get(news_id)
+            if news is None:
+                return False
+            news.duplicate_count += 1
+            if source and source not in news.sources:
+                news.sources.append(source)
+            return True
     
+    def replace_from_snapshot(self, news_dicts):
+        """用后台进程发布的缓存快照替换本地缓存（API 进程使用；索引由后台进程维护，这里不写索引）"""
+        cache, expiry = {}, {}
+        now = datetime.now()
+        for nd in news_dicts:
+            try:
+                news = CachedNews.from_dict(nd)
+            except Exception:
+                continue
+            cache[news.news_id] = news
+            urgency = NewsUrgency(news.urgency) if news.urgency in [e.value for e in NewsUrgency] else NewsUrgency.LOW
+            expiry[news.news_id] = now + timedelta(minutes=self._ttl_config.get(urgency, 30))
+        with self._cache_lock:
+            self._cache = cache
+            self._fingerprints = set(cache)
+            self._expiry = expiry
+        return len(cache)
+
     def cleanup_expired(self):
         now = datetime.now()
         expired = [nid for nid, exp in list(self._expiry.items()) if now > exp]
@@ -158,6 +208,7 @@ class NewsCache:
                 self._fingerprints.discard(nid)
                 self._expiry.pop(nid, None)
             self._stats["expired_cleaned"] += len(expired)
+        self._index.remove("cache", expired)
         return len(expired)
     
     def get_stats(self):
@@ -193,11 +244,14 @@ class NewsCache:
                 except:
                     pass
             self.cleanup_expired()
+            # 索引文件可能被删除或落后于缓存文件，加载后重新写入（按ID覆盖）
+            self._index.add_many([self._index_doc(n) for n in self._cache.values()])
         except:
             pass
     
     def clear(self):
         with self._cache_lock:
+            self._index.remove("cache", list(self._cache.keys()))
             self._cache.clear()
             self._fingerprints.clear()
             self._expiry.clear()
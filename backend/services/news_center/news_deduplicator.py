@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+新闻近似去重
+对标题（过短时补充正文开头）取字符二元组，计算 MinHash 签名并按 LSH 分桶查找候选，
+再用精确 Jaccard 相似度确认，把不同来源的转载稿聚成一个簇：
+簇内只有代表稿做情绪/影响分析、入库和预警，其余来源记录在代表稿的来源列表上
+"""
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# MinHash 参数：64 个哈希函数分 16 个桶，每桶 4 行；相似度 0.7 的文本约 99% 落入同一桶
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240601)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+
+# 标题中的来源标签和标点（【财联社】、[公告]、（记者 xxx）等）不参与比较
+_TAG_RE = re.compile(r'^\s*(【[^】]{0,12}】|\[[^\]]{0,12}\])')
+_STRIP_RE = re.compile(r'[\W_]+', re.UNICODE)
+
+MIN_TITLE_LENGTH = 10      # 标题短于该长度时补充正文开头
+CONTENT_PREFIX = 80        # 补充的正文长度
+MAX_MEMBER_SHINGLES = 8    # 每个簇保留用于比对的成员数
+
+
+def normalize_text(title: str, content: str = "") -> str:
+    """去掉来源标签、标点和空白并转小写"""
+    text = _STRIP_RE.sub('', _TAG_RE.sub('', title or '')).lower()
+    if len(text) < MIN_TITLE_LENGTH and content:
+        text += _STRIP_RE.sub('', content[:CONTENT_PREFIX]).lower()
+    return text
+
+
+def shingles(text: str) -> Set[str]:
+    """字符二元组集合"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def minhash(shingle_set: Set[str]) -> np.ndarray:
+    """MinHash 签名（NUM_PERM 个 uint64）"""
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode('utf-8')) for s in shingle_set),
+        dtype=np.uint64,
+        count=len(shingle_set)
+    )
+    values = (hashes[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME
+    return values.min(axis=0)
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class NewsCluster:
+    """转载簇：代表稿 + 各来源"""
+    cluster_id: str
+    representative: Any                      # 代表稿（首次出现的那条，由调用方定义类型）
+    sources: List[str] = field(default_factory=list)
+    size: int = 1
+    first_seen: float = 0.0
+    last_seen: float = 0.0
+    member_shingles: List[Set[str]] = field(default_factory=list)
+    bucket_keys: List[Tuple[int, bytes]] = field(default_factory=list)
+
+
+@dataclass
+class ClusterMatch:
+    """一条新闻的聚类结果"""
+    cluster: NewsCluster
+    is_new: bool                             # True 表示这条新闻成为新簇的代表稿
+    similarity: float = 1.0
+
+
+class NewsDeduplicator:
+    """
+    基于 MinHash LSH 的滑动窗口近似去重器
+
+    簇在最后一次命中后保留 window_seconds 秒；超出窗口的簇被淘汰，
+    之后出现的相似新闻会作为新事件重新成簇
+    """
+
+    def __init__(self, threshold: float = 0.7, window_seconds: float = 6 * 3600, max_clusters: int = 20000):
+        """
+        Args:
+            threshold: 判为同一事件的 Jaccard 相似度阈值
+            window_seconds: 滑动窗口长度（秒）
+            max_clusters: 窗口内最多保留的簇数量
+        """
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.max_clusters = max_clusters
+        self._clusters: Dict[str, NewsCluster] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+        self._order: Deque[Tuple[float, str]] = deque()   # (最后命中时间, 簇ID)，可能含过期记录
+        self._lock = threading.RLock()
+        self._seq = 0
+        self._stats = {"checked": 0, "clustered": 0, "clusters_created": 0, "clusters_evicted": 0}
+
+    def assign(
+        self,
+        title: str,
+        content: str = "",
+        source: str = "",
+        item: Any = None,
+        now: Optional[float] = None
+    ) -> ClusterMatch:
+        """
+        为一条新闻查找所属的簇，找不到则以它为代表稿新建一个簇
+
+        Args:
+            title: 标题
+            content: 正文
+            source: 来源
+            item: 作为代表稿保存的对象（默认保存标题）
+            now: 当前时间戳（默认 time.time()）
+
+        Returns:
+            聚类结果
+        """
+        now = time.time() if now is None else now
+        shingle_set = shingles(normalize_text(title, content))
+        signature = minhash(shingle_set) if shingle_set else None
+
+        with self._lock:
+            self._evict(now)
+            self._stats["checked"] += 1
+
+            keys = self._bucket_keys(signature) if signature is not None else []
+            best, best_sim = None, 0.0
+            candidates: Set[str] = set()
+            for key in keys:
+                candidates |= self._buckets.get(key, set())
+            for cluster_id in candidates:
+                cluster = self._clusters[cluster_id]
+                sim = max(jaccard(shingle_set, s) for s in cluster.member_shingles)
+                if sim > best_sim:
+                    best, best_sim = cluster, sim
+
+            if best is not None and best_sim >= self.threshold:
+                best.size += 1
+                best.last_seen = now
+                if source and source not in best.sources:
+                    best.sources.append(source)
+                if len(best.member_shingles) < MAX_MEMBER_SHINGLES:
+                    # 转载稿的签名也加入分桶，便于匹配"转载的转载"
+                    best.member_shingles.append(shingle_set)
+                    for key in keys:
+                        if key not in best.bucket_keys:
+                            best.bucket_keys.append(key)
+                            self._buckets.setdefault(key, set()).add(best.cluster_id)
+                self._order.append((now, best.cluster_id))
+                self._stats["clustered"] += 1
+                return ClusterMatch(cluster=best, is_new=False, similarity=best_sim)
+
+            self._seq += 1
+            cluster = NewsCluster(
+                cluster_id=f"c{self._seq}",
+                representative=item if item is not None else title,
+                sources=[source] if source else [],
+                first_seen=now,
+                last_seen=now,
+                member_shingles=[shingle_set],
+                bucket_keys=keys
+            )
+            self._clusters[cluster.cluster_id] = cluster
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(cluster.cluster_id)
+            self._order.append((now, cluster.cluster_id))
+            self._stats["clusters_created"] += 1
+            return ClusterMatch(cluster=cluster, is_new=True)
+
+    def promote(self, cluster: NewsCluster, item: Any):
+        """把簇的代表稿换成另一条新闻（原代表稿已不可用时，例如已从新闻缓存过期）"""
+        with self._lock:
+            cluster.representative = item
+
+    @staticmethod
+    def _bucket_keys(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+    def _evict(self, now: float):
+        """淘汰窗口外（或超出容量）的簇"""
+        cutoff = now - self.window_seconds
+        while self._order:
+            seen, cluster_id = self._order[0]
+            if seen >= cutoff and len(self._clusters) <= self.max_clusters:
+                break
+            self._order.popleft()
+            cluster = self._clusters.get(cluster_id)
+            # 簇之后再次命中过，以队列中较新的记录为准
+            if cluster is None or cluster.last_seen > seen:
+                continue
+            self._remove(cluster)
+
+    def _remove(self, cluster: NewsCluster):
+        self._clusters.pop(cluster.cluster_id, None)
+        for key in cluster.bucket_keys:
+            bucket = self._buckets.get(key)
+            if bucket:
+                bucket.discard(cluster.cluster_id)
+                if not bucket:
+                    del self._buckets[key]
+        self._stats["clusters_evicted"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "active_clusters": len(self._clusters),
+                "threshold": self.threshold,
+                "window_seconds": self.window_seconds
+            }
+
+
+def collapse_near_duplicates(
+    items: List[Any],
+    get_text: Callable[[Any], Tuple[str, str, str]],
+    threshold: float = 0.7
+) -> List[Tuple[Any, List[str], int]]:
+    """
+    把一批新闻中的转载稿合并到首次出现的代表稿上（批内去重，不跨批次）
+
+    Args:
+        items: 新闻列表（按优先级排列，靠前的作为代表稿）
+        get_text: 取 (标题, 正文, 来源) 的函数
+        threshold: Jaccard 相似度阈值
+
+    Returns:
+        [(代表稿, 来源列表, 簇大小)]，保持代表稿的原有顺序
+    """
+    deduplicator = NewsDeduplicator(threshold=threshold, window_seconds=float('inf'))
+    clusters: List[NewsCluster] = []
+    for item in items:
+        title, content, source = get_text(item)
+        match = deduplicator.assign(title, content, source, item=item, now=0.0)
+        if match.is_new:
+            clusters.append(match.cluster)
+    return [(c.representative, c.sources, c.size) for c in clusters]
+
+
+_news_deduplicator = None
+_dedup_lock = threading.Lock()
+
+
+def get_news_deduplicator() -> NewsDeduplicator:
+    """获取新闻监控使用的滑动窗口去重器单例"""
+    global _news_deduplicator
+    if _news_deduplicator is None:
+        with _dedup_lock:
+            if _news_deduplicator is None:
+                _news_deduplicator = NewsDeduplicator(
+                    threshold=float(os.getenv("NEWS_DEDUP_THRESHOLD", "0.7")),
+                    window_seconds=float(os.getenv("NEWS_DEDUP_WINDOW_HOURS", "6")) * 3600
+                )
+    return _news_deduplicator
@@ -16,6 +16,7 @@ from dataclasses import dataclass
 from enum import Enum
 
 from .news_cache import NewsCache, CachedNews, get_news_cache
+from .news_deduplicator import get_news_deduplicator, collapse_near_duplicates
 from .stock_relation_analyzer import StockRelationAnalyzer, get_stock_relation_analyzer
 from .impact_assessor import ImpactAssessor, get_impact_assessor
 from .news_config import get_news_config_manager, NewsSourceType
@@ -95,7 +96,8 @@ class NewsMonitorCenter:
         self._fetch_tasks: Dict[str, asyncio.Task] = {}
         self._on_new_news: List[Callable] = []
         self._on_urgent_news: List[Callable] = []
-        self._stats = {"total_fetched": 0, "total_processed": 0, "total_duplicates": 0, "start_time": None, "last_fetch_time": None}
+        self._stats = {"total_fetched": 0, "total_processed": 0, "total_duplicates": 0, "total_near_duplicates": 0, "start_time": None, "last_fetch_time": None}
+        self._deduplicator = get_news_deduplicator()
         logger.info("NewsMonitorCenter initialized with config manager")
     
     def _init_sentiment_engine(self):
@@ -727,6 +729,18 @@ class NewsMonitorCenter:
                 self._stats["total_duplicates"] += 1
                 continue
 
+            # 其他来源的转载稿：只记到代表稿的来源列表上，不再重复分析、入缓存和预警
+            source = news_data.get("source", "")
+            fingerprint = self._cache.generate_fingerprint(title, news_data.get("pub_time", ""))
+            match = self._deduplicator.assign(title, content, source, item=fingerprint)
+            if not match.is_new:
+                if self._cache.add_source(match.cluster.representative, source):
+                    self._stats["total_near_duplicates"] += 1
+                    continue
+                # 去重窗口比低紧急度新闻的缓存有效期长，代表稿可能已从缓存过期：
+                # 这条转载稿按新闻处理，并成为该簇新的代表稿
+                self._deduplicator.promote(match.cluster, fingerprint)
+
             # 将CPU密集型操作移到线程池中执行
             try:
                 sentiment_result, related_stocks, impact = await loop.run_in_executor(
@@ -805,8 +819,8 @@ class NewsMonitorCenter:
     async def _send_urgent_notification(self, urgent_news: List[Dict]):
         """发送紧急新闻通知到配置的渠道"""
         try:
-            from backend.services.notification_service import get_notification_service
-            notification_service = get_notification_service()
+            from backend.services.notification_dispatcher import get_notification_dispatcher
+            dispatcher = get_notification_dispatcher()
 
             # 转换为预警格式
             alerts = []
@@ -822,14 +836,11 @@ class NewsMonitorCenter:
                 })
 
             if alerts:
-                result = await notification_service.send_alert_notification(alerts)
-                if result.get('success'):
-                    logger.info(f"✅ 紧急新闻通知发送成功: {len(alerts)}条")
-                elif '0/0' in result.get('message', ''):
-                    # 没有配置通知渠道，这是正常情况，不需要警告
-                    logger.debug(f"紧急新闻通知: 未配置通知渠道，跳过发送")
+                # 写入发件箱，与窗口期内其他预警合并投递；未配置通知渠道时不入队
+                if dispatcher.enqueue(alerts):
+                    logger.info(f"✅ 紧急新闻通知已加入发件箱: {len(alerts)}条")
                 else:
-                    logger.warning(f"⚠️ 紧急新闻通知发送部分失败: {result.get('message')}")
+                    logger.debug(f"紧急新闻通知: 未配置通知渠道，跳过发送")
         except Exception as e:
             logger.error(f"发送紧急新闻通知失败: {e}")
 
@@ -845,10 +856,14 @@ class NewsMonitorCenter:
         news_list = self._cache.get_news_for_stock(stock_code, limit)
         return [n.to_dict() for n in news_list]
     
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
     def get_stats(self) -> Dict[str, Any]:
         cache_stats = self._cache.get_stats()
         source_stats = {sid: {"name": cfg.name, "interval": cfg.interval, "enabled": cfg.enabled, "last_fetch": cfg.last_fetch, "fetch_count": cfg.fetch_count, "error_count": cfg.error_count} for sid, cfg in self._sources.items()}
-        return {**self._stats, "cache": cache_stats, "sources": source_stats, "running": self._running}
+        return {**self._stats, "cache": cache_stats, "dedup": self._deduplicator.get_stats(), "sources": source_stats, "running": self._running}
     
     def set_source_interval(self, source_id: str, interval: int):
         if source_id in self._sources:
@@ -1141,6 +1156,9 @@ class NewsMonitorCenter:
                 management_data = await self._fetch_cninfo_management(limit=source_cfg.limit)
                 news_list.extend(management_data)
 
+            # 合并各来源的转载稿，情绪分析和入库只做一次
+            news_list = self._collapse_reprints(news_list, "市场新闻")
+
             # 对所有新闻进行情绪分析
             if news_list and self._sentiment_engine:
                 for news_item in news_list:
@@ -1172,6 +1190,24 @@ class NewsMonitorCenter:
             logger.error(f"获取市场新闻失败: {e}")
             return []
 
+    @staticmethod
+    def _collapse_reprints(news_list: List[Dict], label: str) -> List[Dict]:
+        """批内近似去重：每个事件保留首条为代表稿，其余来源记在 sources/duplicate_count 上"""
+        if not news_list:
+            return news_list
+        clusters = collapse_near_duplicates(
+            news_list,
+            lambda n: (n.get('title', ''), n.get('content', '') or '', n.get('source', ''))
+        )
+        if len(clusters) < len(news_list):
+            logger.info(f"{label}近似去重: {len(news_list)}条 -> {len(clusters)}条")
+        collapsed = []
+        for news_item, sources, size in clusters:
+            news_item['sources'] = sources
+            news_item['duplicate_count'] = size - 1
+            collapsed.append(news_item)
+        return collapsed
+
     async def _fetch_cninfo_management(self, limit: int = 100) -> List[Dict]:
         """获取巨潮高管变动（p_stock2102）"""
         try:
@@ -1573,6 +1609,8 @@ class NewsMonitorCenter:
                 )
                 news_list.extend(cninfo_stock_news)
 
+            news_list = self._collapse_reprints(news_list, "个股新闻")
+
             # 对所有新闻进行情绪分析
             if news_list and self._sentiment_engine:
                 for news_item in news_list:
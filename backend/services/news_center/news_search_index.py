@@ -0,0 +1,552 @@
+# -*- coding: utf-8 -*-
+"""
+新闻全文检索索引
+基于 SQLite FTS5 的本地持久化索引，覆盖数据库新闻表（MarketNews）、新闻缓存和统一新闻源抓取结果；
+中文按二元组（bigram）切分、英文数字按单词切分后写入 FTS5，入库时增量更新，
+支持关键词、股票代码、来源、时间范围组合查询并按 BM25 相关度排序，查询不访问网络
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger("news_search_index")
+
+# 中日韩统一表意文字（含扩展A和兼容区）
+_CJK = r'㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(f'[{_CJK}]+|[0-9a-z]+')
+_CJK_RE = re.compile(f'^[{_CJK}]')
+_STOCK_CODE_RE = re.compile(r'(?<!\d)\d{6}(?!\d)')
+
+# 索引正文的最大长度（字符），标题始终全文索引
+MAX_CONTENT_LENGTH = 2000
+
+# BM25 列权重：标题命中比正文更重要
+TITLE_WEIGHT = 4.0
+CONTENT_WEIGHT = 1.0
+
+TimeLike = Union[datetime, str, float, int, None]
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    切分文本为索引词
+
+    中文连续片段切为相邻二元组（"中国平安" -> 中国 国平 平安），单字片段保留单字；
+    英文和数字按连续字母数字切分并转小写
+    """
+    if not text:
+        return []
+    tokens = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if _CJK_RE.match(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def build_match_query(keyword: str) -> Optional[str]:
+    """
+    把用户关键词转换为 FTS5 查询表达式
+
+    空白分隔的每个词转换为一个短语（二元组相邻即等价于子串匹配），多个词之间为 AND；
+    单个汉字在索引中可能是某个二元组的首字，按前缀匹配
+    """
+    phrases = []
+    for term in keyword.split():
+        parts = []
+        for token in tokenize(term):
+            if _CJK_RE.match(token) and len(token) == 1:
+                parts.append(f'"{token}"*')
+            else:
+                parts.append(f'"{token}"')
+        if parts:
+            phrases.append(' + '.join(parts))
+    if not phrases:
+        return None
+    return ' AND '.join(f'({p})' for p in phrases)
+
+
+def normalize_stock_codes(values: Iterable[Any]) -> List[str]:
+    """从股票代码/关联股票字段中提取6位A股代码（去掉 .SH/sh 等前后缀）"""
+    codes = []
+    for value in values or []:
+        if isinstance(value, dict):
+            value = value.get('code') or value.get('stock_code') or ''
+        for code in _STOCK_CODE_RE.findall(str(value)):
+            if code not in codes:
+                codes.append(code)
+    return codes
+
+
+def to_timestamp(value: TimeLike) -> Optional[float]:
+    """把 datetime / 时间字符串 / 时间戳转换为 Unix 时间戳"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        pass
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%Y/%m/%d %H:%M:%S', '%Y%m%d'):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+class NewsSearchIndex:
+    """新闻全文检索索引"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        db_path = os.getenv("NEWS_SEARCH_INDEX_PATH")
+        if not db_path:
+            # Docker 环境使用 /app/data 目录，本地开发使用 backend/data 目录
+            if os.path.exists('/app/data'):
+                data_dir = Path('/app/data')
+            else:
+                data_dir = Path(__file__).parent.parent.parent / "data"
+            data_dir.mkdir(exist_ok=True)
+            db_path = str(data_dir / "news_search.db")
+
+        self.db_path = db_path
+        self._db_lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.available = False
+        self._stats = {'indexed': 0, 'removed': 0, 'queries': 0, 'query_ms_total': 0.0}
+
+        if os.getenv("ENABLE_NEWS_SEARCH_INDEX", "true").lower() != "true":
+            logger.info("新闻全文索引已禁用")
+            return
+        try:
+            self._init_database()
+            self.available = True
+            logger.info(f"✅ 新闻全文索引初始化完成: {self.db_path}")
+        except sqlite3.Error as e:
+            # SQLite 未编译 FTS5 等情况，调用方回退为原有的扫描/LIKE 查询
+            logger.warning(f"⚠️ 新闻全文索引不可用: {e}")
+
+    def _init_database(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS news_docs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                doc_key TEXT NOT NULL UNIQUE,
+                origin TEXT NOT NULL,
+                news_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                content TEXT,
+                source TEXT,
+                url TEXT,
+                stock_codes TEXT,
+                sentiment TEXT,
+                pub_time TEXT,
+                ts REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_news_docs_ts ON news_docs(ts);
+            CREATE INDEX IF NOT EXISTS idx_news_docs_origin_ts ON news_docs(origin, ts);
+            CREATE INDEX IF NOT EXISTS idx_news_docs_source_ts ON news_docs(source, ts);
+
+            CREATE TABLE IF NOT EXISTS news_doc_stocks (
+                code TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                PRIMARY KEY (code, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_news_doc_stocks_doc ON news_doc_stocks(doc_id);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+                title, content, tokenize='unicode61'
+            );
+
+            CREATE TABLE IF NOT EXISTS index_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        conn.commit()
+        self._conn = conn
+
+    # ==================== 写入 ====================
+
+    def add(
+        self,
+        origin: str,
+        news_id: str,
+        title: str,
+        content: Optional[str] = None,
+        source: Optional[str] = None,
+        url: Optional[str] = None,
+        stock_codes: Optional[Iterable[Any]] = None,
+        sentiment: Optional[str] = None,
+        pub_time: TimeLike = None,
+        sort_time: TimeLike = None
+    ) -> bool:
+        """
+        写入或更新一条新闻
+
+        Args:
+            origin: 来源库（db=数据库新闻表, cache=新闻缓存, unified=统一新闻源）
+            news_id: 来源库内的新闻ID
+            title: 标题
+            content: 正文
+            source: 新闻来源
+            url: 原文链接
+            stock_codes: 关联股票（代码或含代码的字符串）
+            sentiment: 情绪标签
+            pub_time: 发布时间
+            sort_time: 排序和时间筛选使用的时间，默认取发布时间
+
+        Returns:
+            是否写入成功
+        """
+        return self.add_many([{
+            'origin': origin, 'news_id': news_id, 'title': title, 'content': content,
+            'source': source, 'url': url, 'stock_codes': stock_codes, 'sentiment': sentiment,
+            'pub_time': pub_time, 'sort_time': sort_time
+        }]) > 0
+
+    def add_many(self, docs: List[Dict[str, Any]]) -> int:
+        """批量写入或更新新闻（参数同 add），返回写入条数"""
+        if not self.available or not docs:
+            return 0
+        count = 0
+        with self._db_lock:
+            try:
+                cursor = self._conn.cursor()
+                for doc in docs:
+                    if self._upsert(cursor, doc):
+                        count += 1
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                logger.error(f"写入新闻索引失败: {e}")
+                return 0
+        self._stats['indexed'] += count
+        return count
+
+    def _upsert(self, cursor: sqlite3.Cursor, doc: Dict[str, Any]) -> bool:
+        title = (doc.get('title') or '').strip()
+        news_id = doc.get('news_id')
+        if not title or not news_id:
+            return False
+
+        origin = doc.get('origin') or 'db'
+        content = (doc.get('content') or '')[:MAX_CONTENT_LENGTH]
+        pub_ts = to_timestamp(doc.get('pub_time'))
+        ts = to_timestamp(doc.get('sort_time')) or pub_ts or time.time()
+        pub_time = doc.get('pub_time')
+        if isinstance(pub_time, datetime):
+            pub_time = pub_time.isoformat()
+        codes = normalize_stock_codes(doc.get('stock_codes') or [])
+
+        doc_key = f"{origin}:{news_id}"
+        values = (
+            title, content, doc.get('source') or '', doc.get('url') or '',
+            ','.join(codes), doc.get('sentiment'), str(pub_time) if pub_time else None, ts
+        )
+        row = cursor.execute("SELECT id FROM news_docs WHERE doc_key = ?", (doc_key,)).fetchone()
+        if row:
+            doc_id = row[0]
+            cursor.execute("""
+                UPDATE news_docs SET title=?, content=?, source=?, url=?, stock_codes=?,
+                    sentiment=?, pub_time=?, ts=? WHERE id=?
+            """, (*values, doc_id))
+            cursor.execute("DELETE FROM news_fts WHERE rowid = ?", (doc_id,))
+            cursor.execute("DELETE FROM news_doc_stocks WHERE doc_id = ?", (doc_id,))
+        else:
+            cursor.execute("""
+                INSERT INTO news_docs (doc_key, origin, news_id, title, content, source, url,
+                    stock_codes, sentiment, pub_time, ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (doc_key, origin, news_id, *values))
+            doc_id = cursor.lastrowid
+
+        cursor.execute(
+            "INSERT INTO news_fts (rowid, title, content) VALUES (?, ?, ?)",
+            (doc_id, ' '.join(tokenize(title)), ' '.join(tokenize(content)))
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO news_doc_stocks (code, doc_id) VALUES (?, ?)",
+            [(code, doc_id) for code in codes]
+        )
+        return True
+
+    def remove(self, origin: str, news_ids: Iterable[str]) -> int:
+        """删除指定新闻"""
+        keys = [f"{origin}:{news_id}" for news_id in news_ids]
+        if not self.available or not keys:
+            return 0
+        with self._db_lock:
+            ids = []
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                ids.extend(r[0] for r in self._conn.execute(
+                    f"SELECT id FROM news_docs WHERE doc_key IN ({placeholders})", chunk
+                ))
+            return self._delete_ids(ids)
+
+    def prune(self, before: TimeLike, origin: Optional[str] = None) -> int:
+        """删除时间早于 before 的新闻"""
+        if not self.available:
+            return 0
+        sql = "SELECT id FROM news_docs WHERE ts < ?"
+        params: List[Any] = [to_timestamp(before)]
+        if origin:
+            sql += " AND origin = ?"
+            params.append(origin)
+        with self._db_lock:
+            ids = [r[0] for r in self._conn.execute(sql, params)]
+            return self._delete_ids(ids)
+
+    def _delete_ids(self, ids: List[int]) -> int:
+        if not ids:
+            return 0
+        try:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                self._conn.execute(f"DELETE FROM news_fts WHERE rowid IN ({placeholders})", chunk)
+                self._conn.execute(f"DELETE FROM news_doc_stocks WHERE doc_id IN ({placeholders})", chunk)
+                self._conn.execute(f"DELETE FROM news_docs WHERE id IN ({placeholders})", chunk)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            self._conn.rollback()
+            logger.error(f"删除新闻索引失败: {e}")
+            return 0
+        self._stats['removed'] += len(ids)
+        return len(ids)
+
+    def backfill_market_news(self, days: int = 30, batch_size: int = 1000) -> int:
+        """
+        把数据库新闻表中尚未索引的记录补入索引（按自增ID续传）
+
+        Args:
+            days: 首次补建时只索引最近N天的新闻
+            batch_size: 每批读取的记录数
+
+        Returns:
+            补入的记录数
+        """
+        if not self.available:
+            return 0
+
+        from backend.database.database import get_db_context
+        from backend.database.models import MarketNews
+
+        last_id = int(self._get_meta('market_news_last_id') or 0)
+        since = datetime.now() - timedelta(days=days)
+        total = 0
+        while True:
+            with get_db_context() as db:
+                query = db.query(MarketNews).filter(MarketNews.id > last_id)
+                if last_id == 0:
+                    query = query.filter(MarketNews.created_at >= since)
+                rows = [n.to_dict() for n in query.order_by(MarketNews.id).limit(batch_size).all()]
+            if not rows:
+                break
+            total += self.add_many([self.market_news_doc(row) for row in rows])
+            last_id = rows[-1]['id']
+            self._set_meta('market_news_last_id', str(last_id))
+
+        if total:
+            logger.info(f"新闻全文索引补建: {total}条数据库新闻")
+        return total
+
+    def maintain(self, retention_days: int = 30) -> Dict[str, int]:
+        """启动维护：补建数据库新闻的索引，清理过期的抓取结果"""
+        backfilled = self.backfill_market_news(days=retention_days)
+        pruned = self.prune(datetime.now() - timedelta(days=retention_days), origin='unified')
+        return {'backfilled': backfilled, 'pruned': pruned}
+
+    @staticmethod
+    def market_news_doc(news: Dict[str, Any]) -> Dict[str, Any]:
+        """MarketNews.to_dict() 转换为索引文档"""
+        return {
+            'origin': 'db',
+            'news_id': news.get('news_id'),
+            'title': news.get('title'),
+            'content': news.get('content') or news.get('summary'),
+            'source': news.get('source'),
+            'url': news.get('source_url'),
+            'stock_codes': [news.get('stock_code')] if news.get('stock_code') else [],
+            'sentiment': news.get('sentiment'),
+            'pub_time': news.get('pub_time'),
+            'sort_time': news.get('pub_time') or news.get('created_at')
+        }
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._db_lock:
+            row = self._conn.execute("SELECT value FROM index_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)", (key, value)
+            )
+            self._conn.commit()
+
+    # ==================== 查询 ====================
+
+    def search(
+        self,
+        keyword: Optional[str] = None,
+        stock_code: Optional[str] = None,
+        source: Optional[str] = None,
+        start_time: TimeLike = None,
+        end_time: TimeLike = None,
+        origin: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        order_by: str = "relevance"
+    ) -> List[Dict[str, Any]]:
+        """
+        检索新闻
+
+        Args:
+            keyword: 关键词，空白分隔多个词表示同时包含
+            stock_code: 股票代码（关联股票或标题/正文中出现该代码）
+            source: 新闻来源
+            start_time: 起始时间
+            end_time: 结束时间
+            origin: 只检索指定来源库（db/cache/unified）
+            limit: 返回数量
+            offset: 偏移量
+            order_by: relevance=按相关度（无关键词时按时间），time=按时间倒序
+
+        Returns:
+            新闻列表，包含 news_id/origin/title/content/source/url/stock_codes/sentiment/pub_time/score
+        """
+        if not self.available:
+            return []
+
+        match = build_match_query(keyword) if keyword else None
+        if keyword and match is None:
+            return []
+
+        conditions, params = [], []
+        if match:
+            sql = f"""
+                SELECT d.*, bm25(news_fts, {TITLE_WEIGHT}, {CONTENT_WEIGHT}) AS rank
+                FROM news_fts JOIN news_docs d ON d.id = news_fts.rowid
+            """
+            conditions.append("news_fts MATCH ?")
+            params.append(match)
+        else:
+            sql = "SELECT d.*, 0 AS rank FROM news_docs d"
+
+        if stock_code:
+            codes = normalize_stock_codes([stock_code]) or [stock_code.split('.')[0]]
+            code_match = build_match_query(codes[0])
+            conditions.append(
+                "(d.id IN (SELECT doc_id FROM news_doc_stocks WHERE code = ?)"
+                " OR d.id IN (SELECT rowid FROM news_fts WHERE news_fts MATCH ?))"
+            )
+            params.extend([codes[0], code_match])
+        if source:
+            conditions.append("d.source = ?")
+            params.append(source)
+        if origin:
+            conditions.append("d.origin = ?")
+            params.append(origin)
+        if start_time is not None:
+            conditions.append("d.ts >= ?")
+            params.append(to_timestamp(start_time))
+        if end_time is not None:
+            conditions.append("d.ts <= ?")
+            params.append(to_timestamp(end_time))
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if match and order_by == "relevance":
+            sql += " ORDER BY rank, d.ts DESC"
+        else:
+            sql += " ORDER BY d.ts DESC"
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        started = time.perf_counter()
+        with self._db_lock:
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"新闻索引查询失败: {e}")
+                return []
+        self._stats['queries'] += 1
+        self._stats['query_ms_total'] += (time.perf_counter() - started) * 1000
+
+        return [
+            {
+                'news_id': row['news_id'],
+                'origin': row['origin'],
+                'title': row['title'],
+                'content': row['content'],
+                'source': row['source'],
+                'url': row['url'],
+                'stock_codes': row['stock_codes'].split(',') if row['stock_codes'] else [],
+                'sentiment': row['sentiment'],
+                'pub_time': row['pub_time'],
+                'time': datetime.fromtimestamp(row['ts']).isoformat(),
+                # bm25 越小越相关，取反后越大越相关
+                'score': round(-row['rank'], 4) if match else None
+            }
+            for row in rows
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计"""
+        stats = {
+            'available': self.available,
+            'db_path': self.db_path,
+            **self._stats,
+            'avg_query_ms': round(self._stats['query_ms_total'] / self._stats['queries'], 2)
+            if self._stats['queries'] else 0.0
+        }
+        if self.available:
+            with self._db_lock:
+                stats['documents'] = dict(self._conn.execute(
+                    "SELECT origin, COUNT(*) FROM news_docs GROUP BY origin"
+                ).fetchall())
+        return stats
+
+
+_news_search_index = None
+
+
+def get_news_search_index() -> NewsSearchIndex:
+    """获取新闻全文索引单例"""
+    global _news_search_index
+    if _news_search_index is None:
+        _news_search_index = NewsSearchIndex()
+    return _news_search_index
@@ -12,6 +12,7 @@ from sqlalchemy.exc import IntegrityError
 
 from backend.database.database import get_db_context
 from backend.database.models import MarketNews
+from backend.services.news_center.news_search_index import get_news_search_index, NewsSearchIndex
 from backend.utils.logging_config import get_logger
 
 logger = get_logger("news_storage")
@@ -63,6 +64,12 @@ class NewsStorage:
             # 生成唯一ID
             news_id = generate_news_id(title, source, pub_time)
 
+            # 近似去重合并的转载来源记在扩展数据里
+            extra_data = news_item.get('extra_data')
+            if len(news_item.get('sources') or []) > 1:
+                extra_data = {**(extra_data or {}), 'sources': news_item['sources'],
+                              'duplicate_count': news_item.get('duplicate_count', 0)}
+
             with get_db_context() as db:
                 # 检查是否已存在
                 existing = db.query(MarketNews).filter(MarketNews.news_id == news_id).first()
@@ -86,10 +93,14 @@ class NewsStorage:
                     sentiment_score=news_item.get('sentiment_score'),
                     category=news_item.get('category'),
                     keywords=news_item.get('keywords'),
-                    extra_data=news_item.get('extra_data')
+                    extra_data=extra_data
                 )
                 db.add(news)
-                return True
+                indexed_doc = NewsSearchIndex.market_news_doc(news.to_dict())
+
+            # 提交成功后增量更新全文索引
+            get_news_search_index().add_many([indexed_doc])
+            return True
 
         except IntegrityError:
             # 唯一约束冲突，说明已存在
@@ -227,19 +238,28 @@ class NewsStorage:
         self,
         keyword: str,
         limit: int = 50,
-        hours: int = 72
+        hours: int = 72,
+        source: Optional[str] = None,
+        stock_code: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         搜索新闻
+        优先使用本地全文索引（按相关度排序），索引不可用时回退为 LIKE 查询
 
         Args:
             keyword: 搜索关键词
             limit: 返回数量
             hours: 搜索最近N小时的新闻
+            source: 数据源筛选
+            stock_code: 股票代码筛选
 
         Returns:
             新闻列表
         """
+        index = get_news_search_index()
+        if index.available:
+            return self._search_indexed(index, keyword, limit, hours, source, stock_code)
+
         try:
             with get_db_context() as db:
                 query = db.query(MarketNews)
@@ -254,6 +274,12 @@ class NewsStorage:
                     )
                 )
 
+                if source:
+                    query = query.filter(MarketNews.source == source)
+                if stock_code:
+                    code = stock_code.split('.')[0]
+                    query = query.filter(MarketNews.stock_code.like(f"{code}%"))
+
                 # 时间筛选
                 if hours > 0:
                     since = datetime.now() - timedelta(hours=hours)
@@ -270,6 +296,40 @@ class NewsStorage:
             logger.error(f"搜索新闻失败: {e}")
             return []
 
+    def _search_indexed(
+        self,
+        index: NewsSearchIndex,
+        keyword: str,
+        limit: int,
+        hours: int,
+        source: Optional[str],
+        stock_code: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """通过全文索引检索，再按新闻ID从数据库取完整记录"""
+        try:
+            hits = index.search(
+                keyword=keyword,
+                stock_code=stock_code,
+                source=source,
+                start_time=datetime.now() - timedelta(hours=hours) if hours > 0 else None,
+                origin='db',
+                limit=limit
+            )
+            if not hits:
+                return []
+
+            news_ids = [hit['news_id'] for hit in hits]
+            with get_db_context() as db:
+                rows = db.query(MarketNews).filter(MarketNews.news_id.in_(news_ids)).all()
+                by_id = {row.news_id: row.to_dict() for row in rows}
+
+            # 保持索引的相关度顺序
+            return [by_id[news_id] for news_id in news_ids if news_id in by_id]
+
+        except Exception as e:
+            logger.error(f"搜索新闻失败: {e}")
+            return []
+
     def get_statistics(self, hours: int = 24) -> Dict[str, Any]:
         """
         获取新闻统计数据
@@ -334,7 +394,9 @@ class NewsStorage:
                 cutoff = datetime.now() - timedelta(days=days)
                 deleted = db.query(MarketNews).filter(MarketNews.created_at < cutoff).delete()
                 logger.info(f"清理旧新闻: 删除{deleted}条（{days}天前）")
-                return deleted
+
+            get_news_search_index().prune(cutoff, origin='db')
+            return deleted
 
         except Exception as e:
             logger.error(f"清理旧新闻失败: {e}")
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+预警通知投递服务
+预警先写入持久化发件箱，再由后台循环按渠道合并为摘要发送，失败按指数退避重试
+
+多个进程同时投递时，每次投递先用一条 UPDATE 把到期记录认领为 sending（写入认领者和租约），
+再只发送自己认领到的记录，同一条预警不会被重复发送；认领进程崩溃后租约过期，记录可被重新认领
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy import and_, func, or_
+
+from backend.database.database import engine, get_db_context
+from backend.database.models import NotificationOutbox
+from backend.services.notification_service import NotificationConfig, get_notification_service
+from backend.utils.logging_config import get_logger
+
+logger = get_logger("notification_dispatcher")
+
+
+class NotificationDispatcher:
+    """预警通知投递服务"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        # 重试配置
+        self._max_attempts = 5
+        self._base_backoff = 30      # 首次重试间隔（秒）
+        self._max_backoff = 1800     # 最大重试间隔（秒）
+        self._batch_limit = 500      # 单次投递最多处理的发件箱记录数
+        self._lease_seconds = 300    # 认领租约（秒），应大于一次投递的最长耗时
+
+        # 本进程标识：主机名:PID
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._stats = {
+            'enqueued': 0,
+            'delivered': 0,
+            'digests_sent': 0,
+            'digests_failed': 0,
+        }
+
+        NotificationOutbox.__table__.create(bind=engine, checkfirst=True)
+        logger.info("NotificationDispatcher initialized")
+
+    async def start(self):
+        """启动投递循环"""
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._dispatch_loop())
+        logger.info("NotificationDispatcher started")
+
+    async def stop(self):
+        """停止投递循环，并尽量投递已到期的通知"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final notification flush failed: {e}")
+        await get_notification_service().close()
+        logger.info("NotificationDispatcher stopped")
+
+    async def _dispatch_loop(self):
+        """投递循环：每个合并窗口投递一次"""
+        while self._running:
+            await asyncio.sleep(NotificationConfig.NOTIFY_COALESCE_WINDOW)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Notification dispatch error: {e}")
+
+    def enqueue(
+        self,
+        alerts: List[Dict],
+        channels: Optional[List[str]] = None,
+        email_recipients: Optional[List[str]] = None
+    ) -> int:
+        """
+        将预警写入发件箱
+
+        Args:
+            alerts: 预警列表 {title, message, level, stock_code, suggestion}
+            channels: 通知渠道，默认使用所有可用渠道
+            email_recipients: 邮件收件人，默认使用配置的收件人
+
+        Returns:
+            写入的发件箱记录数
+        """
+        if not alerts:
+            return 0
+        if channels is None:
+            channels = NotificationConfig.get_available_channels()
+        if not channels:
+            logger.debug("No notification channel configured, skip enqueue")
+            return 0
+
+        now = datetime.utcnow()
+        count = 0
+        with get_db_context() as db:
+            for channel in channels:
+                recipients = None
+                if channel == 'email':
+                    recipients = email_recipients or NotificationConfig.EMAIL_RECIPIENTS
+                    if not recipients:
+                        continue
+                for alert in alerts:
+                    db.add(NotificationOutbox(
+                        channel=channel,
+                        payload={
+                            'title': alert.get('title', ''),
+                            'message': alert.get('message', ''),
+                            'level': alert.get('level', 'medium'),
+                            'stock_code': alert.get('stock_code', ''),
+                            'suggestion': alert.get('suggestion', '')
+                        },
+                        recipients=recipients,
+                        status='pending',
+                        attempts=0,
+                        next_attempt_at=now,
+                        created_at=now
+                    ))
+                    count += 1
+
+        self._stats['enqueued'] += count
+        self._ensure_started()
+        return count
+
+    def _ensure_started(self):
+        """在事件循环中首次入队时自动启动投递循环"""
+        if self._running:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._dispatch_loop())
+        logger.info("NotificationDispatcher started on first enqueue")
+
+    async def flush(self) -> Dict[str, int]:
+        """
+        投递所有到期的通知：同一渠道（及收件人）的预警合并为摘要发送
+
+        Returns:
+            {'digests': 摘要发送次数, 'delivered': 投递成功的预警数, 'failed': 投递失败的预警数}
+        """
+        async with self._flush_lock:
+            pending = self._claim()
+
+            if not pending:
+                return {'digests': 0, 'delivered': 0, 'failed': 0}
+
+            # 按渠道和收件人分组
+            groups: Dict[tuple, List[tuple]] = {}
+            for item in pending:
+                _, channel, _, recipients, _ = item
+                groups.setdefault((channel, tuple(recipients or ())), []).append(item)
+
+            service = get_notification_service()
+            max_items = NotificationConfig.NOTIFY_DIGEST_MAX_ITEMS
+            summary = {'digests': 0, 'delivered': 0, 'failed': 0}
+
+            for (channel, recipients), items in groups.items():
+                for start in range(0, len(items), max_items):
+                    chunk = items[start:start + max_items]
+                    try:
+                        result = await service.send_channel(
+                            channel,
+                            [item[2] for item in chunk],
+                            list(recipients) or None
+                        )
+                    except Exception as e:
+                        result = {'success': False, 'message': str(e)}
+
+                    summary['digests'] += 1
+                    if result.get('success'):
+                        self._mark_delivered([item[0] for item in chunk])
+                        summary['delivered'] += len(chunk)
+                        self._stats['digests_sent'] += 1
+                        self._stats['delivered'] += len(chunk)
+                    else:
+                        self._mark_failed(chunk, result.get('message', ''))
+                        summary['failed'] += len(chunk)
+                        self._stats['digests_failed'] += 1
+
+            logger.info(
+                f"📤 通知投递: {len(pending)}条预警 -> {summary['digests']}条摘要, "
+                f"成功{summary['delivered']}条, 失败{summary['failed']}条"
+            )
+            return summary
+
+    def _claim(self) -> List[tuple]:
+        """
+        认领到期的记录（含租约已过期的 sending 记录）并返回
+
+        认领在一条 UPDATE 中完成，WHERE 条件重新检查状态，并发的投递进程不会认领到同一条记录
+        """
+        now = datetime.utcnow()
+        claim = f"{self._owner}:{uuid.uuid4().hex[:8]}"
+        claimable = or_(
+            and_(NotificationOutbox.status == 'pending', NotificationOutbox.next_attempt_at <= now),
+            and_(NotificationOutbox.status == 'sending', NotificationOutbox.lease_until < now)
+        )
+        with get_db_context() as db:
+            due_ids = db.query(NotificationOutbox.id).filter(claimable).order_by(
+                NotificationOutbox.id
+            ).limit(self._batch_limit).subquery()
+            db.query(NotificationOutbox).filter(
+                NotificationOutbox.id.in_(due_ids.select()),
+                claimable
+            ).update({
+                'status': 'sending',
+                'owner': claim,
+                'lease_until': now + timedelta(seconds=self._lease_seconds)
+            }, synchronize_session=False)
+
+        with get_db_context() as db:
+            rows = db.query(NotificationOutbox).filter(
+                NotificationOutbox.owner == claim,
+                NotificationOutbox.status == 'sending'
+            ).order_by(NotificationOutbox.id).all()
+            return [(row.id, row.channel, row.payload, row.recipients, row.attempts or 0) for row in rows]
+
+    def _mark_delivered(self, ids: List[int]):
+        """投递成功的记录从发件箱删除"""
+        with get_db_context() as db:
+            db.query(NotificationOutbox).filter(
+                NotificationOutbox.id.in_(ids)
+            ).delete(synchronize_session=False)
+
+    def _mark_failed(self, items: List[tuple], error: str):
+        """投递失败：按指数退避安排重试，超过最大次数后标记为 failed"""
+        now = datetime.utcnow()
+        with get_db_context() as db:
+            for outbox_id, channel, _, _, attempts in items:
+                attempts += 1
+                values = {'attempts': attempts, 'last_error': error[:500], 'owner': None, 'lease_until': None}
+                if attempts >= self._max_attempts:
+                    values['status'] = 'failed'
+                    logger.warning(f"⚠️ {channel} 通知多次投递失败，放弃: #{outbox_id} {error}")
+                else:
+                    delay = min(self._base_backoff * (2 ** (attempts - 1)), self._max_backoff)
+                    values['status'] = 'pending'
+                    values['next_attempt_at'] = now + timedelta(seconds=delay)
+                db.query(NotificationOutbox).filter(
+                    NotificationOutbox.id == outbox_id
+                ).update(values, synchronize_session=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with get_db_context() as db:
+            counts = dict(
+                db.query(NotificationOutbox.status, func.count(NotificationOutbox.id))
+                .group_by(NotificationOutbox.status).all()
+            )
+        return {
+            'running': self._running,
+            'coalesce_window': NotificationConfig.NOTIFY_COALESCE_WINDOW,
+            'digest_max_items': NotificationConfig.NOTIFY_DIGEST_MAX_ITEMS,
+            'pending': counts.get('pending', 0),
+            'sending': counts.get('sending', 0),
+            'failed': counts.get('failed', 0),
+            **self._stats
+        }
+
+
+# 单例获取函数
+_dispatcher = None
+
+
+def get_notification_dispatcher() -> NotificationDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = NotificationDispatcher()
+    return _dispatcher
@@ -4,7 +4,9 @@
 """
 
 import os
+import asyncio
 import smtplib
+import threading
 import hashlib
 import hmac
 import base64
@@ -27,6 +29,60 @@ logger = get_logger("notification")
 # 配置文件路径
 CONFIG_FILE_PATH = Path(__file__).parent.parent / 'config' / 'notification_config.json'
 
+# 共享的 HTTP 客户端（按事件循环复用连接池）
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    获取通知渠道共用的 HTTP 客户端
+
+    客户端绑定到创建时的事件循环，在其他事件循环中调用时会新建一个，并关闭旧客户端的连接池
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        if _http_client is not None and not _http_client.is_closed:
+            _close_stale_client(_http_client, _http_client_loop, loop)
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20, keepalive_expiry=60),
+            timeout=10
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+# 正在关闭的旧客户端任务（持有引用避免任务被回收）
+_closing_tasks: set = set()
+
+
+async def _aclose_quietly(client: httpx.AsyncClient):
+    try:
+        await client.aclose()
+    except Exception as e:
+        logger.debug(f"关闭旧 HTTP 客户端失败: {e}")
+
+
+def _close_stale_client(client: httpx.AsyncClient, client_loop: Optional[asyncio.AbstractEventLoop],
+                        loop: asyncio.AbstractEventLoop):
+    """关闭绑定到其他事件循环的旧客户端：原循环仍在运行时交给原循环关闭，否则在当前循环中关闭"""
+    if client_loop is not None and client_loop.is_running() and not client_loop.is_closed():
+        asyncio.run_coroutine_threadsafe(_aclose_quietly(client), client_loop)
+        return
+    task = loop.create_task(_aclose_quietly(client))
+    _closing_tasks.add(task)
+    task.add_done_callback(_closing_tasks.discard)
+
+
+async def close_http_client():
+    """关闭共享的 HTTP 客户端"""
+    global _http_client, _http_client_loop
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+    _http_client_loop = None
+
 
 # 自定义 classproperty 装饰器
 class classproperty:
@@ -126,6 +182,8 @@ class NotificationConfig:
             'SERVERCHAN_KEY': '******' if cls.SERVERCHAN_KEY else '',
             'BARK_KEY': '******' if cls.BARK_KEY else '',
             'BARK_SERVER': cls.BARK_SERVER,
+            'NOTIFY_COALESCE_WINDOW': cls.NOTIFY_COALESCE_WINDOW,
+            'NOTIFY_DIGEST_MAX_ITEMS': cls.NOTIFY_DIGEST_MAX_ITEMS,
         }
         return config
 
@@ -205,6 +263,19 @@ class NotificationConfig:
     def BARK_SERVER(cls) -> str:
         return cls._get_config('BARK_SERVER', 'https://api.day.app')
 
+    # 预警合并配置：窗口期内的预警按渠道合并为一条摘要
+    @classproperty
+    def NOTIFY_COALESCE_WINDOW(cls) -> int:
+        """合并窗口（秒）"""
+        window = cls._get_config('NOTIFY_COALESCE_WINDOW', '30')
+        return max(1, int(window)) if window else 30
+
+    @classproperty
+    def NOTIFY_DIGEST_MAX_ITEMS(cls) -> int:
+        """单条摘要最多包含的预警数"""
+        max_items = cls._get_config('NOTIFY_DIGEST_MAX_ITEMS', '20')
+        return max(1, int(max_items)) if max_items else 20
+
     @classmethod
     def is_email_configured(cls) -> bool:
         """检查邮件是否已配置"""
@@ -248,10 +319,52 @@ class NotificationConfig:
 
 
 class EmailNotifier:
-    """邮件通知器"""
+    """邮件通知器（复用 SMTP 长连接）"""
 
     def __init__(self):
         self.config = NotificationConfig
+        self._server: Optional[smtplib.SMTP] = None
+        self._server_key: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        """建立 SMTP 连接并登录"""
+        if self.config.SMTP_USE_SSL:
+            server = smtplib.SMTP_SSL(self.config.SMTP_HOST, self.config.SMTP_PORT, timeout=30)
+        else:
+            server = smtplib.SMTP(self.config.SMTP_HOST, self.config.SMTP_PORT, timeout=30)
+            server.starttls()
+        server.login(self.config.SMTP_USER, self.config.SMTP_PASSWORD)
+        return server
+
+    def _get_server(self) -> smtplib.SMTP:
+        """获取可用的 SMTP 连接，配置变化或连接失效时重建"""
+        key = (
+            self.config.SMTP_HOST, self.config.SMTP_PORT, self.config.SMTP_USE_SSL,
+            self.config.SMTP_USER, self.config.SMTP_PASSWORD
+        )
+        if self._server is not None and self._server_key == key:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+        self.close()
+        self._server = self._connect()
+        self._server_key = key
+        return self._server
+
+    def close(self):
+        """关闭 SMTP 连接"""
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+        self._server = None
+        self._server_key = None
 
     def send(
         self,
@@ -289,20 +402,21 @@ class EmailNotifier:
                 part = MIMEText(content, 'plain', 'utf-8')
             msg.attach(part)
 
-            # 发送邮件
-            if self.config.SMTP_USE_SSL:
-                server = smtplib.SMTP_SSL(self.config.SMTP_HOST, self.config.SMTP_PORT)
-            else:
-                server = smtplib.SMTP(self.config.SMTP_HOST, self.config.SMTP_PORT)
-                server.starttls()
-
-            server.login(self.config.SMTP_USER, self.config.SMTP_PASSWORD)
-            server.sendmail(
-                self.config.SMTP_FROM or self.config.SMTP_USER,
-                to_emails,
-                msg.as_string()
-            )
-            server.quit()
+            # 发送邮件（连接被服务器断开时重连一次）
+            with self._lock:
+                try:
+                    self._get_server().sendmail(
+                        self.config.SMTP_FROM or self.config.SMTP_USER,
+                        to_emails,
+                        msg.as_string()
+                    )
+                except smtplib.SMTPServerDisconnected:
+                    self.close()
+                    self._get_server().sendmail(
+                        self.config.SMTP_FROM or self.config.SMTP_USER,
+                        to_emails,
+                        msg.as_string()
+                    )
 
             logger.info(f"✅ 邮件发送成功: {subject} -> {to_emails}")
             return {'success': True, 'message': '邮件发送成功'}
@@ -311,6 +425,16 @@ class EmailNotifier:
             logger.error(f"❌ 邮件发送失败: {e}")
             return {'success': False, 'message': str(e)}
 
+    async def send_async(
+        self,
+        to_emails: List[str],
+        subject: str,
+        content: str,
+        content_type: str = 'html'
+    ) -> Dict[str, Any]:
+        """在线程中发送邮件，避免阻塞事件循环"""
+        return await asyncio.to_thread(self.send, to_emails, subject, content, content_type)
+
 
 class WeChatNotifier:
     """企业微信通知器"""
@@ -355,13 +479,12 @@ class WeChatNotifier:
                     }
                 }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.config.WECHAT_WEBHOOK_URL,
-                    json=data,
-                    timeout=10
-                )
-                result = response.json()
+            response = await get_http_client().post(
+                self.config.WECHAT_WEBHOOK_URL,
+                json=data,
+                timeout=10
+            )
+            result = response.json()
 
             if result.get('errcode') == 0:
                 logger.info(f"✅ 企业微信消息发送成功")
@@ -452,9 +575,8 @@ class DingTalkNotifier:
                     }
                 }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=data, timeout=10)
-                result = response.json()
+            response = await get_http_client().post(url, json=data, timeout=10)
+            result = response.json()
 
             if result.get('errcode') == 0:
                 logger.info(f"✅ 钉钉消息发送成功")
@@ -500,9 +622,8 @@ class ServerChanNotifier:
                 'desp': content
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, data=data, timeout=10)
-                result = response.json()
+            response = await get_http_client().post(url, data=data, timeout=10)
+            result = response.json()
 
             if result.get('code') == 0:
                 logger.info(f"✅ Server酱消息发送成功")
@@ -554,9 +675,8 @@ class BarkNotifier:
                 'sound': sound
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=data, timeout=10)
-                result = response.json()
+            response = await get_http_client().post(url, json=data, timeout=10)
+            result = response.json()
 
             if result.get('code') == 200:
                 logger.info(f"✅ Bark消息发送成功")
@@ -573,6 +693,8 @@ class BarkNotifier:
 class NotificationService:
     """统一通知服务"""
 
+    CHANNELS = ('email', 'wechat', 'dingtalk', 'serverchan', 'bark')
+
     def __init__(self):
         self.email = EmailNotifier()
         self.wechat = WeChatNotifier()
@@ -680,6 +802,51 @@ class NotificationService:
 
         return md
 
+    async def send_channel(
+        self,
+        channel: str,
+        alerts: List[Dict],
+        email_recipients: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        将一组预警作为一条消息发送到单个渠道
+
+        Args:
+            channel: 通知渠道 (email/wechat/dingtalk/serverchan/bark)
+            alerts: 预警列表
+            email_recipients: 邮件收件人列表
+
+        Returns:
+            {'success': bool, 'message': str}
+        """
+        if channel == 'email':
+            recipients = email_recipients or NotificationConfig.EMAIL_RECIPIENTS
+            if not recipients:
+                return {'success': False, 'message': '未配置邮件收件人'}
+            subject = f"[InvestMindPro] 风险预警 - {len(alerts)}条新预警"
+            content = self.format_alert_email(alerts)
+            return await self.email.send_async(recipients, subject, content)
+
+        if channel == 'wechat':
+            return await self.wechat.send(self.format_alert_markdown(alerts))
+
+        if channel == 'dingtalk':
+            return await self.dingtalk.send(
+                self.format_alert_markdown(alerts),
+                title=f"风险预警 - {len(alerts)}条"
+            )
+
+        if channel == 'serverchan':
+            title = f"[InvestMindPro] {len(alerts)}条风险预警"
+            return await self.serverchan.send(title, self.format_alert_markdown(alerts))
+
+        if channel == 'bark':
+            # Bark内容简短
+            content = f"检测到{len(alerts)}条风险预警，请及时查看"
+            return await self.bark.send("InvestMindPro 风险预警", content)
+
+        return {'success': False, 'message': f'未知通知渠道: {channel}'}
+
     async def send_alert_notification(
         self,
         alerts: List[Dict],
@@ -705,38 +872,11 @@ class NotificationService:
             channels = NotificationConfig.get_available_channels()
 
         results = {}
-
-        # 邮件通知
-        if 'email' in channels and email_recipients:
-            subject = f"[InvestMindPro] 风险预警 - {len(alerts)}条新预警"
-            content = self.format_alert_email(alerts)
-            results['email'] = self.email.send(email_recipients, subject, content)
-
-        # 企业微信通知
-        if 'wechat' in channels:
-            content = self.format_alert_markdown(alerts)
-            results['wechat'] = await self.wechat.send(content)
-
-        # 钉钉通知
-        if 'dingtalk' in channels:
-            content = self.format_alert_markdown(alerts)
-            results['dingtalk'] = await self.dingtalk.send(
-                content,
-                title=f"风险预警 - {len(alerts)}条"
-            )
-
-        # Server酱通知
-        if 'serverchan' in channels:
-            title = f"[InvestMindPro] {len(alerts)}条风险预警"
-            content = self.format_alert_markdown(alerts)
-            results['serverchan'] = await self.serverchan.send(title, content)
-
-        # Bark通知
-        if 'bark' in channels:
-            title = f"InvestMindPro 风险预警"
-            # Bark内容简短
-            content = f"检测到{len(alerts)}条风险预警，请及时查看"
-            results['bark'] = await self.bark.send(title, content)
+        for channel in channels:
+            if channel == 'email' and not email_recipients:
+                continue
+            if channel in self.CHANNELS:
+                results[channel] = await self.send_channel(channel, alerts, email_recipients)
 
         # 统计结果
         success_count = sum(1 for r in results.values() if r.get('success'))
@@ -750,6 +890,11 @@ class NotificationService:
             'details': results
         }
 
+    async def close(self):
+        """释放 SMTP 长连接和 HTTP 连接池"""
+        await asyncio.to_thread(self.email.close)
+        await close_http_client()
+
 
 # 全局实例
 _notification_service = None
@@ -0,0 +1,324 @@
+"""
+实时行情二进制快照
+TDX 缓存服务（单一写进程）把全市场实时行情写入固定布局的内存映射文件，
+API 进程与其他工作进程直接映射同一文件读取，无需解析 JSON，也无需加锁。
+
+文件布局（小端）：
+    头部 64 字节: magic(4s) version(u4) seq(u8) count(u4) capacity(u4) updated_at(f8) record_size(u4)
+    记录区: capacity 条 QUOTE_DTYPE 结构化记录，前 count 条有效，按代码升序排列
+
+一致性（seqlock）：
+    写入方先把 seq 加 1（奇数表示正在写），写完记录区和 count/updated_at 后再加 1（偶数）；
+    读取方读 seq（奇数则重试）→ 读取数据 → 再读 seq，两次不一致说明读取期间被改写，重试。
+
+用法：
+    # 写进程
+    get_snapshot_writer().write_dataframe(spot_df)
+    # 任意进程
+    quote = get_snapshot_reader().get("600519")
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger("services.quote_snapshot")
+
+SNAPSHOT_FILE = Path(os.getenv("QUOTE_SNAPSHOT_FILE", "data/tdx_cache/realtime_quotes.snap"))
+
+MAGIC = b"TDXQ"
+VERSION = 1
+HEADER = struct.Struct("<4sIQIIdI")
+HEADER_SIZE = 64
+SEQ_OFFSET = 8  # magic(4) + version(4)
+
+# A股约 5400 只，预留余量；超出的记录会被截断
+DEFAULT_CAPACITY = int(os.getenv("QUOTE_SNAPSHOT_CAPACITY", "8192"))
+
+# 读取时遇到写入中的最大重试次数
+MAX_READ_RETRIES = 100
+
+# 写进程刷新快照的间隔（秒，按开始时间计），以及读取方判定快照过期的阈值：
+# 间隔加上一次全市场行情下载可能耗费的时间，避免正常刷新周期内的快照被误判为过期
+REFRESH_INTERVAL = int(os.getenv("QUOTE_SNAPSHOT_REFRESH_INTERVAL", "60"))
+SNAPSHOT_MAX_AGE = REFRESH_INTERVAL + int(os.getenv("QUOTE_SNAPSHOT_AGE_MARGIN", "45"))
+
+QUOTE_DTYPE = np.dtype([
+    ("code", "S6"),
+    ("name", "S24"),            # UTF-8，最多 8 个汉字
+    ("price", "<f8"),
+    ("pre_close", "<f8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("change", "<f8"),
+    ("change_pct", "<f8"),
+    ("volume", "<f8"),
+    ("amount", "<f8"),
+    ("turnover_rate", "<f8"),
+    ("pe", "<f8"),
+    ("pb", "<f8"),
+    ("total_mv", "<f8"),
+])
+
+# AKShare stock_zh_a_spot_em 列名 -> 快照字段
+SPOT_COLUMNS = {
+    "最新价": "price",
+    "昨收": "pre_close",
+    "今开": "open",
+    "最高": "high",
+    "最低": "low",
+    "涨跌额": "change",
+    "涨跌幅": "change_pct",
+    "成交量": "volume",
+    "成交额": "amount",
+    "换手率": "turnover_rate",
+    "市盈率-动态": "pe",
+    "市净率": "pb",
+    "总市值": "total_mv",
+}
+
+
+def _file_size(capacity: int) -> int:
+    return HEADER_SIZE + capacity * QUOTE_DTYPE.itemsize
+
+
+def _record_to_dict(values: tuple) -> Dict[str, Any]:
+    """record.tolist() 的结果转换为字典（NaN 记为 0）"""
+    code, name, *numbers = values
+    result = {"code": code.decode(), "name": name.decode("utf-8", errors="ignore")}
+    for field, value in zip(QUOTE_DTYPE.names[2:], numbers):
+        result[field] = 0.0 if value != value else value
+    return result
+
+
+class QuoteSnapshotWriter:
+    """快照写入方（只应有一个写进程，由 TDX 缓存服务持有）"""
+
+    def __init__(self, path: Path = SNAPSHOT_FILE, capacity: int = DEFAULT_CAPACITY):
+        self.path = Path(path)
+        self.capacity = capacity
+        self._mm: Optional[mmap.mmap] = None
+        self._file = None
+        self._records: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._mm is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = _file_size(self.capacity)
+        # 原地打开已有文件，不替换 inode，已映射的读进程无需重新打开
+        mode = "r+b" if self.path.exists() and self.path.stat().st_size == size else "w+b"
+        self._file = open(self.path, mode)
+        if mode == "w+b":
+            self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        magic, version, seq, count, capacity, updated_at, record_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or capacity != self.capacity or record_size != QUOTE_DTYPE.itemsize:
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION, 0, 0, self.capacity, 0.0, QUOTE_DTYPE.itemsize)
+        self._records = np.ndarray((self.capacity,), dtype=QUOTE_DTYPE, buffer=self._mm, offset=HEADER_SIZE)
+
+    def _seq(self) -> int:
+        return struct.unpack_from("<Q", self._mm, SEQ_OFFSET)[0]
+
+    def write(self, records: np.ndarray) -> int:
+        """
+        写入一批行情记录（QUOTE_DTYPE 结构化数组，会按代码排序）
+
+        Returns:
+            实际写入的条数
+        """
+        records = np.sort(records, order="code")
+        if len(records) > self.capacity:
+            logger.warning(f"[行情快照] 记录数 {len(records)} 超过容量 {self.capacity}，已截断")
+            records = records[:self.capacity]
+        count = len(records)
+        with self._lock:
+            self._open()
+            seq = self._seq()
+            if seq % 2:
+                seq += 1  # 上次写入中途退出，修正为偶数
+            struct.pack_into("<Q", self._mm, SEQ_OFFSET, seq + 1)
+            self._records[:count] = records
+            self._records[count:] = np.zeros(1, dtype=QUOTE_DTYPE)[0]
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION, seq + 1, count, self.capacity,
+                             time.time(), QUOTE_DTYPE.itemsize)
+            struct.pack_into("<Q", self._mm, SEQ_OFFSET, seq + 2)
+        return count
+
+    def write_dataframe(self, df) -> int:
+        """把 AKShare 全市场实时行情（stock_zh_a_spot_em）写入快照"""
+        import pandas as pd
+
+        records = np.zeros(len(df), dtype=QUOTE_DTYPE)
+        records["code"] = np.array(df["代码"].astype(str).tolist(), dtype="S6")
+        records["name"] = [str(name).encode("utf-8")[:24] for name in df["名称"].tolist()]
+        for column, field in SPOT_COLUMNS.items():
+            if column in df.columns:
+                records[field] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype="f8", na_value=np.nan)
+        return self.write(records)
+
+    def close(self):
+        with self._lock:
+            self._records = None
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class QuoteSnapshotReader:
+    """快照读取方（任意进程，无锁）"""
+
+    def __init__(self, path: Path = SNAPSHOT_FILE):
+        self.path = Path(path)
+        self._mm: Optional[mmap.mmap] = None
+        self._records: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._open_lock = threading.Lock()
+        self.retries = 0
+
+    def _ensure_open(self) -> bool:
+        if self._mm is not None:
+            return True
+        with self._open_lock:
+            if self._mm is not None:
+                return True
+            try:
+                with open(self.path, "rb") as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return False
+            magic, version, _, _, capacity, _, record_size = HEADER.unpack_from(mm, 0)
+            if (magic != MAGIC or version != VERSION or record_size != QUOTE_DTYPE.itemsize
+                    or len(mm) < _file_size(capacity)):
+                mm.close()
+                return False
+            self._records = np.ndarray((capacity,), dtype=QUOTE_DTYPE, buffer=mm, offset=HEADER_SIZE)
+            self._codes = self._records["code"]
+            self._mm = mm
+            return True
+
+    def _header(self) -> Tuple[int, int, float]:
+        _, _, seq, count, _, updated_at, _ = HEADER.unpack_from(self._mm, 0)
+        return seq, count, updated_at
+
+    def _read(self, reader):
+        """在 seqlock 保护下执行 reader(count)，返回 (结果, updated_at)"""
+        for _ in range(MAX_READ_RETRIES):
+            seq, count, updated_at = self._header()
+            if seq % 2 == 0:
+                result = reader(count)
+                if struct.unpack_from("<Q", self._mm, SEQ_OFFSET)[0] == seq:
+                    return result, updated_at
+            self.retries += 1
+            time.sleep(0)
+        raise RuntimeError("行情快照持续写入中，读取失败")
+
+    def _lookup(self, count: int, keys: np.ndarray) -> np.ndarray:
+        """二分查找 keys 对应的记录，返回命中记录的副本"""
+        if count == 0:
+            return np.zeros(0, dtype=QUOTE_DTYPE)
+        codes = self._codes[:count]
+        pos = np.minimum(np.searchsorted(codes, keys), count - 1)
+        return self._records[pos[codes[pos] == keys]]
+
+    def get(self, code: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        读取单只股票行情
+
+        Args:
+            code: 6位股票代码
+            max_age: 快照最长允许的陈旧时间（秒），超过返回 None
+        """
+        if not self._ensure_open():
+            return None
+        keys = np.array([code.encode()], dtype="S6")
+        records, updated_at = self._read(lambda count: self._lookup(count, keys))
+        if len(records) == 0 or (max_age is not None and time.time() - updated_at > max_age):
+            return None
+        quote = _record_to_dict(records[0].tolist())
+        quote["updated_at"] = updated_at
+        return quote
+
+    def get_many(self, codes: Iterable[str], max_age: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """批量读取（一次 seqlock 读取内完成），返回 {代码: 行情}"""
+        if not self._ensure_open():
+            return {}
+        keys = np.array([code.encode() for code in codes], dtype="S6")
+        records, updated_at = self._read(lambda count: self._lookup(count, keys))
+        if max_age is not None and time.time() - updated_at > max_age:
+            return {}
+        result = {}
+        for values in records.tolist():
+            quote = _record_to_dict(values)
+            quote["updated_at"] = updated_at
+            result[quote["code"]] = quote
+        return result
+
+    def view(self) -> Tuple[int, np.ndarray]:
+        """
+        零拷贝访问全部记录：返回 (seq, 记录视图)
+        视图内容可能被写进程改写，使用完后调用 is_current(seq) 确认读取期间未发生写入
+        """
+        if not self._ensure_open():
+            return 0, np.zeros(0, dtype=QUOTE_DTYPE)
+        for _ in range(MAX_READ_RETRIES):
+            seq, count, _ = self._header()
+            if seq % 2 == 0:
+                return seq, self._records[:count]
+            time.sleep(0)
+        raise RuntimeError("行情快照持续写入中，读取失败")
+
+    def is_current(self, seq: int) -> bool:
+        return self._mm is not None and struct.unpack_from("<Q", self._mm, SEQ_OFFSET)[0] == seq
+
+    def get_status(self) -> Dict[str, Any]:
+        if not self._ensure_open():
+            return {"available": False, "file": str(self.path)}
+        seq, count, updated_at = self._header()
+        return {
+            "available": True,
+            "file": str(self.path),
+            "count": count,
+            "generation": seq // 2,
+            "updated_at": updated_at,
+            "age_seconds": round(time.time() - updated_at, 1) if updated_at else None,
+            "read_retries": self.retries
+        }
+
+
+_writer: Optional[QuoteSnapshotWriter] = None
+_reader: Optional[QuoteSnapshotReader] = None
+_singleton_lock = threading.Lock()
+
+
+def get_snapshot_writer() -> QuoteSnapshotWriter:
+    """获取快照写入方（仅 TDX 缓存服务所在进程使用）"""
+    global _writer
+    if _writer is None:
+        with _singleton_lock:
+            if _writer is None:
+                _writer = QuoteSnapshotWriter()
+    return _writer
+
+
+def get_snapshot_reader() -> QuoteSnapshotReader:
+    """获取快照读取方"""
+    global _reader
+    if _reader is None:
+        with _singleton_lock:
+            if _reader is None:
+                _reader = QuoteSnapshotReader()
+    return _reader
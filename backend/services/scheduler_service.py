@@ -282,6 +282,20 @@ class TradingScheduler:
             "recent_history": self.task_history[-10:]
         }
 
+    def update_config(self, config: Dict) -> Dict:
+        """更新调度配置（只接受已有的配置项），运行中的调度器重启以应用新配置"""
+        for key, value in config.items():
+            if key in self.config:
+                self.config[key] = value
+
+        self.save_config()
+
+        if self.is_running:
+            self.stop()
+            self.start()
+
+        return self.config
+
     def trigger_task(self, task_type: str):
         """手动触发任务"""
         task_map = {
@@ -4,6 +4,8 @@ TDX数据后台缓存服务
 所有API请求直接读取缓存，不阻塞用户请求
 
 缓存策略：
+- 全市场实时行情: 交易时段每分钟更新（独立线程，按开始时间定时，不受其他数据更新耗时影响），
+  写入二进制内存映射快照（见 quote_snapshot）
 - 市场统计（涨跌家数）: 交易时段每5分钟更新
 - 板块数据: 交易时段每10分钟更新
 - 股票列表: 每天开盘前更新一次
@@ -12,6 +14,7 @@ TDX数据后台缓存服务
 """
 
 import json
+import os
 import threading
 import time
 from datetime import datetime, timedelta
@@ -21,6 +24,7 @@ import schedule
 import pandas as pd
 
 from backend.utils.logging_config import get_logger
+from backend.services.quote_snapshot import REFRESH_INTERVAL, get_snapshot_reader, get_snapshot_writer
 
 logger = get_logger("services.tdx_cache")
 
@@ -38,6 +42,9 @@ CACHE_FILES = {
     "limit_up_down": CACHE_DIR / "limit_up_down.json",
 }
 
+# 全市场行情表在此时间内（秒）可被市场统计复用，不再重复下载
+SPOT_REUSE_SECONDS = 60
+
 
 class TDXCacheService:
     """TDX数据缓存服务"""
@@ -45,12 +52,20 @@ class TDXCacheService:
     def __init__(self):
         self._running = False
         self._thread: Optional[threading.Thread] = None
+        self._quotes_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
         self._lock = threading.Lock()
         self._tdx_provider = None
         self._last_update_times: Dict[str, datetime] = {}
+        # 最近一次下载的全市场行情表（供市场统计复用）
+        self._spot_df: Optional[pd.DataFrame] = None
+        self._spot_time = 0.0
+        # read_cache 解析结果，按文件 mtime/size 失效
+        self._read_memo: Dict[str, tuple] = {}
 
         # 更新间隔配置（秒）
         self._update_intervals = {
+            "realtime_quotes": REFRESH_INTERVAL,  # 1分钟
             "market_stats": 300,      # 5分钟
             "industry_sectors": 600,  # 10分钟
             "concept_sectors": 600,   # 10分钟
@@ -117,11 +132,12 @@ class TDXCacheService:
         interval = self._update_intervals.get(cache_type, 300)
         elapsed = (datetime.now() - last_update).total_seconds()
 
-        if elapsed < interval:
+        # 留 1 秒余量，避免定时误差导致整轮跳过
+        if elapsed < interval - 1:
             return False
 
         # 根据数据类型判断是否在合适的时间更新
-        if cache_type in ["market_stats", "industry_sectors", "concept_sectors",
+        if cache_type in ["realtime_quotes", "market_stats", "industry_sectors", "concept_sectors",
                          "sector_fund_flow", "limit_up_down"]:
             # 这些数据只在交易时段更新
             return self._is_trading_time()
@@ -148,9 +164,12 @@ class TDXCacheService:
                 "cache_type": cache_type
             }
 
+            # 先写临时文件再原子替换，读取方不会读到写了一半的文件
+            tmp_file = cache_file.with_name(cache_file.name + ".tmp")
             with self._lock:
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(cache_data, f, ensure_ascii=False, indent=2)
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(cache_data, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_file, cache_file)
 
             self._last_update_times[cache_type] = datetime.now()
             logger.debug(f"[TDX缓存] {cache_type} 缓存已更新")
@@ -161,15 +180,22 @@ class TDXCacheService:
             return False
 
     def read_cache(self, cache_type: str) -> Optional[Dict]:
-        """读取缓存（供API调用）"""
+        """读取缓存（供API调用，文件未变化时直接返回上次解析结果，调用方不应修改）"""
         try:
             cache_file = CACHE_FILES.get(cache_type)
             if not cache_file or not cache_file.exists():
                 return None
 
+            stat = cache_file.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            memo = self._read_memo.get(cache_type)
+            if memo and memo[0] == signature:
+                return memo[1]
+
             with open(cache_file, 'r', encoding='utf-8') as f:
                 cache_data = json.load(f)
 
+            self._read_memo[cache_type] = (signature, cache_data)
             return cache_data
 
         except Exception as e:
@@ -194,12 +220,9 @@ class TDXCacheService:
 
             if cache_file.exists():
                 cache_info["file_size"] = cache_file.stat().st_size
-                try:
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        cache_info["last_update"] = data.get("update_time")
-                except:
-                    pass
+                data = self.read_cache(cache_type)
+                if data:
+                    cache_info["last_update"] = data.get("update_time")
 
             # 计算下次更新时间
             last_update = self._last_update_times.get(cache_type)
@@ -210,16 +233,61 @@ class TDXCacheService:
 
             status["caches"][cache_type] = cache_info
 
+        snapshot = get_snapshot_reader().get_status()
+        last_update = self._last_update_times.get("realtime_quotes")
+        snapshot["next_update_in"] = (
+            max(0, int(self._update_intervals["realtime_quotes"] - (datetime.now() - last_update).total_seconds()))
+            if last_update else None
+        )
+        status["caches"]["realtime_quotes"] = snapshot
+
         return status
 
+    def _update_realtime_quotes(self):
+        """更新全市场实时行情快照（二进制内存映射文件，各进程无锁读取）"""
+        if not self._should_update("realtime_quotes"):
+            return
+
+        try:
+            import akshare as ak
+
+            start_time = time.time()
+            # 更新时间记为开始下载的时间，刷新周期按开始时间计
+            started_at = datetime.now()
+            df = ak.stock_zh_a_spot_em()
+            if df is None or df.empty:
+                logger.warning("[TDX缓存] 全市场实时行情为空")
+                return
+
+            count = get_snapshot_writer().write_dataframe(df)
+            self._spot_df = df
+            self._spot_time = time.time()
+            self._last_update_times["realtime_quotes"] = started_at
+            logger.debug(f"[TDX缓存] 实时行情快照已更新: {count}只股票 (耗时{time.time() - start_time:.1f}秒)")
+
+        except Exception as e:
+            logger.error(f"[TDX缓存] 更新实时行情快照失败: {e}")
+
+    def _get_spot_df(self) -> pd.DataFrame:
+        """获取全市场实时行情表（刚下载过则直接复用）"""
+        if self._spot_df is not None and time.time() - self._spot_time < SPOT_REUSE_SECONDS:
+            return self._spot_df
+
+        import akshare as ak
+        df = ak.stock_zh_a_spot_em()
+        if df is not None and not df.empty:
+            get_snapshot_writer().write_dataframe(df)
+            self._spot_df = df
+            self._spot_time = time.time()
+            self._last_update_times["realtime_quotes"] = datetime.now()
+        return df
+
     def _update_market_stats(self):
         """更新市场统计数据（优先使用AKShare，TDX作为补充）"""
         if not self._should_update("market_stats"):
             return
 
         try:
-            import akshare as ak
-
             logger.info("[TDX缓存] 开始更新市场统计...")
             start_time = time.time()
 
@@ -244,8 +312,8 @@ class TDXCacheService:
 
             # 方法1: 使用AKShare获取涨跌统计
             try:
-                # 获取A股实时行情
-                df = ak.stock_zh_a_spot_em()
+                # 获取A股实时行情（与实时行情快照共用同一次下载）
+                df = self._get_spot_df()
                 if df is not None and not df.empty:
                     # 过滤A股
                     df = df[df['代码'].str.match(r'^(00|30|60|68)')]
@@ -498,7 +566,7 @@ class TDXCacheService:
         """后台更新循环"""
         logger.info("[TDX缓存] 后台更新线程启动")
 
-        # 启动时立即更新一次
+        # 启动时立即更新一次（实时行情由独立线程更新）
         self._update_stock_list()
         self._update_market_stats()
         self._update_sector_data()
@@ -526,6 +594,16 @@ class TDXCacheService:
 
         logger.info("[TDX缓存] 后台更新线程停止")
 
+    def _run_quotes_loop(self):
+        """实时行情快照更新循环：按开始时间每 REFRESH_INTERVAL 秒一轮，读取方据此判定快照是否过期"""
+        while self._running:
+            started = time.monotonic()
+            try:
+                self._update_realtime_quotes()
+            except Exception as e:
+                logger.error(f"[TDX缓存] 实时行情更新循环异常: {e}")
+            self._stop_event.wait(max(1.0, REFRESH_INTERVAL - (time.monotonic() - started)))
+
     def start(self):
         """启动缓存服务"""
         if self._running:
@@ -533,8 +611,11 @@ class TDXCacheService:
             return
 
         self._running = True
+        self._stop_event.clear()
         self._thread = threading.Thread(target=self._run_update_loop, daemon=True)
         self._thread.start()
+        self._quotes_thread = threading.Thread(target=self._run_quotes_loop, daemon=True)
+        self._quotes_thread.start()
         logger.info("[TDX缓存] 服务已启动")
 
     def stop(self):
@@ -543,8 +624,11 @@ class TDXCacheService:
             return
 
         self._running = False
+        self._stop_event.set()
         if self._thread:
             self._thread.join(timeout=5)
+        if self._quotes_thread:
+            self._quotes_thread.join(timeout=5)
         logger.info("[TDX缓存] 服务已停止")
 
     def force_update(self, cache_type: str = None):
@@ -553,7 +637,9 @@ class TDXCacheService:
             # 清除上次更新时间，强制更新
             self._last_update_times.pop(cache_type, None)
 
-            if cache_type == "market_stats":
+            if cache_type == "realtime_quotes":
+                self._update_realtime_quotes()
+            elif cache_type == "market_stats":
                 self._update_market_stats()
             elif cache_type == "stock_list":
                 self._update_stock_list()
@@ -565,6 +651,7 @@ class TDXCacheService:
             # 更新所有
             self._last_update_times.clear()
             self._update_stock_list()
+            self._update_realtime_quotes()
             self._update_market_stats()
             self._update_sector_data()
             self._update_limit_up_down()
@@ -596,6 +683,16 @@ def read_market_stats() -> Optional[Dict]:
     return None
 
 
+def read_realtime_quote(code: str, max_age: Optional[float] = None) -> Optional[Dict]:
+    """读取单只股票实时行情快照（便捷函数，不经过JSON解析）"""
+    return get_snapshot_reader().get(code, max_age=max_age)
+
+
+def read_realtime_quotes(codes: List[str], max_age: Optional[float] = None) -> Dict[str, Dict]:
+    """批量读取实时行情快照（便捷函数）"""
+    return get_snapshot_reader().get_many(codes, max_age=max_age)
+
+
 def read_stock_list() -> Optional[List]:
     """读取股票列表缓存（便捷函数）"""
     service = get_tdx_cache_service()
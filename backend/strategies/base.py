@@ -8,6 +8,7 @@ from enum import Enum
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
 
@@ -118,6 +119,15 @@ class StrategyPerformance:
         }
 
 
+@dataclass
+class ScreenResult:
+    """全市场选股结果，数组按行情面板的股票顺序对齐"""
+    signal_types: np.ndarray                 # 每只股票的信号类型（SignalType），未命中为 HOLD
+    confidence: np.ndarray                   # 置信度 0-1
+    score: Optional[np.ndarray] = None       # 同置信度时的排序得分，默认按置信度
+    metrics: Dict[str, np.ndarray] = field(default_factory=dict)  # 随命中结果返回的指标
+
+
 @dataclass
 class StrategyConfig:
     """策略配置"""
@@ -170,6 +180,15 @@ class BaseStrategy(ABC):
         """获取策略所需的技术指标"""
         pass
 
+    def screen(self, panel) -> Optional[ScreenResult]:
+        """
+        全市场横截面筛选（空仓时的入场条件）
+
+        在行情面板（strategies.screener.MarketPanel）上向量化计算所有股票最新一根K线的信号；
+        返回 None 表示未实现，选股器会逐只股票调用 generate_signal
+        """
+        return None
+
     def validate_data(self, data: pd.DataFrame) -> bool:
         """验证数据完整性"""
         required_columns = ['open', 'high', 'low', 'close', 'volume']
@@ -6,7 +6,8 @@ MACD交叉策略
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Optional
-from .base import BaseStrategy, StrategySignal, SignalType, StrategyConfig, register_strategy
+from .base import BaseStrategy, StrategySignal, SignalType, StrategyConfig, ScreenResult, register_strategy
+from .screener import MarketPanel, ema
 
 # 兼容旧代码
 Signal = StrategySignal
@@ -150,6 +151,43 @@ class MACDCrossoverStrategy(BaseStrategy):
             strategy_id="macd_crossover",
             strategy_name=self.name
         )
+
+    def screen(self, panel: MarketPanel) -> ScreenResult:
+        """全市场筛选：与 generate_signal 的金叉买入条件一致"""
+        close = panel.close
+        macd = ema(close, self.params['fast_period']) - ema(close, self.params['slow_period'])
+        macd_signal = ema(macd, self.params['signal_period'])
+
+        volume_period = self.params['volume_ma_period']
+        volume_ratio = panel.volume[:, -1] / panel.volume[:, -volume_period:].mean(axis=1)
+
+        enough = panel.lengths >= self.params['slow_period'] + self.params['signal_period']
+        cross_up = enough & (macd[:, -1] > macd_signal[:, -1]) & (macd[:, -2] <= macd_signal[:, -2])
+        on_zero_line = macd[:, -1] > 0 if self.params['use_zero_line'] else np.ones(len(panel), dtype=bool)
+        volume_confirmed = volume_ratio > self.params['volume_threshold']
+
+        signal_types = np.full(len(panel), SignalType.HOLD, dtype=object)
+        signal_types[cross_up] = SignalType.BUY
+        signal_types[cross_up & on_zero_line & volume_confirmed] = SignalType.STRONG_BUY
+        confidence = np.select(
+            [cross_up & on_zero_line & volume_confirmed, cross_up & on_zero_line, cross_up],
+            [0.85, 0.7, 0.6],
+            default=0.0
+        )
+
+        price = close[:, -1]
+        return ScreenResult(
+            signal_types=signal_types,
+            confidence=confidence,
+            score=volume_ratio,
+            metrics={
+                'price': price,
+                'macd': macd[:, -1],
+                'macd_signal': macd_signal[:, -1],
+                'volume_ratio': volume_ratio,
+                'stop_loss': price * 0.96
+            }
+        )
     
     def _generate_signals_legacy(self, data: pd.DataFrame) -> List[Signal]:
         """生成交易信号"""
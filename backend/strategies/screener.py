@@ -0,0 +1,487 @@
+"""
+全市场横截面选股
+把全部A股最近 N 根日K线加载为按列存储的行情面板（股票 × K线 的二维数组），
+策略在面板上一次性向量化计算所有股票最新一根K线的入场条件，命中结果按置信度排序；
+行情加载和策略计算都按股票分块在进程池中并行执行
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .base import BaseStrategy, ScreenResult, SignalType, StrategyConfig, get_strategy_registry
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+# A股代码前缀：深圳主板/创业板、上海主板/科创板
+A_SHARE_PREFIXES = {
+    0: ('00', '30'),
+    1: ('60', '68'),
+}
+
+BUY_SIGNALS = (SignalType.BUY, SignalType.STRONG_BUY)
+
+
+# ==================== 行情面板 ====================
+
+@dataclass
+class MarketPanel:
+    """
+    行情面板
+
+    每个价格字段是 (股票数, K线数) 的 float 数组，各行右对齐：
+    最后一列是每只股票最新的一根K线，上市时间不足 N 根的股票左侧用 NaN 填充
+    """
+    codes: List[str]
+    names: List[str]
+    last_dates: List[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    loaded_at: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def bars(self) -> int:
+        return self.close.shape[1]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """每只股票的有效K线数量"""
+        return (~np.isnan(self.close)).sum(axis=1)
+
+    @classmethod
+    def empty(cls, bars: int) -> "MarketPanel":
+        arrays = {name: np.empty((0, bars)) for name in PRICE_FIELDS}
+        return cls(codes=[], names=[], last_dates=[], loaded_at=time.time(), **arrays)
+
+    @classmethod
+    def concat(cls, panels: List["MarketPanel"]) -> "MarketPanel":
+        """按股票方向拼接多个面板（K线数须一致）"""
+        panels = [p for p in panels if len(p)]
+        if not panels:
+            raise ValueError("没有可拼接的行情面板")
+        return cls(
+            codes=[c for p in panels for c in p.codes],
+            names=[n for p in panels for n in p.names],
+            last_dates=[d for p in panels for d in p.last_dates],
+            loaded_at=min(p.loaded_at for p in panels),
+            **{name: np.vstack([getattr(p, name) for p in panels]) for name in PRICE_FIELDS}
+        )
+
+    def take(self, rows) -> "MarketPanel":
+        """按行号取子面板"""
+        rows = np.asarray(rows, dtype=int)
+        return MarketPanel(
+            codes=[self.codes[i] for i in rows],
+            names=[self.names[i] for i in rows],
+            last_dates=[self.last_dates[i] for i in rows],
+            loaded_at=self.loaded_at,
+            **{name: getattr(self, name)[rows] for name in PRICE_FIELDS}
+        )
+
+    def tail(self, bars: int) -> "MarketPanel":
+        """只保留最近 bars 根K线"""
+        if bars >= self.bars:
+            return self
+        return MarketPanel(
+            codes=self.codes,
+            names=self.names,
+            last_dates=self.last_dates,
+            loaded_at=self.loaded_at,
+            **{name: getattr(self, name)[:, -bars:] for name in PRICE_FIELDS}
+        )
+
+    def split(self, block_size: int) -> List["MarketPanel"]:
+        """按股票分块"""
+        return [
+            self.take(range(start, min(start + block_size, len(self))))
+            for start in range(0, len(self), block_size)
+        ]
+
+    def frame(self, row: int) -> pd.DataFrame:
+        """取单只股票的有效K线为 DataFrame（供未实现向量化筛选的策略逐只计算）"""
+        valid = ~np.isnan(self.close[row])
+        return pd.DataFrame(
+            {name: getattr(self, name)[row][valid] for name in PRICE_FIELDS}
+        ).reset_index(drop=True)
+
+
+# ==================== 向量化指标（沿K线方向，逐行独立） ====================
+
+def shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """向右平移 periods 根K线，等价于 Series.shift"""
+    out = np.full_like(x, np.nan)
+    if periods < x.shape[1]:
+        out[:, periods:] = x[:, :x.shape[1] - periods]
+    return out
+
+
+def _rolling(x: np.ndarray, window: int, reducer) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(x, window, axis=1)
+        # 窗口内有 NaN 时结果为 NaN，等价于 rolling(window) 的 min_periods=window
+        out[:, window - 1:] = reducer(windows, axis=2)
+    return out
+
+
+def rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, np.max)
+
+
+def rolling_min(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, np.min)
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, np.mean)
+
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    """
+    指数移动平均，等价于 Series.ewm(span=span).mean()（adjust=True）
+
+    按列递推分子/分母，每一步对所有股票同时计算；左侧 NaN 不计权重
+    """
+    decay = 1.0 - 2.0 / (span + 1.0)
+    out = np.empty_like(x)
+    num = np.zeros(x.shape[0])
+    den = np.zeros(x.shape[0])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for t in range(x.shape[1]):
+            col = x[:, t]
+            valid = ~np.isnan(col)
+            num = num * decay + np.where(valid, col, 0.0)
+            den = den * decay + valid
+            out[:, t] = np.where(den > 0, num / den, np.nan)
+    return out
+
+
+def true_range(panel: MarketPanel) -> np.ndarray:
+    """真实波动幅度；首根K线没有前收盘价时取最高价-最低价"""
+    prev_close = shift(panel.close)
+    tr = np.fmax(panel.high - panel.low, np.abs(panel.high - prev_close))
+    return np.fmax(tr, np.abs(panel.low - prev_close))
+
+
+# ==================== 分块任务（在子进程中运行） ====================
+
+def _load_block(stocks: List[Tuple[str, str]], bars: int) -> MarketPanel:
+    """加载一个股票分块的最近 bars 根日K线"""
+    from backend.dataflows.providers.tdx_native_provider import get_tdx_native_provider
+
+    provider = get_tdx_native_provider()
+    codes, names, last_dates = [], [], []
+    arrays = {name: [] for name in PRICE_FIELDS}
+
+    for code, name in stocks:
+        klines = provider.get_kline(code, kline_type=9, count=bars)
+        if not klines:
+            continue
+        klines = klines[-bars:]
+        pad = bars - len(klines)
+        for field_name in PRICE_FIELDS:
+            row = np.full(bars, np.nan)
+            row[pad:] = [float(k.get(field_name) or 0) for k in klines]
+            arrays[field_name].append(row)
+        codes.append(code)
+        names.append(name)
+        last_dates.append(str(klines[-1].get('date', ''))[:10])
+
+    if not codes:
+        return MarketPanel.empty(bars)
+    return MarketPanel(
+        codes=codes,
+        names=names,
+        last_dates=last_dates,
+        loaded_at=time.time(),
+        **{name: np.vstack(rows) for name, rows in arrays.items()}
+    )
+
+
+def _create_strategy(strategy_id: str) -> Optional[BaseStrategy]:
+    return get_strategy_registry().create_strategy(strategy_id, StrategyConfig(name=strategy_id))
+
+
+def _fallback_screen(strategy_id: str, panel: MarketPanel) -> ScreenResult:
+    """未实现向量化筛选的策略：逐只股票调用 generate_signal"""
+    signal_types = np.full(len(panel), SignalType.HOLD, dtype=object)
+    confidence = np.zeros(len(panel))
+    price = np.full(len(panel), np.nan)
+    stop_loss = np.full(len(panel), np.nan)
+
+    for row in range(len(panel)):
+        # 部分策略在实例上缓存指标，每只股票使用新实例
+        strategy = _create_strategy(strategy_id)
+        try:
+            data = panel.frame(row)
+            strategy.initialize(data)
+            signal = strategy.generate_signal(data, current_position=0)
+        except Exception:
+            continue
+        signal_types[row] = signal.signal_type
+        confidence[row] = signal.confidence or 0.0
+        price[row] = signal.price or np.nan
+        stop_loss[row] = signal.stop_loss or np.nan
+
+    return ScreenResult(
+        signal_types=signal_types,
+        confidence=confidence,
+        metrics={'price': price, 'stop_loss': stop_loss}
+    )
+
+
+def _to_float(value: Any) -> Optional[float]:
+    value = float(value)
+    if math.isnan(value) or math.isinf(value):
+        return None
+    return round(value, 4)
+
+
+def _screen_block(panel: MarketPanel, strategy_ids: List[str]) -> List[Dict[str, Any]]:
+    """在一个股票分块上运行所有策略，返回买入信号命中列表"""
+    hits = []
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for strategy_id in strategy_ids:
+            strategy = _create_strategy(strategy_id)
+            if strategy is None:
+                continue
+            try:
+                result = strategy.screen(panel)
+                if result is None:
+                    result = _fallback_screen(strategy_id, panel)
+            except Exception as e:
+                logger.error(f"策略 {strategy_id} 选股失败: {e}")
+                continue
+
+            score = result.score if result.score is not None else result.confidence
+            hit_rows = [row for row, signal_type in enumerate(result.signal_types) if signal_type in BUY_SIGNALS]
+            for row in hit_rows:
+                hits.append({
+                    'code': panel.codes[row],
+                    'name': panel.names[row],
+                    'last_date': panel.last_dates[row],
+                    'strategy_id': strategy_id,
+                    'strategy_name': strategy.name,
+                    'signal_type': SignalType(result.signal_types[row]).value,
+                    'confidence': _to_float(result.confidence[row]),
+                    'score': _to_float(score[row]),
+                    'metrics': {
+                        key: _to_float(values[row]) for key, values in result.metrics.items()
+                    }
+                })
+    return hits
+
+
+def screenable_strategies() -> List[str]:
+    """实现了向量化筛选（重写 screen）的策略ID"""
+    registry = get_strategy_registry()
+    return [
+        strategy_id for strategy_id in registry.list_strategies()
+        if registry.get(strategy_id).screen is not BaseStrategy.screen
+    ]
+
+
+# ==================== 选股服务 ====================
+
+class StrategyScreener:
+    """全市场选股服务：缓存行情面板，分块并行加载和筛选"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        default_workers = min(4, os.cpu_count() or 1)
+        self._max_workers = max(1, int(os.getenv("SCREENER_MAX_WORKERS", str(default_workers))))
+        self._block_size = max(50, int(os.getenv("SCREENER_BLOCK_SIZE", "500")))
+        self._panel_ttl = int(os.getenv("SCREENER_PANEL_TTL", "600"))  # 行情面板缓存时间（秒）
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self._panel: Optional[MarketPanel] = None
+        self._panel_lock = asyncio.Lock()
+
+        self._stats = {
+            'panel_loads': 0,
+            'screens': 0,
+            'last_load_seconds': 0.0,
+            'last_screen_seconds': 0.0,
+        }
+        logger.info(f"StrategyScreener initialized (workers={self._max_workers}, block={self._block_size})")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._executor
+
+    async def stop(self):
+        """关闭进程池"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        logger.info("StrategyScreener stopped")
+
+    async def _load_universe(self) -> List[Tuple[str, str]]:
+        """获取全部A股代码和名称"""
+        from backend.dataflows.providers.tdx_native_provider import get_tdx_native_provider
+
+        loop = asyncio.get_running_loop()
+        stocks = await loop.run_in_executor(None, get_tdx_native_provider().get_all_stock_codes)
+        universe = {}
+        for stock in stocks:
+            code = stock.get('code', '')
+            market = 1 if stock.get('market') == '上海' else 0
+            if code.startswith(A_SHARE_PREFIXES[market]):
+                universe[code] = stock.get('name', '')
+        return sorted(universe.items())
+
+    async def load_panel(self, bars: int = 250, refresh: bool = False) -> MarketPanel:
+        """
+        获取行情面板（缓存未过期且K线数足够时直接复用）
+
+        Args:
+            bars: 每只股票的K线数量
+            refresh: 是否强制重新加载
+        """
+        async with self._panel_lock:
+            panel = self._panel
+            if (
+                not refresh and panel is not None
+                and panel.bars >= bars
+                and time.time() - panel.loaded_at < self._panel_ttl
+            ):
+                return panel.tail(bars)
+
+            started = time.time()
+            universe = await self._load_universe()
+            if not universe:
+                raise RuntimeError("无法获取A股代码列表")
+
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            blocks = [
+                universe[start:start + self._block_size]
+                for start in range(0, len(universe), self._block_size)
+            ]
+            panels = await asyncio.gather(*[
+                loop.run_in_executor(executor, _load_block, block, bars) for block in blocks
+            ])
+            panel = MarketPanel.concat(list(panels))
+
+            self._panel = panel
+            self._stats['panel_loads'] += 1
+            self._stats['last_load_seconds'] = round(time.time() - started, 2)
+            logger.info(
+                f"行情面板加载完成: {len(panel)}/{len(universe)}只股票 × {bars}根K线, "
+                f"耗时{self._stats['last_load_seconds']}秒"
+            )
+            return panel
+
+    async def screen(
+        self,
+        strategy_ids: Optional[List[str]] = None,
+        bars: int = 250,
+        limit: int = 100,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        全市场选股
+
+        Args:
+            strategy_ids: 策略ID列表，默认使用所有实现了向量化筛选的策略
+            bars: 每只股票加载的K线数量
+            limit: 返回的命中数量
+            refresh: 是否强制重新加载行情面板
+
+        Returns:
+            按置信度、策略得分排序的买入信号命中列表及各策略命中数
+        """
+        registry = get_strategy_registry()
+        if strategy_ids is None:
+            strategy_ids = screenable_strategies()
+        unknown = [s for s in strategy_ids if registry.get(s) is None]
+        if unknown:
+            raise ValueError(f"未知策略: {', '.join(unknown)}")
+
+        panel = await self.load_panel(bars, refresh=refresh)
+
+        started = time.time()
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        block_hits = await asyncio.gather(*[
+            loop.run_in_executor(executor, _screen_block, block, strategy_ids)
+            for block in panel.split(self._block_size)
+        ])
+        hits = [hit for block in block_hits for hit in block]
+        hits.sort(key=lambda h: (h['confidence'] or 0, h['score'] or 0), reverse=True)
+
+        by_strategy: Dict[str, int] = {s: 0 for s in strategy_ids}
+        for hit in hits:
+            by_strategy[hit['strategy_id']] += 1
+
+        self._stats['screens'] += 1
+        self._stats['last_screen_seconds'] = round(time.time() - started, 2)
+        logger.info(
+            f"全市场选股完成: {len(panel)}只股票 × {len(strategy_ids)}个策略, "
+            f"命中{len(hits)}条, 耗时{self._stats['last_screen_seconds']}秒"
+        )
+
+        return {
+            'universe_size': len(panel),
+            'bars': panel.bars,
+            'panel_loaded_at': datetime.fromtimestamp(panel.loaded_at).isoformat(),
+            'strategies': strategy_ids,
+            'total_hits': len(hits),
+            'by_strategy': by_strategy,
+            'hits': hits[:limit],
+            'elapsed_seconds': self._stats['last_screen_seconds']
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        panel = self._panel
+        return {
+            'max_workers': self._max_workers,
+            'block_size': self._block_size,
+            'panel_ttl': self._panel_ttl,
+            'panel_symbols': len(panel) if panel else 0,
+            'panel_bars': panel.bars if panel else 0,
+            'panel_loaded_at': datetime.fromtimestamp(panel.loaded_at).isoformat() if panel else None,
+            'screenable_strategies': screenable_strategies(),
+            **self._stats
+        }
+
+
+# 单例获取函数
+_screener = None
+
+
+def get_strategy_screener() -> StrategyScreener:
+    global _screener
+    if _screener is None:
+        _screener = StrategyScreener()
+    return _screener
@@ -12,7 +12,8 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Optional
-from .base import BaseStrategy, StrategySignal, SignalType, StrategyConfig, register_strategy
+from .base import BaseStrategy, StrategySignal, SignalType, StrategyConfig, ScreenResult, register_strategy
+from .screener import MarketPanel, true_range
 
 # 兼容旧代码
 Signal = StrategySignal
@@ -245,6 +246,36 @@ class TurtleTradingStrategy(BaseStrategy):
             strategy_id="turtle_trading",
             strategy_name=self.name
         )
+
+    def screen(self, panel: MarketPanel) -> ScreenResult:
+        """全市场筛选：与 generate_signal 空仓时的入场条件一致"""
+        entry_period = self.params['entry_period']
+        atr_period = self.params['atr_period']
+
+        price = panel.close[:, -1]
+        donchian_high = panel.high[:, -entry_period:].max(axis=1)
+        atr = true_range(panel)[:, -atr_period:].mean(axis=1)
+        atr = np.where(atr > 0, atr, price * 0.02)
+
+        enough = panel.lengths >= max(entry_period, atr_period)
+        ratio = price / donchian_high
+        hit = enough & (donchian_high > 0) & (ratio >= 0.98)
+
+        signal_types = np.full(len(panel), SignalType.HOLD, dtype=object)
+        signal_types[hit] = SignalType.BUY
+        confidence = np.where(hit, np.minimum(0.70 + (ratio - 0.98) * 5, 0.85), 0.0)
+
+        return ScreenResult(
+            signal_types=signal_types,
+            confidence=confidence,
+            score=ratio,
+            metrics={
+                'price': price,
+                'donchian_high': donchian_high,
+                'atr': atr,
+                'stop_loss': price - atr * self.params['stop_loss_atr']
+            }
+        )
     
     def _generate_signals_legacy(self, data: pd.DataFrame) -> List[Signal]:
         """生成交易信号"""
@@ -12,8 +12,10 @@ from .base import (
     StrategySignal, 
     SignalType, 
     StrategyConfig,
+    ScreenResult,
     register_strategy
 )
+from .screener import MarketPanel, ema, rolling_mean, shift, true_range
 
 
 @register_strategy("vegas_adx")
@@ -222,6 +224,59 @@ class VegasADXStrategy(BaseStrategy):
         
         return adx
 
+    def screen(self, panel: MarketPanel) -> ScreenResult:
+        """全市场筛选：与 generate_signal 空仓时的做多条件一致"""
+        close = panel.close
+        ema_fast = ema(close, self.ema_fast)[:, -1]
+        ema_slow1 = ema(close, self.ema_slow1)
+        ema_slow2 = ema(close, self.ema_slow2)
+        vegas_upper = np.maximum(ema_slow1, ema_slow2)
+        adx = self._screen_adx(panel, self.adx_period)
+
+        price = close[:, -1]
+        breakout_up = (price > vegas_upper[:, -1]) & (close[:, -2] <= vegas_upper[:, -2])
+        ema_above = ema_fast > vegas_upper[:, -1]
+        hit = (breakout_up | ema_above) & (adx > self.adx_threshold)
+
+        signal_types = np.full(len(panel), SignalType.HOLD, dtype=object)
+        signal_types[hit] = SignalType.BUY
+        signal_types[hit & (adx > 40)] = SignalType.STRONG_BUY
+        confidence = np.where(hit, np.minimum(0.9, 0.5 + (adx - 30) / 100), 0.0)
+
+        stop_loss_pct = self.risk_params.get('stop_loss_pct', 0.05)
+        return ScreenResult(
+            signal_types=signal_types,
+            confidence=confidence,
+            score=adx,
+            metrics={
+                'price': price,
+                'ema_fast': ema_fast,
+                'vegas_upper': vegas_upper[:, -1],
+                'adx': adx,
+                'stop_loss': np.round(price * (1 - stop_loss_pct), 2)
+            }
+        )
+
+    @staticmethod
+    def _screen_adx(panel: MarketPanel, period: int) -> np.ndarray:
+        """面板上最新一根K线的 ADX，计算口径同 _calculate_adx"""
+        high, low = panel.high, panel.low
+        valid = ~np.isnan(high)
+        atr = rolling_mean(true_range(panel), period)
+
+        up_move = high - shift(high)
+        down_move = shift(low) - low
+        pos_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        neg_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+        # 上市前的填充位置不参与滚动窗口
+        pos_dm = np.where(valid, pos_dm, np.nan)
+        neg_dm = np.where(valid, neg_dm, np.nan)
+
+        pos_di = 100 * (rolling_mean(pos_dm, period) / atr)
+        neg_di = 100 * (rolling_mean(neg_dm, period) / atr)
+        dx = 100 * np.abs(pos_di - neg_di) / (pos_di + neg_di + 0.001)
+        return dx[:, -period:].mean(axis=1)
+
 
 # 创建预配置的策略实例
 def create_vegas_adx_strategy() -> VegasADXStrategy:
@@ -0,0 +1,311 @@
+"""
+交易表现指标增量计算
+为每个统计窗口维护累加器（胜负计数、运行峰值/回撤、Welford 收益均值方差、逐日盈亏），
+新成交只做 O(1) 更新；窗口左端有交易移出或历史被改写时用 NumPy 向量化重建
+"""
+
+import math
+import threading
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+
+# 与原统计口径保持一致的常量
+INITIAL_CAPITAL = 1000000      # 净值曲线初始资金
+ASSUMED_INVESTMENT = 100000    # 简化：假设每笔卖出对应投入10万
+TRADES_PER_YEAR = 50           # 年化夏普比率：假设每年50笔交易
+RISK_FREE_RATE = 0.03          # 年化无风险利率
+
+
+class WindowAccumulator:
+    """单个统计窗口的累加器"""
+
+    def __init__(self, start: Optional[datetime]):
+        self.start = start
+        self.first_timestamp: Optional[datetime] = None
+
+        # 计数
+        self.total_trades = 0
+        self.buy_trades = 0
+        self.sell_trades = 0
+        self.total_volume = 0.0
+        self.total_commission = 0.0
+
+        # 胜率：按股票 FIFO 配对买卖
+        self._open_buys: Dict[str, Deque[Dict[str, float]]] = defaultdict(deque)
+        self.winning_trades = 0
+        self.closed_trades = 0
+
+        # 平均收益：按股票的平均买入价
+        self._buy_prices: Dict[str, float] = {}
+        self.total_profit = 0.0
+        self.profit_sells = 0
+
+        # 最大回撤：运行净值与峰值
+        self.capital = float(INITIAL_CAPITAL)
+        self.peak = float(INITIAL_CAPITAL)
+        self.max_drawdown = 0.0
+
+        # 夏普比率：卖出收益率的 Welford 均值/方差
+        self.return_count = 0
+        self.return_mean = 0.0
+        self.return_m2 = 0.0
+
+        # 逐日盈亏
+        self.daily_pnl: Dict[str, float] = defaultdict(float)
+
+    # ==================== 构建 ====================
+
+    @classmethod
+    def build(cls, trades: List[Dict], start: Optional[datetime]) -> "WindowAccumulator":
+        """从交易记录向量化构建累加器"""
+        acc = cls(start)
+        window = []
+        timestamps = []
+        for trade in trades:
+            ts = datetime.fromisoformat(trade["timestamp"])
+            if start is None or ts >= start:
+                window.append(trade)
+                timestamps.append(ts)
+        if not window:
+            return acc
+
+        acc.first_timestamp = min(timestamps)
+        actions = np.array([t.get("action", "") for t in window])
+        amounts = np.array([t.get("amount", 0) for t in window], dtype=float)
+        commissions = np.array([t.get("commission", 0) for t in window], dtype=float)
+        is_buy = actions == "BUY"
+        is_sell = actions == "SELL"
+
+        acc.total_trades = len(window)
+        acc.buy_trades = int(is_buy.sum())
+        acc.sell_trades = int(is_sell.sum())
+        acc.total_volume = float(amounts.sum())
+        acc.total_commission = float(commissions.sum())
+
+        # 净值曲线（按时间排序）与最大回撤
+        order = np.argsort(np.array([t.get("timestamp", "") for t in window]), kind="stable")
+        delta = np.where(is_buy, -(amounts + commissions), np.where(is_sell, amounts - commissions, 0.0))[order]
+        capital = INITIAL_CAPITAL + np.cumsum(delta)
+        peak = np.maximum.accumulate(np.maximum(capital, INITIAL_CAPITAL))
+        drawdown = np.where(peak > 0, (peak - capital) / np.where(peak > 0, peak, 1), 0.0)
+        acc.capital = float(capital[-1])
+        acc.peak = float(peak[-1])
+        acc.max_drawdown = max(0.0, float(drawdown.max()))
+
+        # 卖出收益率的均值和方差
+        returns = (amounts[is_sell] - commissions[is_sell] - ASSUMED_INVESTMENT) / ASSUMED_INVESTMENT
+        acc.return_count = len(returns)
+        if acc.return_count:
+            acc.return_mean = float(returns.mean())
+            acc.return_m2 = float(((returns - acc.return_mean) ** 2).sum())
+
+        # 逐日盈亏
+        dates = np.array([ts.strftime("%Y-%m-%d") for ts in timestamps])
+        pnl = np.where(is_sell, amounts - commissions - ASSUMED_INVESTMENT, np.where(is_buy, -commissions, 0.0))
+        unique_dates, inverse = np.unique(dates, return_inverse=True)
+        for date, value in zip(unique_dates, np.bincount(inverse, weights=pnl)):
+            acc.daily_pnl[str(date)] = float(value)
+
+        # 买卖配对依赖顺序，逐笔处理
+        for trade in window:
+            acc._match(trade)
+
+        return acc
+
+    # ==================== 增量更新 ====================
+
+    def add(self, trade: Dict):
+        """追加一笔（时间上最新的）交易"""
+        ts = datetime.fromisoformat(trade["timestamp"])
+        if self.start is not None and ts < self.start:
+            return
+        if self.first_timestamp is None:
+            self.first_timestamp = ts
+
+        action = trade.get("action", "")
+        amount = trade.get("amount", 0)
+        commission = trade.get("commission", 0)
+
+        self.total_trades += 1
+        self.total_volume += amount
+        self.total_commission += commission
+        date = ts.strftime("%Y-%m-%d")
+
+        if action == "BUY":
+            self.buy_trades += 1
+            self.capital -= amount + commission
+            self.daily_pnl[date] -= commission
+        elif action == "SELL":
+            self.sell_trades += 1
+            self.capital += amount - commission
+            self.daily_pnl[date] += amount - commission - ASSUMED_INVESTMENT
+            self._add_return((amount - commission - ASSUMED_INVESTMENT) / ASSUMED_INVESTMENT)
+
+        if self.capital > self.peak:
+            self.peak = self.capital
+        drawdown = (self.peak - self.capital) / self.peak if self.peak > 0 else 0
+        self.max_drawdown = max(self.max_drawdown, drawdown)
+
+        self._match(trade)
+
+    def _add_return(self, value: float):
+        """Welford 更新收益率均值和方差"""
+        self.return_count += 1
+        delta = value - self.return_mean
+        self.return_mean += delta / self.return_count
+        self.return_m2 += delta * (value - self.return_mean)
+
+    def _match(self, trade: Dict):
+        """买卖配对：更新胜率和平均收益的累加器"""
+        stock_code = trade.get("stock_code", "")
+        action = trade.get("action", "")
+        price = trade.get("price", 0)
+        quantity = trade.get("quantity", 0)
+
+        if action == "BUY":
+            self._open_buys[stock_code].append({"price": price, "quantity": quantity})
+            if stock_code not in self._buy_prices:
+                self._buy_prices[stock_code] = price
+            else:
+                # 简化：取平均
+                self._buy_prices[stock_code] = (self._buy_prices[stock_code] + price) / 2
+        elif action == "SELL":
+            buys = self._open_buys.get(stock_code)
+            if buys:
+                # FIFO匹配
+                buy = buys[0]
+                if (price - buy["price"]) * min(quantity, buy["quantity"]) > 0:
+                    self.winning_trades += 1
+                self.closed_trades += 1
+                if buy["quantity"] <= quantity:
+                    buys.popleft()
+                else:
+                    buy["quantity"] -= quantity
+            if stock_code in self._buy_prices:
+                self.total_profit += (price - self._buy_prices[stock_code]) * quantity - trade.get("commission", 0)
+                self.profit_sells += 1
+
+    # ==================== 指标 ====================
+
+    def needs_rebuild(self, start: Optional[datetime]) -> bool:
+        """窗口左端已有交易移出时需要重建"""
+        if start is None or self.first_timestamp is None:
+            return False
+        return self.first_timestamp < start
+
+    @property
+    def win_rate(self) -> float:
+        if self.closed_trades == 0:
+            return 0.0
+        return self.winning_trades / self.closed_trades
+
+    @property
+    def avg_profit(self) -> float:
+        if self.profit_sells == 0:
+            return 0.0
+        return round(self.total_profit / self.profit_sells, 2)
+
+    @property
+    def sharpe_ratio(self) -> float:
+        if self.total_trades < 2 or self.return_count == 0:
+            return 0.0
+        std = math.sqrt(self.return_m2 / self.return_count)
+        if std == 0:
+            return 0.0
+        risk_free = RISK_FREE_RATE / TRADES_PER_YEAR
+        return round((self.return_mean - risk_free) / std * math.sqrt(TRADES_PER_YEAR), 2)
+
+    def daily_returns(self, days: int, now: datetime) -> List[Dict]:
+        """最近 days 天的日收益率序列"""
+        if self.total_trades == 0:
+            return []
+        returns = []
+        cumulative_value = INITIAL_CAPITAL
+        for i in range(days):
+            date = (now - timedelta(days=days - 1 - i)).strftime("%Y-%m-%d")
+            pnl = self.daily_pnl.get(date, 0)
+            cumulative_value += pnl
+            returns.append({
+                "date": date,
+                "return": round(pnl / INITIAL_CAPITAL, 4),
+                "value": round(cumulative_value, 2)
+            })
+        return returns
+
+
+class PerformanceTracker:
+    """
+    交易表现指标跟踪器
+
+    按统计天数缓存窗口累加器；交易历史追加时增量更新，
+    历史被替换/截断（如重置账户）或窗口左端移出交易时重建
+    """
+
+    def __init__(self):
+        self._windows: Dict[Optional[int], WindowAccumulator] = {}
+        self._history_ref: Optional[List[Dict]] = None
+        self._history_len = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """交易历史被改写时调用，下一次查询全部重建"""
+        with self._lock:
+            self._windows.clear()
+            self._history_ref = None
+            self._history_len = 0
+
+    def _sync(self, trades: List[Dict]):
+        """把新追加的交易增量应用到所有窗口"""
+        if trades is not self._history_ref or len(trades) < self._history_len:
+            self._windows.clear()
+        else:
+            for trade in trades[self._history_len:]:
+                for acc in self._windows.values():
+                    acc.add(trade)
+        self._history_ref = trades
+        self._history_len = len(trades)
+
+    def _window(self, trades: List[Dict], days: Optional[int], now: datetime) -> WindowAccumulator:
+        start = now - timedelta(days=days) if days is not None else None
+        acc = self._windows.get(days)
+        if acc is None or acc.needs_rebuild(start):
+            acc = WindowAccumulator.build(trades, start)
+            self._windows[days] = acc
+        else:
+            acc.start = start
+        return acc
+
+    def get_metrics(self, trades: List[Dict], days: int, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """最近 days 天的表现指标"""
+        now = now or datetime.now()
+        with self._lock:
+            self._sync(trades)
+            acc = self._window(trades, days, now)
+            return {
+                "period_days": days,
+                "total_trades": acc.total_trades,
+                "buy_trades": acc.buy_trades,
+                "sell_trades": acc.sell_trades,
+                "total_volume": acc.total_volume,
+                "total_commission": acc.total_commission,
+                "win_rate": acc.win_rate,
+                "avg_profit_per_trade": acc.avg_profit,
+                "max_drawdown": acc.max_drawdown,
+                "sharpe_ratio": acc.sharpe_ratio,
+                "daily_returns": acc.daily_returns(days, now)
+            }
+
+    def get_summary(self, trades: List[Dict]) -> Dict[str, float]:
+        """全部历史的胜率、最大回撤和夏普比率"""
+        with self._lock:
+            self._sync(trades)
+            acc = self._window(trades, None, datetime.now())
+            return {
+                "win_rate": acc.win_rate,
+                "max_drawdown": acc.max_drawdown,
+                "sharpe_ratio": acc.sharpe_ratio
+            }
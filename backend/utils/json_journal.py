@@ -0,0 +1,234 @@
+"""
+追加写 JSON 日志存储
+每次变更追加一行到 .journal.jsonl，定期把内存状态压缩为快照文件并清空日志，
+写入开销与历史长度无关，重启时加载快照再重放日志即可恢复状态
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Union
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger("json_journal")
+
+Key = Union[str, List[str]]
+
+
+class JsonJournal:
+    """
+    快照 + 追加日志的 JSON 状态存储
+
+    快照文件沿用原来的 JSON 文件（格式不变），日志中每行是一条操作：
+    - {"op": "set", "key": [...], "value": v}    设置嵌套键
+    - {"op": "del", "key": [...]}                删除嵌套键
+    - {"op": "push", "key": [...], "value": v}   向嵌套列表追加元素（key 为空表示顶层列表）
+    - {"op": "batch", "ops": [...]}              一次事务中的多条操作（整行写入，重放时全部或全不）
+
+    先修改内存状态再记录操作：自动压缩时快照取自 snapshot_fn，之后日志被清空。
+    一次变更对应多条操作时（如一笔交易同时改账户、持仓并追加成交）必须放在 transaction() 中，
+    否则自动压缩可能发生在操作之间：快照已包含整笔变更，剩余的 push 写进新日志后会被重放两次
+
+    使用示例：
+        journal = JsonJournal("backend/data/trading_decisions.json", lambda: decision_records)
+        decision_records = journal.load(list)
+        journal.push([], record)
+
+        with journal.transaction():
+            journal.set("portfolio", portfolio)
+            journal.push("trade_history", trade)
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Union[str, Path],
+        snapshot_fn: Optional[Callable[[], Any]] = None,
+        compact_every: int = 1000
+    ):
+        """
+        Args:
+            snapshot_path: 快照文件路径
+            snapshot_fn: 返回当前完整状态的函数，用于自动压缩
+            compact_every: 日志累计多少条操作后自动压缩
+        """
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = self.snapshot_path.with_suffix('.journal.jsonl')
+        self._tmp_path = self.snapshot_path.with_suffix('.json.tmp')
+        self._compacting_path = self.snapshot_path.with_suffix('.journal.compacting')
+        self.snapshot_fn = snapshot_fn
+        self.compact_every = compact_every
+        self._ops = 0
+        self._fh = None
+        self._lock = threading.RLock()
+        self._batch: Optional[List[dict]] = None
+        self._batch_depth = 0
+
+    # ==================== 加载 ====================
+
+    def load(self, default: Callable[[], Any]) -> Any:
+        """
+        加载快照并重放日志
+
+        Args:
+            default: 快照不存在时构造初始状态的函数
+
+        Returns:
+            恢复后的状态
+        """
+        with self._lock:
+            self._recover()
+
+            state = default()
+            if self.snapshot_path.exists():
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+
+            self._ops = 0
+            if self.journal_path.exists():
+                with open(self.journal_path, 'r', encoding='utf-8') as f:
+                    for line_no, line in enumerate(f, 1):
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            op = json.loads(line)
+                        except json.JSONDecodeError:
+                            # 进程中断可能留下不完整的最后一行
+                            logger.warning(f"跳过损坏的日志行: {self.journal_path}:{line_no}")
+                            continue
+                        self.apply(state, op)
+                        self._ops += 1
+
+            if self._ops:
+                logger.info(f"从日志恢复 {self.snapshot_path.name}: 重放{self._ops}条操作")
+            return state
+
+    def _recover(self):
+        """处理上次压缩被中断留下的中间文件"""
+        if self._compacting_path.exists():
+            # 新快照已完整写入临时文件，完成替换即可
+            if self._tmp_path.exists():
+                os.replace(self._tmp_path, self.snapshot_path)
+            self._compacting_path.unlink()
+        elif self._tmp_path.exists():
+            # 快照尚未写完，日志仍然有效
+            self._tmp_path.unlink()
+
+    @staticmethod
+    def apply(state: Any, op: dict):
+        """把一条操作应用到状态上"""
+        keys = op.get('key') or []
+        if isinstance(keys, str):
+            keys = [keys]
+        action = op.get('op')
+
+        target = state
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+
+        if action == 'batch':
+            for sub_op in op.get('ops') or []:
+                JsonJournal.apply(state, sub_op)
+            return
+        if action == 'push':
+            if keys:
+                target = target.setdefault(keys[-1], [])
+            target.append(op.get('value'))
+        elif not keys:
+            return
+        elif action == 'set':
+            target[keys[-1]] = op.get('value')
+        elif action == 'del':
+            target.pop(keys[-1], None)
+
+    # ==================== 写入 ====================
+
+    def set(self, key: Key, value: Any):
+        """记录设置操作"""
+        self._append({'op': 'set', 'key': self._keys(key), 'value': value})
+
+    def delete(self, key: Key):
+        """记录删除操作"""
+        self._append({'op': 'del', 'key': self._keys(key)})
+
+    def push(self, key: Key, value: Any):
+        """记录列表追加操作"""
+        self._append({'op': 'push', 'key': self._keys(key), 'value': value})
+
+    @staticmethod
+    def _keys(key: Key) -> List[str]:
+        if isinstance(key, str):
+            return [key]
+        return list(key)
+
+    @contextmanager
+    def transaction(self):
+        """
+        把块内的操作合并为一行 batch 记录写入，退出时才检查自动压缩（可嵌套）
+
+        块内持有日志锁，其它线程的写入与压缩等待本事务结束
+        """
+        with self._lock:
+            self._batch_depth += 1
+            if self._batch_depth == 1:
+                self._batch = []
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    ops, self._batch = self._batch, None
+                    if ops:
+                        self._append(ops[0] if len(ops) == 1 else {'op': 'batch', 'ops': ops})
+
+    def _append(self, op: dict):
+        with self._lock:
+            if self._batch is not None:
+                self._batch.append(op)
+                return
+            line = json.dumps(op, ensure_ascii=False, default=str)
+            if self._fh is None:
+                self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = open(self.journal_path, 'a', encoding='utf-8')
+            self._fh.write(line + '\n')
+            self._fh.flush()
+            self._ops += 1
+
+            if self.snapshot_fn is not None and self._ops >= self.compact_every:
+                self.compact(self.snapshot_fn())
+
+    # ==================== 压缩 ====================
+
+    def compact(self, state: Any):
+        """
+        把当前状态写成快照并清空日志
+
+        顺序：写临时快照 -> 日志改名为 .compacting -> 替换快照 -> 删除 .compacting，
+        任一步骤中断都能在下次加载时恢复
+        """
+        with self._lock:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2, default=str)
+
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            if self.journal_path.exists():
+                os.replace(self.journal_path, self._compacting_path)
+            else:
+                self._compacting_path.touch()
+
+            os.replace(self._tmp_path, self.snapshot_path)
+            self._compacting_path.unlink()
+            self._ops = 0
+
+    def close(self):
+        """关闭日志文件句柄"""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
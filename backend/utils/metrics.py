@@ -0,0 +1,524 @@
+"""
+进程内性能指标
+按数据源、LLM 提供商、HTTP 接口统计请求耗时直方图与错误计数：
+
+- timed(kind, **labels)：装饰器（同步/异步函数）或上下文管理器（with / async with）
+- instrument(kind, **labels)：类装饰器，为数据源提供器的 get_*/search_* 方法批量加计时
+- MetricsMiddleware：ASGI 中间件，按路由模板统计接口耗时
+- render_prometheus() / get_latency_summary()：Prometheus 文本导出与 P50/P95/P99 汇总
+
+直方图按线程分片：每个线程只写自己的计数数组（GIL 下单写者无需加锁），
+读取时合并各分片；只有线程首次写入某个序列时才加锁登记分片。
+线程退出后其分片在下次读取时并入历史分片，线程频繁创建也不会无限增长。
+
+用法：
+    @timed("datasource", source="tushare", operation="daily")
+    def fetch_daily(...): ...
+
+    with timed("llm", provider="deepseek", model=model) as t:
+        response = await client.post(...)
+        if response.status_code != 200:
+            t.mark_error()
+
+环境变量 METRICS_ENABLED=false 时 timed/instrument 直接返回原函数，不做任何统计。
+"""
+
+import functools
+import inspect
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+METRIC_PREFIX = "investmind"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 耗时桶边界（秒）：0.5ms 起按 1.5 倍递增到约 5 分钟，分位数在桶内线性插值
+DEFAULT_LATENCY_BUCKETS = tuple(float(f"{0.0005 * 1.5 ** i:.4g}") for i in range(34))
+
+# 单个指标的标签组合上限，超出后归入 __other__，防止路径/模型名撑爆序列数
+MAX_SERIES_PER_FAMILY = int(os.getenv("METRICS_MAX_SERIES", "1000"))
+
+# 计时类别：名称 -> (说明, 标签名)
+TIMER_KINDS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "datasource": ("数据源请求耗时", ("source", "operation")),
+    "llm": ("LLM 请求耗时", ("provider", "model")),
+    "http": ("HTTP 接口耗时", ("method", "route", "status")),
+}
+
+
+class _ShardedSeries:
+    """按线程分片的计数数组，子类决定数组布局"""
+
+    __slots__ = ("_size", "_local", "_shards", "_retired", "_lock")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, list]] = []
+        self._retired = self._empty()
+        self._lock = threading.Lock()
+
+    def _empty(self) -> list:
+        return [0] * self._size
+
+    def _shard(self) -> list:
+        """当前线程的分片（首次写入时创建并登记）"""
+        shard = self._local.shard = self._empty()
+        with self._lock:
+            self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _merge(self, target: list, shard: list):
+        for i, value in enumerate(shard):
+            target[i] += value
+
+    def _collect(self) -> list:
+        """合并所有分片，已退出线程的分片并入历史分片"""
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard)
+            self._shards = alive
+            merged = list(self._retired)
+            for _, shard in alive:
+                # 切片复制后再合并，避免读到写线程更新到一半的多个元素
+                self._merge(merged, shard[:])
+        return merged
+
+    def reset(self):
+        with self._lock:
+            for _, shard in self._shards:
+                shard[:] = self._empty()
+            self._retired = self._empty()
+
+
+class HistogramSeries(_ShardedSeries):
+    """单个标签组合的直方图：各桶计数 + 总和 + 最大值"""
+
+    __slots__ = ("bounds",)
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        super().__init__(len(self.bounds) + 3)
+
+    def _empty(self) -> list:
+        return [0] * (len(self.bounds) + 1) + [0.0, 0.0]
+
+    def _merge(self, target: list, shard: list):
+        for i in range(len(shard) - 1):
+            target[i] += shard[i]
+        target[-1] = max(target[-1], shard[-1])
+
+    def observe(self, value: float):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard[bisect_left(self.bounds, value)] += 1
+        shard[-2] += value
+        if value > shard[-1]:
+            shard[-1] = value
+
+    def snapshot(self) -> Tuple[List[int], float, float]:
+        """返回 (各桶计数（最后一个为 +Inf）, 总和, 最大值)"""
+        merged = self._collect()
+        return merged[:-2], merged[-2], merged[-1]
+
+
+class CounterSeries(_ShardedSeries):
+    """单个标签组合的计数器"""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard[0] += amount
+
+    def value(self) -> float:
+        return self._collect()[0]
+
+
+class MetricFamily:
+    """同名指标的所有标签组合"""
+
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], _ShardedSeries] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Any:
+        """按标签值取序列（已存在时无锁）"""
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.get(values)
+                if series is None:
+                    if len(self._series) >= MAX_SERIES_PER_FAMILY:
+                        return self._overflow()
+                    series = HistogramSeries(self.buckets) if self.kind == "histogram" else CounterSeries()
+                    self._series[values] = series
+        return series
+
+    def _overflow(self) -> _ShardedSeries:
+        values = ("__other__",) * len(self.labelnames)
+        series = self._series.get(values)
+        if series is None:
+            series = HistogramSeries(self.buckets) if self.kind == "histogram" else CounterSeries()
+            self._series[values] = series
+        return series
+
+    def label_values(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple([str(labels.get(name, "")) for name in self.labelnames])
+
+    def items(self) -> List[Tuple[Tuple[str, ...], _ShardedSeries]]:
+        with self._lock:
+            return list(self._series.items())
+
+    def reset(self):
+        for _, series in self.items():
+            series.reset()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _quantile(bounds: Sequence[float], counts: Sequence[int], q: float, peak: float) -> float:
+    """按桶计数估算分位数（桶内线性插值，上界不超过观测最大值）"""
+    total = sum(counts)
+    if not total:
+        return 0.0
+    rank = q * total
+    cumulative = 0
+    for i, count in enumerate(counts):
+        if count and cumulative + count >= rank:
+            upper = min(bounds[i] if i < len(bounds) else peak, peak)
+            lower = min(bounds[i - 1] if i > 0 else 0.0, upper)
+            return lower + (upper - lower) * (rank - cumulative) / count
+        cumulative += count
+    return peak
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._timers: Dict[str, Tuple[MetricFamily, MetricFamily]] = {}
+        self._pairs: Dict[str, Dict[Tuple[str, ...], Tuple[HistogramSeries, CounterSeries]]] = {}
+        self._lock = threading.Lock()
+        for kind, (help_text, labelnames) in TIMER_KINDS.items():
+            self.register_timer(kind, help_text, labelnames)
+
+    def _family(self, name: str, help_text: str, kind: str, labelnames: Sequence[str],
+                buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> MetricFamily:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(name, help_text, kind, labelnames, buckets)
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已以不同类型或标签注册")
+            return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, help_text, "counter", labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> MetricFamily:
+        return self._family(name, help_text, "histogram", labelnames, buckets)
+
+    def register_timer(self, kind: str, help_text: str, labelnames: Sequence[str]) -> Tuple[MetricFamily, MetricFamily]:
+        """注册一个计时类别：耗时直方图 + 错误计数"""
+        timer = (
+            self.histogram(f"{METRIC_PREFIX}_{kind}_request_duration_seconds", f"{help_text}（秒）", labelnames),
+            self.counter(f"{METRIC_PREFIX}_{kind}_errors_total", f"{help_text}：失败次数", labelnames),
+        )
+        self._timers[kind] = timer
+        self._pairs[kind] = {}
+        return timer
+
+    def timer(self, kind: str) -> Tuple[MetricFamily, MetricFamily]:
+        try:
+            return self._timers[kind]
+        except KeyError:
+            raise ValueError(f"未注册的计时类别: {kind}") from None
+
+    def series(self, kind: str, labels: Dict[str, Any]) -> Tuple[HistogramSeries, CounterSeries]:
+        """按标签取计时类别的 (耗时序列, 错误计数序列)，已取过的组合一次查表"""
+        durations, errors = self._timers.get(kind) or self.timer(kind)
+        values = durations.label_values(labels)
+        pairs = self._pairs[kind]
+        pair = pairs.get(values)
+        if pair is None:
+            pair = (durations.labels(*values), errors.labels(*values))
+            if len(pairs) < MAX_SERIES_PER_FAMILY:
+                pairs[values] = pair
+        return pair
+
+    def render_prometheus(self) -> str:
+        """Prometheus 文本格式导出"""
+        with self._lock:
+            families = list(self._families.values())
+        lines = []
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help_text}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, series in sorted(family.items()):
+                if family.kind == "counter":
+                    lines.append(f"{family.name}{_format_labels(family.labelnames, values)} "
+                                 f"{_format_value(series.value())}")
+                    continue
+                counts, total, _ = series.snapshot()
+                cumulative = 0
+                for bound, count in zip(family.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    bucket_labels = _format_labels(family.labelnames, values, 'le="' + le + '"')
+                    lines.append(f"{family.name}_bucket{bucket_labels} {cumulative}")
+                labels = _format_labels(family.labelnames, values)
+                lines.append(f"{family.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{family.name}_count{labels} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, kind: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """各计时类别的请求数、错误率与 P50/P95/P99（毫秒），按请求数降序"""
+        result = {}
+        for name, (durations, errors) in self._timers.items():
+            if kind and name != kind:
+                continue
+            error_counts = {values: series.value() for values, series in errors.items()}
+            rows = []
+            for values, series in durations.items():
+                counts, total, peak = series.snapshot()
+                count = sum(counts)
+                if not count:
+                    continue
+                failed = error_counts.get(values, 0)
+                row = dict(zip(durations.labelnames, values))
+                row.update({
+                    "count": count,
+                    "errors": int(failed),
+                    "error_rate": round(failed / count, 4),
+                    "avg_ms": round(total / count * 1000, 3),
+                    "p50_ms": round(_quantile(durations.buckets, counts, 0.50, peak) * 1000, 3),
+                    "p95_ms": round(_quantile(durations.buckets, counts, 0.95, peak) * 1000, 3),
+                    "p99_ms": round(_quantile(durations.buckets, counts, 0.99, peak) * 1000, 3),
+                    "max_ms": round(peak * 1000, 3),
+                })
+                rows.append(row)
+            result[name] = sorted(rows, key=lambda r: r["count"], reverse=True)
+        return result
+
+    def reset(self):
+        with self._lock:
+            families = list(self._families.values())
+        for family in families:
+            family.reset()
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """获取全局指标注册表"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
+
+
+def render_prometheus() -> str:
+    return get_metrics_registry().render_prometheus()
+
+
+def get_latency_summary(kind: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    return get_metrics_registry().summary(kind)
+
+
+class timed:
+    """
+    耗时统计：装饰器或上下文管理器
+
+    Args:
+        kind: 计时类别（datasource / llm / http 或 register_timer 注册的类别）
+        failed: 可选，判断返回值是否算失败（用于以返回值表示错误的函数），仅装饰器模式有效
+        **labels: 标签值；装饰器模式下可传可调用对象，以被装饰函数的参数调用得到标签值
+
+    抛出 Exception 计为失败；任务取消（CancelledError）只记耗时不计失败。
+    """
+
+    __slots__ = ("kind", "labels", "failed", "_series", "_errors", "_started", "_error")
+
+    def __init__(self, kind: str, failed: Optional[Callable[[Any], bool]] = None, **labels):
+        self.kind = kind
+        self.labels = labels
+        self.failed = failed
+        self._series = None
+        self._errors = None
+        self._error = False
+
+    # ---------- 上下文管理器 ----------
+
+    def __enter__(self) -> "timed":
+        if METRICS_ENABLED:
+            self._series, self._errors = get_metrics_registry().series(self.kind, self.labels)
+            self._error = False
+            self._started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self._series is not None:
+            self._series.observe(perf_counter() - self._started)
+            if self._error or (exc_type is not None and issubclass(exc_type, Exception)):
+                self._errors.inc()
+        return False
+
+    async def __aenter__(self) -> "timed":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        return self.__exit__(exc_type, exc, tb)
+
+    def mark_error(self):
+        """上下文内标记本次调用失败（未抛异常但结果无效时使用）"""
+        self._error = True
+
+    # ---------- 装饰器 ----------
+
+    def __call__(self, func: Callable) -> Callable:
+        if not METRICS_ENABLED:
+            return func
+        registry = get_metrics_registry()
+        kind, labels, failed = self.kind, self.labels, self.failed
+        dynamic = {name: value for name, value in labels.items() if callable(value)}
+        # 标签固定时在装饰时取好序列，调用路径上不再查表
+        fixed = None if dynamic else registry.series(kind, labels)
+
+        def resolve(args, kwargs):
+            values = dict(labels)
+            for name, getter in dynamic.items():
+                try:
+                    values[name] = getter(*args, **kwargs)
+                except Exception:
+                    values[name] = "unknown"
+            return registry.series(kind, values)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                series, errors = fixed or resolve(args, kwargs)
+                started = perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    series.observe(perf_counter() - started)
+                if failed is not None and failed(result):
+                    errors.inc()
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            series, errors = fixed or resolve(args, kwargs)
+            started = perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                series.observe(perf_counter() - started)
+            if failed is not None and failed(result):
+                errors.inc()
+            return result
+        return wrapper
+
+
+def instrument(kind: str, methods: Optional[Sequence[str]] = None,
+               prefixes: Tuple[str, ...] = ("get_", "search_"), **labels) -> Callable[[type], type]:
+    """
+    类装饰器：为类中直接定义的方法批量加 timed，operation 标签取方法名
+
+    Args:
+        kind: 计时类别
+        methods: 指定方法名；为空时取名称以 prefixes 开头的公开方法
+        **labels: 其余标签（如 source="tdx"）
+    """
+    def decorator(cls: type) -> type:
+        if not METRICS_ENABLED:
+            return cls
+        for name, attr in list(vars(cls).items()):
+            if not inspect.isfunction(attr):
+                continue
+            if (name in methods) if methods is not None else name.startswith(prefixes):
+                setattr(cls, name, timed(kind, operation=name, **labels)(attr))
+        return cls
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI 中间件：按 方法 + 路由模板 + 状态码类别 统计接口耗时，5xx 计为失败"""
+
+    def __init__(self, app):
+        self.app = app
+        self.durations, self.errors = get_metrics_registry().timer("http")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # 用路由模板而不是实际路径作标签，未匹配的请求（404 等）归为 unmatched
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            values = (scope["method"], route, f"{status[0] // 100}xx")
+            self.durations.labels(*values).observe(perf_counter() - started)
+            if status[0] >= 500:
+                self.errors.labels(*values).inc()
@@ -0,0 +1,176 @@
+"""
+按数据源主机的限流器
+每个上游主机一个令牌桶（平均速率 + 突发容量）和一个并发上限：
+
+- 同步调用方：with limiter.throttle(): ...   （阻塞等待，用于原有线程内调用）
+- 异步调用方：async with limiter.slot(): ...  （await 等待，不阻塞事件循环）
+- limiter.run(fn, *args)：在限流下把同步的网络调用放到线程中执行
+
+令牌采用预约方式：取令牌时立即扣减（可为负），调用方按欠额 / 速率等待，
+同步与异步调用方共用同一个令牌桶，合计速率不超过配置值。
+
+用法：
+    limiter = get_host_limiter("akshare_hk", rate=0.2, max_concurrency=2)
+    df = await limiter.run(ak.stock_financial_hk_analysis_indicator_em, symbol="00700")
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger("rate_limiter")
+
+
+class TokenBucket:
+    """令牌桶（线程安全，预约式取令牌）"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: 每秒补充的令牌数（<= 0 表示不限速）
+            burst: 桶容量，允许的突发请求数
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """取一个令牌，返回调用方需要等待的秒数"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+
+class HostLimiter:
+    """单个上游主机的限流器：令牌桶 + 并发上限"""
+
+    def __init__(self, host: str, rate: float, burst: int = 1, max_concurrency: int = 4):
+        self.host = host
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self._sync_semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        # asyncio.Semaphore 绑定事件循环，每个循环各建一个
+        self._async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._throttled = 0
+        self._wait_seconds = 0.0
+        self._in_flight = 0
+        self._max_in_flight = 0
+
+    def _record(self, wait: float):
+        with self._stats_lock:
+            self._requests += 1
+            if wait > 0:
+                self._throttled += 1
+                self._wait_seconds += wait
+
+    def _enter(self):
+        with self._stats_lock:
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+
+    def _exit(self):
+        with self._stats_lock:
+            self._in_flight -= 1
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._async_semaphores[loop] = semaphore
+        return semaphore
+
+    @contextmanager
+    def throttle(self):
+        """同步限流：阻塞直到取得并发名额和令牌"""
+        with self._sync_semaphore:
+            wait = self.bucket.reserve()
+            self._record(wait)
+            if wait > 0:
+                logger.debug(f"⏱️ [限流] {self.host} 等待 {wait:.2f} 秒")
+                time.sleep(wait)
+            self._enter()
+            try:
+                yield
+            finally:
+                self._exit()
+
+    @asynccontextmanager
+    async def slot(self):
+        """异步限流：await 等待并发名额和令牌，不阻塞事件循环"""
+        async with self._async_semaphore():
+            wait = self.bucket.reserve()
+            self._record(wait)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._enter()
+            try:
+                yield
+            finally:
+                self._exit()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """在限流下于线程中执行同步调用"""
+        async with self.slot():
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "host": self.host,
+                "rate": self.bucket.rate,
+                "burst": self.bucket.burst,
+                "max_concurrency": self.max_concurrency,
+                "requests": self._requests,
+                "throttled": self._throttled,
+                "wait_seconds": round(self._wait_seconds, 2),
+                "in_flight": self._in_flight,
+                "max_in_flight": self._max_in_flight
+            }
+
+
+_limiters: Dict[str, HostLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(host: str, rate: Optional[float] = None, burst: int = 1,
+                     max_concurrency: int = 4) -> HostLimiter:
+    """
+    获取（或创建）指定主机的限流器，同一主机的所有调用方共用
+
+    Args:
+        host: 主机/数据源名称
+        rate: 每秒请求数（首次创建时生效，None 表示不限速）
+        burst: 突发容量
+        max_concurrency: 最大并发请求数
+    """
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(host)
+            if limiter is None:
+                limiter = HostLimiter(host, rate or 0, burst, max_concurrency)
+                _limiters[host] = limiter
+    return limiter
+
+
+def get_all_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """所有主机限流器的统计"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.host: limiter.get_stats() for limiter in limiters}
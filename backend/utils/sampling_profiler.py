@@ -0,0 +1,203 @@
+"""
+按需采样分析器
+在独立线程中按固定间隔读取 sys._current_frames()，统计各线程调用栈出现的次数，输出：
+
+- folded：折叠栈（"线程;外层函数;...;内层函数 次数"），可直接导入 speedscope / flamegraph.pl
+- flamegraph：d3-flame-graph 使用的嵌套树 {name, value, children}
+- top_functions：按自身采样数排序的热点函数
+
+被分析的线程不注入任何 trace 钩子，开销只来自采样线程持有 GIL 遍历栈帧的时间，
+默认 100Hz 下对业务线程的影响在 1% 以内。事件循环线程只能看到当前正在执行的协程栈，
+挂起等待的协程不会出现在采样中。
+
+用法：
+    result = run_profile(seconds=5)             # 阻塞 5 秒，同一时刻只允许一个采样任务
+    result = await asyncio.to_thread(run_profile, 5)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType
+from typing import Any, Dict
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger("sampling_profiler")
+
+PROFILER_MAX_SECONDS = int(os.getenv("PROFILER_MAX_SECONDS", "60"))
+
+# 空闲等待的栈顶函数（文件名, 函数名）：线程池空闲、事件循环等待 IO、条件变量等待
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socketserver.py", "serve_forever"),
+}
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """已有采样任务在运行"""
+
+
+class SamplingProfiler:
+    """基于栈采样的分析器"""
+
+    def __init__(self, interval: float = 0.01, include_idle: bool = False, max_depth: int = 128):
+        """
+        Args:
+            interval: 采样间隔（秒）
+            include_idle: 是否保留空闲等待中的线程栈
+            max_depth: 单个栈最多记录的帧数（从栈顶算起）
+        """
+        self.interval = max(0.001, interval)
+        self.include_idle = include_idle
+        self.max_depth = max_depth
+        self._labels: Dict[CodeType, str] = {}
+        self._idle_codes: Dict[CodeType, bool] = {}
+        self._prefixes = sorted({_PROJECT_ROOT, *(p for p in sys.path if p)}, key=len, reverse=True)
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            for prefix in self._prefixes:
+                if filename.startswith(prefix):
+                    filename = filename[len(prefix):].lstrip("/\\")
+                    break
+            label = self._labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+        return label
+
+    def _is_idle(self, code: CodeType) -> bool:
+        idle = self._idle_codes.get(code)
+        if idle is None:
+            idle = self._idle_codes[code] = (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+        return idle
+
+    def sample(self, seconds: float) -> Dict[str, Any]:
+        """阻塞采样指定秒数并返回汇总结果"""
+        own = threading.get_ident()
+        names: Dict[int, str] = {}
+        stacks: Counter = Counter()
+        ticks = 0
+        idle_skipped = 0
+        sampling_cost = 0.0
+
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_tick = started
+        while True:
+            tick_started = time.perf_counter()
+            if ticks % 100 == 0:
+                names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                if not self.include_idle and self._is_idle(frame.f_code):
+                    idle_skipped += 1
+                    continue
+                stack = []
+                depth = 0
+                while frame is not None and depth < self.max_depth:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                    depth += 1
+                stack.append(names.get(ident, f"thread-{ident}"))
+                stack.reverse()
+                stacks[tuple(stack)] += 1
+            del frames
+            ticks += 1
+            now = time.perf_counter()
+            sampling_cost += now - tick_started
+            if now >= deadline:
+                break
+            next_tick += self.interval
+            if next_tick > now:
+                time.sleep(min(next_tick, deadline) - now)
+            else:
+                # 采样跟不上间隔时不补采，从当前时间重新计时
+                next_tick = now
+
+        elapsed = time.perf_counter() - started
+        return self._summarize(stacks, ticks, elapsed, sampling_cost, idle_skipped)
+
+    def _summarize(self, stacks: Counter, ticks: int, elapsed: float, sampling_cost: float,
+                   idle_skipped: int) -> Dict[str, Any]:
+        total = sum(stacks.values())
+        threads: Counter = Counter()
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        root: Dict[str, Any] = {"name": "all", "value": 0, "children": {}}
+        for stack, count in stacks.items():
+            threads[stack[0]] += count
+            self_counts[stack[-1]] += count
+            # 递归调用在同一个栈里只算一次
+            for label in set(stack[1:]):
+                total_counts[label] += count
+            node = root
+            node["value"] += count
+            for label in stack:
+                child = node["children"].get(label)
+                if child is None:
+                    child = node["children"][label] = {"name": label, "value": 0, "children": {}}
+                child["value"] += count
+                node = child
+
+        return {
+            "seconds": round(elapsed, 3),
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": ticks,
+            "stack_samples": total,
+            "idle_skipped": idle_skipped,
+            # 采样线程自身耗时占墙钟时间的比例（持有 GIL 的上限估计）
+            "overhead_ratio": round(sampling_cost / elapsed, 5) if elapsed else 0.0,
+            "threads": dict(threads.most_common()),
+            "top_functions": [
+                {
+                    "function": label,
+                    "self": count,
+                    "total": total_counts[label],
+                    "self_pct": round(count / total * 100, 2),
+                    "total_pct": round(total_counts[label] / total * 100, 2),
+                }
+                for label, count in self_counts.most_common(30)
+            ],
+            "folded": [f"{';'.join(stack)} {count}" for stack, count in stacks.most_common()],
+            "flamegraph": _freeze(root),
+        }
+
+
+def _freeze(node: Dict[str, Any]) -> Dict[str, Any]:
+    """把 children 字典转成按采样数降序的列表"""
+    children = sorted(node["children"].values(), key=lambda c: c["value"], reverse=True)
+    return {"name": node["name"], "value": node["value"], "children": [_freeze(c) for c in children]}
+
+
+def run_profile(seconds: float, interval_ms: float = 10.0, include_idle: bool = False) -> Dict[str, Any]:
+    """
+    采样指定秒数（同一时刻只允许一个采样任务）
+
+    Raises:
+        ProfilerBusyError: 已有采样任务在运行
+        ValueError: 采样时长超出范围
+    """
+    if not 0 < seconds <= PROFILER_MAX_SECONDS:
+        raise ValueError(f"采样时长需在 0~{PROFILER_MAX_SECONDS} 秒之间")
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("已有采样任务在运行")
+    try:
+        logger.info(f"开始采样分析: {seconds}s, 间隔 {interval_ms}ms")
+        profiler = SamplingProfiler(interval=interval_ms / 1000, include_idle=include_idle)
+        result = profiler.sample(seconds)
+        logger.info(f"采样分析完成: {result['samples']} 次采样, {result['stack_samples']} 个线程栈")
+        return result
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,387 @@
+"""
+统一 TTL 缓存
+按键设置过期时间，支持：
+- 过期后短时间内先返回旧值并在后台刷新（stale-while-revalidate）
+- 并发未命中合并：同一键同时只有一个调用方请求上游，其余等待同一结果（同步/异步调用方均可）
+- 失败结果短时间缓存（negative caching），上游故障时不被重复请求
+- LRU 容量上限与命中/未命中统计
+
+用法：
+    cache = get_ttl_cache("sector_rotation", ttl=300, stale_ttl=300)
+    result = cache.get_or_load("industry_sectors", loader, cache_if=lambda r: r.get("success"))
+
+    @ttl_cached("market_sentiment", key=lambda self, code: f"stock_{code}", ttl=300)
+    def get_stock_sentiment(self, code): ...
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger("ttl_cache")
+
+# 等待同一键进行中的加载的最长秒数（兜底，防止加载方异常退出后等待者永远挂起）
+FLIGHT_WAIT_TIMEOUT = float(os.getenv("TTL_CACHE_WAIT_TIMEOUT", "120"))
+
+# 同步调用方的后台刷新线程池
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ttl_cache_refresh")
+
+
+class _Entry:
+    __slots__ = ("value", "error", "expires_at", "stale_until", "negative")
+
+    def __init__(self, value: Any, error: Optional[BaseException], expires_at: float,
+                 stale_until: float, negative: bool):
+        self.value = value
+        self.error = error
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.negative = negative
+
+    def result(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class _Flight:
+    """一次进行中的上游请求，等待者共享其结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self._futures: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._lock = threading.Lock()
+
+    def finish(self, value: Any, error: Optional[BaseException]):
+        self.value, self.error = value, error
+        with self._lock:
+            self.event.set()
+            futures, self._futures = self._futures, []
+        for loop, future in futures:
+            try:
+                loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+            except RuntimeError:
+                pass    # 等待者的事件循环已关闭
+
+    def wait(self, timeout: float = FLIGHT_WAIT_TIMEOUT) -> Any:
+        if not self.event.wait(timeout):
+            raise TimeoutError(f"等待进行中的加载超时（{timeout}s）")
+        return self.result()
+
+    async def wait_async(self, timeout: float = FLIGHT_WAIT_TIMEOUT) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self.event.is_set():
+                future = loop.create_future()
+                self._futures.append((loop, future))
+            else:
+                future = None
+        if future is not None:
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    if (loop, future) in self._futures:
+                        self._futures.remove((loop, future))
+                raise TimeoutError(f"等待进行中的加载超时（{timeout}s）") from None
+        return self.result()
+
+    def result(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class TTLCache:
+    """
+    带单飞（single-flight）加载的 TTL 缓存
+
+    Args:
+        name: 缓存名称（用于统计）
+        ttl: 默认有效期（秒）
+        stale_ttl: 过期后仍可返回旧值的时长（秒），期间触发后台刷新；0 表示不返回过期数据
+        negative_ttl: 失败结果（加载异常或 cache_if 判定失败）的缓存时长（秒），0 表示不缓存
+        max_entries: 最大条目数，超过时淘汰最久未使用的
+    """
+
+    def __init__(self, name: str, ttl: float = 300, stale_ttl: float = 0,
+                 negative_ttl: float = 15, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0, "stale_hits": 0, "negative_hits": 0, "misses": 0, "coalesced": 0,
+            "loads": 0, "load_errors": 0, "refreshes": 0, "evictions": 0
+        }
+
+    # ==================== 基本读写 ====================
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取未过期（或仍在 stale 窗口内）的成功结果，不触发加载"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.negative or now >= entry.stale_until:
+                return default
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._store(key, value, None, ttl, negative=False)
+
+    def invalidate(self, key: Hashable = None):
+        """删除一个键；不传键时清空"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any, error: Optional[BaseException],
+               ttl: Optional[float], negative: bool):
+        now = time.monotonic()
+        if negative:
+            if self.negative_ttl <= 0:
+                self._entries.pop(key, None)
+                return
+            expires_at = stale_until = now + self.negative_ttl
+        else:
+            expires_at = now + (self.ttl if ttl is None else ttl)
+            stale_until = expires_at + self.stale_ttl
+        self._entries[key] = _Entry(value, error, expires_at, stale_until, negative)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    # ==================== 加载 ====================
+
+    def _lookup(self, key: Hashable) -> Tuple[Optional[_Entry], bool, Optional[_Flight], bool]:
+        """
+        查找缓存（调用方持有锁）
+
+        Returns:
+            (可直接返回的条目, 是否需要后台刷新, 进行中的请求, 当前调用方是否负责加载)
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self._stats["negative_hits" if entry.negative else "hits"] += 1
+                return entry, False, None, False
+            if not entry.negative and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self._stats["stale_hits"] += 1
+                refresh = key not in self._flights
+                if refresh:
+                    self._flights[key] = _Flight()
+                return entry, refresh, self._flights[key], False
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._stats["coalesced"] += 1
+            return None, False, flight, False
+        flight = self._flights[key] = _Flight()
+        self._stats["misses"] += 1
+        return None, False, flight, True
+
+    def _complete(self, key: Hashable, flight: _Flight, value: Any, error: Optional[BaseException],
+                  ttl: Optional[float], cache_if: Optional[Callable[[Any], bool]]):
+        # 判定函数在锁外执行；判定抛异常按失败结果处理
+        negative = error is not None
+        if not negative and cache_if is not None:
+            try:
+                negative = not cache_if(value)
+            except Exception as e:
+                logger.warning(f"[{self.name}] cache_if 判定异常 {key}: {e}")
+                negative = True
+        try:
+            with self._lock:
+                self._stats["loads"] += 1
+                if negative:
+                    self._stats["load_errors"] += 1
+                self._store(key, value if error is None else None, error, ttl, negative=negative)
+        finally:
+            # 无论写缓存是否成功，都要移除进行中的请求并唤醒等待者
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.finish(value, error)
+
+    def _abort(self, key: Hashable, flight: _Flight, reason: BaseException):
+        """
+        加载被取消或中断（CancelledError / KeyboardInterrupt 等）：不写缓存，移除进行中的请求，
+        等待者收到 RuntimeError；之后的调用方重新加载
+        """
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        error = RuntimeError(f"[{self.name}] 加载 {key} 被中断: {type(reason).__name__}")
+        error.__cause__ = reason
+        flight.finish(None, error)
+
+    def _load_sync(self, key, flight, loader, ttl, cache_if):
+        try:
+            value = loader()
+        except Exception as e:
+            self._complete(key, flight, None, e, ttl, cache_if)
+            raise
+        except BaseException as e:
+            self._abort(key, flight, e)
+            raise
+        self._complete(key, flight, value, None, ttl, cache_if)
+        return value
+
+    def _refresh_sync(self, key, flight, loader, ttl, cache_if):
+        self._stats["refreshes"] += 1
+        try:
+            self._load_sync(key, flight, loader, ttl, cache_if)
+        except Exception as e:
+            logger.warning(f"[{self.name}] 后台刷新失败 {key}: {e}")
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None,
+                    cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        同步读取，未命中时调用 loader 加载（同一键的并发调用只加载一次）
+
+        Args:
+            key: 缓存键
+            loader: 无参加载函数
+            ttl: 本次写入的有效期（默认使用缓存的 ttl）
+            cache_if: 判定结果是否成功；判定失败的结果按 negative_ttl 短时间缓存
+        """
+        with self._lock:
+            entry, refresh, flight, leader = self._lookup(key)
+        if entry is not None:
+            if refresh:
+                _refresh_executor.submit(self._refresh_sync, key, flight, loader, ttl, cache_if)
+            return entry.result()
+        if leader:
+            return self._load_sync(key, flight, loader, ttl, cache_if)
+        return flight.wait()
+
+    async def _load_async(self, key, flight, loader, ttl, cache_if):
+        try:
+            if inspect.iscoroutinefunction(loader):
+                value = await loader()
+            else:
+                value = await asyncio.to_thread(loader)
+        except Exception as e:
+            self._complete(key, flight, None, e, ttl, cache_if)
+            raise
+        except BaseException as e:
+            self._abort(key, flight, e)
+            raise
+        self._complete(key, flight, value, None, ttl, cache_if)
+        return value
+
+    async def _refresh_async(self, key, flight, loader, ttl, cache_if):
+        self._stats["refreshes"] += 1
+        try:
+            await self._load_async(key, flight, loader, ttl, cache_if)
+        except Exception as e:
+            logger.warning(f"[{self.name}] 后台刷新失败 {key}: {e}")
+
+    async def aget_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None,
+                           cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        异步读取，loader 可以是协程函数或普通函数（普通函数在线程池中执行，不阻塞事件循环）
+        """
+        with self._lock:
+            entry, refresh, flight, leader = self._lookup(key)
+        if entry is not None:
+            if refresh:
+                asyncio.create_task(self._refresh_async(key, flight, loader, ttl, cache_if))
+            return entry.result()
+        if leader:
+            return await self._load_async(key, flight, loader, ttl, cache_if)
+        return await flight.wait_async()
+
+    # ==================== 统计 ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+            in_flight = len(self._flights)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["negative_hits"] + stats["misses"] + stats["coalesced"]
+        served = lookups - stats["misses"]
+        return {
+            **stats,
+            "name": self.name,
+            "entries": entries,
+            "in_flight": in_flight,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "negative_ttl": self.negative_ttl,
+            "max_entries": self.max_entries
+        }
+
+
+_caches: Dict[str, TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_ttl_cache(name: str, **options) -> TTLCache:
+    """获取命名缓存（同名共享同一实例，options 只在首次创建时生效）"""
+    cache = _caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = _caches[name] = TTLCache(name, **options)
+    return cache
+
+
+def get_all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """所有命名缓存的统计"""
+    return {name: cache.get_stats() for name, cache in list(_caches.items())}
+
+
+def ttl_cached(cache_name: str, key: Callable[..., Hashable], ttl: Optional[float] = None,
+               cache_if: Optional[Callable[[Any], bool]] = None, **cache_options):
+    """
+    方法/函数缓存装饰器（同步函数走 get_or_load，协程函数走 aget_or_load）
+
+    Args:
+        cache_name: 命名缓存
+        key: 由调用参数生成缓存键的函数（参数与被装饰函数一致，方法包含 self）
+        ttl: 有效期（默认使用缓存的 ttl）
+        cache_if: 判定结果是否成功
+        **cache_options: 首次创建命名缓存时的参数（ttl/stale_ttl/negative_ttl/max_entries）
+    """
+    def decorator(func: Callable) -> Callable:
+        cache = get_ttl_cache(cache_name, **cache_options)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await cache.aget_or_load(
+                    key(*args, **kwargs), functools.partial(func, *args, **kwargs), ttl, cache_if
+                )
+            async_wrapper.cache = cache
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cache.get_or_load(key(*args, **kwargs), functools.partial(func, *args, **kwargs), ttl, cache_if)
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -0,0 +1,63 @@
+"""
+IcySaint AI - 后台服务进程
+运行调度器、新闻监控、盯盘、TDX缓存、预警监控等后台服务，不处理 HTTP 请求。
+
+用法（与 server.py 在同一目录下运行，共用 data/ 目录和 Redis）：
+    PROCESS_ROLE=api API_WORKERS=4 python server.py
+    python worker.py
+"""
+
+import os
+import sys
+import asyncio
+import signal
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pathlib import Path
+from dotenv import load_dotenv
+
+
+async def _run():
+    from backend.services.async_task.redis_client import redis_client
+    await redis_client.connect()
+    if redis_client.is_redis_available:
+        print("✅ Redis 连接成功")
+    else:
+        print("⚠️ Redis 不可用，使用内存降级模式（API 进程无法读取本进程的后台结果）")
+
+    from backend.services.background_worker import get_background_worker
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows 下由 KeyboardInterrupt 结束
+
+    worker = get_background_worker()
+    print(f"🚀 后台服务进程启动 (PID {os.getpid()})")
+    try:
+        await worker.run_forever(stop_event)
+    finally:
+        await redis_client.disconnect()
+        print("✅ 后台服务进程已退出")
+
+
+def main():
+    os.environ["PROCESS_ROLE"] = "worker"
+    env_file = Path(__file__).parent.parent / '.env'
+    if env_file.exists():
+        load_dotenv(env_file)
+    else:
+        load_dotenv()
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ class SSEClient {
   constructor() {
     this.connections = new Map()
     this.reconnectAttempts = new Map()
+    this.lastEventIds = new Map() // 已收到的最后一条日志序号，手动重连时续传
     this.maxReconnectAttempts = 5
     this.reconnectDelay = 1000 // 初始重连延迟 1秒
   }
@@ -137,6 +138,9 @@ class SSEClient {
 
     // 日志事件
     eventSource.addEventListener('log', (e) => {
+      if (e.lastEventId) {
+        this.lastEventIds.set(key, e.lastEventId)
+      }
       const data = JSON.parse(e.data)
       handlers.onLog?.(data)
     })
@@ -170,7 +174,7 @@ class SSEClient {
           this.reconnectAttempts.set(key, attempts + 1)
           setTimeout(() => {
             if (this.connections.get(key) === eventSource) {
-              this._connect(key, url, handlers)
+              this._connect(key, this._resumeUrl(key, url), handlers)
             }
           }, delay)
         } else {
@@ -183,6 +187,19 @@ class SSEClient {
     return eventSource
   }
 
+  /**
+   * 重连地址：带上已收到的最后一条日志序号，服务端只补发之后的日志
+   * @private
+   */
+  _resumeUrl(key, url) {
+    const lastEventId = this.lastEventIds.get(key)
+    if (!lastEventId) {
+      return url
+    }
+    const base = url.replace(/([?&])last_event_id=[^&]*&?/, '$1').replace(/[?&]$/, '')
+    return `${base}${base.includes('?') ? '&' : '?'}last_event_id=${encodeURIComponent(lastEventId)}`
+  }
+
   /**
    * 断开指定连接
    * @param {string} key - 连接标识